@@ -1,8 +1,18 @@
-import bcrypt
 import sqlite3
 import logging
 import re
 from auth.database import get_db_connection, execute_query
+from auth.password_hashing import hash_password, check_password, needs_rehash, PasswordHashTimeout
+from auth.session_tokens import revoke_user_sessions
+from config import Config
+from utils.ttl_cache import TTLCache
+
+# username -> id, compartido por todas las sesiones (solo se cachean usuarios existentes)
+_user_id_cache = TTLCache(Config.PROFILE_CACHE_TTL_SECONDS)
+
+def invalidate_user_cache(username):
+    """Descarta de la caché los datos del usuario"""
+    _user_id_cache.invalidate(username.strip() if username else "")
 
 def validate_username(username):
     """Valida formato del nombre de usuario"""
@@ -75,9 +85,8 @@ def register_user(username, password):
         if not valid_pass:
             return False, pass_msg
         
-        # Hash de la contraseña
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        password_hash_str = password_hash.decode('utf-8')
+        # Hash de la contraseña (en el pool de procesos)
+        password_hash_str = hash_password(password)
         
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -92,6 +101,8 @@ def register_user(username, password):
     except sqlite3.IntegrityError:
         logging.warning(f"⚠️ Intento de registro con usuario existente: {username}")
         return False, "El nombre de usuario ya existe"
+    except PasswordHashTimeout as e:
+        return False, str(e)
     except Exception as e:
         logging.error(f"❌ Error al registrar usuario: {e}")
         return False, "Error interno del servidor"
@@ -115,12 +126,22 @@ def verify_user(username, password):
             if result:
                 stored_hash = result[0]
                 # Verificar contraseña
-                if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
+                if check_password(password, stored_hash):
+                    # Coste de bcrypt cambiado: regenerar el hash ahora que tenemos la contraseña
+                    # (antes de los UPDATE, para no retener el bloqueo de escritura mientras se calcula)
+                    new_hash = hash_password(password) if needs_rehash(stored_hash) else None
+                    
                     # Actualizar último login
                     cursor.execute(
                         "UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE username = ?",
                         (username,)
                     )
+                    if new_hash:
+                        cursor.execute(
+                            "UPDATE users SET password_hash = ? WHERE username = ?",
+                            (new_hash, username)
+                        )
+                        logging.info(f"🔁 Hash de contraseña actualizado al nuevo coste para: {username}")
                     conn.commit()
                     logging.info(f"✅ Login exitoso para usuario: {username}")
                     return True, "Login exitoso"
@@ -131,15 +152,23 @@ def verify_user(username, password):
                 logging.warning(f"⚠️ Usuario no encontrado: {username}")
                 return False, "Usuario no encontrado"
                 
+    except PasswordHashTimeout as e:
+        # Ráfaga de logins: cuenta como intento fallido, sin calcular bcrypt fuera del pool
+        logging.warning(f"⚠️ Login de {username} rechazado: {e}")
+        return False, str(e)
     except Exception as e:
         logging.error(f"❌ Error al verificar usuario: {e}")
         return False, "Error interno del servidor"
 
 def get_user_id(username):
-    """Obtiene el ID del usuario por su nombre"""
+    """Obtiene el ID del usuario por su nombre (cacheado por usuario)"""
     try:
         username = username.strip() if username else ""
         
+        found, user_id = _user_id_cache.get(username)
+        if found:
+            return user_id
+        
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
@@ -149,6 +178,7 @@ def get_user_id(username):
             result = cursor.fetchone()
             
             if result:
+                _user_id_cache.set(username, result[0])
                 return result[0]
             else:
                 logging.warning(f"⚠️ ID no encontrado para usuario: {username}")
@@ -183,9 +213,8 @@ def update_user_password(username, new_password):
             if not result:
                 return False, "Usuario no encontrado"
             
-            # Hash de la nueva contraseña
-            password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-            password_hash_str = password_hash.decode('utf-8')
+            # Hash de la nueva contraseña (en el pool de procesos)
+            password_hash_str = hash_password(new_password)
             
             # Actualizar contraseña
             cursor.execute(
@@ -193,10 +222,16 @@ def update_user_password(username, new_password):
                 (password_hash_str, username)
             )
             conn.commit()
+            invalidate_user_cache(username)
+            
+            # Las sesiones abiertas con la contraseña anterior dejan de ser válidas
+            revoke_user_sessions(result[0])
             
             logging.info(f"✅ Contraseña actualizada para usuario: {username}")
             return True, "Contraseña actualizada exitosamente"
             
+    except PasswordHashTimeout as e:
+        return False, str(e)
     except Exception as e:
         logging.error(f"❌ Error al actualizar contraseña: {e}")
         return False, "Error interno del servidor"
@@ -8,8 +8,10 @@ import os
 import logging
 from contextlib import contextmanager
 
+from config import Config
+
 # Ruta de la base de datos SQLite
-DB_PATH = "/workspaces/ProFit Coach/profit_coach.db"
+DB_PATH = os.path.join(Config.DATA_DIR, "profit_coach.db")
 
 def initialize_connection_pool():
     """Inicializar SQLite - no necesita pool de conexiones"""
@@ -123,7 +125,7 @@ def create_tables_if_not_exist():
     )
     """
     
-    # Tabla de mensajes
+    # Tabla de mensajes (los largos dejan content vacío y apuntan a message_bodies con body_hash)
     messages_table = """
     CREATE TABLE IF NOT EXISTS messages (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -131,10 +133,43 @@ def create_tables_if_not_exist():
         content TEXT NOT NULL,
         is_user BOOLEAN NOT NULL,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        body_hash TEXT,
         FOREIGN KEY (conversation_id) REFERENCES conversations (id) ON DELETE CASCADE
     )
     """
     
+    # Cuerpos largos de los mensajes: comprimidos con zlib (en Python) y
+    # guardados una sola vez por hash (messages.body_hash)
+    message_bodies_table = """
+    CREATE TABLE IF NOT EXISTS message_bodies (
+        content_hash TEXT PRIMARY KEY,
+        body BLOB NOT NULL
+    )
+    """
+    
+    # Mensajes comprimidos borrados pendientes de salir del índice de búsqueda:
+    # quitarlos de messages_fts exige su texto, y solo Python puede descomprimirlo
+    messages_fts_deleted_table = """
+    CREATE TABLE IF NOT EXISTS messages_fts_deleted (
+        message_id INTEGER PRIMARY KEY,
+        conversation_id INTEGER NOT NULL,
+        body BLOB NOT NULL
+    )
+    """
+    
+    # Al borrar un mensaje comprimido (también en cascada o desde otro cliente)
+    # se encola su cuerpo para el índice y se borra si ya no lo usa otro mensaje
+    message_bodies_trigger = """
+    CREATE TRIGGER IF NOT EXISTS message_bodies_release AFTER DELETE ON messages
+    WHEN old.body_hash IS NOT NULL BEGIN
+        INSERT OR IGNORE INTO messages_fts_deleted (message_id, conversation_id, body)
+        SELECT old.id, old.conversation_id, body FROM message_bodies WHERE content_hash = old.body_hash;
+        DELETE FROM message_bodies
+        WHERE content_hash = old.body_hash
+          AND NOT EXISTS (SELECT 1 FROM messages WHERE body_hash = old.body_hash);
+    END
+    """
+    
     # Tabla de threads
     threads_table = """
     CREATE TABLE IF NOT EXISTS threads (
@@ -146,6 +181,85 @@ def create_tables_if_not_exist():
     )
     """
     
+    # Bandeja de salida de emails (envío en segundo plano con reintentos)
+    email_outbox_table = """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT UNIQUE NOT NULL,
+        athlete_id INTEGER,
+        recipient TEXT NOT NULL,
+        athlete_name TEXT,
+        trainer_name TEXT,
+        filename TEXT,
+        attachment BLOB,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        next_attempt_at REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP
+    )
+    """
+    
+    # Tokens de sesión revocados (token_id = jti, o 'user:<id>' para todas las sesiones del usuario)
+    session_revocations_table = """
+    CREATE TABLE IF NOT EXISTS session_revocations (
+        token_id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        revoked_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """
+    
+    # Índices para las consultas por usuario/atleta (export masivo, historial)
+    indexes = [
+        "CREATE INDEX IF NOT EXISTS idx_athletes_user ON athletes (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_athlete ON conversations (athlete_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, is_user, id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages (conversation_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_body_hash ON messages (body_hash) WHERE body_hash IS NOT NULL",
+    ]
+    
+    # Índice de texto completo del chat (FTS5 sin contenido: guarda solo el
+    # índice, el texto se lee de messages). conversation_id también se indexa
+    # para filtrar por atleta dentro de FTS5 y no rankear todo el corpus. Los
+    # triggers indexan los mensajes en texto plano; los comprimidos los indexa
+    # save_message desde Python con index_message_text y, al borrarse, los saca
+    # purge_deleted_message_index.
+    messages_fts_table = """
+    CREATE VIRTUAL TABLE messages_fts USING fts5(
+        content,
+        conversation_id,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """
+    messages_fts_triggers = [
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages
+        WHEN new.body_hash IS NULL BEGIN
+            INSERT INTO messages_fts (rowid, content, conversation_id)
+            VALUES (new.id, new.content, new.conversation_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages
+        WHEN old.body_hash IS NULL BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, conversation_id)
+            VALUES ('delete', old.id, old.content, old.conversation_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content, body_hash, conversation_id ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, conversation_id)
+            SELECT 'delete', old.id, old.content, old.conversation_id WHERE old.body_hash IS NULL;
+            INSERT INTO messages_fts (rowid, content, conversation_id)
+            SELECT new.id, new.content, new.conversation_id WHERE new.body_hash IS NULL;
+        END
+        """,
+    ]
+    
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -155,7 +269,24 @@ def create_tables_if_not_exist():
             cursor.execute(athletes_table)
             cursor.execute(conversations_table)
             cursor.execute(messages_table)
+            cursor.execute(message_bodies_table)
+            
+            # Migración: bases creadas antes de comprimir los mensajes largos
+            cursor.execute("PRAGMA table_info(messages)")
+            if 'body_hash' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE messages ADD COLUMN body_hash TEXT")
+            cursor.execute(messages_fts_deleted_table)
+            cursor.execute(message_bodies_trigger)
             cursor.execute(threads_table)
+            cursor.execute(email_outbox_table)
+            cursor.execute(session_revocations_table)
+            
+            for index_sql in indexes:
+                cursor.execute(index_sql)
+            
+            search_enabled = create_message_search_index(cursor, messages_fts_table, messages_fts_triggers)
+            compress_existing_messages(cursor, search_enabled)
+            purge_deleted_message_index(cursor)
             
             conn.commit()
             logging.info("✅ Todas las tablas SQLite creadas correctamente")
@@ -164,6 +295,106 @@ def create_tables_if_not_exist():
         logging.error(f"❌ Error creando tablas SQLite: {e}")
         raise
 
+def create_message_search_index(cursor, table_sql, triggers_sql):
+    """Crea el índice FTS5 del chat; la primera vez indexa los mensajes existentes
+    
+    Si el SQLite del sistema no trae FTS5, la app sigue funcionando sin búsqueda.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+    exists = cursor.fetchone() is not None
+    
+    if not exists:
+        try:
+            cursor.execute(table_sql)
+        except sqlite3.OperationalError as e:
+            logging.warning(f"⚠️ SQLite sin FTS5, búsqueda en el chat desactivada: {e}")
+            return False
+    
+    for trigger_sql in triggers_sql:
+        cursor.execute(trigger_sql)
+    
+    if not exists:
+        rebuild_message_search_index(cursor)
+        logging.info("✅ Índice de búsqueda del chat creado")
+    return True
+
+def rebuild_message_search_index(cursor):
+    """Vuelve a indexar todos los mensajes: los de texto plano en SQL y los comprimidos en Python"""
+    from modules.message_bodies import message_text
+    
+    cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('delete-all')")
+    cursor.execute("DELETE FROM messages_fts_deleted")
+    cursor.execute("""
+        INSERT INTO messages_fts (rowid, content, conversation_id)
+        SELECT id, content, conversation_id FROM messages WHERE body_hash IS NULL
+    """)
+    rows = cursor.connection.execute("""
+        SELECT m.id, m.conversation_id, b.body
+        FROM messages m JOIN message_bodies b ON b.content_hash = m.body_hash
+    """)
+    for message_id, conversation_id, body in rows:
+        index_message_text(cursor, message_id, conversation_id, message_text("", body))
+
+def index_message_text(cursor, message_id, conversation_id, text):
+    """Indexa en messages_fts un mensaje comprimido (los triggers solo ven el texto plano)"""
+    try:
+        cursor.execute(
+            "INSERT INTO messages_fts (rowid, content, conversation_id) VALUES (?, ?, ?)",
+            (message_id, text, conversation_id)
+        )
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+
+def purge_deleted_message_index(cursor):
+    """Quita de messages_fts los mensajes comprimidos borrados que encoló message_bodies_release
+    
+    Devuelve cuántos había en cola. Sin FTS5 la cola solo se vacía.
+    """
+    from modules.message_bodies import message_text
+    
+    cursor.execute("SELECT message_id, conversation_id, body FROM messages_fts_deleted")
+    rows = cursor.fetchall()
+    for message_id, conversation_id, body in rows:
+        try:
+            cursor.execute(
+                "INSERT INTO messages_fts (messages_fts, rowid, content, conversation_id) VALUES ('delete', ?, ?, ?)",
+                (message_id, message_text("", body), conversation_id)
+            )
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+    cursor.executemany("DELETE FROM messages_fts_deleted WHERE message_id = ?", [(row[0],) for row in rows])
+    return len(rows)
+
+def compress_existing_messages(cursor, search_enabled):
+    """Migración única (user_version 1): comprime los mensajes largos guardados antes de la compresión"""
+    from modules.message_bodies import should_store_body, store_body
+    
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= 1:
+        return
+    
+    rows = cursor.connection.execute(
+        "SELECT id, conversation_id, content FROM messages WHERE body_hash IS NULL"
+    ).fetchall()
+    compressed = 0
+    for message_id, conversation_id, content in rows:
+        if not should_store_body(content):
+            continue
+        # El trigger de UPDATE quita el texto plano del índice; el comprimido se indexa aquí
+        cursor.execute(
+            "UPDATE messages SET content = '', body_hash = ? WHERE id = ?",
+            (store_body(cursor, content), message_id)
+        )
+        if search_enabled:
+            index_message_text(cursor, message_id, conversation_id, content)
+        compressed += 1
+    
+    cursor.execute("PRAGMA user_version = 1")
+    if compressed:
+        logging.info(f"✅ {compressed} mensajes largos comprimidos en message_bodies")
+
 def create_users_table():
     """Wrapper para compatibilidad"""
     create_tables_if_not_exist()
@@ -0,0 +1,102 @@
+"""
+Hash y verificación de contraseñas con bcrypt en un pool de procesos acotado
+Cada hash cuesta cientos de ms de CPU al factor de coste por defecto: se
+ejecutan en PASSWORD_HASH_WORKERS procesos para que una ráfaga de logins no
+ocupe todos los núcleos del servidor de Streamlit y el resto de sesiones siga
+respondiendo. El coste (BCRYPT_ROUNDS) es configurable y los hashes con otro
+coste se regeneran en el siguiente login correcto.
+
+Los procesos se crean con 'spawn' (no se copia el servidor de Streamlit con
+todos sus hilos). Si la cola no se vacía a tiempo se lanza PasswordHashTimeout
+y el login falla: el pool no se reinicia ni se calcula en el hilo de la
+petición, que es justo lo que el límite de procesos evita.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+from config import Config
+
+# Tiempo máximo esperando al pool (incluye la cola de una ráfaga de logins)
+HASH_TIMEOUT_SECONDS = 30
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class PasswordHashTimeout(Exception):
+    """El pool de hashing no respondió a tiempo (ráfaga de logins): reintentar más tarde"""
+    pass
+
+def _hashpw(password_bytes, rounds):
+    """Se ejecuta en un proceso del pool (nivel de módulo para poder serializarla)"""
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _checkpw(password_bytes, hash_bytes):
+    return bcrypt.checkpw(password_bytes, hash_bytes)
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, Config.PASSWORD_HASH_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _reset_executor():
+    """Descarta un pool roto para que la próxima llamada cree uno nuevo"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _run(func, *args):
+    """Ejecuta func en el pool; si no hay multiprocessing disponible, en el hilo actual
+
+    Lanza PasswordHashTimeout si el pool no responde en HASH_TIMEOUT_SECONDS.
+    """
+    if Config.PASSWORD_HASH_WORKERS <= 0:
+        return func(*args)
+    try:
+        future = _get_executor().submit(func, *args)
+        return future.result(timeout=HASH_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        # Va antes que OSError (desde 3.11 es el TimeoutError builtin, subclase de OSError):
+        # el pool funciona, solo está saturado
+        future.cancel()  # Si seguía en cola, no llega a ocupar un proceso
+        logging.warning(f"⚠️ Hash de contraseña sin respuesta en {HASH_TIMEOUT_SECONDS}s: pool saturado")
+        raise PasswordHashTimeout("Servidor ocupado verificando contraseñas, intenta de nuevo en unos segundos")
+    except (BrokenProcessPool, OSError, RuntimeError) as e:
+        logging.error(f"❌ Pool de hashing no disponible, calculando en el proceso actual: {e}")
+        _reset_executor()
+        return func(*args)
+
+def hash_password(password, rounds=None):
+    """Hash bcrypt de la contraseña con el coste configurado (str listo para guardar)"""
+    return _run(_hashpw, password.encode('utf-8'), rounds or Config.BCRYPT_ROUNDS)
+
+def check_password(password, stored_hash):
+    """Indica si la contraseña coincide con el hash guardado"""
+    try:
+        return _run(_checkpw, password.encode('utf-8'), stored_hash.encode('utf-8'))
+    except ValueError:
+        logging.warning("⚠️ Hash de contraseña con formato inválido")
+        return False
+
+def get_hash_rounds(stored_hash):
+    """Factor de coste de un hash bcrypt ('$2b$12$...' -> 12), o None si no es válido"""
+    try:
+        return int(stored_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(stored_hash, rounds=None):
+    """True si el hash se generó con un coste distinto del configurado"""
+    return get_hash_rounds(stored_hash) != (rounds or Config.BCRYPT_ROUNDS)
@@ -0,0 +1,146 @@
+"""
+Tokens de sesión firmados con HMAC-SHA256
+Tras el login se emite un token con user_id, usuario y caducidad
+(SESSION_TIMEOUT_DAYS). Al reconectar, la sesión se restaura verificando la
+firma en memoria, sin consultar usuarios ni calcular bcrypt. La revocación
+(logout, cambio de contraseña) es opcional y se guarda en la tabla
+session_revocations, que cada proceso mantiene en memoria y relee cada
+REVOCATION_REFRESH_SECONDS.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+
+from auth.database import get_db_connection
+from config import Config
+from utils.ttl_cache import TTLCache
+
+TOKEN_VERSION = "v1"
+REVOCATION_REFRESH_SECONDS = 60
+
+_revocations_cache = TTLCache(REVOCATION_REFRESH_SECONDS, max_entries=1)
+_secret_key = None
+_secret_key_lock = threading.Lock()
+
+def _get_secret_key():
+    """Clave HMAC de SESSION_SECRET_KEY; sin configurar, una aleatoria por proceso"""
+    global _secret_key
+    with _secret_key_lock:
+        if _secret_key is None:
+            if Config.SESSION_SECRET_KEY:
+                _secret_key = str(Config.SESSION_SECRET_KEY).encode('utf-8')
+            else:
+                logging.warning("⚠️ SESSION_SECRET_KEY no configurada: las sesiones no sobreviven a un reinicio")
+                _secret_key = secrets.token_bytes(32)
+        return _secret_key
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(message):
+    return hmac.new(_get_secret_key(), message.encode('ascii'), hashlib.sha256).digest()
+
+def issue_session_token(user_id, username, ttl_days=None):
+    """Emite un token firmado 'v1.<payload>.<firma>' para la sesión del usuario"""
+    now = time.time()
+    payload = {
+        'uid': user_id,
+        'usr': username,
+        'iat': now,
+        'exp': now + (ttl_days or Config.SESSION_TIMEOUT_DAYS) * 86400,
+        'jti': secrets.token_urlsafe(12),
+    }
+    message = f"{TOKEN_VERSION}.{_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))}"
+    return f"{message}.{_b64encode(_sign(message))}"
+
+def verify_session_token(token):
+    """Datos del token (uid, usr, iat, exp, jti) si la firma es válida, no caducó ni fue revocado; si no, None"""
+    if not token or not isinstance(token, str):
+        return None
+    try:
+        version, payload_b64, signature_b64 = token.split(".")
+        if version != TOKEN_VERSION:
+            return None
+        if not hmac.compare_digest(_b64decode(signature_b64), _sign(f"{version}.{payload_b64}")):
+            logging.warning("⚠️ Token de sesión con firma inválida")
+            return None
+        claims = json.loads(_b64decode(payload_b64))
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(claims, dict) or claims.get('exp', 0) <= time.time():
+        return None
+    if Config.SESSION_REVOCATION and _is_revoked(claims):
+        return None
+    return claims
+
+def _load_revocations():
+    """(ids de tokens revocados, {user_id: revocado_desde}) vigentes, desde la caché del proceso"""
+    found, revocations = _revocations_cache.get('revocations')
+    if found:
+        return revocations
+
+    revoked_ids, user_cutoffs = set(), {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT token_id, user_id, revoked_at FROM session_revocations WHERE expires_at > ?",
+            (time.time(),)
+        )
+        for token_id, user_id, revoked_at in cursor.fetchall():
+            if token_id.startswith("user:"):
+                user_cutoffs[user_id] = max(revoked_at, user_cutoffs.get(user_id, 0))
+            else:
+                revoked_ids.add(token_id)
+
+    revocations = (frozenset(revoked_ids), user_cutoffs)
+    _revocations_cache.set('revocations', revocations)
+    return revocations
+
+def _is_revoked(claims):
+    try:
+        revoked_ids, user_cutoffs = _load_revocations()
+    except Exception as e:
+        # Sin poder comprobar revocaciones, se pide login de nuevo
+        logging.error(f"❌ Error leyendo revocaciones de sesión: {e}")
+        return True
+    return claims.get('jti') in revoked_ids or claims.get('iat', 0) <= user_cutoffs.get(claims.get('uid'), 0)
+
+def _store_revocation(token_id, user_id, expires_at):
+    if not Config.SESSION_REVOCATION:
+        return False
+    try:
+        now = time.time()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM session_revocations WHERE expires_at <= ?", (now,))
+            cursor.execute(
+                "INSERT OR REPLACE INTO session_revocations (token_id, user_id, revoked_at, expires_at) VALUES (?, ?, ?, ?)",
+                (token_id, user_id, now, expires_at)
+            )
+            conn.commit()
+        _revocations_cache.clear()
+        return True
+    except Exception as e:
+        logging.error(f"❌ Error revocando sesión: {e}")
+        return False
+
+def revoke_session_token(token):
+    """Revoca un token (logout); los demás procesos lo ven al releer las revocaciones"""
+    claims = verify_session_token(token)
+    if not claims:
+        return False
+    return _store_revocation(claims['jti'], claims['uid'], claims['exp'])
+
+def revoke_user_sessions(user_id):
+    """Revoca todas las sesiones emitidas hasta ahora para el usuario (p. ej. al cambiar la contraseña)"""
+    return _store_revocation(f"user:{user_id}", user_id, time.time() + Config.SESSION_TIMEOUT_DAYS * 86400)
@@ -0,0 +1,90 @@
+"""
+Benchmark de alta de atletas: add_athlete fila a fila vs. importación masiva
+
+Uso:
+    python benchmarks/bench_athlete_import.py [num_atletas] [repeticiones]
+
+Genera un CSV con N atletas (por defecto MAX_ATHLETES_PER_USER) y los da de
+alta en una base SQLite temporal de dos formas: llamando a add_athlete por
+cada fila (una conexión y un commit por atleta, como el formulario) y con
+import_athletes (validación vectorizada y un solo executemany en una
+transacción). Muestra el mejor tiempo de cada una y las filas rechazadas.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+import auth.database as database
+from config import Config
+from modules.athlete_import import import_athletes
+from modules.athlete_manager import add_athlete, get_athletes_by_user, invalidate_athlete_cache
+
+LEVELS = ("Principiante", "intermedio", "AVANZADO", "semi profesional", "Elite")
+
+
+def build_csv(count):
+    """CSV separado por ';' (como lo exporta Excel en español)"""
+    lines = ["Nombre;Deporte;Nivel;Objetivos;Correo"]
+    for n in range(count):
+        lines.append(f"Atleta {n};Fútbol;{LEVELS[n % len(LEVELS)]};Fuerza y resistencia;atleta{n}@club.com")
+    return "\n".join(lines).encode("utf-8")
+
+
+def fresh_database(tmp_dir, name):
+    database.DB_PATH = os.path.join(tmp_dir, f"{name}.db")
+    database.create_tables_if_not_exist()
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        conn.commit()
+        user_id = cursor.lastrowid
+    invalidate_athlete_cache(user_id=user_id)  # La caché de atletas no sabe que cambió la base
+    return user_id
+
+
+def one_by_one(tmp_dir, run, count):
+    user_id = fresh_database(tmp_dir, f"uno_{run}")
+    start = time.perf_counter()
+    for n in range(count):
+        add_athlete(user_id, f"Atleta {n}", "Fútbol", "Intermedio", "Fuerza y resistencia", f"atleta{n}@club.com")
+    elapsed = time.perf_counter() - start
+    assert len(get_athletes_by_user(user_id)) == count
+    return elapsed
+
+
+def bulk(tmp_dir, run, data, count):
+    user_id = fresh_database(tmp_dir, f"masivo_{run}")
+    start = time.perf_counter()
+    summary = import_athletes(user_id, io.BytesIO(data), "atletas.csv")
+    elapsed = time.perf_counter() - start
+    assert summary['imported'] == count, summary['errors'][:3]
+    return elapsed, summary
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else Config.MAX_ATHLETES_PER_USER
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    Config.MAX_ATHLETES_PER_USER = max(Config.MAX_ATHLETES_PER_USER, count)
+    data = build_csv(count)
+
+    import pandas  # noqa: F401 - se carga antes para no medir el import en la primera repetición
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        single = min(one_by_one(tmp_dir, run, count) for run in range(repeat))
+        results = [bulk(tmp_dir, run, data, count) for run in range(repeat)]
+        batched, summary = min(results, key=lambda result: result[0])
+
+    print(f"{count} atletas, mejor de {repeat}")
+    print(f"  add_athlete fila a fila : {single * 1000:8.1f} ms")
+    print(f"  import_athletes         : {batched * 1000:8.1f} ms ({single / batched:.1f}x)")
+    print(f"  importados {summary['imported']}, duplicados {summary['duplicates']}, errores {len(summary['errors'])}")
+
+
+if __name__ == "__main__":
+    main()
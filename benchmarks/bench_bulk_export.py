@@ -0,0 +1,116 @@
+"""
+Benchmark de exportación masiva: ZIP con la última rutina de 100 atletas
+
+Uso:
+    python benchmarks/bench_bulk_export.py [num_atletas]
+
+Crea una base SQLite temporal con N atletas (por defecto 100, el máximo de
+MAX_ATHLETES_PER_USER), cada uno con un historial de chat y varias rutinas,
+y compara:
+  - consulta: última rutina por atleta con una consulta vs. historial atleta a atleta
+  - render: ZIP en serie vs. pool de procesos (tiempo y memoria pico del proceso principal)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+import auth.database as database
+
+from benchmarks.bench_excel_export import make_routine_text
+
+
+def populate(num_athletes, messages_per_athlete=40, routines_per_athlete=3):
+    """Crea usuario, atletas, conversaciones y mensajes sintéticos"""
+    database.create_tables_if_not_exist()
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        for n in range(num_athletes):
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, 'Fútbol', 'Avanzado')",
+                (user_id, f"Atleta {n}")
+            )
+            athlete_id = cursor.lastrowid
+            cursor.execute("INSERT INTO conversations (athlete_id) VALUES (?)", (athlete_id,))
+            conversation_id = cursor.lastrowid
+            rows = []
+            for m in range(messages_per_athlete):
+                if m % (messages_per_athlete // routines_per_athlete) == 0:
+                    rows.append((conversation_id, make_routine_text(120 + m), 0))
+                else:
+                    rows.append((conversation_id, f"Mensaje {m} del chat", m % 2))
+            cursor.executemany(
+                "INSERT INTO messages (conversation_id, content, is_user) VALUES (?, ?, ?)", rows
+            )
+        conn.commit()
+    return user_id
+
+
+def per_athlete_lookup(user_id):
+    """Enfoque anterior: abrir el historial de cada atleta y buscar su última rutina"""
+    from modules.athlete_manager import get_athletes_by_user
+    from modules.chat_manager import get_chat_history, ROUTINE_MARKER
+
+    found = 0
+    for athlete in get_athletes_by_user(user_id):
+        history = get_chat_history(athlete[0], limit=1000)
+        for content, is_user, _ in reversed(history):
+            if not is_user and ROUTINE_MARKER in content:
+                found += 1
+                break
+    return found
+
+
+def run_export(user_id, workers):
+    """Exporta a un archivo temporal y devuelve (segundos, KB pico, resumen, tamaño ZIP)"""
+    from modules import routine_export
+    from modules.bulk_export import export_latest_routines_zip
+
+    routine_export._export_cache.clear()
+    routine_export._parsed_routine_cache.clear()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with tempfile.TemporaryFile() as tmp:
+        summary = export_latest_routines_zip(user_id, tmp, "xlsx", max_workers=workers)
+        size = tmp.tell()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024, summary, size
+
+
+def main():
+    num_athletes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.DB_PATH = os.path.join(tmp_dir, "bench.db")
+        user_id = populate(num_athletes)
+
+        from modules.chat_manager import get_latest_routines_by_user
+
+        start = time.perf_counter()
+        latest = get_latest_routines_by_user(user_id)
+        single_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        found = per_athlete_lookup(user_id)
+        loop_ms = (time.perf_counter() - start) * 1000
+        print(f"Consulta ({num_athletes} atletas): una consulta {single_ms:.1f} ms ({len(latest)}) "
+              f"vs. atleta a atleta {loop_ms:.1f} ms ({found})")
+
+        print(f"{'workers':>7} | {'segundos':>8} | {'KB pico':>8} | {'ZIP KB':>7} | exportadas")
+        for workers in (1, 2, 4):
+            elapsed, peak_kb, summary, size = run_export(user_id, workers)
+            print(f"{workers:>7} | {elapsed:>8.2f} | {peak_kb:>8.0f} | {size / 1024:>7.0f} | "
+                  f"{summary['exported']}/{summary['total']}")
+
+
+if __name__ == "__main__":
+    main()
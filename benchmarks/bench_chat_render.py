@@ -0,0 +1,82 @@
+"""
+Benchmark del render del chat: formatear todo en cada rerun vs. bloques memorizados
+
+Uso:
+    python benchmarks/bench_chat_render.py [num_mensajes]
+
+Arma un historial largo (prompts del entrenador, rutinas del generador sin IA,
+respuestas sintéticas con artefactos y respuestas de texto) y mide lo que
+cuesta en cada rerun de show_chat_section convertir todos los mensajes en HTML
+(antes) frente a get_message_render_block, que solo formatea los mensajes que
+no ha visto. Simula además la llegada de un mensaje nuevo entre reruns.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+from modules import chat_render
+from modules.chat_render import build_message_render_block, get_message_render_block
+from modules.routine_generator import generate_routine
+from benchmarks.bench_response_cleaner import make_response
+
+
+def make_chat(count, rng):
+    """Historial (mensaje, is_user) alternando entrenador y asistente"""
+    athlete = {'name': 'Ana', 'sport': 'Fútbol', 'level': 'Avanzado'}
+    chat = []
+    for i in range(count // 2):
+        chat.append((f"Necesito ajustar la rutina del día {i + 1}, por favor", True))
+        kind = i % 3
+        if kind == 0:
+            chat.append((generate_routine(athlete, days=rng.randint(1, 4), variant=i), False))
+        elif kind == 1:
+            chat.append((make_response(rng.choice((3, 10)), rng), False))
+        else:
+            chat.append(("Claro, para el día 2 baja el volumen a 3 series y mantén el descanso. " * 8, False))
+    return chat
+
+
+def render_all(chat, render):
+    return [render(msg, is_user)['html'] for msg, is_user in chat]
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(5)
+    chat = make_chat(count, rng)
+    size_kb = sum(len(msg) for msg, _ in chat) / 1024
+
+    identical = render_all(chat, build_message_render_block) == render_all(chat, get_message_render_block)
+    print(f"{len(chat)} mensajes ({size_kb:.0f} KB), HTML idéntico: {identical}")
+
+    full_ms = best_of(lambda: render_all(chat, build_message_render_block))
+    cached_ms = best_of(lambda: render_all(chat, get_message_render_block))
+
+    def rerun_with_new_message():
+        chat.append((generate_routine({'sport': 'Rugby', 'level': 'Elite'}, variant=len(chat)), False))
+        render_all(chat, get_message_render_block)
+
+    new_message_ms = best_of(rerun_with_new_message)
+
+    print(f"  formatear todo en cada rerun:  {full_ms:8.2f} ms")
+    print(f"  bloques memorizados:           {cached_ms:8.2f} ms  (x{full_ms / cached_ms:.0f})")
+    print(f"  rerun con un mensaje nuevo:    {new_message_ms:8.2f} ms")
+    print(f"  bloques en memoria: {len(chat_render._render_cache)}")
+
+
+if __name__ == "__main__":
+    main()
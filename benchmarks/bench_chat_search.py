@@ -0,0 +1,140 @@
+"""
+Benchmark de búsqueda en el historial de chat: FTS5 vs. LIKE
+
+Uso:
+    python benchmarks/bench_chat_search.py [num_mensajes] [repeticiones]
+
+Crea una base SQLite temporal con 20 entrenadores, 10 atletas cada uno y un
+corpus sintético de mensajes (por defecto 120.000) con vocabulario de
+entrenamiento. Los mensajes pasan por los triggers que mantienen messages_fts.
+Mide search_chat_messages (alcance usuario y atleta) con términos raros,
+frecuentes y prefijos, frente a un LIKE '%término%' sobre messages, que es
+lo que haría falta sin índice. Muestra el mejor tiempo de cada búsqueda.
+
+El LIKE devuelve los 20 más recientes sin ordenar por relevancia ni ignorar
+tildes: con términos frecuentes para en cuanto los encuentra, con términos
+raros tiene que recorrer todos los mensajes del entrenador.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+import auth.database as database
+from modules.chat_manager import search_chat_messages
+
+COACHES = 20
+ATHLETES_PER_COACH = 10
+
+WORDS = (
+    "rutina fuerza potencia sentadilla peso muerto press banca dominadas zancadas "
+    "movilidad cadera core plancha series repeticiones descanso calentamiento "
+    "velocidad resistencia aeróbica intervalos sprint pliometría salto cuádriceps "
+    "glúteos gemelos hombro espalda técnica carga progresiva semana día recuperación "
+    "estiramientos nutrición hidratación competición pretemporada lesión prevención"
+).split()
+RARE_PHRASES = ("molestia en isquiotibiales", "tendinitis rotuliana", "esguince de tobillo")
+
+# (descripción, texto buscado, alcance)
+QUERIES = (
+    ("término raro", "isquiotibiales", "usuario"),
+    ("frase rara", "tendinitis rotuliana", "usuario"),
+    ("término frecuente", "rutina", "usuario"),
+    ("término frecuente", "rutina", "atleta"),
+    ("prefijo", "isquio", "atleta"),
+    ("sin tildes", "tecnica carga", "usuario"),
+)
+
+
+def random_message(rng):
+    words = rng.choices(WORDS, k=rng.randint(12, 60))
+    if rng.random() < 0.01:
+        words.insert(rng.randrange(len(words)), rng.choice(RARE_PHRASES))
+    return " ".join(words).capitalize() + "."
+
+
+def populate(message_count, seed=7):
+    """Entrenadores, atletas, una conversación por atleta y mensajes repartidos"""
+    rng = random.Random(seed)
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        athlete_ids = []
+        for coach in range(COACHES):
+            cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, 'x')", (f"coach{coach}",))
+            user_id = cursor.lastrowid
+            for n in range(ATHLETES_PER_COACH):
+                cursor.execute(
+                    "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, 'Fútbol', 'Avanzado')",
+                    (user_id, f"Atleta {coach}-{n}")
+                )
+                athlete_id = cursor.lastrowid
+                cursor.execute("INSERT INTO conversations (athlete_id) VALUES (?)", (athlete_id,))
+                athlete_ids.append((user_id, athlete_id, cursor.lastrowid))
+
+        conversation_ids = [conversation_id for _, _, conversation_id in athlete_ids]
+        cursor.executemany(
+            "INSERT INTO messages (conversation_id, content, is_user) VALUES (?, ?, ?)",
+            ((rng.choice(conversation_ids), random_message(rng), n % 2 == 0) for n in range(message_count))
+        )
+        conn.commit()
+    return athlete_ids[0][0], athlete_ids[0][1]
+
+
+def like_search(text, user_id, athlete_id=None, limit=20):
+    """Búsqueda sin índice: LIKE sobre cada mensaje del alcance"""
+    athlete_filter = "AND c.athlete_id = ?" if athlete_id is not None else ""
+    params = [user_id] + ([athlete_id] if athlete_id is not None else [])
+    conditions = " AND ".join("m.content LIKE ?" for _ in text.split())
+    params += [f"%{word}%" for word in text.split()] + [limit]
+    with database.get_db_connection() as conn:
+        return conn.execute(f"""
+            SELECT m.id FROM messages m
+            JOIN conversations c ON c.id = m.conversation_id
+            JOIN athletes a ON a.id = c.athlete_id
+            WHERE a.user_id = ? {athlete_filter} AND {conditions}
+            ORDER BY m.id DESC LIMIT ?
+        """, params).fetchall()
+
+
+def best_ms(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 120_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.DB_PATH = os.path.join(tmp_dir, "bench.db")
+        database.create_tables_if_not_exist()
+
+        start = time.perf_counter()
+        user_id, athlete_id = populate(message_count)
+        print(f"{message_count} mensajes insertados (con triggers FTS5) en {time.perf_counter() - start:.1f} s, "
+              f"{COACHES * ATHLETES_PER_COACH} atletas")
+        print(f"{'búsqueda':>18} | {'texto':>22} | {'alcance':>7} | {'FTS5 ms':>8} | {'LIKE ms':>8} | resultados")
+
+        for label, text, scope in QUERIES:
+            scoped_athlete = athlete_id if scope == "atleta" else None
+            fts_ms, hits = best_ms(lambda: search_chat_messages(text, user_id, scoped_athlete), repeat)
+            like_ms, _ = best_ms(lambda: like_search(text, user_id, scoped_athlete), repeat)
+            print(f"{label:>18} | {text:>22} | {scope:>7} | {fts_ms:>8.2f} | {like_ms:>8.2f} | {len(hits)}")
+
+        hits = search_chat_messages("isquiotibiales", user_id)
+        if hits:
+            print(f"\nejemplo: mensaje {hits[0]['message_id']} de {hits[0]['athlete_name']}: {hits[0]['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
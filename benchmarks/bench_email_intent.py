@@ -0,0 +1,122 @@
+"""
+Benchmark del detector de intención de email
+
+Uso:
+    python benchmarks/bench_email_intent.py
+
+Compara los detectores anteriores (AutoEmailHandler: 12 re.search sin
+compilar; chat_interface: 3 patrones) con EmailIntentDetector sobre un corpus
+de mensajes típicos del chat entre entrenador y asistente, y verifica que la
+decisión sí/no es idéntica mensaje a mensaje.
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.email_intent import (
+    EMAIL_INTENT_PATTERNS, AUTO_EMAIL_INTENTS, CHAT_EMAIL_INTENTS,
+    auto_email_intent_detector, chat_email_intent_detector,
+)
+from benchmarks.bench_excel_export import make_routine_text
+
+logging.disable(logging.INFO)
+
+CORPUS = [
+    # Pedidos de rutinas y consultas habituales (sin email)
+    "Hola, necesito una rutina de fuerza para un futbolista juvenil",
+    "Crea un plan de 4 semanas para mejorar la velocidad de un sprinter",
+    "¿Cuántas series recomiendas para hipertrofia en nivel intermedio?",
+    "Ajusta la carga del día 2, la sentadilla le resultó muy pesada",
+    "Mi atleta tiene molestias en la rodilla, ¿qué ejercicios evito?",
+    "Dame una rutina de movilidad para antes del partido",
+    "Agrega un bloque de pliometría al final del día 3",
+    "Reduce el volumen esta semana porque tiene competencia el sábado",
+    "¿Qué es mejor para un nadador, press banca o dominadas?",
+    "Perfecto, me gusta la rutina, gracias",
+    "Cambia el peso muerto por hip thrust",
+    "Hazla más corta, solo tiene 40 minutos",
+    "Necesito una progresión de 8 semanas para baloncesto",
+    "Incluye trabajo de core y prevención de lesiones de tobillo",
+    "Está bien así",
+    # Pedidos de envío por email
+    "Envíala por email por favor",
+    "mandalo por correo",
+    "¿Me la podés mandar por mail?",
+    "Mándamela al correo",
+    "Quiero que lo envíes por email a su correo",
+    "Send it by email",
+    "por favor manda por correo la rutina",
+    "compártelo por email",
+    "Compártelo",
+    "compártelo con el equipo",
+    "COMPÁRTELO POR CORREO",
+    "Mándaselo hoy",
+    "Envíamela",
+    "envíaselo a juan@club.com",
+    "mail",
+    "Email me the plan",
+    "Mándala a ana.perez@gmail.com",
+    "Enviar la rutina por correo a la atleta",
+    "El correo del atleta está mal, hay que enviar de nuevo",
+    "Su mail de contacto es nuevo, actualízalo",
+]
+
+
+def legacy_auto_detect(message):
+    """Réplica del AutoEmailHandler anterior"""
+    patterns = [pattern for name, pattern in EMAIL_INTENT_PATTERNS if name in AUTO_EMAIL_INTENTS]
+    message_lower = message.lower().strip()
+    for pattern in patterns:
+        if re.search(pattern, message_lower):
+            return True
+    return False
+
+
+def legacy_chat_detect(message):
+    """Réplica de chat_interface.detect_email_command anterior"""
+    patterns = [pattern for name, pattern in EMAIL_INTENT_PATTERNS if name in CHAT_EMAIL_INTENTS]
+    for pattern in patterns:
+        if re.search(pattern, message.lower()):
+            return True
+    return False
+
+
+def time_detector(detect, messages, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            detect(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+def main():
+    # Incluir también respuestas largas del asistente (se analizan igual al guardar el chat)
+    messages = CORPUS + [make_routine_text(rows) for rows in (50, 200)]
+
+    for label, legacy, detector in (
+        ("AutoEmailHandler", legacy_auto_detect, auto_email_intent_detector),
+        ("chat_interface", legacy_chat_detect, chat_email_intent_detector),
+    ):
+        mismatches = [m for m in messages if legacy(m) != (detector.detect(m) is not None)]
+        hits = sum(1 for m in messages if detector.detect(m))
+        legacy_us = time_detector(legacy, messages)
+        new_us = time_detector(detector.detect, messages)
+        print(f"{label}: {hits}/{len(messages)} con intención, diferencias: {len(mismatches)}")
+        print(f"  anterior {legacy_us:8.1f} µs/mensaje | combinado {new_us:8.1f} µs/mensaje | x{legacy_us / new_us:.1f}")
+        for message in mismatches:
+            print(f"  DIFERENCIA: {message[:60]!r}")
+
+    print("\nIntención detectada (AutoEmailHandler):")
+    for message in CORPUS:
+        intent = auto_email_intent_detector.detect(message)
+        if intent:
+            print(f"  {intent:<18} {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de exportación a Excel: workbook en memoria vs escritor en streaming
+
+Uso:
+    python benchmarks/bench_excel_export.py
+
+Mide tiempo de construcción y memoria pico (tracemalloc) para una exportación
+de 500 filas y para tamaños crecientes (programas periodizados de 12 semanas),
+comparando el enfoque anterior (Workbook normal + estilos por celda) con
+RoutineWorkbookWriter (write-only + estilos con nombre).
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+from modules.routine_export import build_routine_workbook, parse_routine_simple
+
+ATHLETE = {'name': 'Atleta Benchmark', 'sport': 'Fútbol', 'level': 'Avanzado'}
+
+
+def make_routine_text(total_rows, weeks=12, days_per_week=4):
+    """Genera una rutina sintética con ~total_rows ejercicios repartidos en semanas/días"""
+    per_day = max(1, total_rows // (weeks * days_per_week))
+    lines = ["[INICIO_NUEVA_RUTINA]", "**📝 RUTINA: Programa periodizado**"]
+    for week in range(1, weeks + 1):
+        lines.append(f"## SEMANA {week}")
+        for day in range(1, days_per_week + 1):
+            lines.append(f"### DÍA {day} - FUERZA Y POTENCIA")
+            for n in range(per_day):
+                lines.append(f"- Sentadilla búlgara variante {n}: 4x{6 + n % 6} controlado")
+    return "\n".join(lines)
+
+
+def legacy_build(athlete_data, routine_data):
+    """Réplica del generador anterior: Workbook completo y estilos creados por celda"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Plan de Entrenamiento"
+    header_font = Font(bold=True, color="FFFFFF", size=12)
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    day_font = Font(bold=True, color="FFFFFF", size=11)
+    day_fill = PatternFill(start_color="5B9BD5", end_color="5B9BD5", fill_type="solid")
+    border = Border(left=Side(border_style="thin"), right=Side(border_style="thin"),
+                    top=Side(border_style="thin"), bottom=Side(border_style="thin"))
+    for row, (label, value) in enumerate([("ATLETA:", athlete_data['name']), ("DEPORTE:", athlete_data['sport']),
+                                          ("NIVEL:", athlete_data['level']), ("FECHA:", "01/01/2025")], 1):
+        ws.cell(row=row, column=1, value=label).font = Font(bold=True)
+        ws.cell(row=row, column=2, value=value)
+    current_row = 6
+    for col, header in enumerate(["EJERCICIO", "SERIES/REPETICIONES", "CARGA", "NOTAS"], 1):
+        cell = ws.cell(row=current_row, column=col, value=header)
+        cell.font, cell.fill, cell.border = header_font, header_fill, border
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+    current_row += 1
+    for day_info in routine_data:
+        cell = ws.cell(row=current_row, column=1, value=f"DÍA {day_info['day']} - {day_info['title']}")
+        cell.font, cell.fill, cell.border = day_font, day_fill, border
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=4)
+        current_row += 1
+        for exercise in day_info['exercises']:
+            ws.cell(row=current_row, column=1, value=exercise['name']).border = border
+            ws.cell(row=current_row, column=2, value=exercise['sets_reps']).border = border
+            ws.cell(row=current_row, column=3, value="").border = border
+            ws.cell(row=current_row, column=4, value=exercise['notes']).border = border
+            current_row += 1
+        current_row += 1
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(builder, routine_data, repeat=3):
+    """Devuelve (mejor tiempo en ms, memoria pico en KB, tamaño en bytes)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = builder(ATHLETE, routine_data)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    builder(ATHLETE, routine_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024, len(data)
+
+
+def main():
+    print(f"{'filas':>6} | {'legacy ms':>9} {'legacy KB':>10} | {'stream ms':>9} {'stream KB':>10} | hojas")
+    for rows in (500, 1000, 2000, 4000):
+        routine_data = parse_routine_simple(make_routine_text(rows))
+        real_rows = sum(len(d['exercises']) for d in routine_data)
+        legacy_ms, legacy_kb, _ = measure(legacy_build, routine_data)
+        stream_ms, stream_kb, _ = measure(build_routine_workbook, routine_data)
+        sheets = len({d.get('week') for d in routine_data})
+        print(f"{real_rows:>6} | {legacy_ms:>9.1f} {legacy_kb:>10.0f} | {stream_ms:>9.1f} {stream_kb:>10.0f} | {sheets}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark comparativo de formatos de exportación (XLSX, CSV, JSON, PDF)
+
+Uso:
+    python benchmarks/bench_export_formats.py
+
+Todos los renderers consumen el mismo modelo parseado; se mide solo el render
+(mejor de N repeticiones) y el tamaño del archivo generado.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+from modules.routine_export import EXPORT_RENDERERS, parse_routine_simple
+
+from benchmarks.bench_excel_export import ATHLETE, make_routine_text
+
+
+def measure(render, routine_data, repeat=5):
+    """Devuelve (mejor tiempo en ms, tamaño en bytes)"""
+    best = float("inf")
+    data = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = render(ATHLETE, routine_data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(data)
+
+
+def main():
+    formats = list(EXPORT_RENDERERS)
+    print("formatos:", ", ".join(formats))
+    print(f"{'filas':>6} | " + " | ".join(f"{fmt + ' ms':>9} {fmt + ' KB':>8}" for fmt in formats))
+    for rows in (50, 500, 2000):
+        routine_data = parse_routine_simple(make_routine_text(rows))
+        real_rows = sum(len(d['exercises']) for d in routine_data)
+        cells = []
+        for fmt in formats:
+            ms, size = measure(EXPORT_RENDERERS[fmt]['render'], routine_data)
+            cells.append(f"{ms:>9.1f} {size / 1024:>8.1f}")
+        print(f"{real_rows:>6} | " + " | ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark de almacenamiento de mensajes: texto plano vs. cuerpos comprimidos y deduplicados
+
+Uso:
+    python benchmarks/bench_message_compression.py [num_atletas] [intercambios_por_atleta]
+
+Crea en un directorio temporal la base principal y ai_cache.db con un
+entrenador, N atletas (por defecto 100) y un historial realista: preguntas
+cortas, respuestas de chat, rutinas largas generadas para cada atleta y
+rutinas precalentadas de la caché (las mismas para cada deporte y nivel) que
+se guardan también como mensaje. Todo pasa por save_message y cache_response.
+
+Compara TEXT_COMPRESSION_MIN_CHARS=0 (como antes: todo en TEXT, una copia en
+messages y otra en ai_cache) con el umbral configurado: tamaño de las dos
+bases tras VACUUM, páginas ocupadas y tiempos de escritura y de lectura
+(ventana del chat, últimas rutinas para el export masivo y búsqueda). El
+índice FTS5 (~4 MB con los valores por defecto) no cambia: la diferencia en
+la base principal es toda del texto de los mensajes.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+import auth.database as database
+from config import Config
+from modules.ai_cache_manager import AICacheManager
+from modules.chat_manager import get_chat_window, get_latest_routines_by_user, save_message, search_chat_messages
+from modules.routine_generator import EXERCISE_LIBRARY
+
+PROFILES = (("Fútbol", "Avanzado"), ("Básquet", "Intermedio"), ("Tenis", "Élite"), ("Running", "Principiante"))
+TEMPLATES = ("express_20", "standard_45", "intensive_60", "strength", "cardio_hiit", "mobility")
+NOTES = (
+    "Mantener la técnica antes que la carga; si la velocidad cae más de un 20 %, cortar la serie.",
+    "Controlar la fase excéntrica en 3 segundos y explotar en la concéntrica.",
+    "Registrar la RPE de cada serie para ajustar la carga la semana siguiente.",
+    "Si aparece molestia en la rodilla, sustituir por la variante isométrica.",
+    "Hidratación: 500 ml en la hora previa y sorbos entre bloques.",
+    "Descanso completo entre series de potencia para mantener la calidad del gesto.",
+)
+
+
+def make_routine(rng, weeks=4, days=4):
+    """Rutina en markdown como las de la IA (~10-20 KB): semanas, días, ejercicios y notas"""
+    names = [exercise[0] for exercise in EXERCISE_LIBRARY]
+    lines = ["[INICIO_NUEVA_RUTINA]", f"**📝 RUTINA: Mesociclo de {weeks} semanas**", ""]
+    for week in range(1, weeks + 1):
+        lines.append(f"## SEMANA {week} - {'CARGA' if week < weeks else 'DESCARGA'}")
+        for day in range(1, days + 1):
+            lines.append(f"### DÍA {day} - {rng.choice(('FUERZA', 'POTENCIA', 'RESISTENCIA', 'MOVILIDAD'))}")
+            for exercise in rng.sample(names, rng.randint(6, 8)):
+                lines.append(
+                    f"- **{exercise}**: {rng.randint(2, 5)}x{rng.randint(4, 15)} "
+                    f"al {rng.randrange(55, 90, 5)} % 1RM, descanso {rng.choice((60, 90, 120, 180))} seg, "
+                    f"RPE {rng.randint(6, 9)}, tempo {rng.randint(2, 4)}-{rng.randint(0, 2)}-1"
+                )
+            lines.append(f"> {rng.choice(NOTES)}")
+            lines.append("")
+    lines.append("**Notas generales:** " + " ".join(rng.sample(NOTES, 3)))
+    return "\n".join(lines)
+
+
+def make_answer(rng):
+    """Respuesta de chat corta/media (casi siempre por debajo del umbral)"""
+    return " ".join(rng.sample(NOTES, rng.randint(2, 6))) * rng.randint(1, 3)
+
+
+def build_history(tmp_dir, label, num_athletes, exchanges, seed=11):
+    """Bases principal y de caché con el historial sintético; devuelve (user_id, athlete_id, segundos escribiendo, ruta de la caché)"""
+    rng = random.Random(seed)
+    database.DB_PATH = os.path.join(tmp_dir, f"{label}.db")
+    database.create_tables_if_not_exist()
+    cache = AICacheManager(os.path.join(tmp_dir, f"{label}_cache.db"))
+
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        athletes = []
+        for n in range(num_athletes):
+            sport, level = PROFILES[n % len(PROFILES)]
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, ?, ?)",
+                (user_id, f"Atleta {n}", sport, level)
+            )
+            athletes.append((cursor.lastrowid, {'sport': sport, 'level': level}))
+        conn.commit()
+
+    start = time.perf_counter()
+    # Precalentamiento: una rutina por template y perfil
+    for sport, level in PROFILES:
+        for template_id in TEMPLATES:
+            cache.cache_response({'sport': sport, 'level': level}, f"quick_template:{template_id}", make_routine(rng))
+
+    for athlete_id, context in athletes:
+        for exchange in range(exchanges):
+            save_message(athlete_id, f"Pregunta {exchange}: ¿cómo ajusto la carga esta semana? " * 3, is_user=True)
+            roll = rng.random()
+            if roll < 0.2:
+                response = cache.get_cached_response(context, f"quick_template:{rng.choice(TEMPLATES)}")
+            elif roll < 0.5:
+                response = make_routine(rng)
+            else:
+                response = make_answer(rng)
+            save_message(athlete_id, response, is_user=False)
+    elapsed = time.perf_counter() - start
+
+    return user_id, athletes[0][0], elapsed, cache.cache_db_path
+
+
+def file_stats(path):
+    """(bytes tras VACUUM, páginas)"""
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    return os.path.getsize(path), page_count
+
+
+def best_ms(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(tmp_dir, label, threshold, num_athletes, exchanges):
+    Config.TEXT_COMPRESSION_MIN_CHARS = threshold
+    user_id, athlete_id, write_seconds, cache_path = build_history(tmp_dir, label, num_athletes, exchanges)
+    main_bytes, main_pages = file_stats(database.DB_PATH)
+    cache_bytes, _ = file_stats(cache_path)
+    with database.get_db_connection() as conn:
+        bodies = conn.execute("SELECT COUNT(*) FROM message_bodies").fetchone()[0]
+        messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        stored_bytes = (
+            conn.execute("SELECT COALESCE(SUM(length(CAST(content AS BLOB))), 0) FROM messages").fetchone()[0]
+            + conn.execute("SELECT COALESCE(SUM(length(body)), 0) FROM message_bodies").fetchone()[0]
+        )
+    return {
+        'stored_mb': stored_bytes / 1e6,
+        'main_mb': main_bytes / 1e6,
+        'cache_mb': cache_bytes / 1e6,
+        'pages': main_pages,
+        'bodies': bodies,
+        'messages': messages,
+        'write_ms': write_seconds * 1000 / messages,
+        'window_ms': best_ms(lambda: get_chat_window(athlete_id, Config.CHAT_PAGE_SIZE)),
+        'latest_ms': best_ms(lambda: get_latest_routines_by_user(user_id), repeat=3),
+        'search_ms': best_ms(lambda: search_chat_messages("isométrica rodilla", user_id)),
+    }
+
+
+def main():
+    num_athletes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    exchanges = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    threshold = Config.TEXT_COMPRESSION_MIN_CHARS or 2048
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        before = run(tmp_dir, "plano", 0, num_athletes, exchanges)
+        after = run(tmp_dir, "comprimido", threshold, num_athletes, exchanges)
+
+    print(f"{num_athletes} atletas x {exchanges} intercambios = {after['messages']} mensajes, "
+          f"{after['bodies']} cuerpos comprimidos (umbral {threshold} caracteres)")
+    rows = (
+        ("texto del historial (MB)", 'stored_mb', "{:.2f}"),
+        ("base principal (MB)", 'main_mb', "{:.2f}"),
+        ("ai_cache.db (MB)", 'cache_mb', "{:.2f}"),
+        ("páginas base principal", 'pages', "{:d}"),
+        ("escritura por mensaje (ms)", 'write_ms', "{:.3f}"),
+        ("ventana del chat (ms)", 'window_ms', "{:.2f}"),
+        ("últimas rutinas export (ms)", 'latest_ms', "{:.1f}"),
+        ("búsqueda FTS5 (ms)", 'search_ms', "{:.2f}"),
+    )
+    print(f"{'':>28} | {'texto plano':>12} | {'comprimido':>12} | {'ratio':>6}")
+    for label, key, fmt in rows:
+        ratio = before[key] / after[key] if after[key] else float("inf")
+        print(f"{label:>28} | {fmt.format(before[key]):>12} | {fmt.format(after[key]):>12} | {ratio:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
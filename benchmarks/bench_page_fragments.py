@@ -0,0 +1,99 @@
+"""
+Benchmark de la página principal dividida en fragmentos
+
+Uso:
+    python benchmarks/bench_page_fragments.py [num_atletas] [mensajes_chat]
+
+Crea una base SQLite temporal con un entrenador, N atletas (por defecto 30) y
+un chat abierto con historial, y ejecuta main.main() con AppTest midiendo en el
+servidor cuánto tarda cada región de main_app. Antes de los fragmentos toda
+interacción (enviar un mensaje, paginar el chat, elegir un atleta en el panel
+de gestión, exportar) volvía a ejecutar la página completa; ahora solo se
+vuelve a ejecutar la región donde ocurre. La navegación (abrir un chat,
+volver, generar un template) sigue siendo un rerun completo.
+
+AppTest ejecuta los clics como reruns completos, así que el coste de un rerun
+de fragmento se mide como el tiempo de su región dentro de la ejecución.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+import auth.database as database
+
+from benchmarks.bench_bulk_export import populate
+
+def page_script(db_path, athlete_id):
+    """Script de AppTest (se ejecuta aislado: solo puede usar sus argumentos e imports propios)"""
+    import time
+    import streamlit as st
+    import auth.database as database
+    import main
+
+    database.DB_PATH = db_path
+    st.session_state["username"] = "coach"
+    st.session_state["active_athlete_chat"] = athlete_id
+    st.session_state.setdefault("_timings", {})
+
+    def timed(name, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                st.session_state["_timings"].setdefault(name, []).append((time.perf_counter() - start) * 1000)
+        return wrapper
+
+    if not getattr(main, "_bench_wrapped", False):
+        for name in ("show_athletes_section", "show_athlete_management", "show_chat_panel"):
+            setattr(main, name, timed(name, getattr(main, name)))
+        main._bench_wrapped = True
+
+    start = time.perf_counter()
+    main.main()
+    st.session_state["_timings"].setdefault("page", []).append((time.perf_counter() - start) * 1000)
+
+
+def main():
+    from streamlit.testing.v1 import AppTest
+
+    num_athletes = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    num_messages = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        database.DB_PATH = db_path
+        populate(num_athletes, messages_per_athlete=num_messages)
+
+        with database.get_db_connection() as conn:
+            athlete_id = conn.execute("SELECT MAX(id) FROM athletes").fetchone()[0]
+
+        at = AppTest.from_function(page_script, args=(db_path, athlete_id), default_timeout=120)
+        at.run()  # Primera ejecución: inicialización, tablas e imports
+        if at.exception:
+            print(f"Error en la página: {at.exception[0].message}")
+            return
+        at.session_state["_timings"] = {}
+        for _ in range(5):
+            at.run()
+
+        timings = {name: min(values) for name, values in at.session_state["_timings"].items()}
+        page_ms = timings["page"]
+
+        print(f"{num_athletes} atletas, chat con {num_messages} mensajes (mejor de 5 ejecuciones)")
+        print(f"  página completa (toda interacción antes):   {page_ms:8.1f} ms")
+        for label, name in (
+            ("chat: enviar / paginar / email", "show_chat_panel"),
+            ("gestión: elegir atleta / formularios", "show_athlete_management"),
+            ("atletas: exportar / email masivo", "show_athletes_section"),
+        ):
+            region_ms = timings.get(name, 0.0)
+            print(f"  {label:<40} {region_ms:8.1f} ms  (x{page_ms / max(region_ms, 0.01):.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark de logins concurrentes: bcrypt en el hilo de la petición vs. pool de procesos
+
+Uso:
+    python benchmarks/bench_password_hashing.py [coste_bcrypt] [logins_por_usuario]
+
+Crea una base SQLite temporal con 8 entrenadores y lanza 8 hilos (8 usuarios
+haciendo login a la vez) contra verify_user. Compara bcrypt en el propio hilo
+(PASSWORD_HASH_WORKERS=0, como antes) con el pool de procesos a distintos
+tamaños: logins/s, latencia p50/p95 y cuánto se retrasa otro hilo de Python
+(un tick de 5 ms que simula el resto de sesiones de Streamlit). Al final
+comprueba el rehash transparente al cambiar BCRYPT_ROUNDS.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+
+import auth.database as database
+from auth import password_hashing
+from auth.auth_utils import register_user, verify_user
+from config import Config
+
+PARALLEL_USERS = 8
+PASSWORD = "entreno2024"
+
+
+class TickMonitor:
+    """Hilo que duerme 5 ms en bucle y registra el mayor retraso observado"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.max_delay = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            time.sleep(self.interval)
+            self.max_delay = max(self.max_delay, time.perf_counter() - start - self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_logins(usernames, logins_per_user):
+    """8 hilos haciendo login a la vez; devuelve (logins/s, latencias ms, retraso máx. ms)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def user_session(username):
+        for _ in range(logins_per_user):
+            start = time.perf_counter()
+            ok, message = verify_user(username, PASSWORD)
+            assert ok, message
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    with TickMonitor() as monitor:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=PARALLEL_USERS) as pool:
+            list(pool.map(user_session, usernames))
+        elapsed = time.perf_counter() - start
+
+    return len(latencies) / elapsed, latencies, monitor.max_delay * 1000
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else Config.BCRYPT_ROUNDS
+    logins_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    Config.BCRYPT_ROUNDS = rounds
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.DB_PATH = os.path.join(tmp_dir, "bench.db")
+        database.create_tables_if_not_exist()
+        usernames = [f"coach{n}" for n in range(PARALLEL_USERS)]
+        for username in usernames:
+            ok, message = register_user(username, PASSWORD)
+            assert ok, message
+
+        print(f"{PARALLEL_USERS} usuarios en paralelo, {logins_per_user} logins cada uno, bcrypt coste {rounds}, "
+              f"{os.cpu_count()} CPU")
+        print(f"{'modo':>14} | {'logins/s':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'retraso máx. otro hilo':>22}")
+        for workers in (0, 1, 2, 4):
+            Config.PASSWORD_HASH_WORKERS = workers
+            password_hashing._reset_executor()
+            if workers:
+                password_hashing.check_password("calentamiento", password_hashing.hash_password("x", rounds=4))
+            rate, latencies, max_delay = run_logins(usernames, logins_per_user)
+            label = "en el hilo" if workers == 0 else f"pool {workers} proc."
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{label:>14} | {rate:>8.2f} | {statistics.median(latencies):>7.0f} | {p95:>7.0f} | {max_delay:>19.1f} ms")
+
+        # Rehash transparente: al bajar el coste, el primer login regenera el hash
+        Config.BCRYPT_ROUNDS = max(4, rounds - 2)
+        verify_user(usernames[0], PASSWORD)
+        with database.get_db_connection() as conn:
+            stored = conn.execute("SELECT password_hash FROM users WHERE username = ?", (usernames[0],)).fetchone()[0]
+        print(f"\nrehash al cambiar BCRYPT_ROUNDS a {Config.BCRYPT_ROUNDS}: "
+              f"coste guardado {password_hashing.get_hash_rounds(stored)}")
+        password_hashing._reset_executor()
+
+
+if __name__ == "__main__":
+    main()
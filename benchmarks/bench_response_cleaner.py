@@ -0,0 +1,131 @@
+"""
+Benchmark de ResponseCleaner: patrones por separado vs. pasadas combinadas
+
+Uso:
+    python benchmarks/bench_response_cleaner.py
+
+Genera respuestas largas de rutinas (3-40 KB) con los artefactos habituales
+del asistente (anotaciones 【4:0†source】, marcadores, HTML residual, emojis,
+espacios y puntuación repetidos), verifica que clean_response,
+format_routine_response y enhance_response_formatting producen exactamente el
+mismo texto que la implementación anterior y compara tiempos.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.response_cleaner import ResponseCleaner
+
+
+class LegacyResponseCleaner(ResponseCleaner):
+    """Implementación anterior: cada patrón con re.sub/re.search por separado"""
+
+    def clean_response(self, response):
+        if not response or not isinstance(response, str):
+            return ""
+        cleaned = response.strip()
+        for pattern in self.unwanted_patterns:
+            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE | re.MULTILINE)
+        for pattern in self.unwanted_starting_patterns:
+            match = re.search(pattern, cleaned, flags=re.IGNORECASE | re.DOTALL)
+            if match:
+                cleaned = cleaned[match.end():]
+                break
+        for pattern, replacement in self.improvements.items():
+            cleaned = re.sub(pattern, replacement, cleaned, flags=re.MULTILINE)
+        cleaned = cleaned.strip()
+        if not cleaned or len(cleaned) < 10:
+            return "🤔 Respuesta procesada pero no clara. Por favor, reformula tu pregunta."
+        return cleaned
+
+    def format_routine_response(self, response):
+        cleaned = self.clean_response(response)
+        routine_improvements = {
+            r'(\d+\.\s*[🍑⚡💪🔥🚀].*?)(?=\d+\.|\Z)': r'\1\n',
+            r'([•\-\*])\s*([A-ZÁÉÍÓÚ].*?)(?=\n|$)': r'\1 \2',
+            r'(\d+)\s*x\s*(\d+)': r'\1 x \2',
+            r'(\d+)\s*seg': r'\1 seg',
+            r'(\d+)\s*min': r'\1 min',
+        }
+        for pattern, replacement in routine_improvements.items():
+            cleaned = re.sub(pattern, replacement, cleaned, flags=re.MULTILINE)
+        return cleaned
+
+    def enhance_response_formatting(self, response):
+        enhanced = self.clean_response(response)
+        error_response = self.detect_and_clean_error_response(enhanced)
+        if error_response:
+            return error_response
+        formatting_improvements = {
+            r'([🎯💪⚡🔥🚀🍑])([A-ZÁÉÍÓÚ])': r'\1 \2',
+            r'^([•\-\*])\s*': r'\1 ',
+            r'(\.\s+)([a-záéíóú])': lambda m: m.group(1) + m.group(2).upper(),
+            r'(\d+)\s*\.\s*([A-ZÁÉÍÓÚ])': r'\1. \2',
+        }
+        for pattern, replacement in formatting_improvements.items():
+            enhanced = re.sub(pattern, replacement, enhanced, flags=re.MULTILINE)
+        return enhanced.strip()
+
+
+OPENINGS = [
+    "", "【4:0†source】 ", "[ASSISTANT] ", "Claro, aquí tienes. ", "<div class='msg'>",
+    "Entendido... ", "¡Perfecto! ", "Para tu atleta, ", "Voy a preparar ", "¡Hola Ana! ",
+]
+EXERCISES = ["Sentadilla búlgara", "Press banca", "Peso muerto rumano", "Hip thrust", "Dominadas",
+             "Saltos al cajón", "Plancha lateral", "Remo con mancuerna", "Sprint 20m", "Zancadas"]
+ARTIFACTS = ["【4:0†source】", "【12:3†source】", "<br/>", "&nbsp;", "</span>", "<span style='x'>",
+             "[metadata: run_42]", "[id: msg_9]", "<|endoftext|>", "​", "&amp;", "[SYSTEM]"]
+EMOJIS = ["💪", "🔥", "⚡", "🎯", "🚀", "🍑", "✅", "📋"]
+
+
+def make_response(target_kb, rng):
+    """Respuesta sintética de rutina con ~target_kb KB"""
+    parts = [rng.choice(OPENINGS), "[INICIO_NUEVA_RUTINA]\n**📝 RUTINA: Fuerza y potencia**\n\n"]
+    day = 1
+    while sum(len(p) for p in parts) < target_kb * 1024:
+        parts.append(f"### {rng.choice(EMOJIS)} DÍA {day} - FUERZA Y POTENCIA{rng.choice(['', '!!', '...'])}\n")
+        for n in range(rng.randint(4, 9)):
+            exercise = rng.choice(EXERCISES)
+            artifact = rng.choice(ARTIFACTS) if rng.random() < 0.15 else ""
+            spacing = rng.choice([" ", "  ", "   ", "\t "])
+            parts.append(f"{rng.choice(['-', '•', '*', str(n + 1) + '.'])}{spacing}{exercise}: "
+                         f"{rng.randint(3, 5)}x{rng.randint(5, 12)} {rng.choice(['', '30seg', '2 min', 'controlado.'])}"
+                         f"{artifact} {rng.choice(EMOJIS) if rng.random() < 0.3 else ''}"
+                         f"{rng.choice(['', '..', '??', ' descanso. luego repite'])}\n")
+        parts.append(rng.choice(["\n", "\n\n", "\n\n\n\n", " \n \n\n"]))
+        day += 1
+    parts.append("¿Alguna pregunta?? 💪💪 ¡Vamos!!!")
+    return "".join(parts)
+
+
+def best_of(func, texts, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(texts)
+
+
+def main():
+    rng = random.Random(7)
+    legacy, combined = LegacyResponseCleaner(), ResponseCleaner()
+
+    for size_kb in (3, 10, 40):
+        texts = [make_response(size_kb, rng) for _ in range(20)]
+        for method in ("clean_response", "format_routine_response", "enhance_response_formatting"):
+            old_func, new_func = getattr(legacy, method), getattr(combined, method)
+            identical = all(old_func(text) == new_func(text) for text in texts)
+            old_ms, new_ms = best_of(old_func, texts), best_of(new_func, texts)
+            print(f"{size_kb:>3} KB {method:<28} anterior {old_ms:7.2f} ms | combinado {new_ms:7.2f} ms "
+                  f"| x{old_ms / new_ms:4.1f} | idéntico: {identical}")
+
+
+if __name__ == "__main__":
+    main()
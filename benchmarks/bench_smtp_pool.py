@@ -0,0 +1,136 @@
+"""
+Benchmark de envío de emails: conexión SMTP por email vs. pool de sesiones
+
+Uso:
+    pip install aiosmtpd
+    python benchmarks/bench_smtp_pool.py [num_emails] [latencia_ms]
+
+Levanta un servidor SMTP local con aiosmtpd (con AUTH, sin TLS) que añade una
+latencia artificial a cada respuesta para simular la ida y vuelta a un
+servidor real, y mide emails/segundo enviando N emails (por defecto 100) con
+adjunto: primero abriendo una sesión por email (comportamiento anterior) y
+después a través de SMTPConnectionPool.
+"""
+
+import asyncio
+import os
+import smtplib
+import sys
+import time
+import warnings
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email import encoders
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import SMTP, AuthResult
+except ImportError:
+    print("aiosmtpd no está instalado: pip install aiosmtpd")
+    sys.exit(1)
+
+from modules.smtp_pool import SMTPConnectionPool
+
+warnings.filterwarnings("ignore", message="Session.login_data")
+
+USERNAME, PASSWORD = "coach@profit.local", "secret"
+
+
+class CountingHandler:
+    """Handler que acepta y cuenta los mensajes recibidos"""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def authenticator(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.login == USERNAME.encode() and auth_data.password == PASSWORD.encode())
+
+
+class LatencyController(Controller):
+    """Controller cuyo servidor espera `latency` segundos antes de cada respuesta"""
+
+    def __init__(self, handler, latency, **kwargs):
+        self.latency = latency
+        super().__init__(handler, **kwargs)
+
+    def factory(self):
+        latency = self.latency
+
+        class LatencySMTP(SMTP):
+            async def push(self, status):
+                await asyncio.sleep(latency)
+                await super().push(status)
+
+        return LatencySMTP(self.handler, **self.SMTP_kwargs)
+
+
+def build_message(index, attachment):
+    msg = MIMEMultipart('alternative')
+    msg['From'] = f"ProFit Coach <{USERNAME}>"
+    msg['To'] = f"atleta{index}@profit.local"
+    msg['Subject'] = f"Tu Plan de Entrenamiento {index}"
+    msg.attach(MIMEText("<p>Rutina adjunta</p>", 'html', 'utf-8'))
+    part = MIMEBase('application', 'octet-stream')
+    part.set_payload(attachment)
+    encoders.encode_base64(part)
+    part.add_header('Content-Disposition', 'attachment; filename= rutina.xlsx')
+    msg.attach(part)
+    return msg
+
+
+def send_one_connection_per_email(host, port, messages):
+    """Comportamiento anterior: conexión + login por cada email"""
+    for msg in messages:
+        with smtplib.SMTP(host, port) as server:
+            server.login(USERNAME, PASSWORD)
+            server.send_message(msg)
+
+
+def send_with_pool(host, port, messages):
+    pool = SMTPConnectionPool(host, port, USERNAME, PASSWORD, use_tls=False)
+    for msg in messages:
+        pool.send_message(msg)
+    pool.close_all()
+    return pool.stats
+
+
+def main():
+    num_emails = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+
+    handler = CountingHandler()
+    controller = LatencyController(
+        handler, latency, hostname="127.0.0.1", port=8025,
+        authenticator=authenticator, auth_require_tls=False
+    )
+    controller.start()
+    try:
+        attachment = os.urandom(20 * 1024)  # ~20 KB, tamaño típico de una rutina en xlsx
+        messages = [build_message(i, attachment) for i in range(num_emails)]
+
+        start = time.perf_counter()
+        send_one_connection_per_email(controller.hostname, controller.port, messages)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = send_with_pool(controller.hostname, controller.port, messages)
+        pooled = time.perf_counter() - start
+
+        print(f"{num_emails} emails, latencia simulada {latency * 1000:.0f} ms por respuesta")
+        print(f"  conexión por email: {legacy:6.2f} s  ({num_emails / legacy:6.1f} emails/s)")
+        print(f"  pool de sesiones:   {pooled:6.2f} s  ({num_emails / pooled:6.1f} emails/s)  {stats}")
+        print(f"  recibidos por el servidor: {handler.received}")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark de clasificación de deportes (índice normalizado vs. búsqueda lineal)
+
+Uso:
+    python benchmarks/bench_sport_index.py
+
+Compara la clasificación anterior (minúsculas + subcadena sobre los ejemplos de
+cada categoría) con classify_sport (índice con tildes normalizadas, sinónimos,
+trigramas para errores de tipeo y caché LRU) sobre nombres de deportes tal
+como los escriben los entrenadores. Lista los casos que cambian de categoría y
+mide el tiempo por búsqueda en frío y con la caché caliente.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.training_variations import SPORT_ADAPTATION_PRINCIPLES, classify_sport
+
+SPORTS = [
+    "Fútbol", "futbol", "Futbolista juvenil", "Fútbol sala", "Futbool", "Soccer", "Rugby", "Básquet",
+    "Baloncesto", "Basketball", "Hockey", "Balonmano", "Voleibol", "Pádel",
+    "Natación", "natacion", "Natasion", "Ciclismo", "Ciclsmo", "Remo", "Atletismo fondo",
+    "Maratón", "Triatlón", "Trail running", "Running",
+    "Tenis", "Golf", "Tiro con arco", "Arquería", "Tenis de mesa",
+    "Boxeo", "boxoe", "Artes marciales", "MMA", "Judo", "Karate", "Lucha", "Jiu-Jitsu",
+    "Crossfit", "Halterofilia", "Calistenia", "Escalada", "General", "",
+]
+
+
+def legacy_classify(sport):
+    """Réplica de la clasificación anterior"""
+    sport_lower = sport.lower()
+    for category, data in SPORT_ADAPTATION_PRINCIPLES.items():
+        for example_sport in data["ejemplos"]:
+            if example_sport in sport_lower:
+                return category
+    return "deportes_intermitentes"
+
+
+def time_lookups(func, sports, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sport in sports:
+            func(sport)
+    return (time.perf_counter() - start) / (repeat * len(sports)) * 1e6
+
+
+def main():
+    changed = [(s, legacy_classify(s), classify_sport(s)) for s in SPORTS if legacy_classify(s) != classify_sport(s)]
+    print(f"{len(SPORTS)} deportes, {len(changed)} cambian de categoría:")
+    for sport, old, new in changed:
+        print(f"  {sport!r:<22} {old:<24} -> {new}")
+
+    classify_sport.cache_clear()
+    start = time.perf_counter()
+    for sport in SPORTS:
+        classify_sport(sport)
+    cold_us = (time.perf_counter() - start) / len(SPORTS) * 1e6
+
+    print(f"\nanterior: {time_lookups(legacy_classify, SPORTS):6.2f} µs/búsqueda")
+    print(f"índice:   {cold_us:6.2f} µs/búsqueda en frío | {time_lookups(classify_sport, SPORTS):6.2f} µs con caché")
+    print(f"caché: {classify_sport.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de arranque en frío de main.py con `python -X importtime`
+
+Uso:
+    python benchmarks/bench_startup.py [presupuesto_ms] [repeticiones]
+
+Importa main en un intérprete nuevo varias veces (por defecto 5) y toma el
+mejor tiempo acumulado de `import main` según -X importtime, con los módulos
+que más tardan. Falla (código de salida 1) si el arranque supera el
+presupuesto (por defecto STARTUP_BUDGET_MS) o si alguna de las librerías
+pesadas que deben cargarse en el primer uso (pandas, openpyxl, openai, fpdf)
+se importa al arrancar. Sirve como chequeo en CI contra regresiones.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_BUDGET_MS = 800  # ~420 ms medidos; antes de diferir imports eran ~1900 ms
+LAZY_MODULES = ("pandas", "openpyxl", "openai", "fpdf")
+TOP_MODULES = 8
+
+
+def import_main():
+    """Importa main en un proceso nuevo y devuelve {módulo: (propio_us, acumulado_us)}"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///benchmark")  # config exige una URL al importar
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main falló:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(own), int(cumulative))
+    return timings
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else STARTUP_BUDGET_MS
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    runs = [import_main() for _ in range(repeat)]
+    best = min(runs, key=lambda timings: timings["main"][1])
+    startup_ms = best["main"][1] / 1000
+
+    print(f"import main: {startup_ms:.0f} ms (mejor de {repeat}, presupuesto {budget_ms:.0f} ms)")
+    top_level = sorted(
+        ((cumulative, name) for name, (_, cumulative) in best.items() if "." not in name and name != "main"),
+        reverse=True
+    )
+    for cumulative, name in top_level[:TOP_MODULES]:
+        print(f"  {name:<28} {cumulative / 1000:8.1f} ms")
+
+    eager = [name for name in LAZY_MODULES if name in best]
+    failed = False
+    if eager:
+        print(f"❌ Se importan al arrancar (deberían cargarse en el primer uso): {', '.join(eager)}")
+        failed = True
+    if startup_ms > budget_ms:
+        print(f"❌ El arranque supera el presupuesto en {startup_ms - budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ Arranque dentro del presupuesto")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de limpieza incremental (StreamingResponseCleaner)
+
+Uso:
+    python benchmarks/bench_streaming_cleaner.py [num_respuestas]
+
+Parte respuestas sintéticas de rutinas (las de bench_response_cleaner más
+casos con marcas cortadas, '<' sueltos y saludos al final) en fragmentos de
+distintos tamaños, como llegarían de un stream, y verifica que el resultado
+de finish() es idéntico a clean_response() del texto completo. Mide además
+el coste total frente a limpiar una sola vez al final y cuánto texto queda
+retenido en promedio mientras llegan los fragmentos.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.response_cleaner import response_cleaner, StreamingResponseCleaner
+from benchmarks.bench_response_cleaner import make_response
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "hola",
+    "Texto previo 【4:0†source】 y luego ¡Hola equipo!!! ...",
+    "Anotación partida 【a】 b†c】 en la misma línea, Para terminar",
+    "Anotación sin cierre 【abc\nsigue Como siempre",
+    "Peso < 50kg y <div\nclass='x'>bloque</div> <br  /> <BR> &NBSP;&amp;",
+    "[metadata: x] [ASSISTANT] [Ejercicio 1] x [series x reps] [id:\n9]",
+    "Marca <|endoftext|> y <| abierta\nVoy a crear la rutina",
+    "Para empezar la rutina... y al final Bienvenido!!",
+    "Ho【x】la equipo, Perfecto entonces",
+    "BİENVENIDO a ıhola Para todos",
+    "   \n\n\n💪 💪 Voy?? ok\n\n\n\n",
+    "Fin con espacios y puntos ...   \n\n",
+]
+
+
+def split_chunks(text, rng, mode):
+    """Divide el texto en fragmentos: de 1 carácter, tipo token o aleatorios"""
+    if mode == "char":
+        return list(text)
+    if mode == "token":
+        sizes = lambda: rng.randint(1, 6)
+    else:
+        sizes = lambda: rng.randint(1, 200)
+    chunks, position = [], 0
+    while position < len(text):
+        size = sizes()
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+def stream_clean(chunks):
+    cleaner = StreamingResponseCleaner()
+    held = 0
+    for chunk in chunks:
+        cleaner.feed(chunk)
+        held += len(cleaner._pending) + len(cleaner._clean) - cleaner._improved_upto
+    return cleaner.finish(), held / max(len(chunks), 1)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rng = random.Random(11)
+    texts = EDGE_CASES + [make_response(rng.choice((3, 10, 40)), rng) for _ in range(count)]
+
+    mismatches = 0
+    for text in texts:
+        expected = response_cleaner.clean_response(text)
+        for mode in ("char", "token", "random"):
+            result, _ = stream_clean(split_chunks(text, rng, mode))
+            if result != expected:
+                mismatches += 1
+                print(f"DIFERENCIA ({mode}): {text[:60]!r}")
+    print(f"{len(texts)} respuestas x 3 particiones, diferencias: {mismatches}")
+
+    long_texts = [make_response(40, rng) for _ in range(5)]
+    token_chunks = [split_chunks(text, rng, "token") for text in long_texts]
+
+    start = time.perf_counter()
+    for text in long_texts:
+        response_cleaner.clean_response(text)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(long_texts)
+
+    start = time.perf_counter()
+    held = [stream_clean(chunks)[1] for chunks in token_chunks]
+    stream_ms = (time.perf_counter() - start) * 1000 / len(long_texts)
+
+    chunks_per_text = sum(len(chunks) for chunks in token_chunks) / len(token_chunks)
+    print(f"40 KB, ~{chunks_per_text:.0f} fragmentos tipo token por respuesta")
+    print(f"  limpieza al final: {batch_ms:7.2f} ms")
+    print(f"  incremental:       {stream_ms:7.2f} ms en total ({stream_ms * 1000 / chunks_per_text:.1f} µs por fragmento)")
+    print(f"  caracteres retenidos en promedio: {sum(held) / len(held):.1f}")
+
+
+if __name__ == "__main__":
+    main()
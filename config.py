@@ -86,6 +86,9 @@ class Config:
     DB_USER = get_secret("DB_USER", "")
     DB_PASSWORD = get_secret("DB_PASSWORD", "")
     
+    # Directorio de las bases SQLite locales (profit_coach.db y ai_cache.db)
+    DATA_DIR = get_secret("DATA_DIR", "/workspaces/ProFit Coach", "app", silent=True) or "/workspaces/ProFit Coach"
+    
     # Database Configuration - Prioridad: Streamlit secrets -> ENV
     DATABASE_URL = get_secret("url", section="database") or get_secret("DATABASE_URL", "")
     
@@ -104,12 +107,35 @@ class Config:
     EMAIL_PASSWORD = get_secret("password", section="email") or get_secret("EMAIL_PASSWORD", "")
     EMAIL_FROM_NAME = get_secret("from_name", "ProFit Coach", section="email") or get_secret("EMAIL_FROM_NAME", "ProFit Coach")
     EMAIL_FROM_EMAIL = get_secret("from_email", section="email") or get_secret("EMAIL_FROM_EMAIL", "")
+    EMAIL_POOL_SIZE = int(get_secret("EMAIL_POOL_SIZE", "3", "app", silent=True) or "3")  # Sesiones SMTP concurrentes
+    EMAIL_IDLE_TIMEOUT = int(get_secret("EMAIL_IDLE_TIMEOUT", "60", "app", silent=True) or "60")  # Segundos antes de reconectar
+    EMAIL_MAX_ATTEMPTS = int(get_secret("EMAIL_MAX_ATTEMPTS", "5", "app", silent=True) or "5")  # Intentos antes de marcar como fallido
+    EMAIL_RETRY_BACKOFF_SECONDS = int(get_secret("EMAIL_RETRY_BACKOFF_SECONDS", "30", "app", silent=True) or "30")  # Base del backoff exponencial
+    EMAIL_BULK_RATE_PER_SECOND = float(get_secret("EMAIL_BULK_RATE_PER_SECOND", "2", "app", silent=True) or "2")  # Envíos por segundo del worker de la bandeja de salida
     
     # Configuración de la aplicación (silenciosas para evitar warnings innecesarios)
     MAX_ATHLETES_PER_USER = int(get_secret("MAX_ATHLETES_PER_USER", "100", "app", silent=True) or "100")  # Aumentado para producción
     MAX_MESSAGE_LENGTH = int(get_secret("MAX_MESSAGE_LENGTH", "8000", "app", silent=True) or "8000")  # Aumentado para archivos
     CHAT_HISTORY_LIMIT = int(get_secret("CHAT_HISTORY_LIMIT", "100", "app", silent=True) or "100")  # Más historial
+    CHAT_PAGE_SIZE = int(get_secret("CHAT_PAGE_SIZE", "30", "app", silent=True) or "30")  # Mensajes visibles por página del chat
     SESSION_TIMEOUT_DAYS = int(get_secret("SESSION_TIMEOUT_DAYS", "30", "app", silent=True) or "30")
+    SESSION_SECRET_KEY = get_secret("SESSION_SECRET_KEY", "", "app", silent=True)  # Clave HMAC de los tokens de sesión (sin ella, una aleatoria por proceso)
+    _session_revocation = get_secret("SESSION_REVOCATION", "true", "app", silent=True)
+    SESSION_REVOCATION = _session_revocation if isinstance(_session_revocation, bool) else str(_session_revocation).lower() == "true"  # Tabla session_revocations (logout / cambio de contraseña)
+    PROFILE_CACHE_TTL_SECONDS = int(get_secret("PROFILE_CACHE_TTL_SECONDS", "300", "app", silent=True) or "300")  # Caché de usuarios y atletas entre sesiones
+    BCRYPT_ROUNDS = int(get_secret("BCRYPT_ROUNDS", "12", "app", silent=True) or "12")  # Coste de bcrypt; los hashes con otro coste se regeneran al hacer login
+    PASSWORD_HASH_WORKERS = int(get_secret("PASSWORD_HASH_WORKERS", "2", "app", silent=True) or "2")  # Procesos para bcrypt (0 = en el hilo de la petición)
+    TEXT_COMPRESSION_MIN_CHARS = int(get_secret("TEXT_COMPRESSION_MIN_CHARS", "2048", "app", silent=True) or "2048")  # Mensajes y respuestas cacheadas más largos se guardan comprimidos y deduplicados (0 = desactivado)
+    
+    # Templates rápidos de 6 bloques resueltos sin IA (modules/routine_generator.py)
+    _offline_quick_templates = get_secret("OFFLINE_QUICK_TEMPLATES", "true", "app", silent=True)
+    OFFLINE_QUICK_TEMPLATES = _offline_quick_templates if isinstance(_offline_quick_templates, bool) else str(_offline_quick_templates).lower() == "true"
+    
+    # Precalentamiento del cache de templates rápidos (modules/template_warmup.py)
+    TEMPLATE_CACHE_TTL_HOURS = int(get_secret("TEMPLATE_CACHE_TTL_HOURS", "168", "app", silent=True) or "168")  # Una semana
+    TEMPLATE_WARMUP_TOKEN_BUDGET = int(get_secret("TEMPLATE_WARMUP_TOKEN_BUDGET", "200000", "app", silent=True) or "200000")  # Tokens por ejecución
+    TEMPLATE_WARMUP_HOURS = get_secret("TEMPLATE_WARMUP_HOURS", "2-6", "app", silent=True) or "2-6"  # Franja horaria valle (hora local)
+    ROUTINE_JOB_WORKERS = int(get_secret("ROUTINE_JOB_WORKERS", "4", "app", silent=True) or "4")  # Generaciones de rutinas en paralelo
     
     # Configuración de logging
     LOG_LEVEL = get_secret("LOG_LEVEL", "INFO", "app", silent=True) or "INFO"  # Más detallado para producción inicial
@@ -206,12 +232,5 @@ def get_config():
         return DevelopmentConfig()
 
 # Instancia global de configuración
+# La validación (validate_config) la hace initialize_app al arrancar la sesión, no el import
 config = get_config()
-
-# Validar configuración al cargar
-try:
-    config.validate_config()
-    logging.info("✅ Configuración validada correctamente")
-except Exception as e:
-    logging.error(f"❌ Error en configuración: {e}")
-    raise
@@ -5,11 +5,9 @@ Versión 2.0 con manejo robusto de errores y UX mejorado
 
 import streamlit as st
 import streamlit.components.v1 as components
+from streamlit.errors import StreamlitAPIException
 import logging
 import time
-import pandas as pd
-import io
-import re
 import sys
 from datetime import datetime
 
@@ -41,11 +39,16 @@ from auth.auth_utils import (
 from modules.athlete_manager import (
     create_athletes_table, get_athletes_by_user, add_athlete, update_athlete, delete_athlete, get_athlete_data
 )
-from modules.chat_manager import create_chat_tables, create_thread_table
-from modules.chat_interface import handle_user_message, get_chat_history, detect_email_command, get_welcome_message
-from modules.routine_export import generate_routine_excel_from_chat, create_download_button
-from modules.email_manager import show_email_sending_interface
+from modules.chat_manager import create_chat_tables, create_thread_table, get_chat_window, get_earlier_cursor, get_chat_stats, search_chat_messages
+from modules.chat_interface import handle_user_message, detect_email_command, get_welcome_message
+from modules.routine_export import create_lazy_download_button, get_routine_excel
+from modules.chat_render import get_message_render_block
+from modules.bulk_export import create_bulk_export_button
+from modules.athlete_import import import_athletes, CSV_TEMPLATE
+from modules.email_manager import show_email_sending_interface, show_bulk_email_interface
+from modules.email_outbox import email_outbox_worker
 from auth.database import test_db_connection, initialize_connection_pool, create_tables_if_not_exist
+from auth.session_tokens import issue_session_token, verify_session_token, revoke_session_token
 
 # Configuración de página
 st.set_page_config(
@@ -192,6 +195,10 @@ def initialize_app():
                 ]
             )
         
+        # Validar configuración (se difiere hasta aquí para no hacerlo al importar config)
+        config.validate_config()
+        logging.info("✅ Configuración validada correctamente")
+        
         # Verificar conexión a BD (rápido)
         if not test_db_connection():
             st.error("❌ Error de conexión a la base de datos. Verifica la configuración.")
@@ -207,6 +214,9 @@ def initialize_app():
             create_tables_if_not_exist()
             st.session_state["tables_created"] = True
         
+        # Worker de emails: retoma los envíos pendientes de ejecuciones anteriores
+        email_outbox_worker.start()
+        
         # Gestionar estado de navegación
         navigation_state_manager()
         
@@ -242,10 +252,85 @@ def show_app_status():
             
             # Botón de logout mejorado
             if st.button("🚪 Cerrar Sesión", key="sidebar_logout", use_container_width=True):
-                st.session_state.clear()
+                end_user_session()
                 navigation_state_manager()
                 st.rerun()
 
+# Cookie con el token de sesión: sobrevive a recargas y reconexiones sin pasar por la URL
+SESSION_COOKIE_NAME = "profit_session"
+# Versiones anteriores ponían el token en la URL (?session=): se quita sin usarlo,
+# porque ese enlace pudo quedar en el historial, en logs o compartido
+LEGACY_SESSION_QUERY_PARAM = "session"
+
+def _schedule_session_cookie(token):
+    """Pide escribir (token) o borrar (None) la cookie de sesión en la próxima ejecución de main()"""
+    st.session_state["pending_session_cookie"] = token or ""
+
+def write_pending_session_cookie():
+    """Escribe o borra la cookie de sesión pendiente en el navegador
+
+    Streamlit no permite añadir cabeceras Set-Cookie, así que la cookie no puede
+    ser HttpOnly: se escribe con JavaScript, con SameSite=Strict y Secure en HTTPS.
+    """
+    if "pending_session_cookie" not in st.session_state:
+        return
+
+    token = st.session_state.pop("pending_session_cookie")
+    max_age = Config.SESSION_TIMEOUT_DAYS * 86400 if token else 0
+    components.html(f"""
+    <script>
+        const secure = window.parent.location.protocol === "https:" ? "; Secure" : "";
+        window.parent.document.cookie =
+            "{SESSION_COOKIE_NAME}={token}; Max-Age={max_age}; Path=/; SameSite=Strict" + secure;
+    </script>
+    """, height=0)
+
+def start_user_session(username):
+    """Abre la sesión del usuario y emite el token firmado que permite restaurarla"""
+    st.session_state["username"] = username
+    st.session_state["current_page"] = "main"
+
+    user_id = get_user_id(username)
+    if user_id:
+        token = issue_session_token(user_id, username)
+        st.session_state["user_id"] = user_id
+        st.session_state["session_token"] = token
+        _schedule_session_cookie(token)
+
+def strip_legacy_session_param():
+    """Quita de la URL el token de sesión de versiones anteriores, sin usarlo"""
+    if LEGACY_SESSION_QUERY_PARAM in st.query_params:
+        del st.query_params[LEGACY_SESSION_QUERY_PARAM]
+
+def restore_user_session():
+    """Restaura la sesión de un entrenador que vuelve con un token válido (sin BD ni bcrypt)"""
+    # Tras cerrar sesión, la conexión sigue viendo las cookies con las que se abrió
+    if st.session_state.get("username") or st.session_state.get("session_closed"):
+        return
+
+    token = st.context.cookies.get(SESSION_COOKIE_NAME)
+    if not token:
+        return
+
+    claims = verify_session_token(token)
+    if not claims:
+        # Caducado, revocado o manipulado: volver al login
+        st.session_state["session_closed"] = True
+        _schedule_session_cookie(None)
+        return
+
+    st.session_state["username"] = claims['usr']
+    st.session_state["user_id"] = claims['uid']
+    st.session_state["session_token"] = token
+    st.session_state["current_page"] = "main"
+
+def end_user_session():
+    """Cierra la sesión, revoca su token y borra la cookie"""
+    revoke_session_token(st.session_state.get("session_token"))
+    st.session_state.clear()
+    st.session_state["session_closed"] = True
+    _schedule_session_cookie(None)
+
 def login_screen():
     """Pantalla de login mejorada"""
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -297,8 +382,7 @@ def login_screen():
                             )
                             
                             if success:
-                                st.session_state["username"] = username.strip()
-                                st.session_state["current_page"] = "main"
+                                start_user_session(username.strip())
                                 st.success("✅ ¡Bienvenido!")
                                 time.sleep(1)
                                 st.rerun()
@@ -442,46 +526,62 @@ def password_reset_screen():
                             else:
                                 st.error(f"❌ {message}")
 
+def rerun_fragment():
+    """Vuelve a ejecutar solo el fragmento actual (toda la app si no estamos en un rerun del fragmento)"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def load_athletes(user_id):
+    """Atletas del usuario; cada región de la página los carga por su cuenta"""
+    return safe_execute(
+        lambda: get_athletes_by_user(user_id),
+        "Error al cargar atletas",
+        []
+    )
+
 def main_app(username):
-    """Aplicación principal mejorada"""
+    """Aplicación principal mejorada
+    
+    Cada región (atletas, gestión, chat, templates) es un st.fragment que carga
+    sus propios datos: una interacción dentro de una región solo vuelve a
+    ejecutar esa región. La navegación entre regiones usa st.rerun() completo.
+    """
     # Header
     col1, col2, col3 = st.columns([2, 3, 1])
     with col1:
         st.markdown('<div class="main-header">🏃‍♂️ ProFit Coach</div>', unsafe_allow_html=True)
     with col3:
         if st.button("🚪 Cerrar Sesión", type="secondary"):
-            st.session_state.clear()
+            end_user_session()
             navigation_state_manager()
             st.rerun()
     
-    # Obtener user_id de manera segura
-    user_id = safe_execute(
-        lambda: get_user_id(username),
-        "Error al obtener información del usuario"
-    )
-    
+    # Obtener user_id de manera segura (una vez por sesión)
+    user_id = st.session_state.get("user_id")
     if not user_id:
-        st.error("❌ Error al cargar información del usuario")
-        return
-    
-    # Obtener atletas
-    athletes = safe_execute(
-        lambda: get_athletes_by_user(user_id),
-        "Error al cargar atletas",
-        []
-    )
+        user_id = safe_execute(
+            lambda: get_user_id(username),
+            "Error al obtener información del usuario"
+        )
+        
+        if not user_id:
+            st.error("❌ Error al cargar información del usuario")
+            return
+        st.session_state["user_id"] = user_id
     
     # Mostrar atletas
-    show_athletes_section(athletes, user_id)
+    show_athletes_section(user_id)
     
     # Panel de gestión
-    show_athlete_management(athletes, user_id)
+    show_athlete_management(user_id)
     
     # Chat si hay atleta activo
-    show_chat_section(athletes)
+    show_chat_section(user_id)
     
     # Templates rápidos si están activos
-    show_quick_templates_section(athletes)
+    show_quick_templates_section(user_id)
 
 def process_uploaded_file(file):
     """Procesa un archivo adjunto y extrae su contenido"""
@@ -512,6 +612,7 @@ def process_uploaded_file(file):
         elif file_type in ['application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'application/vnd.ms-excel'] or file.name.endswith(('.xlsx', '.xls')):
             # Archivos Excel
             try:
+                import pandas as pd  # Solo al adjuntar un Excel: pandas tarda ~0.4 s en importarse
                 df = pd.read_excel(file, nrows=50)  # Limitar a 50 filas
                 content = df.to_string(max_rows=20, max_cols=10)
                 return f"📊 **{file.name}** ({file_size:.1f} KB) - Contenido Excel:\n```\n{content}\n```"
@@ -538,8 +639,11 @@ def process_uploaded_file(file):
         logging.error(f"Error procesando archivo {getattr(file, 'name', 'unknown')}: {e}")
         return f"❌ **{getattr(file, 'name', 'archivo')}** - Error al procesar archivo: {str(e)}"
 
-def show_athletes_section(athletes, user_id):
+@st.fragment
+def show_athletes_section(user_id):
     """Muestra la sección de atletas con tarjetas mejoradas"""
+    athletes = load_athletes(user_id)
+    
     st.markdown("---")
     st.markdown("## 🏃‍♂️ Tus Atletas")
     
@@ -578,6 +682,13 @@ def show_athletes_section(athletes, user_id):
                     ):
                         st.session_state["show_quick_templates"] = athlete[0]
                         st.rerun()
+        
+        # 📦 Exportación masiva de la última rutina de cada atleta
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            create_bulk_export_button(user_id)
+            with st.expander("📨 Enviar rutinas por email a varios atletas"):
+                show_bulk_email_interface(user_id, athletes)
     else:
         st.markdown("""
         <div style='text-align:center; padding:60px 20px; background:#F8FAFC; border-radius:12px; border:2px dashed #E2E8F0;'>
@@ -586,14 +697,17 @@ def show_athletes_section(athletes, user_id):
         </div>
         """, unsafe_allow_html=True)
 
-def show_athlete_management(athletes, user_id):
+@st.fragment
+def show_athlete_management(user_id):
     """Panel de gestión de atletas mejorado"""
+    athletes = load_athletes(user_id)
+    
     st.markdown("---")
     
     # 🔽 GESTIÓN DE ATLETAS con expander pero título grande
     with st.expander("## ⚙️ Gestión de Atletas", expanded=False):
         # 🔄 REORDENADO: Primero "Agregar Nuevo", después "Editar"
-        tab1, tab2 = st.tabs(["➕ Agregar Nuevo", "✏️ Editar Atleta"])
+        tab1, tab2, tab3 = st.tabs(["➕ Agregar Nuevo", "✏️ Editar Atleta", "📥 Importar"])
         
         # 🆕 TAB 1: AGREGAR NUEVO (AHORA PRIMERA)
         with tab1:
@@ -714,17 +828,62 @@ def show_athlete_management(athletes, user_id):
                 with col_cancel:
                     if st.button("❌ Cancelar", use_container_width=True):
                         del st.session_state[f"confirm_delete_{athlete_data[0]}"]
-                        st.rerun()
+                        rerun_fragment()
             else:
                 st.info("ℹ️ No tienes atletas registrados para editar")
 
-def show_quick_templates_section(athletes):
+        # 📥 TAB 3: IMPORTACIÓN MASIVA DESDE CSV/EXCEL
+        with tab3:
+            show_athlete_import(user_id, len(athletes))
+
+def show_athlete_import(user_id, athlete_count):
+    """Carga masiva de atletas desde un CSV o Excel con resumen de errores por fila"""
+    st.markdown("### 📥 Importar atletas")
+    st.caption(
+        f"Columnas: nombre y deporte (obligatorias), nivel, objetivos y email. "
+        f"Tienes {athlete_count} de {Config.MAX_ATHLETES_PER_USER} atletas."
+    )
+    st.download_button(
+        "📄 Descargar plantilla CSV",
+        data=CSV_TEMPLATE.encode('utf-8-sig'),
+        file_name="plantilla_atletas.csv",
+        mime="text/csv"
+    )
+
+    uploaded_file = st.file_uploader("📂 Archivo de atletas", type=["csv", "xlsx"], key="athlete_import_file")
+    if uploaded_file and st.button("📥 Importar atletas", type="primary", use_container_width=True):
+        with st.spinner("Importando atletas..."):
+            summary = safe_execute(
+                lambda: import_athletes(user_id, uploaded_file, uploaded_file.name),
+                "Error al importar atletas"
+            )
+        if summary:
+            st.session_state["athlete_import_summary"] = summary
+            if summary['imported']:
+                st.rerun()
+
+    summary = st.session_state.get("athlete_import_summary")
+    if summary:
+        if summary['imported']:
+            st.success(f"✅ {summary['imported']} de {summary['total_rows']} atletas importados")
+        if summary['duplicates']:
+            st.info(f"ℹ️ {summary['duplicates']} filas omitidas por nombre duplicado")
+        if summary['errors']:
+            st.warning(f"⚠️ {len(summary['errors'])} filas no se importaron")
+            st.dataframe(
+                [{"Fila": row or "-", "Motivo": message} for row, message in summary['errors']],
+                use_container_width=True,
+                hide_index=True
+            )
+
+@st.fragment
+def show_quick_templates_section(user_id):
     """Sección de templates rápidos"""
     athlete_id = st.session_state.get("show_quick_templates")
     
     if athlete_id:
         athlete_name = None
-        for a in athletes:
+        for a in load_athletes(user_id):
             if a[0] == athlete_id:
                 athlete_name = a[1]
                 break
@@ -763,13 +922,275 @@ def show_quick_templates_section(athletes):
         except Exception as e:
             st.error(f"❌ Error ejecutando templates: {e}")
 
-def show_chat_section(athletes):
+def load_earlier_chat_messages(athlete_id, oldest_loaded_id):
+    """Amplía la ventana del chat una página hacia atrás (callback del botón)"""
+    earlier_from = get_earlier_cursor(athlete_id, oldest_loaded_id, Config.CHAT_PAGE_SIZE)
+    if earlier_from is not None:
+        st.session_state[f"chat_window_from_{athlete_id}"] = earlier_from
+
+@st.fragment
+def show_chat_search(user_id, athlete_id):
+    """Búsqueda en el historial (índice FTS5): escribir no recarga la página ni el chat"""
+    with st.expander("🔎 Buscar en el historial", expanded=False):
+        col_query, col_scope = st.columns([3, 1])
+        with col_query:
+            query = st.text_input(
+                "Buscar",
+                placeholder="Ej: rutina isquiotibiales",
+                label_visibility="collapsed",
+                key=f"chat_search_{athlete_id}"
+            )
+        with col_scope:
+            all_athletes = st.checkbox("Todos mis atletas", key=f"chat_search_all_{athlete_id}")
+        
+        if not query.strip():
+            return
+        
+        results = safe_execute(
+            lambda: search_chat_messages(query, user_id, None if all_athletes else athlete_id),
+            "Error al buscar en el historial",
+            []
+        )
+        if not results:
+            st.info("ℹ️ No se encontraron mensajes")
+            return
+        
+        for result in results:
+            author = "👤 Entrenador" if result['is_user'] else "🤖 ProFit Coach"
+            st.caption(f"{result['athlete_name']} · {author} · {result['created_at']}")
+            st.markdown(result['snippet'])
+
+@st.fragment
+def show_chat_panel(athlete_id, athlete_name):
+    """Historial y caja de mensajes del chat: se vuelve a ejecutar sola, sin recargar la página"""
+    # Ventana del chat: últimos CHAT_PAGE_SIZE mensajes, ampliable hacia atrás por keyset
+    window_key = f"chat_window_from_{athlete_id}"
+    chat_window, has_earlier = safe_execute(
+        lambda: get_chat_window(athlete_id, Config.CHAT_PAGE_SIZE, st.session_state.get(window_key)),
+        "Error al cargar historial",
+        ([], False)
+    )
+    
+    if has_earlier:
+        st.button(
+            "⬆️ Cargar mensajes anteriores",
+            key=f"load_earlier_{athlete_id}",
+            on_click=load_earlier_chat_messages,
+            args=(athlete_id, chat_window[0][0]),
+            use_container_width=True
+        )
+    
+    # Contenedor del chat
+    chat_container = st.container(height=500, border=True)
+    
+    with chat_container:
+        if not chat_window:
+            # Mostrar mensaje de bienvenida personalizado
+            welcome_msg = get_welcome_message(athlete_id)
+            st.markdown(f"""
+                <div style='text-align:center; padding:40px; color:#1F2937; background:#f8fafc; border-radius:12px;'>
+                    {welcome_msg.replace(chr(10), '<br>')}
+                </div>
+                """, unsafe_allow_html=True)
+        
+        for message_db_id, msg, is_user, created_at in chat_window:
+            # Bloque ya formateado (solo se procesa la primera vez que aparece el mensaje)
+            render_block = get_message_render_block(msg, is_user)
+            st.markdown(render_block["html"], unsafe_allow_html=True)
+            
+            if not is_user:
+                # Generar ID único para este mensaje
+                try:
+                    # Convertir created_at a datetime si es string
+                    if isinstance(created_at, str):
+                        # Intentar parsear el formato SQLite
+                        try:
+                            date_obj = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                            date_str = date_obj.strftime('%Y%m%d_%H%M%S')
+                        except:
+                            date_str = 'no_date'
+                    elif created_at:
+                        date_str = created_at.strftime('%Y%m%d_%H%M%S')
+                    else:
+                        date_str = 'no_date'
+                except:
+                    date_str = 'no_date'
+                
+                message_id = f"{athlete_id}_{message_db_id}_{date_str}"
+                
+                # Detectar si es una rutina
+                if render_block["kind"] == "routine":
+                    # Botones de descarga/email: el Excel se genera solo al pedirlo
+                    col1, col2, col3 = st.columns([1, 1, 1])
+                    
+                    with col1:
+                        create_lazy_download_button(athlete_id, msg, athlete_name, "Rutina_Entrenamiento", unique_id=message_id)
+                    
+                    with col2:
+                        # Botón para enviar por email
+                        if st.button("📧 Enviar por Email", key=f"email_{message_id}", use_container_width=True):
+                            # Obtener datos del atleta para el email
+                            athlete_data = get_athlete_data(athlete_id)
+                            
+                            if athlete_data:
+                                # Mostrar interfaz de envío de email
+                                st.session_state[f"show_email_interface_{message_id}"] = True
+                                rerun_fragment()
+                    
+                    with col3:
+                        # Espacio reservado para futuros botones
+                        st.write("")
+                    
+                    # Mostrar interfaz de email si se solicitó
+                    if st.session_state.get(f"show_email_interface_{message_id}", False):
+                        st.markdown("---")
+                        
+                        athlete_data = get_athlete_data(athlete_id)
+                        excel_data = get_routine_excel(athlete_id, msg, unique_id=message_id)
+                        if athlete_data and excel_data:
+                            show_email_sending_interface(athlete_data, excel_data, f"Rutina_{athlete_name}_{datetime.now().strftime('%Y%m%d')}.xlsx")
+                        
+                        # Botón para cerrar la interfaz
+                        if st.button("❌ Cerrar", key=f"close_email_{message_id}"):
+                            st.session_state[f"show_email_interface_{message_id}"] = False
+                            rerun_fragment()
+                    
+                    st.markdown("""
+                        <div style='text-align:center; margin:10px 0; padding:10px; background:#e8f5e8; border-radius:8px; color:#2d5a2d; font-size:0.9em;'>
+                            ✅ <strong>Rutina lista para descargar y enviar</strong><br>
+                            📁 Incluye: Días de entrenamiento y ejercicios detallados en Excel
+                        </div>
+                        """, unsafe_allow_html=True)
+                elif render_block["is_complete_routine"]:
+                    col1, col2, col3 = st.columns([1, 2, 1])
+                    with col2:
+                        st.markdown("---")
+                        st.markdown("**💡 ¿Quieres descargar esta rutina en Excel?**")
+                        # 🔄 SOLO mostrar botón de descarga (SIN email), generado bajo demanda
+                        create_lazy_download_button(athlete_id, msg, athlete_name, "Rutina_Entrenamiento", unique_id=f"{message_id}_alt")
+    
+    # Input del chat con adjuntar archivos integrado estilo ChatGPT
+    
+    # File uploader fuera del form para evitar conflictos
+    attach_key = f"show_attach_{athlete_id}"
+    uploaded_files = None
+    
+    # Mostrar file uploader si se activó
+    if st.session_state.get(attach_key, False):
+        st.markdown("**📎 Selecciona archivos para adjuntar**")
+        uploaded_files = st.file_uploader(
+            "Archivos",
+            type=['pdf', 'jpg', 'jpeg', 'png', 'gif', 'xlsx', 'xls', 'docx', 'txt'],
+            accept_multiple_files=True,
+            key=f"file_uploader_{athlete_id}",
+            label_visibility="collapsed"
+        )
+        
+        # Mostrar preview de archivos seleccionados
+        if uploaded_files:
+            st.markdown("**📋 Archivos adjuntos:**")
+            cols = st.columns(min(len(uploaded_files), 4))
+            for idx, file in enumerate(uploaded_files):
+                with cols[idx % 4]:
+                    file_size = len(file.getvalue()) / 1024  # KB
+                    if file.type and file.type.startswith('image/'):
+                        st.image(file, width=80)
+                    st.caption(f"{file.name} ({file_size:.1f} KB)")
+    
+    # Formulario del chat
+    with st.form("chat_input_form", clear_on_submit=True, border=False):
+        # 3 columnas: input, enviar, adjuntar (REORDENADO)
+        col_input, col_send, col_attach = st.columns([4.5, 1, 0.5])
+        
+        with col_input:
+            # Placeholder dinámico según si hay archivos
+            placeholder_text = "Escribe tu mensaje sobre los archivos adjuntos..." if uploaded_files else "Pregunta algo sobre entrenamiento"
+            user_message = st.text_input(
+                "💬 Escribe tu mensaje...",
+                placeholder=placeholder_text,
+                label_visibility="collapsed",
+                key=f"chat_input_{athlete_id}"
+            )
+        
+        with col_send:
+            send_clicked = st.form_submit_button(
+                "🚀",
+                use_container_width=True,
+                type="primary"
+            )
+        
+        with col_attach:
+            attach_clicked = st.form_submit_button(
+                "📎",
+                help="Adjuntar archivos",
+                type="secondary"
+            )
+        
+        # Manejar clic en adjuntar archivos
+        if attach_clicked:
+            st.session_state[attach_key] = not st.session_state.get(attach_key, False)
+            rerun_fragment()
+        
+        # Procesar el mensaje cuando se envía
+        if send_clicked and (user_message.strip() or uploaded_files):
+            # Preparar el mensaje con archivos adjuntos
+            final_message = user_message.strip()
+            
+            # 🔧 ALMACENAR archivos en session_state para OpenAI
+            if uploaded_files:
+                # Resetear los punteros de todos los archivos
+                for file in uploaded_files:
+                    file.seek(0)
+                
+                # Guardar archivos en session_state para el chat_interface
+                st.session_state[f"uploaded_files_{athlete_id}"] = uploaded_files
+            
+            # Si hay archivos adjuntos, procesar su contenido para mostrar al usuario
+            if uploaded_files:
+                file_contents = []
+                
+                for file in uploaded_files:
+                    # Procesar cada archivo usando la función especializada
+                    processed_content = process_uploaded_file(file)
+                    file_contents.append(processed_content)
+                
+                # Agregar contenido de archivos al mensaje
+                if file_contents:
+                    if final_message:
+                        final_message = f"{final_message}\n\n[ARCHIVOS ADJUNTOS]\n" + "\n\n".join(file_contents)
+                    else:
+                        final_message = f"[ARCHIVOS ADJUNTOS]\n" + "\n\n".join(file_contents) + "\n\nAnaliza estos archivos y ayúdame con el entrenamiento."
+                
+                # Limpiar archivos adjuntos de la UI después del envío
+                st.session_state[attach_key] = False
+            
+            # Asegurar que el mensaje tenga contenido válido
+            if not final_message.strip():
+                st.error("❌ Por favor escribe un mensaje o adjunta archivos")
+                return
+            
+            with st.spinner("🤖 Procesando mensaje..."):
+                response = handle_user_message(athlete_id, final_message)
+                if response:
+                    # Limpiar archivos de session_state después del procesamiento
+                    if f"uploaded_files_{athlete_id}" in st.session_state:
+                        del st.session_state[f"uploaded_files_{athlete_id}"]
+                    
+                    # Mostrar confirmación especial si se envió email
+                    if "✅" in response and "enviada exitosamente" in response:
+                        st.success("📧 ¡Rutina enviada por email!")
+                        st.balloons()
+                    rerun_fragment()
+                else:
+                    st.error("❌ Error al procesar el mensaje")
+
+def show_chat_section(user_id):
     """Sección de chat mejorada"""
     athlete_id = st.session_state.get("active_athlete_chat")
     
     if athlete_id:
         athlete_name = None
-        for a in athletes:
+        for a in load_athletes(user_id):
             if a[0] == athlete_id:
                 athlete_name = a[1]
                 break
@@ -791,6 +1212,10 @@ def show_chat_section(athletes):
                 st.session_state["active_athlete_chat"] = None
                 st.rerun()
         
+        # Rutinas rápidas generándose en segundo plano para este atleta
+        from modules.quick_templates import show_routine_jobs_status
+        show_routine_jobs_status(athlete_id)
+        
         # 🎯 AUTO-SCROLL MEJORADO: Scroll automático al último mensaje
         if f"auto_scroll_{athlete_id}" not in st.session_state:
             st.session_state[f"auto_scroll_{athlete_id}"] = True
@@ -818,403 +1243,10 @@ def show_chat_section(athletes):
                 </script>
             """, height=0)
         
-        # Contenedor del chat
-        chat_container = st.container(height=500, border=True)
-        
-        with chat_container:
-            chat_history = safe_execute(
-                lambda: get_chat_history(athlete_id),
-                "Error al cargar historial",
-                []
-            )
-            
-            if not chat_history:
-                # Mostrar mensaje de bienvenida personalizado
-                welcome_msg = get_welcome_message(athlete_id)
-                st.markdown(f"""
-                <div style='text-align:center; padding:40px; color:#1F2937; background:#f8fafc; border-radius:12px;'>
-                    {welcome_msg.replace(chr(10), '<br>')}
-                </div>
-                """, unsafe_allow_html=True)
-            
-            for idx, (msg, is_user, created_at) in enumerate(chat_history):
-                if is_user:
-                    st.markdown(f"""
-                    <div style='display:flex; justify-content:flex-end; margin-bottom:16px;'>
-                        <div class='chat-user'>
-                            {msg}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    # Procesar respuestas especiales del AI
-                    ai_content = msg.replace("🤖 ProFit Coach AI:", "").strip()
-                    
-                    # Generar ID único para este mensaje
-                    try:
-                        # Convertir created_at a datetime si es string
-                        if isinstance(created_at, str):
-                            # Intentar parsear el formato SQLite
-                            try:
-                                date_obj = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                                date_str = date_obj.strftime('%Y%m%d_%H%M%S')
-                            except:
-                                date_str = 'no_date'
-                        elif created_at:
-                            date_str = created_at.strftime('%Y%m%d_%H%M%S')
-                        else:
-                            date_str = 'no_date'
-                    except:
-                        date_str = 'no_date'
-                    
-                    message_id = f"{athlete_id}_{idx}_{date_str}"
-                    
-                    # Detectar si es una rutina
-                    if "[INICIO_NUEVA_RUTINA]" in ai_content:
-                        ai_content_clean = ai_content.replace("[INICIO_NUEVA_RUTINA]", "").strip()
-                        
-                        # � FORMATO MEJORADO Y CONSISTENTE DE RUTINAS
-                        lines = ai_content_clean.split('\n')
-                        formatted_content = []
-                        in_table = False
-                        
-                        for line in lines:
-                            line = line.strip()
-                            if not line:
-                                if not in_table:  # Solo agregar espacios fuera de tablas
-                                    formatted_content.append("<br>")
-                                continue
-                            
-                            # 🏆 TÍTULOS PRINCIPALES (RUTINA, ENTRENAMIENTO)
-                            if any(keyword in line.upper() for keyword in ['**📝 RUTINA:', '📋 RUTINA:', 'RUTINA:']):
-                                title = line.replace('**', '').replace('📝', '').replace('📋', '').strip()
-                                formatted_content.append(f"""
-                                <div style='background: linear-gradient(135deg, #4F46E5 0%, #7C3AED 100%); 
-                                     color: white; padding: 12px 20px; border-radius: 12px; margin: 10px 0;
-                                     text-align: center; font-size: 1.2em; font-weight: bold; box-shadow: 0 4px 15px rgba(79, 70, 229, 0.3);'>
-                                    🏆 {title}
-                                </div>""")
-                                continue
-                            
-                            # ⏱️ INFORMACIÓN CLAVE (Duración, Objetivo, Nivel)
-                            if any(keyword in line for keyword in ['⏱️ Duración Total:', '🎯 Objetivo:', '📊 Nivel:']):
-                                formatted_content.append(f"""
-                                <div style='background: #F0F9FF; border-left: 4px solid #0EA5E9; 
-                                     padding: 8px 15px; margin: 5px 0; border-radius: 0 8px 8px 0;'>
-                                    <strong style='color: #0369A1;'>{line}</strong>
-                                </div>""")
-                                continue
-                            
-                            # 🔥 BLOQUES DE ENTRENAMIENTO (BLOQUE 1, 2, etc.)
-                            if any(keyword in line.upper() for keyword in ['### **BLOQUE', 'BLOQUE 1', 'BLOQUE 2', 'BLOQUE 3', 'BLOQUE 4', 'BLOQUE 5']) and ('min)' in line or 'MIN)' in line):
-                                block_name = line.replace('###', '').replace('**', '').strip()
-                                formatted_content.append(f"""
-                                <div style='background: linear-gradient(135deg, #059669 0%, #0D9488 100%); 
-                                     color: white; padding: 10px 16px; border-radius: 8px; margin: 15px 0 5px 0;
-                                     font-weight: bold; box-shadow: 0 2px 10px rgba(5, 150, 105, 0.2);'>
-                                    🔸 {block_name}
-                                </div>""")
-                                continue
-                            
-                            # 📋 TABLA DE EJERCICIOS
-                            if line.startswith('|------'):
-                                in_table = True
-                                continue  # Skip separator lines
-                            elif line.startswith('|') and '|' in line[1:]:
-                                if not in_table:
-                                    # Header de tabla
-                                    headers = [h.strip() for h in line.split('|')[1:-1]]
-                                    if len(headers) >= 3:  # Verificar que sea una tabla de ejercicios
-                                        formatted_content.append("""
-                                        <div style='background: #F8FAFC; border: 1px solid #E2E8F0; border-radius: 8px; margin: 10px 0; overflow: hidden;'>
-                                        <table style='width: 100%; border-collapse: collapse;'>""")
-                                        
-                                        header_html = "<tr style='background: #64748B; color: white; font-weight: bold;'>"
-                                        for header in headers:
-                                            header_html += f"<td style='padding: 10px 12px; border: none; font-size: 0.85em;'>{header}</td>"
-                                        header_html += "</tr>"
-                                        formatted_content.append(header_html)
-                                        in_table = True
-                                        continue
-                                else:
-                                    # Row de datos
-                                    cells = [c.strip() for c in line.split('|')[1:-1]]
-                                    if len(cells) >= 3:
-                                        row_html = "<tr style='border-bottom: 1px solid #E2E8F0;'>"
-                                        for i, cell in enumerate(cells):
-                                            if i == 0:  # Nombre del ejercicio
-                                                row_html += f"<td style='padding: 10px 12px; font-weight: 600; color: #1E293B;'>{cell}</td>"
-                                            elif 'x' in cell or 'rep' in cell.lower():  # Series/Reps
-                                                highlighted_cell = re.sub(r'(\d+)\s*x\s*(\d+)', r'<span style="background:#DBEAFE; padding:2px 6px; border-radius:4px; font-weight:bold;">\1×\2</span>', cell)
-                                                row_html += f"<td style='padding: 10px 12px; text-align: center;'>{highlighted_cell}</td>"
-                                            elif any(time_word in cell.lower() for time_word in ['min', 'seg', 'segundo']):  # Tiempo
-                                                highlighted_cell = re.sub(r'(\d+)\s*(min|seg)', r'<span style="background:#FEF3C7; padding:2px 6px; border-radius:4px; font-weight:bold;">\1\2</span>', cell)
-                                                row_html += f"<td style='padding: 10px 12px; text-align: center;'>{highlighted_cell}</td>"
-                                            else:
-                                                row_html += f"<td style='padding: 10px 12px; color: #64748B;'>{cell}</td>"
-                                        row_html += "</tr>"
-                                        formatted_content.append(row_html)
-                                        continue
-                            else:
-                                if in_table:
-                                    formatted_content.append("</table></div>")
-                                    in_table = False
-                            
-                            # 📋 NOTAS TÉCNICAS
-                            if line.startswith('**📋 NOTAS TÉCNICAS'):
-                                formatted_content.append(f"""
-                                <div style='background: #FEF7CD; border: 1px solid #F59E0B; border-radius: 8px; 
-                                     padding: 12px 16px; margin: 15px 0;'>
-                                    <strong style='color: #92400E; font-size: 1.05em;'>📋 NOTAS TÉCNICAS IMPORTANTES</strong>
-                                </div>""")
-                                continue
-                            
-                            # 💡 NOTAS ESPECÍFICAS (Respiración, Técnica, etc.)
-                            if line.startswith('- **') and any(keyword in line for keyword in ['Respiración:', 'Técnica:', 'Progresión:', 'Adaptaciones:']):
-                                note_content = line.replace('- **', '').replace('**', '')
-                                parts = note_content.split(':', 1)
-                                if len(parts) == 2:
-                                    note_title, note_desc = parts
-                                    formatted_content.append(f"""
-                                    <div style='margin: 8px 0 8px 15px; padding: 8px 12px; background: #F0FDF4; 
-                                         border-left: 3px solid #22C55E; border-radius: 0 6px 6px 0;'>
-                                        <strong style='color: #15803D;'>💡 {note_title.strip()}:</strong> 
-                                        <span style='color: #374151;'>{note_desc.strip()}</span>
-                                    </div>""")
-                                    continue
-                            
-                            # ⏱️ TIEMPO ESTIMADO TOTAL
-                            if '⏱️ Tiempo estimado total:' in line:
-                                time_info = line.replace('⏱️ Tiempo estimado total:', '').strip()
-                                formatted_content.append(f"""
-                                <div style='background: #EDE9FE; border: 1px solid #8B5CF6; border-radius: 8px; 
-                                     padding: 10px 15px; margin: 15px 0; text-align: center;'>
-                                    <strong style='color: #6D28D9; font-size: 1.1em;'>⏱️ Tiempo Total: {time_info}</strong>
-                                </div>""")
-                                continue
-                            
-                            # 🎯 LÍNEAS NORMALES CON FORMATO MEJORADO
-                            if line.startswith('**') and line.endswith('**'):
-                                clean_line = line.replace('**', '')
-                                formatted_content.append(f"<strong style='color: #1F2937; font-size: 1.05em;'>{clean_line}</strong>")
-                            elif line.startswith('- '):
-                                formatted_content.append(f"<div style='margin: 4px 0 4px 15px; color: #4B5563;'>• {line[2:]}</div>")
-                            else:
-                                formatted_content.append(f"<div style='color: #374151; line-height: 1.5;'>{line}</div>")
-                        
-                        # Cerrar tabla si quedó abierta
-                        if in_table:
-                            formatted_content.append("</table></div>")
-                        
-                        formatted_html = ''.join(formatted_content)
-                        
-                        st.markdown(f"""
-                        <div style='display:flex; justify-content:flex-start; margin-bottom:16px;'>
-                            <div class='chat-ai' style='max-width: 95%; background: white; border: 1px solid #E5E7EB; border-radius: 12px; box-shadow: 0 4px 25px rgba(0,0,0,0.1);'>
-                                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 12px 20px; border-radius: 12px 12px 0 0; font-weight: bold; text-align: center;'>
-                                    🤖 ProFit Coach AI - ✨ Nueva Rutina Generada ✨
-                                </div>
-                                <div style='padding: 20px; line-height: 1.6; font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;'>
-                                    {formatted_html}
-                                </div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Generar botón de descarga para rutina
-                        excel_data, athlete_name = generate_routine_excel_from_chat(athlete_id, msg)
-                        if excel_data:
-                            # Botones en una sola fila
-                            col1, col2, col3 = st.columns([1, 1, 1])
-                            
-                            with col1:
-                                create_download_button(excel_data, athlete_name, "Rutina_Entrenamiento", unique_id=message_id)
-                            
-                            with col2:
-                                # Botón para enviar por email
-                                if st.button("📧 Enviar por Email", key=f"email_{message_id}", use_container_width=True):
-                                    # Obtener datos del atleta para el email
-                                    athlete_data = get_athlete_data(athlete_id)
-                                    
-                                    if athlete_data:
-                                        # Mostrar interfaz de envío de email
-                                        st.session_state[f"show_email_interface_{message_id}"] = True
-                                        st.rerun()
-                            
-                            with col3:
-                                # Espacio reservado para futuros botones
-                                st.write("")
-                            
-                            # Mostrar interfaz de email si se solicitó
-                            if st.session_state.get(f"show_email_interface_{message_id}", False):
-                                st.markdown("---")
-                                
-                                athlete_data = get_athlete_data(athlete_id)
-                                if athlete_data:
-                                    show_email_sending_interface(athlete_data, excel_data, f"Rutina_{athlete_name}_{datetime.now().strftime('%Y%m%d')}.xlsx")
-                                
-                                # Botón para cerrar la interfaz
-                                if st.button("❌ Cerrar", key=f"close_email_{message_id}"):
-                                    st.session_state[f"show_email_interface_{message_id}"] = False
-                                    st.rerun()
-                            
-                            st.markdown("""
-                            <div style='text-align:center; margin:10px 0; padding:10px; background:#e8f5e8; border-radius:8px; color:#2d5a2d; font-size:0.9em;'>
-                                ✅ <strong>Rutina lista para descargar y enviar</strong><br>
-                                📁 Incluye: Días de entrenamiento y ejercicios detallados en Excel
-                            </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"""
-                        <div style='display:flex; justify-content:flex-start; margin-bottom:16px;'>
-                            <div class='chat-ai' style='max-width: 85%;'>
-                                <strong>🤖 ProFit Coach AI:</strong><br>
-                                <div style='white-space: pre-line;'>{ai_content}</div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # 🎯 DETECCIÓN INTELIGENTE: Solo mostrar botones si es realmente una rutina completa
-                        is_complete_routine = (
-                            # Debe contener múltiples días Y ejercicios específicos
-                            (ai_content.lower().count('día') >= 2 or ai_content.lower().count('sesión') >= 2) and
-                            # Debe contener patrones de ejercicios
-                            any(pattern in ai_content.lower() for pattern in [
-                                'x', 'rep', 'series', 'ejercicio', 'bloque', 'calentamiento'
-                            ]) and
-                            # Debe ser suficientemente largo (rutina completa)
-                            len(ai_content) > 500 and
-                            # No debe ser solo una pregunta o respuesta corta
-                            not any(question in ai_content.lower() for question in [
-                                '¿qué te parece?', '¿alguna pregunta?', '¿necesitas algo más?', 
-                                'cuéntame más', 'explícame', '¿cómo te sientes?'
-                            ])
-                        )
-                        
-                        if is_complete_routine:
-                            excel_data, athlete_name = generate_routine_excel_from_chat(athlete_id, msg)
-                            if excel_data:
-                                col1, col2, col3 = st.columns([1, 2, 1])
-                                with col2:
-                                    st.markdown("---")
-                                    st.markdown("**💡 ¿Quieres descargar esta rutina en Excel?**")
-                                    # 🔄 SOLO mostrar botón de descarga (SIN email)
-                                    create_download_button(excel_data, athlete_name, "Rutina_Entrenamiento", unique_id=f"{message_id}_alt")
-        
-        # Input del chat con adjuntar archivos integrado estilo ChatGPT
+        show_chat_search(user_id, athlete_id)
         
-        # File uploader fuera del form para evitar conflictos
-        attach_key = f"show_attach_{athlete_id}"
-        uploaded_files = None
-        
-        # Mostrar file uploader si se activó
-        if st.session_state.get(attach_key, False):
-            st.markdown("**📎 Selecciona archivos para adjuntar**")
-            uploaded_files = st.file_uploader(
-                "Archivos",
-                type=['pdf', 'jpg', 'jpeg', 'png', 'gif', 'xlsx', 'xls', 'docx', 'txt'],
-                accept_multiple_files=True,
-                key=f"file_uploader_{athlete_id}",
-                label_visibility="collapsed"
-            )
-            
-            # Mostrar preview de archivos seleccionados
-            if uploaded_files:
-                st.markdown("**📋 Archivos adjuntos:**")
-                cols = st.columns(min(len(uploaded_files), 4))
-                for idx, file in enumerate(uploaded_files):
-                    with cols[idx % 4]:
-                        file_size = len(file.getvalue()) / 1024  # KB
-                        if file.type and file.type.startswith('image/'):
-                            st.image(file, width=80)
-                        st.caption(f"{file.name} ({file_size:.1f} KB)")
-        
-        # Formulario del chat
-        with st.form("chat_input_form", clear_on_submit=True, border=False):
-            # 3 columnas: input, enviar, adjuntar (REORDENADO)
-            col_input, col_send, col_attach = st.columns([4.5, 1, 0.5])
-            
-            with col_input:
-                # Placeholder dinámico según si hay archivos
-                placeholder_text = "Escribe tu mensaje sobre los archivos adjuntos..." if uploaded_files else "Pregunta algo sobre entrenamiento"
-                user_message = st.text_input(
-                    "💬 Escribe tu mensaje...",
-                    placeholder=placeholder_text,
-                    label_visibility="collapsed",
-                    key=f"chat_input_{athlete_id}"
-                )
-            
-            with col_send:
-                send_clicked = st.form_submit_button(
-                    "🚀",
-                    use_container_width=True,
-                    type="primary"
-                )
-            
-            with col_attach:
-                attach_clicked = st.form_submit_button(
-                    "📎",
-                    help="Adjuntar archivos",
-                    type="secondary"
-                )
-            
-            # Manejar clic en adjuntar archivos
-            if attach_clicked:
-                st.session_state[attach_key] = not st.session_state.get(attach_key, False)
-                st.rerun()
-            
-            # Procesar el mensaje cuando se envía
-            if send_clicked and (user_message.strip() or uploaded_files):
-                # Preparar el mensaje con archivos adjuntos
-                final_message = user_message.strip()
-                
-                # 🔧 ALMACENAR archivos en session_state para OpenAI
-                if uploaded_files:
-                    # Resetear los punteros de todos los archivos
-                    for file in uploaded_files:
-                        file.seek(0)
-                    
-                    # Guardar archivos en session_state para el chat_interface
-                    st.session_state[f"uploaded_files_{athlete_id}"] = uploaded_files
-                
-                # Si hay archivos adjuntos, procesar su contenido para mostrar al usuario
-                if uploaded_files:
-                    file_contents = []
-                    
-                    for file in uploaded_files:
-                        # Procesar cada archivo usando la función especializada
-                        processed_content = process_uploaded_file(file)
-                        file_contents.append(processed_content)
-                    
-                    # Agregar contenido de archivos al mensaje
-                    if file_contents:
-                        if final_message:
-                            final_message = f"{final_message}\n\n[ARCHIVOS ADJUNTOS]\n" + "\n\n".join(file_contents)
-                        else:
-                            final_message = f"[ARCHIVOS ADJUNTOS]\n" + "\n\n".join(file_contents) + "\n\nAnaliza estos archivos y ayúdame con el entrenamiento."
-                    
-                    # Limpiar archivos adjuntos de la UI después del envío
-                    st.session_state[attach_key] = False
-                
-                # Asegurar que el mensaje tenga contenido válido
-                if not final_message.strip():
-                    st.error("❌ Por favor escribe un mensaje o adjunta archivos")
-                    return
-                
-                with st.spinner("🤖 Procesando mensaje..."):
-                    response = handle_user_message(athlete_id, final_message)
-                    if response:
-                        # Limpiar archivos de session_state después del procesamiento
-                        if f"uploaded_files_{athlete_id}" in st.session_state:
-                            del st.session_state[f"uploaded_files_{athlete_id}"]
-                        
-                        # Mostrar confirmación especial si se envió email
-                        if "✅" in response and "enviada exitosamente" in response:
-                            st.success("📧 ¡Rutina enviada por email!")
-                            st.balloons()
-                        st.rerun()
-                    else:
-                        st.error("❌ Error al procesar el mensaje")
+        # Historial + input en un fragmento: enviar un mensaje o paginar no recarga toda la página
+        show_chat_panel(athlete_id, athlete_name)
         
         # Información sobre el sistema de descarga y email automático
         with st.expander("📧 Sistema de Descarga y Email Automático", expanded=False):
@@ -1295,20 +1327,26 @@ def show_chat_section(athletes):
             """)
             
             # Mostrar estadísticas si hay historial
-            if chat_history:
-                routine_count = len([msg for msg, is_user, _ in chat_history if not is_user and any(keyword in msg.lower() for keyword in ['día 1', 'día 2', 'rutina'])])
-                st.markdown(f"**Estadísticas:** {len(chat_history)} mensajes total | {routine_count} rutinas generadas")
+            message_count, routine_count = get_chat_stats(athlete_id)
+            if message_count:
+                st.markdown(f"**Estadísticas:** {message_count} mensajes total | {routine_count} rutinas generadas")
 
 # --- Punto de entrada principal ---
 def main():
     """Función principal de la aplicación"""
     try:
+        strip_legacy_session_param()
+        
         # Preservar estado de sesión
         preserve_session_state()
         
         # Inicializar aplicación
         initialize_app()
         
+        # Entrenador que vuelve con su token de sesión
+        restore_user_session()
+        write_pending_session_cookie()
+
         # Mostrar estado en sidebar
         show_app_status()
         
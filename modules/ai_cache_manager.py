@@ -1,6 +1,8 @@
 """
 Sistema de Cache Inteligente para OpenAI
 Reduce rate limits y mejora velocidad de respuesta
+Las respuestas largas se guardan comprimidas con zlib en response_body
+(en esta misma base, ai_cache.db no depende de la base principal).
 """
 
 import hashlib
@@ -10,17 +12,27 @@ import logging
 from typing import Optional, Dict, Any
 import sqlite3
 import os
-from datetime import datetime, timedelta
+
+from config import Config
+from modules.message_bodies import should_store_body
+from utils.text_compression import compress_text, decompress_text
+from utils.lazy import LazyInstance
+
+# Días de aciertos/fallos que cuentan para el hit rate
+CACHE_STATS_DAYS = 7
+
+# ai_cache.db junto a la base principal
+DEFAULT_CACHE_DB_PATH = os.path.join(Config.DATA_DIR, "ai_cache.db")
 
 class AICacheManager:
     """Gestor de cache para respuestas de IA"""
     
-    def __init__(self, cache_db_path="/workspaces/ProFit Coach/ai_cache.db"):
+    def __init__(self, cache_db_path=DEFAULT_CACHE_DB_PATH):
         self.cache_db_path = cache_db_path
         self._init_cache_db()
         
         # Configuración de cache
-        self.CACHE_DURATION_HOURS = 24  # Cache válido por 24 horas
+        self.CACHE_DURATION_HOURS = 24  # Cache válido por 24 horas (salvo TTL propio de la entrada)
         self.MAX_CACHE_SIZE = 1000  # Máximo 1000 entradas
         
     def _init_cache_db(self):
@@ -38,7 +50,28 @@ class AICacheManager:
                     response TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    use_count INTEGER DEFAULT 1
+                    use_count INTEGER DEFAULT 1,
+                    expires_at TIMESTAMP
+                )
+            ''')
+            
+            # Migración: caches creadas antes de existir el TTL por entrada
+            cursor.execute('PRAGMA table_info(ai_cache)')
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'expires_at' not in columns:
+                cursor.execute('ALTER TABLE ai_cache ADD COLUMN expires_at TIMESTAMP')
+            
+            # Migración: respuestas largas comprimidas en la propia fila
+            if 'response_body' not in columns:
+                cursor.execute('ALTER TABLE ai_cache ADD COLUMN response_body BLOB')
+            
+            # Aciertos/fallos por día, guardados para que el hit rate sobreviva a
+            # reinicios y sume todos los procesos que comparten ai_cache.db
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ai_cache_lookups (
+                    day TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0
                 )
             ''')
             
@@ -110,6 +143,36 @@ class AICacheManager:
         
         return normalized.strip()
     
+    def _valid_entry_condition(self) -> str:
+        """Condición SQL de entrada vigente: su propio TTL o CACHE_DURATION_HOURS desde created_at"""
+        # created_at/expires_at se guardan en UTC con el formato de CURRENT_TIMESTAMP
+        return (f"COALESCE(expires_at, datetime(created_at, '+{int(self.CACHE_DURATION_HOURS)} hours')) "
+                f"> CURRENT_TIMESTAMP")
+    
+    def _record_lookup(self, cursor, hit: bool):
+        """Suma un acierto o un fallo al día actual (UTC, como CURRENT_TIMESTAMP)"""
+        column = 'hits' if hit else 'misses'
+        cursor.execute(f'''
+            INSERT INTO ai_cache_lookups (day, {column}) VALUES (date('now'), 1)
+            ON CONFLICT(day) DO UPDATE SET {column} = {column} + 1
+        ''')
+    
+    def is_cached(self, athlete_data: dict, query: str) -> bool:
+        """Indica si hay una entrada vigente (sin contar como acierto ni actualizar su uso)"""
+        try:
+            cache_key = self._generate_cache_key(athlete_data, query)
+            conn = sqlite3.connect(self.cache_db_path)
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT 1 FROM ai_cache WHERE query_hash = ? AND {self._valid_entry_condition()}
+            ''', (cache_key,))
+            result = cursor.fetchone()
+            conn.close()
+            return result is not None
+        except Exception as e:
+            logging.error(f"❌ Error checking cache entry: {e}")
+            return False
+    
     def get_cached_response(self, athlete_data: dict, query: str) -> Optional[str]:
         """Busca respuesta en cache"""
         try:
@@ -119,18 +182,18 @@ class AICacheManager:
             cursor = conn.cursor()
             
             # Buscar entrada válida
-            cutoff_time = datetime.now() - timedelta(hours=self.CACHE_DURATION_HOURS)
-            
-            cursor.execute('''
-                SELECT response, use_count 
+            cursor.execute(f'''
+                SELECT response, response_body, use_count 
                 FROM ai_cache 
-                WHERE query_hash = ? AND created_at > ?
-            ''', (cache_key, cutoff_time.isoformat()))
+                WHERE query_hash = ? AND {self._valid_entry_condition()}
+            ''', (cache_key,))
             
             result = cursor.fetchone()
             
             if result:
-                response, use_count = result
+                response, response_body, use_count = result
+                if response_body is not None:
+                    response = decompress_text(response_body)
                 
                 # Actualizar estadísticas de uso
                 cursor.execute('''
@@ -138,6 +201,7 @@ class AICacheManager:
                     SET last_used = CURRENT_TIMESTAMP, use_count = ? 
                     WHERE query_hash = ?
                 ''', (use_count + 1, cache_key))
+                self._record_lookup(cursor, hit=True)
                 
                 conn.commit()
                 conn.close()
@@ -145,6 +209,8 @@ class AICacheManager:
                 logging.info(f"🎯 Cache hit for query (used {use_count + 1} times)")
                 return response
             
+            self._record_lookup(cursor, hit=False)
+            conn.commit()
             conn.close()
             return None
             
@@ -152,8 +218,8 @@ class AICacheManager:
             logging.error(f"❌ Error getting cached response: {e}")
             return None
     
-    def cache_response(self, athlete_data: dict, query: str, response: str):
-        """Guarda respuesta en cache"""
+    def cache_response(self, athlete_data: dict, query: str, response: str, ttl_hours: Optional[float] = None):
+        """Guarda respuesta en cache (ttl_hours sustituye a CACHE_DURATION_HOURS para esta entrada)"""
         try:
             cache_key = self._generate_cache_key(athlete_data, query)
             
@@ -167,16 +233,22 @@ class AICacheManager:
                 'age_range': self._get_age_range(athlete_data.get('age', 0))
             })
             
+            expires_modifier = f"+{int(ttl_hours * 3600)} seconds" if ttl_hours else None
+            
+            # Respuestas largas: comprimidas en la propia fila
+            response_body = compress_text(response) if should_store_body(response) else None
+            
             cursor.execute('''
                 INSERT OR REPLACE INTO ai_cache 
-                (query_hash, athlete_context, query, response, created_at, last_used, use_count)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)
-            ''', (cache_key, athlete_context_str, query, response))
+                (query_hash, athlete_context, query, response, response_body, created_at, last_used, use_count, expires_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1, datetime('now', ?))
+            ''', (cache_key, athlete_context_str, query, None if response_body else response, response_body, expires_modifier))
             
             conn.commit()
             
             # Limpiar cache si excede el tamaño máximo
             self._cleanup_cache(cursor)
+            conn.commit()
             
             conn.close()
             logging.info("💾 Response cached successfully")
@@ -192,14 +264,21 @@ class AICacheManager:
             count = cursor.fetchone()[0]
             
             if count > self.MAX_CACHE_SIZE:
-                # Eliminar las entradas más antiguas y menos usadas
+                # Eliminar primero las caducadas, después las más antiguas y menos usadas;
+                # las precalentadas vigentes (TTL propio) van las últimas: su use_count
+                # empieza en 1 y su last_used es el del precalentamiento
                 entries_to_remove = count - int(self.MAX_CACHE_SIZE * 0.8)  # Dejar 80% del máximo
                 
-                cursor.execute('''
+                cursor.execute(f'''
                     DELETE FROM ai_cache 
                     WHERE id IN (
                         SELECT id FROM ai_cache 
-                        ORDER BY use_count ASC, last_used ASC 
+                        ORDER BY CASE
+                                     WHEN NOT ({self._valid_entry_condition()}) THEN 0
+                                     WHEN expires_at IS NULL THEN 1
+                                     ELSE 2
+                                 END,
+                                 use_count ASC, last_used ASC 
                         LIMIT ?
                     )
                 ''', (entries_to_remove,))
@@ -219,24 +298,39 @@ class AICacheManager:
             cursor.execute('SELECT COUNT(*), AVG(use_count), MAX(use_count) FROM ai_cache')
             total, avg_uses, max_uses = cursor.fetchone()
             
-            # Cache hits recientes (última hora)
-            recent_cutoff = datetime.now() - timedelta(hours=1)
-            cursor.execute('SELECT COUNT(*) FROM ai_cache WHERE last_used > ?', (recent_cutoff.isoformat(),))
+            # Entradas usadas en la última hora
+            cursor.execute("SELECT COUNT(*) FROM ai_cache WHERE last_used > datetime('now', '-1 hour')")
             recent_hits = cursor.fetchone()[0]
             
+            # Entradas con TTL propio (precalentadas)
+            cursor.execute(f'SELECT COUNT(*) FROM ai_cache WHERE expires_at IS NOT NULL AND {self._valid_entry_condition()}')
+            long_ttl_entries = cursor.fetchone()[0]
+            
+            # Aciertos y fallos de los últimos CACHE_STATS_DAYS días (todos los procesos)
+            cursor.execute('''
+                SELECT COALESCE(SUM(hits), 0), COALESCE(SUM(misses), 0) FROM ai_cache_lookups
+                WHERE day > date('now', ?)
+            ''', (f"-{CACHE_STATS_DAYS} days",))
+            hits, misses = cursor.fetchone()
+            
             conn.close()
             
+            lookups = hits + misses
+            
             return {
                 'total_entries': total or 0,
                 'average_uses': round(avg_uses or 0, 2),
                 'max_uses': max_uses or 0,
                 'recent_hits': recent_hits or 0,
-                'cache_hit_rate': f"{(recent_hits / max(total, 1)) * 100:.1f}%" if total else "0%"
+                'long_ttl_entries': long_ttl_entries or 0,
+                'hits': hits,
+                'misses': misses,
+                'cache_hit_rate': f"{(hits / lookups) * 100:.1f}%" if lookups else "0%"
             }
             
         except Exception as e:
             logging.error(f"❌ Error getting cache stats: {e}")
             return {}
 
-# Instancia global del cache manager
-cache_manager = AICacheManager()
+# Instancia global del cache manager (abre ai_cache.db en el primer uso)
+cache_manager = LazyInstance(AICacheManager)
@@ -0,0 +1,193 @@
+"""
+Importación masiva de atletas desde CSV o Excel
+Lee el archivo con pandas (como mucho las filas que caben en el cupo del
+entrenador), valida todas las filas de forma vectorizada, descarta duplicados
+(dentro del archivo y contra los atletas existentes) e inserta el resto en una
+sola transacción con executemany.
+"""
+
+import logging
+
+from auth.database import get_db_connection
+from config import Config
+from modules.athlete_manager import get_athletes_by_user, invalidate_athlete_cache
+
+# Encabezados aceptados (normalizados: minúsculas, sin tildes, espacios -> '_')
+COLUMN_ALIASES = {
+    'name': ('nombre', 'nombre_completo', 'atleta', 'deportista', 'name'),
+    'sport': ('deporte', 'disciplina', 'sport'),
+    'level': ('nivel', 'categoria', 'level'),
+    'goals': ('objetivos', 'objetivo', 'metas', 'goals'),
+    'email': ('email', 'e_mail', 'correo', 'correo_electronico', 'mail'),
+}
+REQUIRED_COLUMNS = ('name', 'sport')
+
+LEVEL_LABELS = {
+    'principiante': "Principiante",
+    'inicial': "Principiante",
+    'intermedio': "Intermedio",
+    'avanzado': "Avanzado",
+    'semi_profesional': "Semi Profesional",
+    'semiprofesional': "Semi Profesional",
+    'semi_pro': "Semi Profesional",
+    'elite': "Élite",
+    'profesional': "Élite",
+}
+DEFAULT_LEVEL = "Intermedio"
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+CSV_TEMPLATE = "nombre,deporte,nivel,objetivos,email\nJuan Pérez,Fútbol,Avanzado,Potencia y velocidad,juan@ejemplo.com\n"
+
+def _normalize_series(series):
+    """Texto sin tildes, en minúsculas y con '_' en lugar de espacios/guiones (vectorizado)"""
+    return (series.fillna("").astype(str).str.strip().str.lower()
+            .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.replace(r"[\s\-]+", "_", regex=True))
+
+def read_athlete_file(file, filename, max_rows):
+    """DataFrame con las columnas reconocidas (name, sport, level, goals, email) como texto"""
+    import pandas as pd  # Solo al importar: pandas se carga en el primer uso
+
+    if filename.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(file, dtype=str, nrows=max_rows)
+    else:
+        # sep=None detecta ',' o ';' (CSV exportado desde Excel en español). Se lee sin
+        # encabezado y conservando las líneas en blanco (pandas descarta las que siguen a los
+        # encabezados), para que el índice siga siendo la fila del archivo; por bloques,
+        # hasta tener max_rows filas con datos
+        chunks, filled_rows = [], 0
+        with pd.read_csv(file, dtype=str, header=None, sep=None, engine="python", encoding="utf-8-sig",
+                         skip_blank_lines=False, chunksize=max_rows + 1) as reader:
+            for chunk in reader:
+                chunks.append(chunk)
+                filled_rows += int(chunk.notna().any(axis=1).sum())
+                if filled_rows > max_rows:
+                    break
+        raw = pd.concat(chunks)
+        df = raw.iloc[1:].set_axis(raw.iloc[0].fillna("").astype(str), axis=1)
+        df.index = df.index - 1  # 0 = primera fila tras los encabezados, como en read_excel
+
+    normalized_headers = _normalize_series(pd.Series(df.columns, dtype=str))
+    rename = {}
+    for column, header in zip(df.columns, normalized_headers):
+        for field, aliases in COLUMN_ALIASES.items():
+            if header in aliases and field not in rename.values():
+                rename[column] = field
+    missing = [field for field in REQUIRED_COLUMNS if field not in rename.values()]
+    if missing:
+        raise ValueError(f"faltan las columnas {', '.join(COLUMN_ALIASES[field][0] for field in missing)}")
+    df = df.rename(columns=rename)[list(rename.values())]
+
+    for field in COLUMN_ALIASES:
+        if field not in df.columns:
+            df[field] = ""
+        df[field] = df[field].fillna("").astype(str).str.strip()
+
+    # Filas completamente vacías (líneas en blanco, formato de Excel arrastrado): se ignoran
+    # sin renumerar, el índice sigue contando desde la primera fila tras los encabezados
+    return df[(df != "").any(axis=1)].head(max_rows)
+
+def validate_athlete_rows(df, existing_names):
+    """Valida todas las filas de una vez
+
+    Returns:
+        (DataFrame de filas válidas, [(fila, error)], duplicados descartados)
+    """
+    errors = []
+    row_numbers = df.index + 2  # Fila 1 = encabezados, como la ve el entrenador en Excel
+
+    def reject(mask, message):
+        for row in row_numbers[mask]:
+            errors.append((int(row), message))
+
+    invalid = df['name'].str.len() < 2
+    reject(invalid, "Nombre vacío o demasiado corto")
+    missing_sport = ~invalid & (df['sport'].str.len() < 2)
+    reject(missing_sport, "Deporte vacío")
+    invalid |= missing_sport
+
+    level_keys = _normalize_series(df['level'])
+    levels = level_keys.map(LEVEL_LABELS)
+    bad_level = ~invalid & (level_keys != "") & levels.isna()
+    reject(bad_level, "Nivel no reconocido (Principiante, Intermedio, Avanzado, Semi Profesional o Élite)")
+    invalid |= bad_level
+    df = df.assign(level=levels.fillna(DEFAULT_LEVEL))
+
+    bad_email = ~invalid & (df['email'] != "") & ~df['email'].str.match(EMAIL_PATTERN)
+    reject(bad_email, "Email con formato inválido")
+    invalid |= bad_email
+
+    # Duplicados: mismo nombre (sin tildes ni mayúsculas) en el archivo o ya registrado
+    name_keys = _normalize_series(df['name'])
+    duplicate_in_file = ~invalid & name_keys.where(~invalid).duplicated()
+    duplicate_existing = ~invalid & name_keys.isin(existing_names)
+    reject(duplicate_existing, "Ya existe un atleta con ese nombre")
+    reject(duplicate_in_file & ~duplicate_existing, "Nombre repetido en el archivo")
+    duplicates = int((duplicate_in_file | duplicate_existing).sum())
+    invalid |= duplicate_in_file | duplicate_existing
+
+    errors.sort()
+    return df[~invalid], errors, duplicates
+
+def import_athletes(user_id, file, filename):
+    """Importa atletas de un CSV/XLSX para el usuario
+
+    Returns:
+        dict con total de filas, importados, duplicados y errores [(fila, mensaje)]
+    """
+    summary = {'total_rows': 0, 'imported': 0, 'duplicates': 0, 'errors': []}
+
+    existing = get_athletes_by_user(user_id)
+    available = Config.MAX_ATHLETES_PER_USER - len(existing)
+    if available <= 0:
+        summary['errors'].append((0, f"Límite de {Config.MAX_ATHLETES_PER_USER} atletas alcanzado"))
+        return summary
+
+    try:
+        # Se leen algunas filas más que el cupo para poder informar de las que sobran
+        df = read_athlete_file(file, filename, max_rows=Config.MAX_ATHLETES_PER_USER * 2)
+    except Exception as e:
+        logging.error(f"❌ Error leyendo archivo de atletas {filename}: {e}")
+        summary['errors'].append((0, f"No se pudo leer el archivo: {e}"))
+        return summary
+
+    summary['total_rows'] = len(df)
+
+    import pandas as pd
+
+    existing_names = set(_normalize_series(pd.Series([a[1] for a in existing], dtype=str)))
+    valid, errors, duplicates = validate_athlete_rows(df, existing_names)
+    summary['duplicates'] = duplicates
+
+    if len(valid) > available:
+        for row in (valid.index[available:] + 2):
+            errors.append((int(row), f"Supera el límite de {Config.MAX_ATHLETES_PER_USER} atletas"))
+        errors.sort()
+        valid = valid.iloc[:available]
+    summary['errors'] = errors
+
+    if valid.empty:
+        return summary
+
+    rows = [
+        (user_id, name, sport, level, goals or "Sin objetivos específicos", email)
+        for name, sport, level, goals, email in valid[['name', 'sport', 'level', 'goals', 'email']].itertuples(index=False)
+    ]
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO athletes (user_id, name, sport, level, goals, email)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+    except Exception as e:
+        logging.error(f"❌ Error importando atletas: {e}")
+        summary['errors'].append((0, "Error guardando los atletas; no se importó ninguno"))
+        return summary
+    finally:
+        invalidate_athlete_cache(user_id=user_id)
+
+    summary['imported'] = len(rows)
+    logging.info(f"✅ {len(rows)} atletas importados para usuario {user_id} ({len(errors)} filas con errores)")
+    return summary
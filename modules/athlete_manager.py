@@ -4,13 +4,36 @@ Gestión de Atletas con SQLite - Versión Simplificada
 
 import logging
 from auth.database import get_db_connection
+from config import Config
+from utils.ttl_cache import TTLCache
+
+# Cachés de perfiles compartidas por todas las sesiones (invalidadas en cada escritura)
+_athletes_by_user_cache = TTLCache(Config.PROFILE_CACHE_TTL_SECONDS)
+_athlete_data_cache = TTLCache(Config.PROFILE_CACHE_TTL_SECONDS, max_entries=4096)
 
 def create_athletes_table():
     """Ya se crea en database.py"""
     pass
 
+def invalidate_athlete_cache(athlete_id=None, user_id=None):
+    """Descarta de la caché el perfil de un atleta y/o la lista de atletas de un usuario"""
+    if athlete_id is not None:
+        _athlete_data_cache.invalidate(athlete_id)
+    if user_id is not None:
+        _athletes_by_user_cache.invalidate(user_id)
+
+def _invalidate_athlete(cursor, athlete_id):
+    """Invalida el atleta y la lista de su entrenador (busca el user_id con el mismo cursor)"""
+    cursor.execute("SELECT user_id FROM athletes WHERE id = ?", (athlete_id,))
+    row = cursor.fetchone()
+    invalidate_athlete_cache(athlete_id, row[0] if row else None)
+
 def get_athletes_by_user(user_id):
-    """Obtiene todos los atletas de un usuario"""
+    """Obtiene todos los atletas de un usuario (cacheado por usuario)"""
+    found, athletes = _athletes_by_user_cache.get(user_id)
+    if found:
+        return list(athletes)
+    
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -36,6 +59,7 @@ def get_athletes_by_user(user_id):
                 ))
             
             logging.info(f"✅ {len(athletes)} atletas encontrados para usuario {user_id}")
+            _athletes_by_user_cache.set(user_id, tuple(athletes))
             return athletes
             
     except Exception as e:
@@ -54,6 +78,7 @@ def add_athlete(user_id, name, sport, level, goals="", email=""):
             
             athlete_id = cursor.lastrowid
             conn.commit()
+            invalidate_athlete_cache(user_id=user_id)
             
             logging.info(f"✅ Atleta '{name}' agregado con ID {athlete_id}")
             return athlete_id
@@ -77,6 +102,7 @@ def update_athlete(athlete_id, name, sport, level, goals="", email=""):
             conn.commit()
             
             if cursor.rowcount > 0:
+                _invalidate_athlete(cursor, athlete_id)
                 logging.info(f"✅ Atleta {athlete_id} actualizado correctamente")
                 return True, "Atleta actualizado correctamente"
             else:
@@ -101,6 +127,7 @@ def delete_athlete(athlete_id):
             conn.commit()
             
             if cursor.rowcount > 0:
+                _invalidate_athlete(cursor, athlete_id)
                 logging.info(f"✅ Atleta {athlete_id} eliminado correctamente")
                 return True, "Atleta eliminado correctamente"
             else:
@@ -111,8 +138,36 @@ def delete_athlete(athlete_id):
         logging.error(f"❌ Error eliminando atleta: {e}")
         return False, "Error interno del servidor"
 
+def update_athlete_email(athlete_id, new_email):
+    """Actualiza solo el email del atleta"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE athletes 
+                SET email = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (new_email.strip(), athlete_id))
+            
+            conn.commit()
+            
+            if cursor.rowcount > 0:
+                _invalidate_athlete(cursor, athlete_id)
+                logging.info(f"✅ Email actualizado para atleta {athlete_id}")
+                return True
+            logging.warning(f"⚠️ No se encontró atleta con ID {athlete_id}")
+            return False
+            
+    except Exception as e:
+        logging.error(f"❌ Error actualizando email del atleta: {e}")
+        return False
+
 def get_athlete_data(athlete_id):
-    """Obtiene los datos de un atleta específico"""
+    """Obtiene los datos de un atleta específico (cacheado por atleta)"""
+    found, athlete_data = _athlete_data_cache.get(athlete_id)
+    if found:
+        return dict(athlete_data)
+    
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -124,7 +179,7 @@ def get_athlete_data(athlete_id):
             
             result = cursor.fetchone()
             if result:
-                return {
+                athlete_data = {
                     'id': result[0],
                     'name': result[1],
                     'sport': result[2],
@@ -133,6 +188,8 @@ def get_athlete_data(athlete_id):
                     'email': result[5] or '',
                     'created_at': result[6]
                 }
+                _athlete_data_cache.set(athlete_id, athlete_data)
+                return dict(athlete_data)
             else:
                 logging.warning(f"⚠️ Atleta {athlete_id} no encontrado")
                 return None
@@ -0,0 +1,167 @@
+"""
+Exportación masiva de rutinas
+Genera un ZIP con la última rutina de cada atleta de un entrenador.
+Los archivos se renderizan en un pool de procesos (en el propio proceso si
+solo hay un núcleo) y se escriben en el ZIP a medida que terminan, sin
+mantener todos los workbooks en memoria.
+"""
+
+import os
+import logging
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import streamlit as st
+
+from modules.chat_manager import get_latest_routines_by_user
+from modules.routine_export import export_routine, EXPORT_RENDERERS
+
+# Menos atletas que esto no compensa arrancar procesos
+MIN_ATHLETES_FOR_POOL = 4
+
+def _render_routine_entry(athlete_data, routine_text, fmt):
+    """Renderiza una rutina en un proceso del pool (debe ser picklable: nivel de módulo)"""
+    try:
+        return athlete_data['id'], export_routine(athlete_data, routine_text, fmt)
+    except Exception as e:
+        logging.error(f"❌ Error renderizando rutina del atleta {athlete_data.get('id')}: {e}")
+        return athlete_data['id'], None
+
+def _archive_name(athlete_data, fmt):
+    """Nombre del archivo dentro del ZIP (incluye el id para evitar colisiones de nombre)"""
+    extension = EXPORT_RENDERERS[fmt]['extension']
+    name_clean = str(athlete_data.get('name') or 'Atleta').replace(' ', '_').replace('/', '_')
+    return f"Rutina_{name_clean}_{athlete_data['id']}.{extension}"
+
+def _available_cpus():
+    """Núcleos que puede usar este proceso (la afinidad de CPU del contenedor, si la hay)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+def _default_workers():
+    """Procesos por defecto: hasta 4, sin superar los núcleos disponibles"""
+    return max(1, min(4, _available_cpus()))
+
+def export_latest_routines_zip(user_id, output, fmt="xlsx", progress_callback=None, max_workers=None):
+    """Escribe en `output` (ruta o archivo binario) un ZIP con la última rutina de cada atleta
+
+    progress_callback(completadas, total, nombre_atleta) se llama tras cada archivo.
+    Devuelve un resumen: {'total', 'exported', 'failed'}.
+    """
+    if fmt not in EXPORT_RENDERERS:
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+
+    routines = get_latest_routines_by_user(user_id)
+    athletes_by_id = {item['athlete']['id']: item['athlete'] for item in routines}
+    total = len(routines)
+    summary = {'total': total, 'exported': 0, 'failed': 0}
+    done_ids = set()
+
+    # xlsx ya es un ZIP comprimido: volver a comprimirlo solo gasta CPU
+    compression = zipfile.ZIP_STORED if fmt == "xlsx" else zipfile.ZIP_DEFLATED
+
+    with zipfile.ZipFile(output, 'w', compression=compression) as archive:
+
+        def write_result(athlete_id, data):
+            athlete_data = athletes_by_id[athlete_id]
+            done_ids.add(athlete_id)
+            if data:
+                archive.writestr(_archive_name(athlete_data, fmt), data)
+                summary['exported'] += 1
+            else:
+                summary['failed'] += 1
+            if progress_callback:
+                progress_callback(summary['exported'] + summary['failed'], total, athlete_data['name'])
+
+        workers = max_workers or _default_workers()
+
+        # Con un solo núcleo el pool solo añade el coste de arrancar procesos y serializar
+        if total < MIN_ATHLETES_FOR_POOL or workers <= 1 or _available_cpus() <= 1:
+            for item in routines:
+                write_result(*_render_routine_entry(item['athlete'], item['content'], fmt))
+        else:
+            try:
+                _render_in_pool(routines, fmt, workers, write_result)
+            except Exception as e:
+                # Entornos sin multiprocessing: terminar en el proceso actual
+                logging.error(f"❌ Pool de procesos no disponible, exportando en serie: {e}")
+                for item in routines:
+                    if item['athlete']['id'] not in done_ids:
+                        write_result(*_render_routine_entry(item['athlete'], item['content'], fmt))
+
+    logging.info(f"📦 Export masivo usuario {user_id}: {summary['exported']}/{total} rutinas ({fmt})")
+    return summary
+
+def _render_in_pool(routines, fmt, workers, write_result):
+    """Envía las rutinas al pool con una ventana acotada y escribe cada resultado al terminar"""
+    pending = set()
+    queue = iter(routines)
+    window = workers * 2  # Limita los workbooks en vuelo (memoria acotada)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for item in queue:
+            pending.add(executor.submit(_render_routine_entry, item['athlete'], item['content'], fmt))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                write_result(*future.result())
+                next_item = next(queue, None)
+                if next_item is not None:
+                    pending.add(executor.submit(_render_routine_entry, next_item['athlete'], next_item['content'], fmt))
+
+def _discard_bulk_export(state_key):
+    """Suelta el ZIP de session_state una vez descargado"""
+    st.session_state.pop(state_key, None)
+
+def create_bulk_export_button(user_id, fmt="xlsx"):
+    """Botón de exportación masiva con barra de progreso
+
+    El ZIP se construye en un archivo temporal (que se borra al cerrarlo) y
+    sus bytes quedan en session_state solo hasta que se descargan.
+    """
+    state_key = f"bulk_export_{user_id}_{fmt}"
+
+    if st.button("📦 Exportar todas las rutinas (ZIP)", key=f"{state_key}_btn", use_container_width=True):
+        _discard_bulk_export(state_key)
+        progress_bar = st.progress(0.0, text="Buscando rutinas...")
+
+        def on_progress(done, total, athlete_name):
+            progress_bar.progress(done / total, text=f"{done}/{total} · {athlete_name}")
+
+        try:
+            # El ZIP se construye en disco; solo se lee entero al terminar
+            with tempfile.TemporaryFile() as tmp:
+                summary = export_latest_routines_zip(user_id, tmp, fmt, progress_callback=on_progress)
+                tmp.seek(0)
+                zip_data = tmp.read() if summary['total'] else None
+            st.session_state[state_key] = (zip_data, summary)
+            progress_bar.empty()
+        except Exception as e:
+            progress_bar.empty()
+            logging.error(f"❌ Error en exportación masiva: {e}")
+            st.error("❌ No se pudo generar la exportación masiva")
+
+    if state_key in st.session_state:
+        zip_data, summary = st.session_state[state_key]
+        if summary['total'] == 0:
+            st.info("ℹ️ Ningún atleta tiene rutinas generadas todavía")
+            return
+        if summary['failed']:
+            st.warning(f"⚠️ {summary['failed']} rutinas no se pudieron exportar")
+        st.download_button(
+            label=f"⬇️ Descargar ZIP ({summary['exported']} rutinas)",
+            data=zip_data,
+            file_name=f"Rutinas_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+            mime="application/zip",
+            key=f"{state_key}_download",
+            on_click=_discard_bulk_export,
+            args=(state_key,),
+            use_container_width=True
+        )
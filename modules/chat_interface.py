@@ -8,7 +8,6 @@ import sys
 import logging
 import time
 import streamlit as st
-import re
 from typing import Optional
 
 # Agregar el directorio raíz al path de Python
@@ -20,14 +19,14 @@ if project_root not in sys.path:
 # Importar configuración
 from config import config
 
-# OpenAI
-from openai import OpenAI
-
 # Módulos locales SQLite
 from modules.athlete_manager import get_athlete_data
 from modules.chat_manager import save_message, get_chat_history, get_welcome_message
+from modules.email_intent import chat_email_intent_detector
+from modules.routine_generator import generate_fallback_routine
 
 # Configuración
+OPENAI_MODEL = "gpt-4o-mini"
 OPENAI_TIMEOUT = 90
 MAX_RESPONSE_LENGTH = 40000
 
@@ -37,6 +36,9 @@ def initialize_openai_client():
         if not config.OPENAI_API_KEY:
             raise ValueError("❌ No se encontró la API key de OpenAI")
         
+        # El SDK de OpenAI tarda ~0.5 s en importarse: se carga con el primer cliente
+        from openai import OpenAI
+        
         client = OpenAI(api_key=config.OPENAI_API_KEY)
         logging.info("✅ Cliente OpenAI inicializado correctamente")
         return client
@@ -46,33 +48,11 @@ def initialize_openai_client():
 
 def detect_email_command(message):
     """Detecta si el mensaje contiene un comando de email"""
-    email_patterns = [
-        r'\b(enviar|mandar|email|correo|mail)\b.*\b(email|correo|mail)\b',
-        r'\b(email|correo|mail)\b.*\b(enviar|mandar)\b',
-        r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    ]
-    
-    for pattern in email_patterns:
-        if re.search(pattern, message.lower()):
-            return True
-    return False
+    return chat_email_intent_detector.detect(message) is not None
 
-def process_chat_message(athlete_id, user_message, openai_client):
-    """Procesa un mensaje de chat y genera respuesta"""
-    try:
-        # Guardar mensaje del usuario
-        save_message(athlete_id, user_message, is_user=True)
-        
-        # Obtener datos del atleta
-        athlete_data = get_athlete_data(athlete_id)
-        if not athlete_data:
-            return "❌ Error: No se pudieron obtener los datos del atleta"
-        
-        # Obtener historial de chat
-        chat_history = get_chat_history(athlete_id, limit=10)
-        
-        # Crear contexto para OpenAI
-        system_message = f"""
+def build_system_message(athlete_data):
+    """Prompt de sistema de ProFit Coach AI con el perfil del atleta"""
+    return f"""
 Eres ProFit Coach AI, especialista elite en metodología de entrenamiento de 5 bloques para deportistas de alto rendimiento.
 
 PERFIL DEL ATLETA:
@@ -221,6 +201,23 @@ RESPUESTAS SOBRE EXPORTACIÓN:
 Crea rutinas de ALTA CALIDAD para deportistas, con ejercicios específicos y estructura profesional como las que ves en programas de elite.
 """
 
+def process_chat_message(athlete_id, user_message, openai_client):
+    """Procesa un mensaje de chat y genera respuesta"""
+    try:
+        # Guardar mensaje del usuario
+        save_message(athlete_id, user_message, is_user=True)
+        
+        # Obtener datos del atleta
+        athlete_data = get_athlete_data(athlete_id)
+        if not athlete_data:
+            return "❌ Error: No se pudieron obtener los datos del atleta"
+        
+        # Obtener historial de chat
+        chat_history = get_chat_history(athlete_id, limit=10)
+        
+        # Crear contexto para OpenAI
+        system_message = build_system_message(athlete_data)
+        
         # Preparar mensajes para OpenAI
         messages = [{"role": "system", "content": system_message}]
         
@@ -233,13 +230,23 @@ Crea rutinas de ALTA CALIDAD para deportistas, con ejercicios específicos y est
         messages.append({"role": "user", "content": user_message})
         
         # Llamada a OpenAI
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=3000,
-            temperature=0.7,
-            timeout=OPENAI_TIMEOUT
-        )
+        from openai import RateLimitError
+        try:
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                max_tokens=3000,
+                temperature=0.7,
+                timeout=OPENAI_TIMEOUT
+            )
+        except RateLimitError as e:
+            # OpenAI saturado: si se pidió una rutina, generarla sin IA
+            logging.warning(f"⚠️ OpenAI con límite de uso, usando generador sin IA: {e}")
+            fallback_routine = generate_fallback_routine(athlete_data, user_message)
+            if not fallback_routine:
+                raise
+            save_message(athlete_id, fallback_routine, is_user=False)
+            return fallback_routine
         
         ai_response = response.choices[0].message.content
         
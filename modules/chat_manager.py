@@ -3,7 +3,10 @@ Gestión de Chat con SQLite - Versión Simplificada
 """
 
 import logging
-from auth.database import get_db_connection
+import re
+import unicodedata
+from auth.database import get_db_connection, index_message_text, purge_deleted_message_index
+from modules.message_bodies import MESSAGE_BODY_JOIN, message_text, should_store_body, store_body
 
 def create_chat_tables():
     """Ya se crean en database.py"""
@@ -13,53 +16,283 @@ def create_thread_table():
     """Ya se crea en database.py"""
     pass
 
-def get_chat_history(athlete_id, limit=50):
-    """Obtiene el historial de chat de un atleta"""
+def _get_conversation_id(cursor, athlete_id):
+    """Conversación más reciente del atleta (o None)"""
+    cursor.execute("""
+        SELECT id FROM conversations 
+        WHERE athlete_id = ? 
+        ORDER BY created_at DESC 
+        LIMIT 1
+    """, (athlete_id,))
+    conversation = cursor.fetchone()
+    return conversation[0] if conversation else None
+
+def get_chat_window(athlete_id, limit=30, from_id=None):
+    """Ventana del chat paginada por keyset (usa idx_messages_conversation_id)
+    
+    Sin from_id devuelve los últimos `limit` mensajes; con from_id, todos desde
+    ese id (incluido) hasta el último. Nunca recorre con OFFSET.
+    
+    Returns:
+        (mensajes [(id, contenido, es_usuario, fecha)] en orden cronológico,
+         True si hay mensajes anteriores a la ventana)
+    """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # Primero buscar si existe una conversación para este atleta
+            conversation_id = _get_conversation_id(cursor, athlete_id)
+            if not conversation_id:
+                return [], False
+            
+            if from_id is None:
+                cursor.execute(f"""
+                    SELECT m.id, m.content, b.body, m.is_user, m.created_at 
+                    FROM messages m {MESSAGE_BODY_JOIN} 
+                    WHERE m.conversation_id = ? 
+                    ORDER BY m.id DESC 
+                    LIMIT ?
+                """, (conversation_id, limit))
+                rows = cursor.fetchall()[::-1]
+            else:
+                cursor.execute(f"""
+                    SELECT m.id, m.content, b.body, m.is_user, m.created_at 
+                    FROM messages m {MESSAGE_BODY_JOIN} 
+                    WHERE m.conversation_id = ? AND m.id >= ? 
+                    ORDER BY m.id ASC
+                """, (conversation_id, from_id))
+                rows = cursor.fetchall()
+            
+            messages = [(row[0], message_text(row[1], row[2]), bool(row[3]), row[4]) for row in rows]
+            
+            has_earlier = False
+            if messages:
+                cursor.execute("""
+                    SELECT 1 FROM messages 
+                    WHERE conversation_id = ? AND id < ? 
+                    LIMIT 1
+                """, (conversation_id, messages[0][0]))
+                has_earlier = cursor.fetchone() is not None
+            
+            return messages, has_earlier
+            
+    except Exception as e:
+        logging.error(f"❌ Error obteniendo ventana del chat: {e}")
+        return [], False
+
+def get_earlier_cursor(athlete_id, before_id, limit=30):
+    """Id desde el que empieza la página de `limit` mensajes anteriores a before_id"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            conversation_id = _get_conversation_id(cursor, athlete_id)
+            if not conversation_id:
+                return None
+            
             cursor.execute("""
-                SELECT id FROM conversations 
-                WHERE athlete_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """, (athlete_id,))
+                SELECT MIN(id) FROM (
+                    SELECT id FROM messages 
+                    WHERE conversation_id = ? AND id < ? 
+                    ORDER BY id DESC 
+                    LIMIT ?
+                )
+            """, (conversation_id, before_id, limit))
             
-            conversation = cursor.fetchone()
+            result = cursor.fetchone()
+            return result[0] if result else None
             
-            if not conversation:
-                logging.info(f"ℹ️ No hay conversación para atleta {athlete_id}")
+    except Exception as e:
+        logging.error(f"❌ Error paginando el chat: {e}")
+        return None
+
+def get_chat_history(athlete_id, limit=50):
+    """Obtiene el historial de chat de un atleta (los últimos `limit` mensajes, en orden)"""
+    messages, _ = get_chat_window(athlete_id, limit)
+    
+    # Convertir a formato esperado (mensaje, es_usuario, fecha)
+    chat_history = [(content, is_user, created_at) for _, content, is_user, created_at in messages]
+    
+    logging.info(f"✅ {len(chat_history)} mensajes cargados para atleta {athlete_id}")
+    return chat_history
+
+ROUTINE_STATS_PATTERNS = ("día 1", "día 2", "rutina")
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def _ascii_lower(text):
+    """Minúsculas solo en ASCII, como compara LIKE en SQLite ('DÍA' no es 'día')"""
+    return text.translate(ASCII_LOWER)
+
+def get_chat_stats(athlete_id):
+    """Total de mensajes y de rutinas del chat, contados en SQLite sin cargar el historial
+
+    Los mensajes comprimidos de la IA se descomprimen para buscar los patrones
+    con la misma regla que LIKE.
+
+    Returns:
+        (total_mensajes, rutinas_generadas)
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            conversation_id = _get_conversation_id(cursor, athlete_id)
+            if not conversation_id:
+                return 0, 0
+
+            cursor.execute("""
+                SELECT COUNT(*),
+                       SUM(CASE WHEN is_user = 0 AND body_hash IS NULL AND (
+                           content LIKE '%día 1%' OR content LIKE '%día 2%' OR content LIKE '%rutina%'
+                       ) THEN 1 ELSE 0 END)
+                FROM messages
+                WHERE conversation_id = ?
+            """, (conversation_id,))
+            total, routines = cursor.fetchone()
+            routines = routines or 0
+
+            cursor.execute(f"""
+                SELECT m.content, b.body
+                FROM messages m {MESSAGE_BODY_JOIN}
+                WHERE m.conversation_id = ? AND m.is_user = 0 AND m.body_hash IS NOT NULL
+            """, (conversation_id,))
+            for content, body in cursor.fetchall():
+                text = _ascii_lower(message_text(content, body))
+                if any(pattern in text for pattern in ROUTINE_STATS_PATTERNS):
+                    routines += 1
+            return total or 0, routines
+
+    except Exception as e:
+        logging.error(f"❌ Error obteniendo estadísticas del chat: {e}")
+        return 0, 0
+
+SEARCH_SNIPPET_WORDS = 16  # Palabras de contexto en cada fragmento de resultado
+SNIPPET_MARKUP = re.compile(r"[*#`>|\[\]~]+")
+
+def _search_words(text):
+    """Palabras en minúsculas y sin tildes, igual que el tokenizador del índice"""
+    normalized = unicodedata.normalize("NFKD", (text or "").lower())
+    return re.findall(r"\w+", "".join(ch for ch in normalized if not unicodedata.combining(ch)))
+
+def build_search_query(text):
+    """Convierte lo que escribe el entrenador en una consulta FTS5 segura
+    
+    Cada palabra va entre comillas (sin operadores ni sintaxis de FTS5) y la
+    última se busca como prefijo, para encontrar mientras se escribe:
+    'rutina isquio' -> '"rutina" "isquio"*'. None si no hay palabras.
+    """
+    words = _search_words(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+def build_snippet(content, query, max_words=SEARCH_SNIPPET_WORDS):
+    """Fragmento de `max_words` palabras alrededor de la primera coincidencia, con los términos en negrita
+    
+    Se calcula en Python sobre los pocos resultados devueltos: snippet() de
+    FTS5 obliga a reevaluar la consulta (con prefijos) para cada fila.
+    """
+    terms = _search_words(query)
+    words = list(re.finditer(r"\w+", content))
+    if not words:
+        return ""
+    
+    matched = [
+        index for index, word in enumerate(words)
+        if any(normalized.startswith(term) for normalized in _search_words(word.group()) for term in terms)
+    ]
+    first = max(0, (matched[0] if matched else 0) - max_words // 3)
+    last = min(len(words), first + max_words)
+    
+    parts = []
+    position = words[first].start()
+    for index in range(first, last):
+        word = words[index]
+        # Sin el markdown del mensaje (títulos, negritas, tablas) para no mezclarlo con el resaltado
+        parts.append(SNIPPET_MARKUP.sub(" ", content[position:word.start()]))
+        parts.append(f"**{word.group()}**" if index in matched else word.group())
+        position = word.end()
+    
+    snippet = " ".join("".join(parts).split())
+    return ("…" if first > 0 else "") + snippet + ("…" if last < len(words) else "")
+
+def search_chat_messages(query, user_id, athlete_id=None, limit=20):
+    """Busca en el historial de chat de los atletas del usuario (o de uno solo)
+    
+    Usa el índice FTS5 messages_fts. El alcance se aplica dentro del propio
+    índice (conversation_id indexado), así bm25 solo ordena las coincidencias
+    del usuario/atleta, y los fragmentos se calculan solo para los `limit`
+    mejores resultados.
+    
+    Returns:
+        [{'message_id', 'athlete_id', 'athlete_name', 'is_user', 'created_at', 'snippet'}]
+        ordenados del más al menos relevante
+    """
+    terms = build_search_query(query)
+    if not terms:
+        return []
+    
+    athlete_filter = ""
+    params = [user_id]
+    if athlete_id is not None:
+        athlete_filter = "AND c.athlete_id = ?"
+        params.append(athlete_id)
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT c.id FROM conversations c
+                JOIN athletes a ON a.id = c.athlete_id
+                WHERE a.user_id = ?
+                  AND (a.is_active IS NULL OR a.is_active = 1)
+                  {athlete_filter}
+            """, params)
+            conversation_ids = [row[0] for row in cursor.fetchall()]
+            if not conversation_ids:
                 return []
             
-            conversation_id = conversation[0]
+            # Mensajes comprimidos borrados desde la última búsqueda: fuera del índice
+            if purge_deleted_message_index(cursor):
+                conn.commit()
             
-            # Obtener mensajes de la conversación
-            cursor.execute("""
-                SELECT content, is_user, created_at 
-                FROM messages 
-                WHERE conversation_id = ? 
-                ORDER BY created_at ASC 
-                LIMIT ?
-            """, (conversation_id, limit))
-            
-            messages = cursor.fetchall()
-            
-            # Convertir a formato esperado (mensaje, es_usuario, fecha)
-            chat_history = []
-            for msg in messages:
-                chat_history.append((
-                    msg[0],  # content
-                    bool(msg[1]),  # is_user
-                    msg[2]   # created_at
-                ))
-            
-            logging.info(f"✅ {len(chat_history)} mensajes cargados para atleta {athlete_id}")
-            return chat_history
+            scope = " OR ".join(f'"{conversation_id}"' for conversation_id in conversation_ids)
+            match = f"content:({terms}) AND conversation_id:({scope})"
+            
+            # bm25 con peso 0 para conversation_id: solo puntúa el texto. El LIMIT
+            # va después del JOIN con messages: una entrada del índice sin mensaje
+            # no ocupa el lugar de un resultado
+            cursor.execute(f"""
+                SELECT m.id, c.athlete_id, a.name, m.is_user, m.created_at, m.content, b.body
+                FROM (
+                    SELECT messages_fts.rowid, bm25(messages_fts, 1.0, 0.0) AS score
+                    FROM messages_fts
+                    JOIN messages hit ON hit.id = messages_fts.rowid
+                    WHERE messages_fts MATCH ?
+                    ORDER BY score
+                    LIMIT ?
+                ) h
+                JOIN messages m ON m.id = h.rowid
+                {MESSAGE_BODY_JOIN}
+                JOIN conversations c ON c.id = m.conversation_id
+                JOIN athletes a ON a.id = c.athlete_id
+                ORDER BY h.score
+            """, (match, limit))
+            
+            return [
+                {
+                    'message_id': row[0],
+                    'athlete_id': row[1],
+                    'athlete_name': row[2],
+                    'is_user': bool(row[3]),
+                    'created_at': row[4],
+                    'snippet': build_snippet(message_text(row[5], row[6]), query)
+                }
+                for row in cursor.fetchall()
+            ]
             
     except Exception as e:
-        logging.error(f"❌ Error obteniendo historial de chat: {e}")
+        logging.error(f"❌ Error buscando en el historial del chat: {e}")
         return []
 
 def save_message(athlete_id, message, is_user=True):
@@ -89,11 +322,19 @@ def save_message(athlete_id, message, is_user=True):
             else:
                 conversation_id = conversation[0]
             
-            # Guardar mensaje
+            # Guardar mensaje (los largos, comprimidos y una sola vez en message_bodies)
+            content, body_hash = message, None
+            if should_store_body(message):
+                content, body_hash = "", store_body(cursor, message)
+            
             cursor.execute("""
-                INSERT INTO messages (conversation_id, content, is_user) 
-                VALUES (?, ?, ?)
-            """, (conversation_id, message, is_user))
+                INSERT INTO messages (conversation_id, content, is_user, body_hash) 
+                VALUES (?, ?, ?, ?)
+            """, (conversation_id, content, is_user, body_hash))
+            
+            # Los triggers de FTS solo indexan el texto plano
+            if body_hash:
+                index_message_text(cursor, cursor.lastrowid, conversation_id, message)
             
             conn.commit()
             
@@ -104,6 +345,91 @@ def save_message(athlete_id, message, is_user=True):
         logging.error(f"❌ Error guardando mensaje: {e}")
         return False
 
+ROUTINE_MARKER = "[INICIO_NUEVA_RUTINA]"
+
+def get_latest_routines_by_user(user_id, athlete_ids=None):
+    """Obtiene la última rutina generada para cada atleta activo de un usuario
+    
+    Una sola consulta (usa idx_athletes_user, idx_conversations_athlete e
+    idx_messages_conversation) en lugar de recorrer el chat de cada atleta.
+    Devuelve, del más reciente al más antiguo, los mensajes de la IA que
+    contienen la marca de rutina o están comprimidos; de cada atleta se toma el
+    primero que la contiene, así solo se descomprimen los mensajes posteriores
+    a su última rutina. Con athlete_ids se limita a esos atletas.
+    """
+    try:
+        athlete_filter = ""
+        params = [user_id, ROUTINE_MARKER]
+        if athlete_ids is not None:
+            if not athlete_ids:
+                return []
+            athlete_filter = f"AND a.id IN ({','.join('?' * len(athlete_ids))})"
+            params.extend(athlete_ids)
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT a.id AS athlete_id, a.name, a.sport, a.level, a.goals, a.email,
+                       m.id AS message_id, m.body_hash, m.created_at
+                FROM athletes a
+                JOIN conversations c ON c.athlete_id = a.id
+                JOIN messages m ON m.conversation_id = c.id
+                WHERE a.user_id = ?
+                  AND (a.is_active IS NULL OR a.is_active = 1)
+                  AND m.is_user = 0
+                  AND (m.body_hash IS NOT NULL OR instr(m.content, ?) > 0)
+                  {athlete_filter}
+                ORDER BY a.name, a.id, m.id DESC
+            """, params)
+            
+            latest = []
+            bodies = {}
+            for row in cursor.fetchall():
+                if latest and latest[-1]['athlete_id'] == row['athlete_id']:
+                    continue
+                if row['body_hash']:
+                    if row['body_hash'] not in bodies:
+                        body = conn.execute(
+                            "SELECT body FROM message_bodies WHERE content_hash = ?", (row['body_hash'],)
+                        ).fetchone()
+                        bodies[row['body_hash']] = message_text("", body[0] if body else None)
+                    if ROUTINE_MARKER not in bodies[row['body_hash']]:
+                        continue
+                latest.append(row)
+            
+            # Texto de las rutinas elegidas (las comprimidas ya están descomprimidas)
+            plain_ids = [row['message_id'] for row in latest if not row['body_hash']]
+            contents = {}
+            if plain_ids:
+                cursor.execute(
+                    f"SELECT id, content FROM messages WHERE id IN ({','.join('?' * len(plain_ids))})",
+                    plain_ids
+                )
+                contents = {row['id']: row['content'] for row in cursor.fetchall()}
+            
+            routines = []
+            for row in latest:
+                content = bodies[row['body_hash']] if row['body_hash'] else contents[row['message_id']]
+                routines.append({
+                    'athlete': {
+                        'id': row['athlete_id'],
+                        'name': row['name'],
+                        'sport': row['sport'],
+                        'level': row['level'],
+                        'goals': row['goals'] or "",
+                        'email': row['email'] or ""
+                    },
+                    'content': content,
+                    'created_at': row['created_at']
+                })
+            
+            logging.info(f"✅ {len(routines)} rutinas recientes encontradas para usuario {user_id}")
+            return routines
+            
+    except Exception as e:
+        logging.error(f"❌ Error obteniendo últimas rutinas: {e}")
+        return []
+
 def get_welcome_message(athlete_id):
     """Genera mensaje de bienvenida personalizado"""
     try:
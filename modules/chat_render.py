@@ -0,0 +1,238 @@
+"""
+Render de mensajes del chat
+Convierte cada mensaje en un bloque HTML ya formateado y lo memoriza por hash de
+contenido: en cada rerun del chat solo se procesan los mensajes nuevos.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+# Bloques de render memorizados (compartidos entre sesiones, como los artefactos de exportación)
+RENDER_CACHE_SIZE = 2000
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+def format_routine_html(ai_content_clean):
+    """HTML de una rutina ([INICIO_NUEVA_RUTINA] ya quitado): títulos, bloques, tablas y notas"""
+    lines = ai_content_clean.split('\n')
+    formatted_content = []
+    in_table = False
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if not in_table:  # Solo agregar espacios fuera de tablas
+                formatted_content.append("<br>")
+            continue
+        
+        # 🏆 TÍTULOS PRINCIPALES (RUTINA, ENTRENAMIENTO)
+        if any(keyword in line.upper() for keyword in ['**📝 RUTINA:', '📋 RUTINA:', 'RUTINA:']):
+            title = line.replace('**', '').replace('📝', '').replace('📋', '').strip()
+            formatted_content.append(f"""
+                                <div style='background: linear-gradient(135deg, #4F46E5 0%, #7C3AED 100%); 
+                                     color: white; padding: 12px 20px; border-radius: 12px; margin: 10px 0;
+                                     text-align: center; font-size: 1.2em; font-weight: bold; box-shadow: 0 4px 15px rgba(79, 70, 229, 0.3);'>
+                                    🏆 {title}
+                                </div>""")
+            continue
+        
+        # ⏱️ INFORMACIÓN CLAVE (Duración, Objetivo, Nivel)
+        if any(keyword in line for keyword in ['⏱️ Duración Total:', '🎯 Objetivo:', '📊 Nivel:']):
+            formatted_content.append(f"""
+                                <div style='background: #F0F9FF; border-left: 4px solid #0EA5E9; 
+                                     padding: 8px 15px; margin: 5px 0; border-radius: 0 8px 8px 0;'>
+                                    <strong style='color: #0369A1;'>{line}</strong>
+                                </div>""")
+            continue
+        
+        # 🔥 BLOQUES DE ENTRENAMIENTO (BLOQUE 1, 2, etc.)
+        if any(keyword in line.upper() for keyword in ['### **BLOQUE', 'BLOQUE 1', 'BLOQUE 2', 'BLOQUE 3', 'BLOQUE 4', 'BLOQUE 5']) and ('min)' in line or 'MIN)' in line):
+            block_name = line.replace('###', '').replace('**', '').strip()
+            formatted_content.append(f"""
+                                <div style='background: linear-gradient(135deg, #059669 0%, #0D9488 100%); 
+                                     color: white; padding: 10px 16px; border-radius: 8px; margin: 15px 0 5px 0;
+                                     font-weight: bold; box-shadow: 0 2px 10px rgba(5, 150, 105, 0.2);'>
+                                    🔸 {block_name}
+                                </div>""")
+            continue
+        
+        # 📋 TABLA DE EJERCICIOS
+        if line.startswith('|------'):
+            in_table = True
+            continue  # Skip separator lines
+        elif line.startswith('|') and '|' in line[1:]:
+            if not in_table:
+                # Header de tabla
+                headers = [h.strip() for h in line.split('|')[1:-1]]
+                if len(headers) >= 3:  # Verificar que sea una tabla de ejercicios
+                    formatted_content.append("""
+                                        <div style='background: #F8FAFC; border: 1px solid #E2E8F0; border-radius: 8px; margin: 10px 0; overflow: hidden;'>
+                                        <table style='width: 100%; border-collapse: collapse;'>""")
+                    
+                    header_html = "<tr style='background: #64748B; color: white; font-weight: bold;'>"
+                    for header in headers:
+                        header_html += f"<td style='padding: 10px 12px; border: none; font-size: 0.85em;'>{header}</td>"
+                    header_html += "</tr>"
+                    formatted_content.append(header_html)
+                    in_table = True
+                    continue
+            else:
+                # Row de datos
+                cells = [c.strip() for c in line.split('|')[1:-1]]
+                if len(cells) >= 3:
+                    row_html = "<tr style='border-bottom: 1px solid #E2E8F0;'>"
+                    for i, cell in enumerate(cells):
+                        if i == 0:  # Nombre del ejercicio
+                            row_html += f"<td style='padding: 10px 12px; font-weight: 600; color: #1E293B;'>{cell}</td>"
+                        elif 'x' in cell or 'rep' in cell.lower():  # Series/Reps
+                            highlighted_cell = re.sub(r'(\d+)\s*x\s*(\d+)', r'<span style="background:#DBEAFE; padding:2px 6px; border-radius:4px; font-weight:bold;">\1×\2</span>', cell)
+                            row_html += f"<td style='padding: 10px 12px; text-align: center;'>{highlighted_cell}</td>"
+                        elif any(time_word in cell.lower() for time_word in ['min', 'seg', 'segundo']):  # Tiempo
+                            highlighted_cell = re.sub(r'(\d+)\s*(min|seg)', r'<span style="background:#FEF3C7; padding:2px 6px; border-radius:4px; font-weight:bold;">\1\2</span>', cell)
+                            row_html += f"<td style='padding: 10px 12px; text-align: center;'>{highlighted_cell}</td>"
+                        else:
+                            row_html += f"<td style='padding: 10px 12px; color: #64748B;'>{cell}</td>"
+                    row_html += "</tr>"
+                    formatted_content.append(row_html)
+                    continue
+        else:
+            if in_table:
+                formatted_content.append("</table></div>")
+                in_table = False
+        
+        # 📋 NOTAS TÉCNICAS
+        if line.startswith('**📋 NOTAS TÉCNICAS'):
+            formatted_content.append(f"""
+                                <div style='background: #FEF7CD; border: 1px solid #F59E0B; border-radius: 8px; 
+                                     padding: 12px 16px; margin: 15px 0;'>
+                                    <strong style='color: #92400E; font-size: 1.05em;'>📋 NOTAS TÉCNICAS IMPORTANTES</strong>
+                                </div>""")
+            continue
+        
+        # 💡 NOTAS ESPECÍFICAS (Respiración, Técnica, etc.)
+        if line.startswith('- **') and any(keyword in line for keyword in ['Respiración:', 'Técnica:', 'Progresión:', 'Adaptaciones:']):
+            note_content = line.replace('- **', '').replace('**', '')
+            parts = note_content.split(':', 1)
+            if len(parts) == 2:
+                note_title, note_desc = parts
+                formatted_content.append(f"""
+                                    <div style='margin: 8px 0 8px 15px; padding: 8px 12px; background: #F0FDF4; 
+                                         border-left: 3px solid #22C55E; border-radius: 0 6px 6px 0;'>
+                                        <strong style='color: #15803D;'>💡 {note_title.strip()}:</strong> 
+                                        <span style='color: #374151;'>{note_desc.strip()}</span>
+                                    </div>""")
+                continue
+        
+        # ⏱️ TIEMPO ESTIMADO TOTAL
+        if '⏱️ Tiempo estimado total:' in line:
+            time_info = line.replace('⏱️ Tiempo estimado total:', '').strip()
+            formatted_content.append(f"""
+                                <div style='background: #EDE9FE; border: 1px solid #8B5CF6; border-radius: 8px; 
+                                     padding: 10px 15px; margin: 15px 0; text-align: center;'>
+                                    <strong style='color: #6D28D9; font-size: 1.1em;'>⏱️ Tiempo Total: {time_info}</strong>
+                                </div>""")
+            continue
+        
+        # 🎯 LÍNEAS NORMALES CON FORMATO MEJORADO
+        if line.startswith('**') and line.endswith('**'):
+            clean_line = line.replace('**', '')
+            formatted_content.append(f"<strong style='color: #1F2937; font-size: 1.05em;'>{clean_line}</strong>")
+        elif line.startswith('- '):
+            formatted_content.append(f"<div style='margin: 4px 0 4px 15px; color: #4B5563;'>• {line[2:]}</div>")
+        else:
+            formatted_content.append(f"<div style='color: #374151; line-height: 1.5;'>{line}</div>")
+    
+    # Cerrar tabla si quedó abierta
+    if in_table:
+        formatted_content.append("</table></div>")
+    
+    formatted_html = ''.join(formatted_content)
+    
+    return formatted_html
+
+def is_complete_routine(ai_content):
+    """Solo mostrar botones si es realmente una rutina completa"""
+    return (
+        # Debe contener múltiples días Y ejercicios específicos
+        (ai_content.lower().count('día') >= 2 or ai_content.lower().count('sesión') >= 2) and
+        # Debe contener patrones de ejercicios
+        any(pattern in ai_content.lower() for pattern in [
+            'x', 'rep', 'series', 'ejercicio', 'bloque', 'calentamiento'
+        ]) and
+        # Debe ser suficientemente largo (rutina completa)
+        len(ai_content) > 500 and
+        # No debe ser solo una pregunta o respuesta corta
+        not any(question in ai_content.lower() for question in [
+            '¿qué te parece?', '¿alguna pregunta?', '¿necesitas algo más?', 
+            'cuéntame más', 'explícame', '¿cómo te sientes?'
+        ])
+    )
+
+def build_message_render_block(msg, is_user):
+    """Bloque de render de un mensaje: tipo, HTML listo para st.markdown y si lleva descarga
+
+    Returns:
+        dict con 'kind' ('user', 'routine' o 'text'), 'html' e 'is_complete_routine'
+    """
+    if is_user:
+        html = f"""
+                    <div style='display:flex; justify-content:flex-end; margin-bottom:16px;'>
+                        <div class='chat-user'>
+                            {msg}
+                        </div>
+                    </div>
+                    """
+        return {'kind': 'user', 'html': html, 'is_complete_routine': False}
+    
+    # Procesar respuestas especiales del AI
+    ai_content = msg.replace("🤖 ProFit Coach AI:", "").strip()
+    
+    # Detectar si es una rutina
+    if "[INICIO_NUEVA_RUTINA]" in ai_content:
+        ai_content_clean = ai_content.replace("[INICIO_NUEVA_RUTINA]", "").strip()
+        formatted_html = format_routine_html(ai_content_clean)
+        html = f"""
+                        <div style='display:flex; justify-content:flex-start; margin-bottom:16px;'>
+                            <div class='chat-ai' style='max-width: 95%; background: white; border: 1px solid #E5E7EB; border-radius: 12px; box-shadow: 0 4px 25px rgba(0,0,0,0.1);'>
+                                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 12px 20px; border-radius: 12px 12px 0 0; font-weight: bold; text-align: center;'>
+                                    🤖 ProFit Coach AI - ✨ Nueva Rutina Generada ✨
+                                </div>
+                                <div style='padding: 20px; line-height: 1.6; font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;'>
+                                    {formatted_html}
+                                </div>
+                            </div>
+                        </div>
+                        """
+        return {'kind': 'routine', 'html': html, 'is_complete_routine': True}
+    
+    html = f"""
+                        <div style='display:flex; justify-content:flex-start; margin-bottom:16px;'>
+                            <div class='chat-ai' style='max-width: 85%;'>
+                                <strong>🤖 ProFit Coach AI:</strong><br>
+                                <div style='white-space: pre-line;'>{ai_content}</div>
+                            </div>
+                        </div>
+                        """
+    return {'kind': 'text', 'html': html, 'is_complete_routine': is_complete_routine(ai_content)}
+
+def get_message_render_block(msg, is_user):
+    """Bloque de render memorizado por hash del contenido (solo se procesa la primera vez)"""
+    cache_key = (hashlib.sha1(msg.encode("utf-8")).hexdigest(), bool(is_user))
+    
+    with _render_cache_lock:
+        block = _render_cache.get(cache_key)
+        if block is not None:
+            _render_cache.move_to_end(cache_key)
+            return block
+    
+    block = build_message_render_block(msg, is_user)
+    
+    with _render_cache_lock:
+        _render_cache[cache_key] = block
+        _render_cache.move_to_end(cache_key)
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    
+    return block
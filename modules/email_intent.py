@@ -0,0 +1,88 @@
+"""
+Detector de intención de envío por email
+Todos los patrones se compilan una sola vez en una única alternancia con
+grupos con nombre; un prefiltro de palabras clave descarta sin regex los
+mensajes que no pueden coincidir (la gran mayoría).
+"""
+
+import re
+import logging
+from typing import Iterable, Optional, Sequence, Tuple
+
+# (intención, patrón) - los patrones se aplican sobre el mensaje en minúsculas
+EMAIL_INTENT_PATTERNS: Sequence[Tuple[str, str]] = (
+    # Español - comandos directos
+    ("comando_directo", r'\b(envía|envía|manda|mandá|envíalo|envialo|mandalo|mándalo)\s*(por)?\s*(email|mail|correo)\b'),
+    ("pedido_objeto", r'\b(email|mail|correo)\s*(me|lo|la|esto|eso|la\s*rutina|el\s*plan)\b'),
+    ("pedido_envio", r'\b(quiero|necesito|puedes|podrías|me)\s*(que\s*)?(lo\s*)?(envíes|envies|mandes|mándalo|enviarlo|mandarlo)\s*(por)?\s*(email|mail|correo)\b'),
+
+    # Comandos con "por favor"
+    ("por_favor", r'\b(por\s*favor|please)\s*(envía|envía|manda|send)\s*(por)?\s*(email|mail|correo)\b'),
+
+    # Inglés básico
+    ("ingles", r'\b(send|email|mail)\s*(it|this|the\s*routine|the\s*plan)?\s*(by|via)?\s*(email|mail)\b'),
+
+    # Patrones específicos
+    ("via_email", r'\b(via|por)\s*(email|mail|correo)\b'),
+    ("al_mail", r'\b(al\s*mail|por\s*mail|por\s*correo|al\s*email)\b'),
+
+    # Comandos más naturales
+    ("compartir", r'\b(compártelo|compartelo|envíaselo|enviaselo|mandaselo|mándaselo)\s*(por)?\s*(email|mail|correo)?\b'),
+    ("me_la_mandas", r'\b(me\s*la\s*podes\s*mandar|me\s*la\s*puedes\s*mandar|me\s*lo\s*podes\s*mandar|me\s*lo\s*puedes\s*mandar)\s*(por)?\s*(email|mail|correo)?\b'),
+    ("mandamela", r'\b(mándamela|mandamela|envíamela|enviamela)\s*(por)?\s*(email|mail|correo)?\b'),
+    ("mail_suelto", r'\bmail\b(?!\s*(de|from|@))'),  # "mail" solo (no en direcciones de email)
+
+    # Patrones genéricos del chat
+    ("enviar_por_correo", r'\b(enviar|mandar|email|correo|mail)\b.*\b(email|correo|mail)\b'),
+    ("correo_enviar", r'\b(email|correo|mail)\b.*\b(enviar|mandar)\b'),
+    ("direccion_email", r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'),
+)
+
+# Intenciones que usa cada punto de entrada
+AUTO_EMAIL_INTENTS = (
+    "comando_directo", "pedido_objeto", "pedido_envio", "por_favor", "ingles", "via_email",
+    "al_mail", "compartir", "me_la_mandas", "mandamela", "mail_suelto",
+)
+CHAT_EMAIL_INTENTS = ("enviar_por_correo", "correo_enviar", "direccion_email")
+
+# Todo patrón exige al menos uno de estos fragmentos en el mensaje (con y sin tilde)
+PREFILTER_KEYWORDS = (
+    "mail", "correo", "@", "compart", "compárt", "selo", "mela", "mandar",
+)
+
+
+class EmailIntentDetector:
+    """Detecta comandos de email con una sola regex compilada
+
+    detect() devuelve el nombre de la intención que coincide más a la izquierda
+    en el mensaje, o None. El resultado sí/no es el mismo que probar cada
+    patrón por separado.
+    """
+
+    def __init__(self, intents: Iterable[str], patterns: Sequence[Tuple[str, str]] = EMAIL_INTENT_PATTERNS):
+        selected = set(intents)
+        alternatives = [f"(?P<{name}>{pattern})" for name, pattern in patterns if name in selected]
+        self.intents = tuple(name for name, _ in patterns if name in selected)
+        self.regex = re.compile("|".join(alternatives))
+
+    def detect(self, message: str) -> Optional[str]:
+        """Devuelve la intención detectada o None"""
+        if not message:
+            return None
+
+        message_lower = message.lower()
+        if not any(keyword in message_lower for keyword in PREFILTER_KEYWORDS):
+            return None
+
+        match = self.regex.search(message_lower)
+        if not match:
+            return None
+
+        intent = match.lastgroup
+        logging.info(f"✅ Email command detected: {intent}")
+        return intent
+
+
+# Instancias globales (compiladas una vez por proceso)
+auto_email_intent_detector = EmailIntentDetector(AUTO_EMAIL_INTENTS)
+chat_email_intent_detector = EmailIntentDetector(CHAT_EMAIL_INTENTS)
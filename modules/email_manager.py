@@ -10,7 +10,9 @@ from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import io
+import threading
 
 try:
     import streamlit as st
@@ -20,6 +22,12 @@ except ImportError:
     st = None
 
 from config import Config
+from modules.athlete_manager import update_athlete_email
+from modules.smtp_pool import SMTPConnectionPool
+
+# Pools SMTP por servidor/usuario (compartidos entre sesiones de Streamlit)
+_smtp_pools = {}
+_smtp_pools_lock = threading.Lock()
 
 def get_email_credentials():
     """Obtiene las credenciales de email desde configuración"""
@@ -55,6 +63,24 @@ def get_email_credentials():
         logging.error(f"Error al obtener credenciales de email: {e}")
         return None
 
+def get_smtp_pool(credentials):
+    """Obtiene (o crea) el pool de sesiones SMTP para unas credenciales"""
+    pool_key = (credentials['server'], credentials['port'], credentials['username'])
+    with _smtp_pools_lock:
+        pool = _smtp_pools.get(pool_key)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                credentials['server'],
+                credentials['port'],
+                credentials['username'],
+                credentials['password'],
+                use_tls=credentials['use_tls'],
+                max_connections=Config.EMAIL_POOL_SIZE,
+                idle_timeout=Config.EMAIL_IDLE_TIMEOUT
+            )
+            _smtp_pools[pool_key] = pool
+        return pool
+
 def create_email_template(athlete_name, trainer_name="ProFit Coach"):
     """Crea el template HTML para el email"""
     template = f"""
@@ -150,62 +176,266 @@ def create_email_template(athlete_name, trainer_name="ProFit Coach"):
     """
     return template
 
-def send_routine_email(athlete_email, athlete_name, excel_data, filename, trainer_name="ProFit Coach"):
-    """Envía el email con la rutina en Excel adjunta"""
+class PermanentEmailError(Exception):
+    """Error de envío que no se soluciona reintentando (credenciales, destinatario inválido)"""
+    pass
+
+def build_routine_message(credentials, athlete_email, athlete_name, excel_data, filename, trainer_name="ProFit Coach"):
+    """Construye el mensaje MIME con la plantilla HTML y el Excel adjunto"""
+    msg = MIMEMultipart('alternative')
+    msg['From'] = f"{credentials['from_name']} <{credentials['from_email']}>"
+    msg['To'] = athlete_email
+    msg['Subject'] = f"🏋️‍♂️ Tu Plan de Entrenamiento Personalizado - {athlete_name}"
+    
+    # Crear contenido HTML
+    html_content = create_email_template(athlete_name, trainer_name)
+    html_part = MIMEText(html_content, 'html', 'utf-8')
+    msg.attach(html_part)
+    
+    # Adjuntar Excel
+    if excel_data:
+        attachment = MIMEBase('application', 'octet-stream')
+        attachment.set_payload(excel_data)
+        encoders.encode_base64(attachment)
+        attachment.add_header(
+            'Content-Disposition',
+            f'attachment; filename= {filename}'
+        )
+        msg.attach(attachment)
+    
+    return msg
+
+def deliver_routine_email(athlete_email, athlete_name, excel_data, filename, trainer_name="ProFit Coach"):
+    """Envía el email de forma síncrona (lo usa el worker de la bandeja de salida)
+    
+    Lanza PermanentEmailError si no tiene sentido reintentar y la excepción
+    original para errores transitorios.
+    """
+    credentials = get_email_credentials()
+    if not credentials:
+        raise PermanentEmailError("No se pudieron obtener las credenciales de email")
+    
+    msg = build_routine_message(credentials, athlete_email, athlete_name, excel_data, filename, trainer_name)
+    
+    try:
+        # Enviar email reutilizando una sesión SMTP ya autenticada
+        get_smtp_pool(credentials).send_message(msg)
+    except smtplib.SMTPAuthenticationError:
+        raise PermanentEmailError("Error de autenticación: verifica las credenciales de email")
+    except smtplib.SMTPRecipientsRefused:
+        raise PermanentEmailError(f"Email del destinatario inválido: {athlete_email}")
+    
+    logging.info(f"Email enviado exitosamente a {athlete_email}")
+
+def send_routine_email(athlete_email, athlete_name, excel_data, filename, trainer_name="ProFit Coach", athlete_id=None):
+    """Pone en cola el email con la rutina en Excel adjunta y vuelve inmediatamente
+    
+    Devuelve (éxito, mensaje, outbox_id); el envío real lo hace el worker en
+    segundo plano y su estado se consulta con get_email_status(outbox_id). Si
+    el mismo email todavía está en cola, se devuelve ese outbox_id y el mensaje
+    lo indica.
+    """
     try:
-        # Obtener credenciales
-        credentials = get_email_credentials()
-        if not credentials:
-            return False, "No se pudieron obtener las credenciales de email"
+        from modules.email_outbox import enqueue_email
         
-        # Crear mensaje
-        msg = MIMEMultipart('alternative')
-        msg['From'] = f"{credentials['from_name']} <{credentials['from_email']}>"
-        msg['To'] = athlete_email
-        msg['Subject'] = f"🏋️‍♂️ Tu Plan de Entrenamiento Personalizado - {athlete_name}"
+        outbox_id, deduplicated = enqueue_email(athlete_email, athlete_name, excel_data, filename, trainer_name,
+                                                athlete_id=athlete_id)
+        if deduplicated:
+            return True, f"Este mismo email ya se está enviando a {athlete_email}: no se duplica", outbox_id
+        return True, f"Email en cola de envío para {athlete_email}", outbox_id
         
-        # Crear contenido HTML
-        html_content = create_email_template(athlete_name, trainer_name)
-        html_part = MIMEText(html_content, 'html', 'utf-8')
-        msg.attach(html_part)
+    except Exception as e:
+        error_msg = f"Error inesperado al poner el email en cola: {str(e)}"
+        logging.error(error_msg)
+        return False, error_msg, None
+
+def _render_email_status(status):
+    """Pinta el estado de un email de la bandeja de salida"""
+    from modules.email_outbox import STATUS_SENT, STATUS_FAILED
+    
+    if not status:
+        st.warning("⚠️ No se encontró el email en la bandeja de salida")
+    elif status['status'] == STATUS_SENT:
+        st.success(f"✅ Email enviado exitosamente a {status['recipient']}")
+    elif status['status'] == STATUS_FAILED:
+        st.error(f"❌ No se pudo enviar el email: {status['last_error']}")
+    elif status['attempts']:
+        st.warning(f"🔁 Reintentando envío a {status['recipient']} (intento {status['attempts'] + 1}): {status['last_error']}")
+    else:
+        st.info(f"📤 Enviando email a {status['recipient']}...")
+
+def show_email_status(outbox_id):
+    """Muestra el estado de un email de la bandeja, consultándolo cada 2s hasta que termine"""
+    from modules.email_outbox import get_email_status, FINAL_STATUSES
+    
+    done_key = f"email_status_done_{outbox_id}"
+    if st.session_state.get(done_key):
+        _render_email_status(get_email_status(outbox_id))
+        return
+    
+    @st.fragment(run_every=2)
+    def _status_panel():
+        status = get_email_status(outbox_id)
+        _render_email_status(status)
         
-        # Adjuntar Excel
-        if excel_data:
-            attachment = MIMEBase('application', 'octet-stream')
-            attachment.set_payload(excel_data)
-            encoders.encode_base64(attachment)
-            attachment.add_header(
-                'Content-Disposition',
-                f'attachment; filename= {filename}'
-            )
-            msg.attach(attachment)
+        if not status or status['status'] in FINAL_STATUSES:
+            # Estado final: un rerun completo deja de registrar el fragmento (fin del sondeo)
+            st.session_state[done_key] = True
+            st.rerun()
+    
+    _status_panel()
+
+def send_bulk_routine_emails(user_id, athlete_ids, trainer_name="ProFit Coach", fmt="xlsx"):
+    """Pone en la bandeja de salida un email por atleta con su última rutina y vuelve enseguida
+    
+    - Los adjuntos salen del cache del pipeline de exportación (o se generan en paralelo).
+    - El worker de la bandeja los envía en segundo plano, con reintentos y backoff,
+      espaciados según Config.EMAIL_BULK_RATE_PER_SECOND.
+    
+    Devuelve una lista con el resultado por atleta:
+    [{'athlete_id', 'name', 'email', 'outbox_id', 'message'}]; outbox_id es None
+    si el email no llegó a la cola (sin rutina, email inválido, error al exportar).
+    """
+    from modules.chat_manager import get_latest_routines_by_user
+    from modules.email_outbox import enqueue_email
+    from modules.routine_export import export_routine, build_export_filename
+    
+    athlete_ids = list(dict.fromkeys(athlete_ids))  # Un solo email por atleta aunque se repita
+    routines = {item['athlete']['id']: item for item in get_latest_routines_by_user(user_id, athlete_ids)}
+    results = {}
+    to_send = []
+    
+    for athlete_id in athlete_ids:
+        item = routines.get(athlete_id)
+        if not item:
+            results[athlete_id] = {'athlete_id': athlete_id, 'name': '', 'email': '', 'outbox_id': None,
+                                   'message': "El atleta no tiene rutinas generadas"}
+            continue
+        athlete = item['athlete']
+        email = (athlete.get('email') or '').strip()
+        if not email or not validate_email_address(email):
+            results[athlete_id] = {'athlete_id': athlete_id, 'name': athlete['name'], 'email': email,
+                                   'outbox_id': None, 'message': "Email no registrado o inválido"}
+            continue
+        to_send.append((athlete, email, item['content']))
+    
+    def prepare(entry):
+        athlete, _, routine_text = entry
+        return export_routine(athlete, routine_text, fmt), build_export_filename(athlete['name'], fmt)
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        prepared = list(executor.map(lambda entry: _safe_prepare(prepare, entry), to_send))
+    
+    for (athlete, email, _), (export, error) in zip(to_send, prepared):
+        result = {'athlete_id': athlete['id'], 'name': athlete['name'], 'email': email, 'outbox_id': None}
+        if error:
+            result['message'] = f"Error preparando el email: {error}"
+        else:
+            try:
+                attachment, filename = export
+                result['outbox_id'], deduplicated = enqueue_email(
+                    email, athlete['name'], attachment, filename, trainer_name, athlete_id=athlete['id']
+                )
+                result['message'] = "Ya estaba en cola" if deduplicated else "En cola"
+            except Exception as e:
+                logging.error(f"❌ Error poniendo en cola el email para {email}: {e}")
+                result['message'] = f"Error poniendo el email en cola: {e}"
+        results[athlete['id']] = result
+    
+    queued = sum(1 for result in results.values() if result['outbox_id'])
+    logging.info(f"📨 Envío masivo: {queued}/{len(athlete_ids)} emails en la bandeja de salida")
+    return [results[athlete_id] for athlete_id in athlete_ids if athlete_id in results]
+
+def _safe_prepare(prepare, entry):
+    """Ejecuta prepare(entry) devolviendo (resultado, error) sin propagar excepciones"""
+    try:
+        return prepare(entry), None
+    except Exception as e:
+        logging.error(f"❌ Error preparando email para {entry[1]}: {e}")
+        return None, str(e)
+
+def show_bulk_email_interface(user_id, athletes):
+    """Interfaz para enviar la última rutina a varios atletas a la vez"""
+    try:
+        with_email = [athlete for athlete in athletes if athlete[5]]
+        if not with_email:
+            st.info("ℹ️ Ningún atleta tiene email registrado")
+            return
         
-        # Enviar email
-        with smtplib.SMTP(credentials['server'], credentials['port']) as server:
-            if credentials['use_tls']:
-                server.starttls()
-            server.login(credentials['username'], credentials['password'])
-            server.send_message(msg)
-            
-        logging.info(f"Email enviado exitosamente a {athlete_email}")
-        return True, "Email enviado exitosamente"
+        names = {athlete[0]: f"{athlete[1]} ({athlete[5]})" for athlete in with_email}
+        selected = st.multiselect(
+            "Atletas",
+            options=list(names),
+            default=list(names),
+            format_func=names.get,
+            key=f"bulk_email_athletes_{user_id}"
+        )
         
-    except smtplib.SMTPAuthenticationError:
-        error_msg = "Error de autenticación: verifica las credenciales de email"
-        logging.error(error_msg)
-        return False, error_msg
-    except smtplib.SMTPRecipientsRefused:
-        error_msg = f"Email del destinatario inválido: {athlete_email}"
-        logging.error(error_msg)
-        return False, error_msg
-    except smtplib.SMTPException as e:
-        error_msg = f"Error SMTP: {str(e)}"
-        logging.error(error_msg)
-        return False, error_msg
+        results_key = f"bulk_email_results_{user_id}"
+        if st.button("📨 Enviar última rutina a los seleccionados", key=f"bulk_email_send_{user_id}",
+                     type="primary", use_container_width=True, disabled=not selected):
+            with st.spinner("Preparando emails..."):
+                st.session_state[results_key] = send_bulk_routine_emails(user_id, selected)
+            st.session_state.pop(f"{results_key}_done", None)
+        
+        results = st.session_state.get(results_key)
+        if results:
+            show_bulk_email_progress(results, f"{results_key}_done")
+    
     except Exception as e:
-        error_msg = f"Error inesperado al enviar email: {str(e)}"
-        logging.error(error_msg)
-        return False, error_msg
+        st.error(f"Error en el envío masivo: {e}")
+        logging.error(f"Error en show_bulk_email_interface: {e}")
+
+def _render_bulk_email_progress(results, statuses):
+    """Pinta el progreso del envío masivo según el estado de cada email en la bandeja"""
+    from modules.email_outbox import STATUS_SENT, STATUS_FAILED
+    
+    rows, sent, finished = [], 0, 0
+    for result in results:
+        status = statuses.get(result['outbox_id'])
+        if not result['outbox_id'] or not status:
+            icon, detail = "❌", result['message'] if not result['outbox_id'] else "No se encontró en la bandeja"
+            finished += 1
+        elif status['status'] == STATUS_SENT:
+            icon, detail = "✅", "Enviado"
+            sent += 1
+            finished += 1
+        elif status['status'] == STATUS_FAILED:
+            icon, detail = "❌", status['last_error']
+            finished += 1
+        elif status['attempts']:
+            icon, detail = "🔁", f"Reintentando (intento {status['attempts'] + 1}): {status['last_error']}"
+        else:
+            icon, detail = "📤", result['message']
+        rows.append({'Atleta': result['name'], 'Email': result['email'], 'Estado': icon, 'Detalle': detail})
+    
+    total = len(results)
+    if finished < total:
+        st.progress(finished / total, text=f"{finished}/{total} procesados · {sent} enviados")
+    elif sent == total:
+        st.success(f"✅ {sent} emails enviados")
+    else:
+        st.warning(f"⚠️ {sent}/{total} emails enviados")
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    return finished == total
+
+def show_bulk_email_progress(results, done_key):
+    """Muestra el envío masivo, consultando la bandeja cada 2s hasta que todos terminen"""
+    from modules.email_outbox import get_email_statuses
+    
+    outbox_ids = [result['outbox_id'] for result in results if result['outbox_id']]
+    if st.session_state.get(done_key):
+        _render_bulk_email_progress(results, get_email_statuses(outbox_ids))
+        return
+    
+    @st.fragment(run_every=2)
+    def _progress_panel():
+        if _render_bulk_email_progress(results, get_email_statuses(outbox_ids)):
+            # Todos en estado final: un rerun completo deja de registrar el fragmento (fin del sondeo)
+            st.session_state[done_key] = True
+            st.rerun()
+    
+    _progress_panel()
 
 def validate_email_address(email):
     """Valida formato de email"""
@@ -248,45 +478,32 @@ def show_email_sending_interface(athlete_data, excel_data, filename):
         # Botón para enviar
         if athlete_email and validate_email_address(athlete_email):
             if st.button("📤 Enviar Rutina por Email", type="primary", use_container_width=True):
-                with st.spinner("Enviando email..."):
-                    success, message = send_routine_email(
-                        athlete_email, 
-                        athlete_name, 
-                        excel_data, 
-                        filename
-                    )
+                success, message, outbox_id = send_routine_email(
+                    athlete_email, 
+                    athlete_name, 
+                    excel_data, 
+                    filename,
+                    athlete_id=athlete_data.get('id')
+                )
+                
+                if success:
+                    st.toast(f"📬 {message}")
+                    st.session_state[f"email_outbox_{athlete_data.get('id')}"] = outbox_id
                     
-                    if success:
-                        st.success(f"✅ {message}")
-                        st.balloons()
-                        
-                        # Actualizar email en la base de datos si es diferente
-                        if athlete_email != athlete_data.get('email', ''):
-                            update_athlete_email(athlete_data['id'], athlete_email)
-                            st.info("📝 Email actualizado en el perfil del atleta")
-                    else:
-                        st.error(f"❌ {message}")
+                    # Actualizar email en la base de datos si es diferente
+                    if athlete_email != athlete_data.get('email', ''):
+                        update_athlete_email(athlete_data['id'], athlete_email)
+                        st.info("📝 Email actualizado en el perfil del atleta")
+                else:
+                    st.error(f"❌ {message}")
         elif athlete_email:
             st.error("❌ El formato del email no es válido")
         
+        # Estado del último email puesto en cola para este atleta
+        outbox_id = st.session_state.get(f"email_outbox_{athlete_data.get('id')}")
+        if outbox_id:
+            show_email_status(outbox_id)
+        
     except Exception as e:
         st.error(f"Error en la interfaz de email: {e}")
         logging.error(f"Error en show_email_sending_interface: {e}")
-
-def update_athlete_email(athlete_id, new_email):
-    """Actualiza el email del atleta en la base de datos"""
-    try:
-        from auth.database import get_db_cursor
-        
-        with get_db_cursor() as cursor:
-            cursor.execute(
-                "UPDATE athletes SET email = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                (new_email, athlete_id)
-            )
-        
-        logging.info(f"Email actualizado para atleta {athlete_id}: {new_email}")
-        return True
-        
-    except Exception as e:
-        logging.error(f"Error al actualizar email del atleta: {e}")
-        return False
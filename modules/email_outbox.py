@@ -0,0 +1,251 @@
+"""
+Bandeja de salida de emails persistente
+Los emails se guardan en la tabla email_outbox y un hilo en segundo plano los
+envía con reintentos y backoff exponencial, sin bloquear el script de Streamlit.
+Los envíos se espacian según EMAIL_BULK_RATE_PER_SECOND.
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+
+from auth.database import get_db_connection
+from config import Config
+
+# Estados de un email en la bandeja
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+FINAL_STATUSES = (STATUS_SENT, STATUS_FAILED)
+
+def build_idempotency_key(recipient, attachment, subject_key=""):
+    """Clave de deduplicación: mismo destinatario + mismo adjunto = mismo email mientras siga en cola"""
+    digest = hashlib.sha1()
+    digest.update(recipient.strip().lower().encode("utf-8"))
+    digest.update(b"|")
+    digest.update(subject_key.encode("utf-8"))
+    digest.update(b"|")
+    digest.update(attachment or b"")
+    return digest.hexdigest()
+
+def enqueue_email(recipient, athlete_name, attachment, filename, trainer_name="ProFit Coach",
+                  athlete_id=None, idempotency_key=None):
+    """Guarda un email en la bandeja de salida y despierta al worker
+
+    Devuelve (outbox_id, deduplicado). Solo se deduplica contra un email con la
+    misma clave que aún está pendiente o enviándose (doble clic, rerun): si
+    aquel ya se envió o falló, esto es un reenvío y entra en cola como email nuevo.
+    """
+    key = idempotency_key or build_idempotency_key(recipient, attachment, athlete_name)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # El email anterior con esta clave ya terminó: se archiva su clave para liberar el UNIQUE
+        cursor.execute("""
+            UPDATE email_outbox SET idempotency_key = idempotency_key || ':' || id
+            WHERE idempotency_key = ? AND status IN (?, ?)
+        """, (key, STATUS_SENT, STATUS_FAILED))
+
+        cursor.execute("""
+            INSERT OR IGNORE INTO email_outbox
+                (idempotency_key, athlete_id, recipient, athlete_name, trainer_name, filename,
+                 attachment, status, attempts, next_attempt_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+        """, (key, athlete_id, recipient, athlete_name, trainer_name, filename,
+              attachment, STATUS_PENDING, time.time()))
+
+        deduplicated = cursor.rowcount == 0
+        if deduplicated:
+            cursor.execute("SELECT id FROM email_outbox WHERE idempotency_key = ?", (key,))
+            outbox_id = cursor.fetchone()['id']
+            logging.info(f"♻️ Email duplicado ignorado (clave {key[:8]}), id {outbox_id} aún en cola")
+        else:
+            outbox_id = cursor.lastrowid
+            logging.info(f"📬 Email {outbox_id} en cola para {recipient}")
+
+        conn.commit()
+
+    email_outbox_worker.start()
+    email_outbox_worker.wake()
+    return outbox_id, deduplicated
+
+def get_email_status(outbox_id):
+    """Estado actual de un email de la bandeja (para que la UI lo consulte)"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, recipient, status, attempts, last_error, sent_at
+                FROM email_outbox WHERE id = ?
+            """, (outbox_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    except Exception as e:
+        logging.error(f"❌ Error consultando estado del email {outbox_id}: {e}")
+        return None
+
+def get_email_statuses(outbox_ids):
+    """Estado de varios emails de la bandeja en una sola consulta: {outbox_id: estado}"""
+    outbox_ids = list(outbox_ids)
+    if not outbox_ids:
+        return {}
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, recipient, status, attempts, last_error, sent_at
+                FROM email_outbox WHERE id IN ({','.join('?' * len(outbox_ids))})
+            """, outbox_ids)
+            return {row['id']: dict(row) for row in cursor.fetchall()}
+    except Exception as e:
+        logging.error(f"❌ Error consultando estado de {len(outbox_ids)} emails: {e}")
+        return {}
+
+class EmailOutboxWorker:
+    """Hilo en segundo plano que vacía la bandeja de salida"""
+
+    def __init__(self, poll_interval=2.0):
+        self.poll_interval = poll_interval
+        self.max_attempts = Config.EMAIL_MAX_ATTEMPTS
+        self.backoff_base = Config.EMAIL_RETRY_BACKOFF_SECONDS
+        # Separación mínima entre envíos (un envío masivo no satura el servidor SMTP)
+        self.send_interval = 1.0 / Config.EMAIL_BULK_RATE_PER_SECOND
+        self._last_send = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Arranca el hilo si no está corriendo (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._recover_interrupted()
+            self._thread = threading.Thread(target=self._run, name="email-outbox-worker", daemon=True)
+            self._thread.start()
+            logging.info("📮 Worker de emails iniciado")
+
+    def stop(self, timeout=5):
+        """Detiene el hilo (tras terminar el envío en curso)"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Despierta al worker para que procese la cola sin esperar al siguiente sondeo"""
+        self._wakeup.set()
+
+    def _recover_interrupted(self):
+        """Los emails que quedaron 'sending' por un reinicio vuelven a la cola"""
+        try:
+            with get_db_connection() as conn:
+                conn.execute(
+                    "UPDATE email_outbox SET status = ? WHERE status = ?",
+                    (STATUS_PENDING, STATUS_SENDING)
+                )
+                conn.commit()
+        except Exception as e:
+            logging.error(f"❌ Error recuperando emails interrumpidos: {e}")
+
+    def _claim_next(self):
+        """Marca como 'sending' el siguiente email pendiente cuyo reintento ya venció"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE email_outbox SET status = ?
+                WHERE id = (
+                    SELECT id FROM email_outbox
+                    WHERE status = ? AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at, id
+                    LIMIT 1
+                )
+                RETURNING id, recipient, athlete_name, trainer_name, filename, attachment, attempts
+            """, (STATUS_SENDING, STATUS_PENDING, time.time()))
+            row = cursor.fetchone()
+            conn.commit()
+            return dict(row) if row else None
+
+    def _mark_sent(self, outbox_id):
+        """Registra el envío correcto"""
+        with get_db_connection() as conn:
+            # El adjunto ya no hace falta: liberar espacio en la base de datos
+            conn.execute("""
+                UPDATE email_outbox
+                SET status = ?, attempts = attempts + 1, last_error = NULL,
+                    attachment = NULL, sent_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (STATUS_SENT, outbox_id))
+            conn.commit()
+
+    def _mark_failed_attempt(self, email, error, permanent=False):
+        """Registra un intento fallido: reprograma con backoff o marca como fallido"""
+        attempts = email['attempts'] + 1
+        if permanent or attempts >= self.max_attempts:
+            status, next_attempt_at = STATUS_FAILED, None
+            logging.error(f"❌ Email {email['id']} descartado tras {attempts} intentos: {error}")
+        else:
+            # Backoff exponencial con algo de jitter para no sincronizar reintentos
+            delay = self.backoff_base * (2 ** (attempts - 1))
+            status, next_attempt_at = STATUS_PENDING, time.time() + delay * random.uniform(0.8, 1.2)
+            logging.warning(f"⚠️ Email {email['id']} falló (intento {attempts}), reintento en ~{delay:.0f}s: {error}")
+
+        with get_db_connection() as conn:
+            conn.execute("""
+                UPDATE email_outbox
+                SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?
+                WHERE id = ?
+            """, (status, attempts, str(error), next_attempt_at, email['id']))
+            conn.commit()
+
+    def _process(self, email):
+        """Envía un email reclamado y registra el resultado"""
+        from modules.email_manager import deliver_routine_email, PermanentEmailError
+
+        try:
+            deliver_routine_email(
+                email['recipient'],
+                email['athlete_name'],
+                email['attachment'],
+                email['filename'],
+                email['trainer_name']
+            )
+            self._mark_sent(email['id'])
+            logging.info(f"✅ Email {email['id']} enviado a {email['recipient']}")
+        except PermanentEmailError as e:
+            self._mark_failed_attempt(email, e, permanent=True)
+        except Exception as e:
+            self._mark_failed_attempt(email, e)
+
+    def _run(self):
+        """Bucle del hilo: procesa lo pendiente y espera al siguiente aviso o sondeo"""
+        while not self._stop.is_set():
+            try:
+                email = self._claim_next()
+            except Exception as e:
+                logging.error(f"❌ Error leyendo la bandeja de emails: {e}")
+                email = None
+
+            if email:
+                wait = self.send_interval - (time.monotonic() - self._last_send)
+                if wait > 0:
+                    self._stop.wait(wait)
+                try:
+                    self._process(email)
+                except Exception as e:
+                    # Nunca dejar morir el hilo; el email se recupera al reiniciar
+                    logging.error(f"❌ Error procesando email {email['id']}: {e}")
+                self._last_send = time.monotonic()
+                continue
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+# Instancia global del worker
+email_outbox_worker = EmailOutboxWorker()
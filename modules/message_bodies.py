@@ -0,0 +1,35 @@
+"""
+Cuerpos largos de los mensajes del chat, comprimidos y deduplicados
+Los mensajes de TEXT_COMPRESSION_MIN_CHARS caracteres o más se guardan una
+sola vez en message_bodies (zlib, clave = SHA-256 del texto) y messages.body_hash
+apunta a ellos: una rutina enviada a varios atletas ocupa lo mismo que una.
+Comprimir y descomprimir se hace solo en Python, así la base no depende de
+funciones SQL propias y cualquier cliente de SQLite puede leerla y escribir
+en ella (lo que escriba otro cliente queda en messages.content, sin comprimir).
+"""
+
+from config import Config
+from utils.text_compression import compress_text, content_hash, decompress_text
+
+# Para leer el texto de los mensajes (alias m): SELECT m.content, b.body ... {MESSAGE_BODY_JOIN}
+MESSAGE_BODY_JOIN = "LEFT JOIN message_bodies b ON b.content_hash = m.body_hash"
+
+def should_store_body(text):
+    """True si el texto es lo bastante largo para guardarse comprimido (0 desactiva la compresión)"""
+    threshold = Config.TEXT_COMPRESSION_MIN_CHARS
+    return bool(text) and threshold > 0 and len(text) >= threshold
+
+def store_body(cursor, text):
+    """Guarda el cuerpo con el cursor de la transacción en curso (si no estaba) y devuelve su hash"""
+    body_hash = content_hash(text)
+    cursor.execute("SELECT 1 FROM message_bodies WHERE content_hash = ?", (body_hash,))
+    if cursor.fetchone() is None:
+        cursor.execute(
+            "INSERT OR IGNORE INTO message_bodies (content_hash, body) VALUES (?, ?)",
+            (body_hash, compress_text(text))
+        )
+    return body_hash
+
+def message_text(content, body):
+    """Texto de un mensaje a partir de messages.content y message_bodies.body (o None)"""
+    return decompress_text(body) if body is not None else content
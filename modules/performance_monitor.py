@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any
 import streamlit as st
 
+from utils.lazy import LazyInstance
+
 class PerformanceMonitor:
     """Monitor integral de rendimiento de la aplicación"""
     
@@ -356,5 +358,5 @@ class PerformanceMonitor:
                     st.write(f"{severity_icon} {status_icon} **{alert['type']}**: {alert['message']}")
                     st.caption(f"📅 {alert['timestamp']}")
 
-# Instancia global del monitor
-performance_monitor = PerformanceMonitor()
+# Instancia global del monitor (se inicializa al registrar la primera métrica)
+performance_monitor = LazyInstance(PerformanceMonitor)
@@ -168,6 +168,28 @@ Que prepare perfectamente para el entrenamiento principal."""
     }
 }
 
+def build_template_prompt(template, athlete_data):
+    """Prompt del template con el perfil del atleta (sin nombre: prompt genérico para el cache)"""
+    return f"""Genera una rutina {template['name']} para {athlete_data.get('name') or 'un deportista'} ({athlete_data['sport']}, nivel {athlete_data['level']}).
+
+{template['prompt']}
+
+Formato requerido:
+📝 RUTINA: {template['name'].upper()}
+
+🔥 BLOQUE 1 - [NOMBRE] (X min)
+• Ejercicio 1: X series x Y reps - Z seg descanso
+• Ejercicio 2: X series x Y reps - Z seg descanso
+
+🔥 BLOQUE 2 - [NOMBRE] (X min) 
+• Ejercicio 1: X series x Y reps - Z seg descanso
+• Ejercicio 2: X series x Y reps - Z seg descanso
+
+(continúa con todos los bloques necesarios)
+
+⏱️ Tiempo total: X minutos
+💡 Notas específicas para {athlete_data['sport']}"""
+
 def show_quick_templates_interface(athlete_id, athlete_name):
     """Muestra la interfaz de templates rápidos para un atleta"""
     
@@ -183,11 +205,11 @@ def show_quick_templates_interface(athlete_id, athlete_name):
     
     for cat_key, cat_name in categories.items():
         with st.expander(cat_name, expanded=True):
-            templates_in_category = [t for t in QUICK_TEMPLATES.values() if t["category"] == cat_key]
+            templates_in_category = [(key, t) for key, t in QUICK_TEMPLATES.items() if t["category"] == cat_key]
             
             # Mostrar en grid de 2 columnas
             cols = st.columns(2)
-            for idx, template in enumerate(templates_in_category):
+            for idx, (template_id, template) in enumerate(templates_in_category):
                 with cols[idx % 2]:
                     # Crear contenedor visual sin botón duplicado
                     st.markdown(f"""
@@ -216,114 +238,143 @@ def show_quick_templates_interface(athlete_id, athlete_name):
                         use_container_width=True,
                         type="primary"
                     ):
-                        generate_quick_routine_and_redirect(athlete_id, template)
+                        generate_quick_routine_and_redirect(athlete_id, template, template_id)
                         st.rerun()
 
-def generate_quick_routine_and_redirect(athlete_id, template):
-    """Genera una rutina usando un template con Excel automático y formato mejorado"""
+def generate_quick_routine(athlete_id, template_id):
+    """Genera la rutina del template y su Excel (sin Streamlit: se ejecuta en segundo plano)
+    
+    Returns:
+        dict con la rutina, el Excel (o None), el nombre del archivo y el del template
+    """
+    # Importar funciones localmente para evitar errores circulares
+    from modules import athlete_manager
+    from modules import chat_interface
+    from modules.chat_manager import save_message
+    from modules.routine_export import export_routine, build_export_filename
+    from modules.routine_generator import can_generate_offline, generate_routine
+    from modules.template_warmup import get_prewarmed_response
+    from config import Config
+    
+    template = QUICK_TEMPLATES[template_id]
+    
+    # Obtener datos del atleta para personalización
+    athlete_data = athlete_manager.get_athlete_data(athlete_id)
+    if not athlete_data:
+        raise ValueError("No se pudieron obtener los datos del atleta")
+    
+    # Personalizar el prompt con datos del atleta y formato mejorado
+    personalized_prompt = build_template_prompt(template, athlete_data)
+    
+    offline = Config.OFFLINE_QUICK_TEMPLATES and can_generate_offline(template_id)
+    cached_response = None if offline else get_prewarmed_response(athlete_data, template_id)
+    
+    if offline:
+        # Templates de 6 bloques: generador basado en reglas, sin esperar a la IA
+        response = generate_routine(athlete_data, template_id)
+        save_message(athlete_id, personalized_prompt, is_user=True)
+        save_message(athlete_id, response, is_user=False)
+    elif cached_response:
+        # Respuesta precalentada fuera de horario pico para este deporte y nivel
+        response = cached_response
+        save_message(athlete_id, personalized_prompt, is_user=True)
+        save_message(athlete_id, response, is_user=False)
+    else:
+        # Usar el sistema de chat existente para generar
+        response = chat_interface.handle_user_message(athlete_id, personalized_prompt)
+    
+    if not response or response.startswith("❌"):
+        raise RuntimeError(response or "La IA no devolvió ninguna rutina")
+    
+    # Generar Excel automáticamente (queda en el cache de exportación para el chat)
+    excel_data = None
+    try:
+        excel_data = export_routine(athlete_data, response, "xlsx")
+    except Exception as e:
+        logging.error(f"Error generando Excel: {e}")
+    
+    return {
+        'response': response,
+        'excel_data': excel_data,
+        'filename': build_export_filename(athlete_data['name'], "xlsx"),
+        'template_name': template['name'],
+    }
+
+def generate_quick_routine_and_redirect(athlete_id, template, template_id=None):
+    """Encola la generación del template en segundo plano y lleva al chat del atleta"""
     try:
-        # Importar funciones localmente para evitar errores circulares
-        from modules import athlete_manager
-        from modules import chat_interface
-        from modules.routine_export import generate_routine_excel_from_chat
+        from modules.routine_jobs import routine_job_manager
         
-        # Obtener datos del atleta para personalización
-        athlete_data = athlete_manager.get_athlete_data(athlete_id)
+        if template_id is None:
+            template_id = next(key for key, value in QUICK_TEMPLATES.items() if value is template)
         
-        if not athlete_data:
-            st.error("❌ No se pudieron obtener los datos del atleta")
-            return
+        job_id = routine_job_manager.submit(
+            athlete_id, template['name'], generate_quick_routine, athlete_id, template_id,
+            dedupe_key=(athlete_id, template_id)
+        )
         
-        # Personalizar el prompt con datos del atleta y formato mejorado
-        personalized_prompt = f"""Genera una rutina {template['name']} para {athlete_data['name']} ({athlete_data['sport']}, nivel {athlete_data['level']}).
-
-{template['prompt']}
-
-Formato requerido:
-📝 RUTINA: {template['name'].upper()}
-
-🔥 BLOQUE 1 - [NOMBRE] (X min)
-• Ejercicio 1: X series x Y reps - Z seg descanso
-• Ejercicio 2: X series x Y reps - Z seg descanso
-
-🔥 BLOQUE 2 - [NOMBRE] (X min) 
-• Ejercicio 1: X series x Y reps - Z seg descanso
-• Ejercicio 2: X series x Y reps - Z seg descanso
-
-(continúa con todos los bloques necesarios)
-
-⏱️ Tiempo total: X minutos
-💡 Notas específicas para {athlete_data['sport']}"""
+        pending_jobs = st.session_state.setdefault("routine_jobs", {}).setdefault(athlete_id, [])
+        if job_id not in pending_jobs:
+            pending_jobs.append(job_id)
+        
+        # Ir al chat: allí se muestra el progreso y, al terminar, la rutina y el Excel
+        st.session_state["show_quick_templates"] = None
+        st.session_state["active_athlete_chat"] = athlete_id
         
-        # Mostrar indicador de generación
-        with st.spinner(f"🤖 Generando {template['name']} personalizada..."):
-            # Usar el sistema de chat existente para generar
-            response = chat_interface.handle_user_message(athlete_id, personalized_prompt)
-            
-        if response:
-            # Éxito: Mostrar confirmación
-            st.success(f"✅ {template['name']} generada exitosamente!")
-            
-            # Generar Excel automáticamente
-            excel_success = False
-            with st.spinner("📊 Generando archivo Excel automáticamente..."):
-                try:
-                    excel_data, filename = generate_routine_excel_from_chat(athlete_id, response)
-                    
-                    if excel_data:
-                        excel_success = True
-                        st.success("📊 ¡Excel generado automáticamente!")
-                        
-                        # Botón de descarga prominente
-                        st.markdown("### 📊 **DESCARGAR RUTINA**")
-                        
-                        col1, col2, col3 = st.columns([1, 2, 1])
-                        with col2:
-                            st.download_button(
-                                label="⬇️ 📊 DESCARGAR EN EXCEL",
-                                data=excel_data,
-                                file_name=filename,
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                use_container_width=True,
-                                type="primary"
-                            )
-                    else:
-                        st.warning("⚠️ Excel no disponible aún. Ve al chat para descargarlo.")
-                        
-                except Exception as e:
-                    logging.error(f"Error generando Excel: {e}")
-                    st.warning("⚠️ Excel no disponible aún. Ve al chat para descargarlo.")
-            
-            st.balloons()
-            
-            # Mensaje de confirmación mejorado
-            success_message = f"""🎉 ¡Rutina generada exitosamente!
-            
-📋 Detalles:
-- ✅ Rutina: {template['name']}
-- ✅ Personalizada para: {athlete_data['sport']} - Nivel {athlete_data['level']}
-- ✅ Formato consistente: Con estructura visual mejorada"""
-            
-            if excel_success:
-                success_message += "\n- ✅ Excel: Listo para descargar arriba ⬆️"
-            
-            success_message += "\n\n💬 Ver en el chat: La rutina completa está en el chat del atleta con formato amigable.\n\n🔄 Redirigiendo al chat en 5 segundos..."
-            
-            st.info(success_message)
-            
-            # Redirección automática al chat
-            time.sleep(5)
-            st.session_state["show_quick_templates"] = None
-            st.session_state["active_athlete_chat"] = athlete_id
-            st.rerun()
-            
-        else:
-            st.error("❌ Error al generar la rutina. Inténtalo de nuevo.")
-            
     except Exception as e:
-        logging.error(f"Error generando rutina rápida: {e}")
+        logging.error(f"Error encolando rutina rápida: {e}")
         st.error(f"❌ Error al generar la rutina rápida: {e}")
 
+def show_routine_jobs_status(athlete_id):
+    """Muestra en el chat el progreso de las rutinas rápidas en segundo plano y su resultado"""
+    from modules.routine_export import XLSX_MIME
+    from modules.routine_jobs import JOB_DONE
+    
+    # Trabajos terminados desde la última ejecución completa del script
+    for job in st.session_state.get("routine_job_notices", {}).pop(athlete_id, []):
+        if job['status'] == JOB_DONE:
+            result = job['result'] or {}
+            st.success(f"✅ {job['label']} generada exitosamente! La rutina completa está en el chat.")
+            if result.get('excel_data'):
+                st.download_button(
+                    label="⬇️ 📊 DESCARGAR EN EXCEL",
+                    data=result['excel_data'],
+                    file_name=result['filename'],
+                    mime=XLSX_MIME,
+                    key=f"routine_job_excel_{job['id']}",
+                    use_container_width=True,
+                    type="primary"
+                )
+        else:
+            st.error(f"❌ Error al generar {job['label']}: {job['error']}. Inténtalo de nuevo.")
+    
+    if st.session_state.get("routine_jobs", {}).get(athlete_id):
+        _show_routine_jobs_progress(athlete_id)
+
+@st.fragment(run_every=2)
+def _show_routine_jobs_progress(athlete_id):
+    """Consulta los trabajos pendientes cada 2 s sin volver a ejecutar toda la página"""
+    from modules.routine_jobs import routine_job_manager, FINAL_JOB_STATUSES
+    
+    pending_jobs = st.session_state.get("routine_jobs", {}).get(athlete_id, [])
+    finished_jobs = []
+    
+    for job_id in list(pending_jobs):
+        job = routine_job_manager.get_job(job_id)
+        if job is None or job['status'] in FINAL_JOB_STATUSES:
+            pending_jobs.remove(job_id)
+            if job:
+                finished_jobs.append(job)
+            continue
+        elapsed = int(time.time() - job['created_at'])
+        st.info(f"⏳ Generando {job['label']}... ({elapsed} s). Puedes seguir usando la aplicación.")
+    
+    if finished_jobs:
+        st.session_state.setdefault("routine_job_notices", {}).setdefault(athlete_id, []).extend(finished_jobs)
+    if finished_jobs or not pending_jobs:
+        # Ejecución completa para mostrar los mensajes nuevos del chat
+        st.rerun(scope="app")
+
 def create_custom_template_form():
     """Permite crear templates personalizados (funcionalidad avanzada)"""
     with st.expander("🛠️ Crear Template Personalizado", expanded=False):
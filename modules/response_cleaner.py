@@ -4,11 +4,18 @@ Elimina texto extraño y mejora la presentación
 """
 
 import re
-import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+UNCLEAR_RESPONSE_MESSAGE = "🤔 Respuesta procesada pero no clara. Por favor, reformula tu pregunta."
 
 class ResponseCleaner:
-    """Limpia y formatea respuestas de IA para mejor presentación"""
+    """Limpia y formatea respuestas de IA para mejor presentación
+    
+    Los patrones se compilan una vez al construir el limpiador. Las marcas no
+    deseadas y la puntuación repetida se combinan en una sola regex cada una;
+    el resto se aplica por separado porque el motor de re recorre más rápido
+    un literal suelto que una alternancia.
+    """
     
     def __init__(self):
         # Patrones de texto no deseado
@@ -75,6 +82,86 @@ class ResponseCleaner:
             r'\?{2,}': '?',
             r'!{2,}': '!',
         }
+        
+        self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """Compila los patrones una sola vez por instancia"""
+        # 1. Marcas no deseadas (anotaciones, marcadores, HTML, metadata) en una alternancia:
+        #    se eliminan en una pasada. Las clases de caracteres van aparte, en orden.
+        character_classes = [pattern for pattern in self.unwanted_patterns if pattern.startswith('[')]
+        markers = [pattern for pattern in self.unwanted_patterns if pattern not in character_classes]
+        self._unwanted_regex = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in markers),
+            re.IGNORECASE | re.MULTILINE
+        )
+        self._unwanted_characters = [re.compile(pattern) for pattern in character_classes]
+        
+        # 2. Inicio no deseado: '^.*?(?=X)' corta justo antes de la primera aparición de X,
+        #    así que basta buscar X directamente (sin el '.*?' que reintenta en cada posición)
+        self._starting_regexes = [
+            re.compile(re.match(r"\^\.\*\?\(\?=(.*)\)$", pattern).group(1), re.IGNORECASE)
+            for pattern in self.unwanted_starting_patterns
+        ]
+        
+        # 3. Mejoras en el orden original; la puntuación repetida se reduce en una pasada
+        punctuation = [r'\.{2,}', r'\?{2,}', r'!{2,}']
+        self._improvements = [
+            (re.compile(pattern, re.MULTILINE), replacement)
+            for pattern, replacement in self.improvements.items()
+            if pattern not in punctuation
+        ]
+        self._improvements.append(
+            (re.compile('|'.join(punctuation), re.MULTILINE), lambda match: match.group()[0])
+        )
+        
+        # Formato de rutinas y mejoras generales (se aplican en orden, ya compiladas)
+        self._routine_improvements = [
+            # Asegurar saltos de línea antes de bloques
+            (re.compile(r'(\d+\.\s*[🍑⚡💪🔥🚀].*?)(?=\d+\.|\Z)', re.MULTILINE), r'\1\n'),
+            
+            # Mejorar formato de ejercicios
+            (re.compile(r'([•\-\*])\s*([A-ZÁÉÍÓÚ].*?)(?=\n|$)', re.MULTILINE), r'\1 \2'),
+            
+            # Espaciado consistente en parámetros
+            (re.compile(r'(\d+)\s*x\s*(\d+)', re.MULTILINE), r'\1 x \2'),
+            (re.compile(r'(\d+)\s*seg', re.MULTILINE), r'\1 seg'),
+            (re.compile(r'(\d+)\s*min', re.MULTILINE), r'\1 min'),
+        ]
+        self._formatting_improvements = [
+            # Asegurar espaciado después de emojis
+            (re.compile(r'([🎯💪⚡🔥🚀🍑])([A-ZÁÉÍÓÚ])', re.MULTILINE), r'\1 \2'),
+            
+            # Mejorar listas
+            (re.compile(r'^([•\-\*])\s*', re.MULTILINE), r'\1 '),
+            
+            # Asegurar mayúsculas después de puntos
+            (re.compile(r'(\.\s+)([a-záéíóú])', re.MULTILINE), lambda m: m.group(1) + m.group(2).upper()),
+            
+            # Mejorar formato de números
+            (re.compile(r'(\d+)\s*\.\s*([A-ZÁÉÍÓÚ])', re.MULTILINE), r'\1. \2'),
+        ]
+    
+    def _cut_unwanted_start(self, text: str) -> str:
+        """Recorta el texto previo a la primera palabra de inicio, por orden de prioridad"""
+        for regex in self._starting_regexes:
+            match = regex.search(text)
+            if match:
+                return text[match.start():]
+        return text
+    
+    def _remove_unwanted(self, text: str) -> str:
+        """Elimina marcas y caracteres no deseados"""
+        text = self._unwanted_regex.sub('', text)
+        for regex in self._unwanted_characters:
+            text = regex.sub('', text)
+        return text
+    
+    def _apply_improvements(self, text: str) -> str:
+        """Aplica los reemplazos de mejora en orden"""
+        for regex, replacement in self._improvements:
+            text = regex.sub(replacement, text)
+        return text
     
     def clean_response(self, response: str) -> str:
         """Limpia una respuesta de IA de elementos no deseados"""
@@ -84,26 +171,20 @@ class ResponseCleaner:
         cleaned = response.strip()
         
         # 1. Eliminar patrones no deseados
-        for pattern in self.unwanted_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE | re.MULTILINE)
+        cleaned = self._remove_unwanted(cleaned)
         
         # 2. Limpiar inicio de respuesta
-        for pattern in self.unwanted_starting_patterns:
-            match = re.search(pattern, cleaned, flags=re.IGNORECASE | re.DOTALL)
-            if match:
-                cleaned = cleaned[match.end():]
-                break
+        cleaned = self._cut_unwanted_start(cleaned)
         
         # 3. Aplicar mejoras
-        for pattern, replacement in self.improvements.items():
-            cleaned = re.sub(pattern, replacement, cleaned, flags=re.MULTILINE)
+        cleaned = self._apply_improvements(cleaned)
         
         # 4. Limpiar espaciado final
         cleaned = cleaned.strip()
         
         # 5. Validar que no esté vacío
         if not cleaned or len(cleaned) < 10:
-            return "🤔 Respuesta procesada pero no clara. Por favor, reformula tu pregunta."
+            return UNCLEAR_RESPONSE_MESSAGE
         
         return cleaned
     
@@ -112,21 +193,8 @@ class ResponseCleaner:
         cleaned = self.clean_response(response)
         
         # Mejorar formato de rutinas
-        routine_improvements = {
-            # Asegurar saltos de línea antes de bloques
-            r'(\d+\.\s*[🍑⚡💪🔥🚀].*?)(?=\d+\.|\Z)': r'\1\n',
-            
-            # Mejorar formato de ejercicios
-            r'([•\-\*])\s*([A-ZÁÉÍÓÚ].*?)(?=\n|$)': r'\1 \2',
-            
-            # Espaciado consistente en parámetros
-            r'(\d+)\s*x\s*(\d+)': r'\1 x \2',
-            r'(\d+)\s*seg': r'\1 seg',
-            r'(\d+)\s*min': r'\1 min',
-        }
-        
-        for pattern, replacement in routine_improvements.items():
-            cleaned = re.sub(pattern, replacement, cleaned, flags=re.MULTILINE)
+        for regex, replacement in self._routine_improvements:
+            cleaned = regex.sub(replacement, cleaned)
         
         return cleaned
     
@@ -180,25 +248,8 @@ class ResponseCleaner:
             return error_response
         
         # Mejorar estructura general
-        formatting_improvements = {
-            # Asegurar espaciado después de emojis
-            r'([🎯💪⚡🔥🚀🍑])([A-ZÁÉÍÓÚ])': r'\1 \2',
-            
-            # Mejorar listas
-            r'^([•\-\*])\s*': r'\1 ',
-            
-            # Asegurar mayúsculas después de puntos
-            r'(\.\s+)([a-záéíóú])': lambda m: m.group(1) + m.group(2).upper(),
-            
-            # Mejorar formato de números
-            r'(\d+)\s*\.\s*([A-ZÁÉÍÓÚ])': r'\1. \2',
-        }
-        
-        for pattern, replacement in formatting_improvements.items():
-            if callable(replacement):
-                enhanced = re.sub(pattern, replacement, enhanced, flags=re.MULTILINE)
-            else:
-                enhanced = re.sub(pattern, replacement, enhanced, flags=re.MULTILINE)
+        for regex, replacement in self._formatting_improvements:
+            enhanced = regex.sub(replacement, enhanced)
         
         return enhanced.strip()
     
@@ -211,5 +262,154 @@ class ResponseCleaner:
             "status": "operational"
         }
 
+# Caracteres con los que puede empezar una marca no deseada
+_MARKER_OPENER = re.compile(r'[【\[<&]')
+
+# Prefijos de marcas que todavía pueden completarse con el siguiente fragmento
+# (debe acompañar a ResponseCleaner.unwanted_patterns)
+_MARKER_PREFIX = re.compile(r"""
+      【[^\n]*                                  # anotación: '.*?' no cruza líneas
+    | \[[^\n\]]*                               # [ASSISTANT], [metadata: ...], ...
+    | <\|[^\n]*                                # <|...|>
+    | </?(?:d(?:iv?)?|s(?:p(?:an?)?)?)?         # <, <d, <di, </, </sp, ...
+    | <div[^>]* | <span[^>]*                    # etiqueta abierta sin '>'
+    | <b(?:r\s*/?)?                             # <b, <br, <br /
+    | &(?:n(?:b(?:sp?)?)?|a(?:mp?)?|lt?|gt?)?   # &nbsp; &amp; &lt; &gt;
+""", re.IGNORECASE | re.VERBOSE)
+
+# Una anotación 【...】 sólo es definitiva cuando ya aparece '†' seguido de '】'
+# (si no, '【.*?】' podría acabar cediendo ante '\【.*?†.*?\】')
+_ANNOTATION_COMPLETE = re.compile(r'【[^\n]*?†[^\n]*?】')
+
+# Caracteres que pueden formar parte de una mejora (espacios, puntuación, emojis)
+_IMPROVEMENT_CHARS = frozenset('.?!🎯💪⚡')
+
+class StreamingResponseCleaner:
+    """Limpieza incremental de una respuesta que llega por fragmentos
+    
+    Cada fragmento se limpia en cuanto es seguro hacerlo; sólo se retiene la
+    cola que aún puede cambiar (una marca sin cerrar, espacios o puntuación
+    finales). El resultado de finish() es idéntico a clean_response() sobre
+    el texto completo.
+    
+    El recorte del inicio depende de todo el texto (una palabra de mayor
+    prioridad puede llegar al final), así que feed() devuelve el texto limpio
+    acumulado para repintarlo, no sólo lo nuevo.
+    """
+    
+    def __init__(self, cleaner: Optional[ResponseCleaner] = None):
+        self.cleaner = cleaner or response_cleaner
+        self._received = False
+        self._pending = ""           # Texto crudo que aún no se puede limpiar
+        self._clean = ""             # Texto sin marcas (antes del recorte del inicio)
+        self._keyword_scanned = 0    # Hasta dónde se buscaron palabras de inicio
+        self._cut_priority = len(self.cleaner._starting_regexes)
+        self._cut_position = 0
+        self._improved = ""          # Texto ya mejorado desde el recorte
+        self._improved_upto = 0      # Posición en _clean hasta la que se aplicaron mejoras
+        self._max_keyword = max(len(regex.pattern) for regex in self.cleaner._starting_regexes)
+    
+    @property
+    def text(self) -> str:
+        """Texto limpio disponible hasta ahora"""
+        return self._improved.lstrip()
+    
+    def feed(self, chunk: str) -> str:
+        """Añade un fragmento y devuelve el texto limpio acumulado"""
+        if chunk:
+            self._received = True
+            self._pending += chunk
+            self._advance(final=False)
+        return self.text
+    
+    def finish(self) -> str:
+        """Procesa lo retenido y devuelve el resultado final"""
+        if not self._received:
+            return ""
+        
+        self._advance(final=True)
+        cleaned = self.text.rstrip()
+        if not cleaned or len(cleaned) < 10:
+            return UNCLEAR_RESPONSE_MESSAGE
+        return cleaned
+    
+    def _advance(self, final: bool):
+        """Mueve texto de _pending a _clean y aplica recorte y mejoras"""
+        settled = self._settle_markers(final)
+        if settled:
+            self._clean += self.cleaner._remove_unwanted(settled)
+            self._update_cut()
+        self._improve(final)
+    
+    def _settle_markers(self, final: bool) -> str:
+        """Elimina las marcas resueltas de _pending y retiene desde la primera abierta"""
+        if final:
+            settled, self._pending = self._pending, ""
+            return settled
+        
+        text = self._pending
+        unwanted = self.cleaner._unwanted_regex
+        parts = []
+        position = 0
+        search_from = 0
+        while True:
+            opener = _MARKER_OPENER.search(text, search_from)
+            if not opener:
+                break
+            start = opener.start()
+            match = unwanted.match(text, start)
+            if text[start] == '【' and text.find('\n', start) == -1 and not _ANNOTATION_COMPLETE.match(text, start):
+                match = None  # La anotación aún puede crecer
+            elif match:
+                parts.append(text[position:start])
+                position = search_from = match.end()
+                continue
+            if _MARKER_PREFIX.fullmatch(text, start):
+                # Marca incompleta: esperar al siguiente fragmento
+                parts.append(text[position:start])
+                self._pending = text[start:]
+                return "".join(parts)
+            search_from = start + 1
+        
+        parts.append(text[position:])
+        self._pending = ""
+        return "".join(parts)
+    
+    def _update_cut(self):
+        """Busca palabras de inicio de mayor prioridad en el texto nuevo"""
+        scan_from = max(0, self._keyword_scanned - self._max_keyword)
+        for priority in range(self._cut_priority):
+            match = self.cleaner._starting_regexes[priority].search(self._clean, scan_from)
+            if match:
+                self._cut_priority = priority
+                self._cut_position = match.start()
+                # Lo mejorado antes del nuevo recorte ya no vale
+                self._improved = ""
+                self._improved_upto = self._cut_position
+                break
+        self._keyword_scanned = len(self._clean)
+    
+    def _improve(self, final: bool):
+        """Aplica las mejoras hasta el último carácter que ninguna mejora puede tocar"""
+        end = len(self._clean)
+        if not final:
+            while end > self._improved_upto and (
+                self._clean[end - 1].isspace() or self._clean[end - 1] in _IMPROVEMENT_CHARS
+            ):
+                end -= 1
+        if end > self._improved_upto:
+            self._improved += self.cleaner._apply_improvements(self._clean[self._improved_upto:end])
+            self._improved_upto = end
+
+def clean_stream(chunks: Iterable[str], cleaner: Optional[ResponseCleaner] = None) -> Iterator[str]:
+    """Limpia una respuesta por fragmentos; produce el texto acumulado tras cada uno
+    
+    El último valor producido es idéntico a clean_response() del texto completo.
+    """
+    streaming_cleaner = StreamingResponseCleaner(cleaner)
+    for chunk in chunks:
+        yield streaming_cleaner.feed(chunk)
+    yield streaming_cleaner.finish()
+
 # Instancia global del limpiador
 response_cleaner = ResponseCleaner()
@@ -1,123 +1,381 @@
 """
-Módulo para exportar rutinas de entrenamiento a Excel
-Genera archivos Excel simples y profesionales siguiendo el formato estándar
+Módulo para exportar rutinas de entrenamiento a Excel, CSV, JSON y PDF
+Genera archivos simples y profesionales siguiendo el formato estándar
 """
 
-import pandas as pd
 import logging
 import re
+import csv
+import json
+import hashlib
+import importlib.util
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from io import BytesIO
+from io import StringIO
 import streamlit as st
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from modules.athlete_manager import get_athlete_data
 from modules.email_manager import show_email_sending_interface
 
-def create_simple_routine_excel(athlete_id, routine_text):
-    """Crea un Excel simple y limpio con el formato estándar usado por los entrenadores"""
-    try:
-        # Obtener datos del atleta
-        athlete_data = get_athlete_data(athlete_id)
-        if not athlete_data:
-            logging.error(f"No se encontraron datos del atleta {athlete_id}")
-            return None
+# fpdf2 y openpyxl se importan al generar el primer archivo, no al arrancar la app
+PDF_AVAILABLE = importlib.util.find_spec("fpdf") is not None
 
-        # Crear workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Plan de Entrenamiento"
-
-        # Configurar estilos
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        day_font = Font(bold=True, color="FFFFFF", size=11)
-        day_fill = PatternFill(start_color="5B9BD5", end_color="5B9BD5", fill_type="solid")
-        border = Border(
-            left=Side(border_style="thin"),
-            right=Side(border_style="thin"),
-            top=Side(border_style="thin"),
-            bottom=Side(border_style="thin")
-        )
+# Cache de rutinas parseadas por hash de contenido (compartido entre sesiones)
+PARSED_ROUTINE_CACHE_SIZE = 256
+_parsed_routine_cache = OrderedDict()
+_parsed_routine_lock = threading.Lock()
 
-        # Información del atleta (encabezado)
-        ws.cell(row=1, column=1, value="ATLETA:")
-        ws.cell(row=1, column=2, value=athlete_data['name'])
-        ws.cell(row=2, column=1, value="DEPORTE:")
-        ws.cell(row=2, column=2, value=athlete_data['sport'])
-        ws.cell(row=3, column=1, value="NIVEL:")
-        ws.cell(row=3, column=2, value=athlete_data['level'])
-        ws.cell(row=4, column=1, value="FECHA:")
-        ws.cell(row=4, column=2, value=datetime.now().strftime("%d/%m/%Y"))
-
-        # Configurar estilos del encabezado
-        for row in range(1, 5):
-            ws.cell(row=row, column=1).font = Font(bold=True)
-
-        # Parsear rutina de forma simple
-        routine_data = parse_routine_simple(routine_text)
+def get_routine_hash(routine_text):
+    """Hash estable del contenido de una rutina para usar como clave de cache"""
+    return hashlib.sha1((routine_text or "").encode('utf-8')).hexdigest()
+
+def get_parsed_routine(routine_text):
+    """Devuelve la rutina parseada, reutilizando el resultado si el contenido ya se parseó"""
+    routine_hash = get_routine_hash(routine_text)
+    
+    with _parsed_routine_lock:
+        cached = _parsed_routine_cache.get(routine_hash)
+        if cached is not None:
+            _parsed_routine_cache.move_to_end(routine_hash)
+            return cached
+    
+    parsed = parse_routine_simple(routine_text)
+    
+    with _parsed_routine_lock:
+        _parsed_routine_cache[routine_hash] = parsed
+        _parsed_routine_cache.move_to_end(routine_hash)
+        while len(_parsed_routine_cache) > PARSED_ROUTINE_CACHE_SIZE:
+            _parsed_routine_cache.popitem(last=False)
+    
+    return parsed
+
+EXCEL_TABLE_HEADERS = ["EJERCICIO", "SERIES/REPETICIONES", "CARGA", "NOTAS"]
+
+def build_routine_workbook(athlete_data, routine_data):
+    """Renderiza una rutina ya parseada a XLSX usando el escritor en streaming
+    
+    Si la rutina tiene varias semanas (programas periodizados) se crea una hoja
+    por semana; si no, una única hoja "Plan de Entrenamiento".
+    """
+    from modules.xlsx_writer import RoutineWorkbookWriter
+    
+    writer = RoutineWorkbookWriter()
+    
+    # Agrupar días por semana conservando el orden original
+    weeks = OrderedDict()
+    for day_info in routine_data:
+        weeks.setdefault(day_info.get('week'), []).append(day_info)
+    
+    if len(weeks) <= 1:
+        sheets = [("Plan de Entrenamiento", routine_data)]
+    else:
+        sheets = [(f"Semana {week}" if week else "Plan de Entrenamiento", days) for week, days in weeks.items()]
+    
+    fecha = datetime.now().strftime("%d/%m/%Y")
+    
+    for sheet_title, days in sheets:
+        writer.add_sheet(sheet_title)
         
-        # Empezar el plan desde la fila 6
-        current_row = 6
+        # Información del atleta (encabezado)
+        writer.write_label_rows([
+            ("ATLETA:", athlete_data['name']),
+            ("DEPORTE:", athlete_data['sport']),
+            ("NIVEL:", athlete_data['level']),
+            ("FECHA:", fecha),
+        ])
+        writer.write_blank()
         
         # Headers de la tabla
-        headers = ["EJERCICIO", "SERIES/REPETICIONES", "CARGA", "NOTAS"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.border = border
+        writer.write_table_header(EXCEL_TABLE_HEADERS)
+        
+        # Agregar días y ejercicios
+        for day_info in days:
+            writer.write_merged(f"DÍA {day_info['day']} - {day_info['title']}")
+            
+            for exercise in day_info['exercises']:
+                if exercise['name']:  # Solo si hay nombre de ejercicio
+                    # Carga vacía para que el entrenador la complete
+                    writer.write_exercise(exercise['name'], exercise['sets_reps'], "", exercise['notes'])
+            
+            # Espacio entre días
+            writer.write_blank()
+    
+    return writer.to_bytes()
 
-        current_row += 1
+# ================================
+# 🔄 PIPELINE DE EXPORTACIÓN: parse → modelo → render
+# ================================
+#
+# El modelo es la lista de días que devuelve parse_routine_simple:
+#   [{'day': '1', 'title': 'FUERZA', 'week': None,
+#     'exercises': [{'name': ..., 'sets_reps': ..., 'notes': ...}]}]
+# Cada renderer recibe (athlete_data, routine_data) y devuelve bytes.
 
-        # Agregar días y ejercicios
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_RENDERERS = {}
+
+EXPORT_CACHE_SIZE = 64
+_export_cache = OrderedDict()
+_export_cache_lock = threading.Lock()
+
+def register_export_renderer(fmt, extension, mime):
+    """Decorador para registrar un renderer de rutinas en el pipeline"""
+    def decorator(render_func):
+        EXPORT_RENDERERS[fmt] = {
+            'render': render_func,
+            'extension': extension,
+            'mime': mime
+        }
+        return render_func
+    return decorator
+
+@register_export_renderer("xlsx", "xlsx", XLSX_MIME)
+def render_routine_xlsx(athlete_data, routine_data):
+    """Renderer Excel (escritor en streaming)"""
+    return build_routine_workbook(athlete_data, routine_data)
+
+# Columnas fijas de CSV: no cambiar el orden, lo consumen integraciones externas
+CSV_COLUMNS = ["athlete", "sport", "level", "week", "day", "day_title", "exercise", "sets_reps", "load", "notes"]
+
+JSON_SCHEMA_VERSION = 1
+
+def iter_routine_rows(athlete_data, routine_data):
+    """Aplana el modelo parseado en filas con las columnas de CSV_COLUMNS"""
+    for day_info in routine_data:
+        for exercise in day_info['exercises']:
+            if not exercise['name']:
+                continue
+            yield (
+                athlete_data['name'],
+                athlete_data['sport'],
+                athlete_data['level'],
+                day_info.get('week') or "",
+                day_info['day'],
+                day_info['title'],
+                exercise['name'],
+                exercise['sets_reps'],
+                exercise.get('load', ""),
+                exercise['notes']
+            )
+
+@register_export_renderer("csv", "csv", "text/csv")
+def render_routine_csv(athlete_data, routine_data):
+    """Renderer CSV: una fila por ejercicio, columnas estables"""
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    writer.writerows(iter_routine_rows(athlete_data, routine_data))
+    return buffer.getvalue().encode("utf-8")
+
+@register_export_renderer("json", "json", "application/json")
+def render_routine_json(athlete_data, routine_data):
+    """Renderer JSON: estructura semana/día/ejercicios con versión de esquema"""
+    document = {
+        'schema_version': JSON_SCHEMA_VERSION,
+        'generated_at': datetime.now().strftime("%Y-%m-%d"),
+        'athlete': {
+            'name': athlete_data['name'],
+            'sport': athlete_data['sport'],
+            'level': athlete_data['level']
+        },
+        'days': [
+            {
+                'week': int(day_info['week']) if day_info.get('week') else None,
+                'day': day_info['day'],
+                'title': day_info['title'],
+                'exercises': [
+                    {
+                        'name': exercise['name'],
+                        'sets_reps': exercise['sets_reps'],
+                        'load': exercise.get('load', ""),
+                        'notes': exercise['notes']
+                    }
+                    for exercise in day_info['exercises'] if exercise['name']
+                ]
+            }
+            for day_info in routine_data
+        ]
+    }
+    return json.dumps(document, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _pdf_text(value):
+    """Las fuentes base de PDF son latin-1: se descartan emojis y símbolos no soportados"""
+    return str(value or "").encode("latin-1", "ignore").decode("latin-1").strip()
+
+PDF_COLUMN_WIDTHS = (70, 35, 20, 55)  # mm, A4 con márgenes por defecto
+PDF_LINE_HEIGHT = 5
+
+def _pdf_table_row(pdf, values, fill=False):
+    """Escribe una fila de la tabla; solo usa multi_cell (lento) si algún texto no cabe"""
+    values = [_pdf_text(value) for value in values]
+    padding = 2 * pdf.c_margin
+    fits = all(pdf.get_string_width(value) <= width - padding
+               for value, width in zip(values, PDF_COLUMN_WIDTHS))
+    
+    if fits:
+        for value, width in zip(values, PDF_COLUMN_WIDTHS):
+            pdf.cell(width, PDF_LINE_HEIGHT, value, border=1, fill=fill)
+        pdf.ln(PDF_LINE_HEIGHT)
+        return
+    
+    # Fila con texto largo: alto común según la columna con más líneas
+    line_counts = [len(pdf.multi_cell(width, PDF_LINE_HEIGHT, value, dry_run=True, output="LINES"))
+                   for value, width in zip(values, PDF_COLUMN_WIDTHS)]
+    row_height = PDF_LINE_HEIGHT * max(line_counts)
+    if pdf.get_y() + row_height > pdf.page_break_trigger:
+        pdf.add_page()
+    
+    x, y = pdf.l_margin, pdf.get_y()
+    for value, width in zip(values, PDF_COLUMN_WIDTHS):
+        pdf.rect(x, y, width, row_height, style="DF" if fill else "D")
+        pdf.set_xy(x, y)
+        pdf.multi_cell(width, PDF_LINE_HEIGHT, value)
+        x += width
+    pdf.set_xy(pdf.l_margin, y + row_height)
+
+if PDF_AVAILABLE:
+    @register_export_renderer("pdf", "pdf", "application/pdf")
+    def render_routine_pdf(athlete_data, routine_data):
+        """Renderer PDF para imprimir (fpdf2, sin dependencias nativas)"""
+        from fpdf import FPDF
+        
+        pdf = FPDF(format="A4")
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        
+        # Información del atleta (encabezado)
+        pdf.set_font("Helvetica", "B", 16)
+        pdf.cell(0, 10, "Plan de Entrenamiento", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("Helvetica", "", 10)
+        for label, value in (("Atleta", athlete_data['name']), ("Deporte", athlete_data['sport']),
+                             ("Nivel", athlete_data['level']), ("Fecha", datetime.now().strftime("%d/%m/%Y"))):
+            pdf.cell(0, 6, _pdf_text(f"{label}: {value}"), new_x="LMARGIN", new_y="NEXT")
+        
+        current_week = None
         for day_info in routine_data:
-            # Header del día
-            day_cell = ws.cell(row=current_row, column=1)
-            day_cell.value = f"DÍA {day_info['day']} - {day_info['title']}"
-            day_cell.font = day_font
-            day_cell.fill = day_fill
-            day_cell.alignment = Alignment(horizontal="center", vertical="center")
-            day_cell.border = border
+            week = day_info.get('week')
+            if week and week != current_week:
+                current_week = week
+                pdf.ln(4)
+                pdf.set_font("Helvetica", "B", 14)
+                pdf.cell(0, 9, f"Semana {week}", new_x="LMARGIN", new_y="NEXT")
             
-            # Merge células para el día
-            ws.merge_cells(start_row=current_row, start_column=1, 
-                          end_row=current_row, end_column=4)
+            pdf.ln(3)
+            pdf.set_font("Helvetica", "B", 11)
+            pdf.set_fill_color(91, 155, 213)
+            pdf.set_text_color(255, 255, 255)
+            pdf.cell(0, 8, _pdf_text(f"DÍA {day_info['day']} - {day_info['title']}"), fill=True,
+                     new_x="LMARGIN", new_y="NEXT")
+            pdf.set_text_color(0, 0, 0)
             
-            current_row += 1
+            exercises = [exercise for exercise in day_info['exercises'] if exercise['name']]
+            if not exercises:
+                continue
+            
+            pdf.set_font("Helvetica", "B", 9)
+            pdf.set_fill_color(230, 236, 245)
+            _pdf_table_row(pdf, EXCEL_TABLE_HEADERS, fill=True)
+            pdf.set_font("Helvetica", "", 9)
+            for exercise in exercises:
+                _pdf_table_row(pdf, (exercise['name'], exercise['sets_reps'], "", exercise['notes']))
+        
+        return bytes(pdf.output())
 
-            # Ejercicios del día
-            for exercise in day_info['exercises']:
-                if exercise['name']:  # Solo si hay nombre de ejercicio
-                    ws.cell(row=current_row, column=1, value=exercise['name']).border = border
-                    ws.cell(row=current_row, column=2, value=exercise['sets_reps']).border = border
-                    ws.cell(row=current_row, column=3, value="").border = border  # Carga vacía para llenar
-                    ws.cell(row=current_row, column=4, value=exercise['notes']).border = border
-                    current_row += 1
+def _export_cache_key(athlete_data, routine_text, fmt):
+    """Clave del artefacto: formato + contenido + datos del atleta que aparecen en el archivo + fecha"""
+    return (
+        fmt,
+        get_routine_hash(routine_text),
+        athlete_data.get('id'),
+        athlete_data.get('name'),
+        athlete_data.get('sport'),
+        athlete_data.get('level'),
+        datetime.now().strftime("%Y%m%d")
+    )
 
-            # Espacio entre días
-            current_row += 1
-
-        # Ajustar ancho de columnas
-        ws.column_dimensions['A'].width = 45  # Ejercicio
-        ws.column_dimensions['B'].width = 20  # Series/Repeticiones
-        ws.column_dimensions['C'].width = 15  # Carga
-        ws.column_dimensions['D'].width = 30  # Notas
-
-        # Guardar en BytesIO
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
+def export_routine(athlete_data, routine_text, fmt="xlsx"):
+    """Exporta una rutina al formato pedido, reutilizando el artefacto si ya se generó
+    
+    Punto de entrada único para la descarga del chat, los templates rápidos y el
+    email automático: la rutina se parsea una vez y cada formato se renderiza una vez.
+    """
+    renderer = EXPORT_RENDERERS.get(fmt)
+    if not renderer:
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+    
+    cache_key = _export_cache_key(athlete_data, routine_text, fmt)
+    
+    with _export_cache_lock:
+        cached = _export_cache.get(cache_key)
+        if cached is not None:
+            _export_cache.move_to_end(cache_key)
+            logging.info(f"🎯 Exportación {fmt} reutilizada desde cache")
+            return cached
+    
+    routine_data = get_parsed_routine(routine_text)
+    data = renderer['render'](athlete_data, routine_data)
+    
+    if data:
+        with _export_cache_lock:
+            _export_cache[cache_key] = data
+            _export_cache.move_to_end(cache_key)
+            while len(_export_cache) > EXPORT_CACHE_SIZE:
+                _export_cache.popitem(last=False)
+    
+    return data
+
+def build_export_filename(athlete_name, fmt="xlsx", prefix="Rutina"):
+    """Nombre de archivo estándar para una exportación"""
+    extension = EXPORT_RENDERERS.get(fmt, {}).get('extension', fmt)
+    athlete_name_clean = str(athlete_name or 'Atleta').replace(' ', '_')
+    return f"{prefix}_{athlete_name_clean}_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+
+def create_simple_routine_excel(athlete_id, routine_text):
+    """Crea un Excel simple y limpio con el formato estándar usado por los entrenadores"""
+    try:
+        # Obtener datos del atleta
+        athlete_data = get_athlete_data(athlete_id)
+        if not athlete_data:
+            logging.error(f"No se encontraron datos del atleta {athlete_id}")
+            return None
+
+        excel_data = export_routine(athlete_data, routine_text, "xlsx")
         
         logging.info(f"Excel simple generado exitosamente para atleta {athlete_id}")
-        return excel_buffer.getvalue()
+        return excel_data
 
     except Exception as e:
         logging.error(f"Error al crear Excel simple: {e}")
         return None
 
+# Patrones de series/repeticiones, del más específico al más general
+SETS_REPS_PATTERNS = [
+    re.compile(r'\((\d+x\d+/\d+)\)'),     # (2x15/15)
+    re.compile(r'\((\d+x\d+)\)'),         # (3x10)
+    re.compile(r'(\d+x\d+/\d+)'),         # 2x15/15
+    re.compile(r'(\d+x\d+\s*seg)'),       # 3x30 seg
+    re.compile(r'(\d+x\d+)'),             # 3x10
+    re.compile(r'\((\d+)\s*rep\)'),       # (15 rep)
+    re.compile(r'(\d+)\s*rep'),           # 15 rep
+    re.compile(r'(\d+)\s*series?\s*de?\s*(\d+)'),  # 3 series de 10
+    re.compile(r'(\d+)\s*×\s*(\d+)'),     # 3×10
+    re.compile(r'\((\d+)\s*seg\)'),       # (30 seg)
+    re.compile(r'(\d+)\s*seg'),           # 30 seg
+]
+
+def _extract_sets_reps(text):
+    """Devuelve (series/repeticiones, texto restante); ('', texto) si no hay prescripción"""
+    for pattern in SETS_REPS_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            if len(match.groups()) == 1:
+                sets_reps = match.group(1)
+            else:
+                sets_reps = f"{match.group(1)}x{match.group(2)}"
+            return sets_reps, pattern.sub('', text).strip()
+    return "", text
+
 def parse_routine_simple(routine_text):
     """Parsea el texto de rutina respetando la estructura exacta por días - TODOS los bloques separados"""
     try:
@@ -130,6 +388,7 @@ def parse_routine_simple(routine_text):
         current_day = None
         current_exercises = []
         inside_day = False
+        current_week = None
         
         i = 0
         while i < len(lines):
@@ -140,6 +399,13 @@ def parse_routine_simple(routine_text):
                 i += 1
                 continue
             
+            # Detectar inicio de semana en programas periodizados (SEMANA X)
+            week_match = re.match(r'^[#*\s]*semana\s+(\d+)', line, re.IGNORECASE)
+            if week_match:
+                current_week = week_match.group(1)
+                i += 1
+                continue
+            
             # Detectar inicio de día/sesión (SESIÓN X, DÍA X, ### SESIÓN X)
             day_patterns = [
                 r'###\s*(sesión|día)\s+(\d+)',  # ### SESIÓN 1
@@ -158,6 +424,7 @@ def parse_routine_simple(routine_text):
                         days.append({
                             'day': current_day['day'],
                             'title': current_day['title'],
+                            'week': current_day['week'],
                             'exercises': current_exercises
                         })
                     
@@ -169,9 +436,9 @@ def parse_routine_simple(routine_text):
                     
                     # Extraer título después del guión
                     title = line.split('-')[-1].strip() if '-' in line else "ENTRENAMIENTO"
-                    title = re.sub(r'###|\*\*\*', '', title).strip()
+                    title = re.sub(r'###|\*+', '', title).strip()
                     
-                    current_day = {'day': day_num, 'title': title}
+                    current_day = {'day': day_num, 'title': title, 'week': current_week}
                     current_exercises = []
                     inside_day = True
                     break
@@ -180,6 +447,12 @@ def parse_routine_simple(routine_text):
                 i += 1
                 continue
             
+            # Las notas finales ("📋 NOTAS TÉCNICAS") cierran el último día
+            if re.match(r'^\W*notas\b', line, re.IGNORECASE):
+                inside_day = False
+                i += 1
+                continue
+            
             # Solo procesar si estamos dentro de un día
             if not inside_day:
                 i += 1
@@ -202,7 +475,9 @@ def parse_routine_simple(routine_text):
                 'VUELTA A LA CALMA', 'ESTIRAMIENTOS', 'MOVILIDAD'
             ]
             
-            is_section = any(keyword in line.upper() for keyword in section_keywords)
+            # Una viñeta es siempre un ejercicio, aunque su nombre contenga una palabra clave
+            is_bullet = line.startswith(('-', '•', '–'))
+            is_section = not is_bullet and any(keyword in line.upper() for keyword in section_keywords)
             
             if is_section:
                 # Es una sección - agregar como separador visual
@@ -236,48 +511,37 @@ def parse_routine_simple(routine_text):
                 sets_reps = ""
                 notes = ""
                 
-                # Patrones más amplios para detectar series/repeticiones
-                patterns = [
-                    r'\((\d+x\d+/\d+)\)',     # (2x15/15)
-                    r'\((\d+x\d+)\)',         # (3x10)
-                    r'(\d+x\d+/\d+)',         # 2x15/15
-                    r'(\d+x\d+)',             # 3x10
-                    r'\((\d+)\s*rep\)',       # (15 rep)
-                    r'(\d+)\s*rep',           # 15 rep
-                    r'(\d+)\s*series?\s*de?\s*(\d+)',  # 3 series de 10
-                    r'(\d+)\s*×\s*(\d+)',     # 3×10
-                    r'\((\d+)\s*seg\)',       # (30 seg)
-                    r'(\d+)\s*seg',           # 30 seg
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, cleaned_line)
-                    if match:
-                        if len(match.groups()) == 1:
-                            sets_reps = match.group(1)
-                        else:
-                            sets_reps = f"{match.group(1)}x{match.group(2)}"
-                        exercise_name = re.sub(pattern, '', cleaned_line).strip()
-                        break
+                # La prescripción suele ir tras los últimos dos puntos: buscarla ahí primero
+                # respeta los dos puntos del nombre ("Escalera de agilidad: entradas y salidas: 2x6")
+                # y los números que forman parte de él ("Shuttle run 6x20m: 3x6")
+                name_part, colon, info_part = cleaned_line.rpartition(':')
+                if colon:
+                    sets_reps, remaining_info = _extract_sets_reps(info_part)
+                    if sets_reps:
+                        exercise_name = name_part.strip()
+                        notes = remaining_info
                 
-                # Procesar información después de los dos puntos
-                if ':' in exercise_name:
-                    parts = exercise_name.split(':', 1)
-                    exercise_name = parts[0].strip()
-                    if not sets_reps and len(parts) > 1:
-                        additional_info = parts[1].strip()
-                        # Si contiene números, probablemente son series/reps
-                        if re.search(r'\d+', additional_info):
-                            # Verificar si es información de series/reps
-                            if any(word in additional_info.lower() for word in ['rep', 'series', 'x', 'seg']):
-                                sets_reps = additional_info
+                if not sets_reps:
+                    sets_reps, exercise_name = _extract_sets_reps(cleaned_line)
+                    
+                    # Procesar información después de los dos puntos
+                    if ':' in exercise_name:
+                        parts = exercise_name.split(':', 1)
+                        exercise_name = parts[0].strip()
+                        if not sets_reps and len(parts) > 1:
+                            additional_info = parts[1].strip()
+                            # Si contiene números, probablemente son series/reps
+                            if re.search(r'\d+', additional_info):
+                                # Verificar si es información de series/reps
+                                if any(word in additional_info.lower() for word in ['rep', 'series', 'x', 'seg']):
+                                    sets_reps = additional_info
+                                else:
+                                    notes = additional_info
                             else:
                                 notes = additional_info
-                        else:
-                            notes = additional_info
                 
                 # Limpiar nombre final
-                exercise_name = exercise_name.rstrip('.').strip()
+                exercise_name = exercise_name.rstrip('.').strip('* ')
                 
                 # Solo agregar si hay nombre de ejercicio válido
                 if exercise_name and len(exercise_name) > 2:
@@ -294,6 +558,7 @@ def parse_routine_simple(routine_text):
             days.append({
                 'day': current_day['day'],
                 'title': current_day['title'],
+                'week': current_day['week'],
                 'exercises': current_exercises
             })
         
@@ -355,8 +620,7 @@ def generate_routine_excel_from_chat(athlete_id, chat_message):
             filename_key = f"{excel_key}_filename"
             timestamp_key = f"{excel_key}_timestamp"
             
-            athlete_name_clean = athlete_name.replace(' ', '_')
-            filename = f"Rutina_{athlete_name_clean}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+            filename = build_export_filename(athlete_name, "xlsx")
             
             # Guardar en session_state
             st.session_state[excel_key] = excel_data
@@ -389,7 +653,7 @@ def create_download_button(excel_data, athlete_name, filename_prefix="Rutina", u
             label="📥 Descargar Rutina en Excel",
             data=excel_data,
             file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=XLSX_MIME,
             key=f"download_excel_{unique_id}_{timestamp}",
             use_container_width=True,
             type="primary"
@@ -401,6 +665,105 @@ def create_download_button(excel_data, athlete_name, filename_prefix="Rutina", u
         logging.error(f"Error al crear botón de descarga: {e}")
         return False
 
+def get_routine_excel(athlete_id, routine_text, unique_id=""):
+    """Obtiene el Excel de una rutina generándolo solo la primera vez que se pide"""
+    state_key = f"lazy_excel_{unique_id}"
+    excel_data = st.session_state.get(state_key)
+    
+    if excel_data is None:
+        excel_data = create_simple_routine_excel(athlete_id, routine_text)
+        if excel_data:
+            st.session_state[state_key] = excel_data
+    
+    return excel_data
+
+def _prepare_lazy_excel(athlete_id, routine_text, unique_id):
+    """Callback del botón 'Preparar': genera el Excel antes del siguiente rerun"""
+    if not get_routine_excel(athlete_id, routine_text, unique_id):
+        st.session_state[f"lazy_excel_error_{unique_id}"] = True
+
+def create_lazy_download_button(athlete_id, routine_text, athlete_name, filename_prefix="Rutina", unique_id=""):
+    """Botón de descarga diferido: el Excel solo se construye cuando el usuario lo pide
+    
+    Primer paso: botón "Preparar Excel" (sin trabajo de openpyxl al renderizar).
+    Segundo paso: una vez generado, se muestra el botón de descarga real.
+    """
+    try:
+        excel_data = st.session_state.get(f"lazy_excel_{unique_id}")
+        
+        if excel_data is None:
+            st.button(
+                "📊 Preparar Excel",
+                key=f"prepare_excel_{unique_id}",
+                on_click=_prepare_lazy_excel,
+                args=(athlete_id, routine_text, unique_id),
+                use_container_width=True,
+                type="primary"
+            )
+            
+            if st.session_state.pop(f"lazy_excel_error_{unique_id}", False):
+                st.error("❌ No se pudo generar el Excel de esta rutina")
+            return False
+        
+        downloaded = create_download_button(excel_data, athlete_name, filename_prefix, unique_id=unique_id)
+        create_alternate_format_buttons(athlete_id, routine_text, athlete_name, filename_prefix, unique_id)
+        return downloaded
+
+    except Exception as e:
+        logging.error(f"Error al crear botón de descarga diferida: {e}")
+        return False
+
+def _prepare_lazy_export(athlete_id, routine_text, fmt, unique_id):
+    """Callback del botón 'Preparar <formato>': renderiza solo ese formato antes del siguiente rerun"""
+    data = None
+    athlete_data = get_athlete_data(athlete_id)
+    if athlete_data:
+        try:
+            data = export_routine(athlete_data, routine_text, fmt)
+        except Exception as e:
+            logging.error(f"Error exportando rutina a {fmt}: {e}")
+    
+    if data:
+        st.session_state[f"lazy_export_{fmt}_{unique_id}"] = data
+    else:
+        st.session_state[f"lazy_export_error_{fmt}_{unique_id}"] = True
+
+def create_alternate_format_buttons(athlete_id, routine_text, athlete_name, filename_prefix="Rutina", unique_id=""):
+    """Descargas en formatos adicionales (CSV, JSON, PDF) desde el mismo modelo parseado
+    
+    Igual que el Excel: cada formato se renderiza solo cuando se pulsa su botón
+    "Preparar", no en cada rerun.
+    """
+    formats = [fmt for fmt in ("csv", "json", "pdf") if fmt in EXPORT_RENDERERS]
+    if not formats:
+        return
+    
+    cols = st.columns(len(formats))
+    for col, fmt in zip(cols, formats):
+        with col:
+            data = st.session_state.get(f"lazy_export_{fmt}_{unique_id}")
+            
+            if data is None:
+                st.button(
+                    f"📄 Preparar {fmt.upper()}",
+                    key=f"prepare_{fmt}_{unique_id}",
+                    on_click=_prepare_lazy_export,
+                    args=(athlete_id, routine_text, fmt, unique_id),
+                    use_container_width=True
+                )
+                if st.session_state.pop(f"lazy_export_error_{fmt}_{unique_id}", False):
+                    st.error(f"❌ No se pudo generar el {fmt.upper()}")
+                continue
+            
+            st.download_button(
+                label=f"📄 {fmt.upper()}",
+                data=data,
+                file_name=build_export_filename(athlete_name, fmt, filename_prefix),
+                mime=EXPORT_RENDERERS[fmt]['mime'],
+                key=f"download_{fmt}_{unique_id}",
+                use_container_width=True
+            )
+
 def create_download_and_email_interface(athlete_id, excel_data, athlete_name, filename_prefix="Rutina", unique_id=""):
     """Crea interfaz completa con descarga y envío por email"""
     try:
@@ -426,7 +789,7 @@ def create_download_and_email_interface(athlete_id, excel_data, athlete_name, fi
                 label="📥 Descargar Excel",
                 data=excel_data,
                 file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                mime=XLSX_MIME,
                 key=f"download_excel_{unique_id}_{timestamp}",
                 use_container_width=True,
                 type="primary"
@@ -0,0 +1,311 @@
+"""
+Generador de Rutinas sin IA
+Construye rutinas completas de 6 bloques a partir de la metodología de
+training_variations y una biblioteca de ejercicios indexada por categoría,
+tipo de deporte, nivel y equipamiento. Es determinista (mismos datos, misma
+rutina), responde en menos de un milisegundo y produce el mismo formato de
+texto que el modelo, así que el chat, el Excel y el email lo tratan igual.
+"""
+
+import re
+import random
+import logging
+import unicodedata
+import zlib
+from typing import Dict, Optional
+
+from modules.training_variations import (
+    PROGRESSION_GUIDELINES, SPORT_ADAPTATION_PRINCIPLES, classify_sport
+)
+
+# ================================
+# 📚 BIBLIOTECA DE EJERCICIOS
+# ================================
+
+LEVELS = ("principiante", "intermedio", "avanzado", "semi_profesional", "elite")
+EQUIPMENT_TIERS = ("sin_equipamiento", "basico", "avanzado")
+
+ALL_SPORTS = "*"
+INTERMITENTES = "deportes_intermitentes"
+CICLICOS = "deportes_ciclicos"
+PRECISION = "deportes_precision"
+COMBATE = "deportes_combate"
+
+# (ejercicio, categoría, tipos de deporte, nivel mínimo, equipamiento mínimo)
+EXERCISE_LIBRARY = (
+    # Activación glútea
+    ("Puente glúteo unilateral con pausa de 2 seg", "activacion_glutea", (ALL_SPORTS,), 0, 0),
+    ("Caminata lateral en media sentadilla", "activacion_glutea", (ALL_SPORTS,), 0, 0),
+    ("Patada de glúteo en cuadrupedia con rodilla flexionada", "activacion_glutea", (ALL_SPORTS,), 0, 0),
+    ("Monster walk con banda en tobillos", "activacion_glutea", (ALL_SPORTS,), 0, 1),
+    ("Clamshell con banda y pausa isométrica", "activacion_glutea", (ALL_SPORTS,), 0, 1),
+    ("Hip thrust unilateral con banda", "activacion_glutea", (ALL_SPORTS,), 1, 1),
+    ("Abducción de cadera en plancha lateral", "activacion_glutea", (ALL_SPORTS,), 1, 0),
+    ("Frog pump con mancuerna", "activacion_glutea", (ALL_SPORTS,), 1, 2),
+    ("Hip airplane con apoyo", "activacion_glutea", (INTERMITENTES, PRECISION, COMBATE), 2, 0),
+
+    # Zona media
+    ("Dead bug con exhalación completa", "zona_media_core", (ALL_SPORTS,), 0, 0),
+    ("Hollow hold con balanceo", "zona_media_core", (ALL_SPORTS,), 1, 0),
+    ("Plancha frontal con toque de hombro alterno", "zona_media_core", (ALL_SPORTS,), 0, 0),
+    ("Plancha con arrastre de disco", "zona_media_core", (ALL_SPORTS,), 1, 2),
+    ("Plancha lateral con rotación de tronco", "zona_media_rotacional", (ALL_SPORTS,), 0, 0),
+    ("Pallof press con rotación y banda", "zona_media_rotacional", (ALL_SPORTS,), 0, 1),
+    ("Lanzamiento rotacional de balón medicinal a pared", "zona_media_rotacional", (INTERMITENTES, PRECISION, COMBATE), 1, 1),
+    ("Rotación con landmine", "zona_media_rotacional", (ALL_SPORTS,), 2, 2),
+    ("Woodchop en polea alta", "zona_media_rotacional", (ALL_SPORTS,), 1, 2),
+    ("Plancha con alcance alterno de brazos", "zona_media_antiextension", (ALL_SPORTS,), 0, 0),
+    ("Body saw en TRX", "zona_media_antiextension", (ALL_SPORTS,), 1, 1),
+    ("Rollout con fitball", "zona_media_antiextension", (ALL_SPORTS,), 0, 1),
+    ("Rueda abdominal desde rodillas", "zona_media_antiextension", (ALL_SPORTS,), 1, 2),
+
+    # Dinámicos / potencia
+    ("Salto vertical con contramovimiento y aterrizaje estable", "potencia_explosiva", (ALL_SPORTS,), 0, 0),
+    ("Skater jumps con pausa en la recepción", "potencia_explosiva", (INTERMITENTES, PRECISION), 0, 0),
+    ("Bounds alternos de 20m", "potencia_explosiva", (CICLICOS, INTERMITENTES), 1, 0),
+    ("Lanzamiento de balón medicinal por encima de la cabeza", "potencia_explosiva", (ALL_SPORTS,), 0, 1),
+    ("Lanzamiento de balón medicinal al pecho en caída", "potencia_explosiva", (COMBATE, INTERMITENTES), 1, 1),
+    ("Saltos laterales reactivos sobre vallas bajas", "potencia_explosiva", (INTERMITENTES,), 1, 1),
+    ("Salto al cajón con contramovimiento", "potencia_explosiva", (ALL_SPORTS,), 1, 2),
+    ("Push press con mancuernas", "potencia_explosiva", (COMBATE, PRECISION), 1, 2),
+    ("Jump squat con barra hexagonal", "potencia_explosiva", (ALL_SPORTS,), 2, 2),
+    ("Power clean desde colgado", "potencia_explosiva", (ALL_SPORTS,), 2, 2),
+
+    # Fuerza 1 - patrones fundamentales
+    ("Sentadilla búlgara con pausa abajo", "fuerza_fundamental", (ALL_SPORTS,), 0, 0),
+    ("Flexiones con déficit y pausa", "fuerza_fundamental", (ALL_SPORTS,), 0, 0),
+    ("Remo invertido en TRX", "fuerza_fundamental", (ALL_SPORTS,), 0, 1),
+    ("Sentadilla goblet con kettlebell", "fuerza_fundamental", (ALL_SPORTS,), 0, 2),
+    ("Press banca con mancuernas", "fuerza_fundamental", (ALL_SPORTS,), 0, 2),
+    ("Sentadilla frontal con barra", "fuerza_fundamental", (ALL_SPORTS,), 1, 2),
+    ("Peso muerto rumano con barra", "fuerza_fundamental", (ALL_SPORTS,), 1, 2),
+    ("Hip thrust con barra", "fuerza_fundamental", (ALL_SPORTS,), 1, 2),
+    ("Dominadas lastradas", "fuerza_fundamental", (ALL_SPORTS,), 2, 2),
+
+    # Fuerza 2 - movimientos complejos
+    ("Nordic curl excéntrico", "fuerza_compleja", (ALL_SPORTS,), 0, 0),
+    ("Zancada inversa con salto alterno", "fuerza_compleja", (ALL_SPORTS,), 0, 0),
+    ("Puente de isquios unilateral con pies elevados", "fuerza_compleja", (ALL_SPORTS,), 0, 0),
+    ("Pistol squat al cajón", "fuerza_compleja", (ALL_SPORTS,), 1, 1),
+    ("Remo unilateral con mancuerna en apoyo", "fuerza_compleja", (ALL_SPORTS,), 0, 2),
+    ("Sentadilla búlgara con mancuernas", "fuerza_compleja", (ALL_SPORTS,), 1, 2),
+    ("Step-up al cajón con mancuernas", "fuerza_compleja", (ALL_SPORTS,), 1, 2),
+    ("Peso muerto a una pierna con kettlebell", "fuerza_compleja", (ALL_SPORTS,), 1, 2),
+    ("Press militar unilateral con kettlebell", "fuerza_compleja", (PRECISION, COMBATE, CICLICOS), 1, 2),
+    ("Zancada lateral con kettlebell en goblet", "fuerza_compleja", (INTERMITENTES, PRECISION), 1, 2),
+    ("Remo con barra Pendlay", "fuerza_compleja", (ALL_SPORTS,), 2, 2),
+    ("Landmine press con rotación", "fuerza_compleja", (COMBATE, PRECISION, INTERMITENTES), 2, 2),
+    ("Turkish get-up con kettlebell", "fuerza_compleja", (ALL_SPORTS,), 2, 2),
+
+    # Contraste / preventivos
+    ("Sprint 20m desde salida lanzada", "contraste_velocidad", (ALL_SPORTS,), 0, 0),
+    ("Aceleraciones 10m desde salida en 3 apoyos", "contraste_velocidad", (INTERMITENTES, COMBATE), 0, 0),
+    ("Sprint en cuesta 30m", "contraste_velocidad", (CICLICOS,), 0, 0),
+    ("Sprint con arrastre de trineo 15m", "contraste_velocidad", (ALL_SPORTS,), 1, 2),
+    ("Shuffle lateral reactivo a señal", "agilidad", (ALL_SPORTS,), 0, 0),
+    ("Drop step + sprint 10m", "agilidad", (INTERMITENTES, PRECISION), 1, 0),
+    ("Escalera de agilidad: entradas y salidas", "agilidad", (ALL_SPORTS,), 0, 1),
+    ("Pro agility 5-10-5 entre conos", "agilidad", (INTERMITENTES, PRECISION), 1, 1),
+    ("Elevación de talones excéntrica a una pierna", "prevencion_lesiones", (ALL_SPORTS,), 0, 0),
+    ("Plancha de Copenhague corta", "prevencion_lesiones", (ALL_SPORTS,), 1, 0),
+    ("Equilibrio monopodal con alcances en estrella", "prevencion_lesiones", (ALL_SPORTS,), 0, 0),
+    ("Rotación externa de hombro con banda", "prevencion_lesiones", (PRECISION, COMBATE, CICLICOS), 0, 1),
+    ("Nordic curl asistido con banda", "prevencion_lesiones", (ALL_SPORTS,), 0, 1),
+    ("Face pull con banda", "prevencion_lesiones", (ALL_SPORTS,), 0, 1),
+    ("Y-T-W en banco inclinado con discos", "prevencion_lesiones", (PRECISION, COMBATE, CICLICOS), 1, 2),
+    ("Shuttle run 6x20m", "acondicionamiento", (ALL_SPORTS,), 0, 0),
+    ("Burpee con salto lateral", "acondicionamiento", (ALL_SPORTS,), 1, 0),
+    ("Farmer walk con kettlebells 30m", "acondicionamiento", (ALL_SPORTS,), 0, 2),
+    ("Intervalos en bicicleta de asalto", "acondicionamiento", (ALL_SPORTS,), 1, 2),
+    ("Cuerdas de batalla: ondas alternas", "acondicionamiento", (COMBATE, INTERMITENTES), 1, 2),
+)
+
+def _build_exercise_index():
+    """Indexa la biblioteca por (categoría, tipo de deporte, nivel, equipamiento)
+
+    Cada clave guarda ya todos los ejercicios válidos: los del deporte, los
+    generales y los de niveles y equipamientos inferiores.
+    """
+    index = {}
+    for sport_type in SPORT_ADAPTATION_PRINCIPLES:
+        for level_index in range(len(LEVELS)):
+            for equipment_index in range(len(EQUIPMENT_TIERS)):
+                for name, category, sports, min_level, min_equipment in EXERCISE_LIBRARY:
+                    if (min_level <= level_index and min_equipment <= equipment_index
+                            and (ALL_SPORTS in sports or sport_type in sports)):
+                        key = (category, sport_type, LEVELS[level_index], EQUIPMENT_TIERS[equipment_index])
+                        index.setdefault(key, []).append(name)
+    return {key: tuple(names) for key, names in index.items()}
+
+EXERCISE_INDEX = _build_exercise_index()
+
+# ================================
+# 🏗️ ESTRUCTURA DE LA RUTINA
+# ================================
+
+# (título del bloque, clave de prescripción, categorías por ejercicio)
+TRADITIONAL_BLOCKS = (
+    ("Activación Glútea x2", "activacion", ("activacion_glutea",) * 3),
+    ("Zona media x3", "zona_media", ("zona_media_core", "zona_media_rotacional", "zona_media_antiextension")),
+    ("Dinámicos/Potencia", "potencia", ("potencia_explosiva",)),
+    ("Fuerza 1", "fuerza_1", ("fuerza_fundamental",) * 2),
+    ("Fuerza 2", "fuerza_2", ("fuerza_compleja",) * 3),
+    ("Contraste/Preventivos", "contraste", (
+        "contraste_velocidad", "agilidad", "prevencion_lesiones", "prevencion_lesiones", "acondicionamiento"
+    )),
+)
+
+# Series x repeticiones (o segundos) por nivel
+LEVEL_PRESCRIPTIONS = {
+    "principiante": {"activacion": (2, 12, ""), "zona_media": (2, 20, " seg"), "potencia": (3, 5, ""),
+                     "fuerza_1": (3, 10, ""), "fuerza_2": (3, 10, ""), "contraste": (2, 6, "")},
+    "intermedio": {"activacion": (2, 15, ""), "zona_media": (3, 30, " seg"), "potencia": (4, 5, ""),
+                   "fuerza_1": (4, 8, ""), "fuerza_2": (3, 8, ""), "contraste": (3, 6, "")},
+    "avanzado": {"activacion": (3, 15, ""), "zona_media": (3, 40, " seg"), "potencia": (4, 4, ""),
+                 "fuerza_1": (4, 6, ""), "fuerza_2": (4, 6, ""), "contraste": (4, 5, "")},
+    "semi_profesional": {"activacion": (3, 15, ""), "zona_media": (3, 45, " seg"), "potencia": (5, 3, ""),
+                         "fuerza_1": (5, 5, ""), "fuerza_2": (4, 5, ""), "contraste": (4, 4, "")},
+    "elite": {"activacion": (3, 15, ""), "zona_media": (3, 45, " seg"), "potencia": (5, 3, ""),
+              "fuerza_1": (5, 4, ""), "fuerza_2": (4, 5, ""), "contraste": (5, 4, "")},
+}
+
+# Enfoque de cada día según el tipo de deporte (rota si hay más días)
+DAY_FOCUS = {
+    "deportes_intermitentes": ("FUERZA Y ACELERACIÓN", "POTENCIA Y CAMBIOS DE DIRECCIÓN", "FUERZA REACTIVA Y RSA"),
+    "deportes_ciclicos": ("FUERZA BASE Y ECONOMÍA", "POTENCIA Y TÉCNICA", "FUERZA RESISTENCIA"),
+    "deportes_precision": ("ESTABILIDAD Y FUERZA", "POTENCIA ROTACIONAL", "CONTROL MOTOR Y PREVENCIÓN"),
+    "deportes_combate": ("FUERZA Y POTENCIA MULTIDIRECCIONAL", "RESISTENCIA ANAERÓBICA", "AGILIDAD REACTIVA"),
+}
+
+# Templates rápidos que se resuelven sin IA (clave de QUICK_TEMPLATES)
+OFFLINE_TEMPLATE_PROFILES = {
+    "standard_45": {"titulo": "Estándar 45min", "duracion": "45 minutos", "series_extra": 0, "prescripciones": {}},
+    "intensive_60": {"titulo": "Intensiva 60min", "duracion": "60 minutos", "series_extra": 1, "prescripciones": {}},
+    "strength": {"titulo": "Solo Fuerza", "duracion": "60 minutos", "series_extra": 0,
+                 "prescripciones": {"fuerza_1": (5, 5, ""), "fuerza_2": (4, 6, "")}},
+}
+DEFAULT_PROFILE = "standard_45"
+
+MAX_DAYS = 7
+_DAYS_REQUEST = re.compile(r'(\d+)\s*(?:d[ií]as|sesiones)', re.IGNORECASE)
+_ROUTINE_REQUEST = re.compile(r'\b(rutina|plan|entrenamiento|sesi[oó]n|programa)', re.IGNORECASE)
+
+def _normalize_key(value):
+    """'Semi Profesional' -> 'semi_profesional', 'Élite' -> 'elite'"""
+    value = unicodedata.normalize("NFKD", (value or "").strip().lower())
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return value.replace(" ", "_").replace("-", "_")
+
+def normalize_level(level):
+    """Nivel del atleta como clave de LEVELS (intermedio si no se reconoce)"""
+    level_key = _normalize_key(level)
+    return level_key if level_key in LEVEL_PRESCRIPTIONS else "intermedio"
+
+def can_generate_offline(template_key):
+    """Indica si un template rápido se puede resolver sin IA"""
+    return template_key in OFFLINE_TEMPLATE_PROFILES
+
+def looks_like_routine_request(message):
+    """Indica si un mensaje pide una rutina (para el respaldo sin IA)"""
+    return bool(message and _ROUTINE_REQUEST.search(message))
+
+def requested_days(message, default=1):
+    """Número de días pedido en el mensaje ('plan de 3 días'), acotado a MAX_DAYS"""
+    match = _DAYS_REQUEST.search(message or "")
+    if not match:
+        return default
+    return max(1, min(int(match.group(1)), MAX_DAYS))
+
+def _format_prescription(prescription, series_extra):
+    series, reps, unit = prescription
+    return f"{series + series_extra}x{reps}{unit}"
+
+def generate_routine(athlete_data: Dict, template_key: Optional[str] = None, days: int = 1,
+                     equipment: str = "avanzado", variant: int = 0) -> str:
+    """
+    Genera una rutina completa de 6 bloques en el formato de texto del chat
+
+    Args:
+        athlete_data: Datos del atleta (name, sport, level, goals)
+        template_key: Clave de OFFLINE_TEMPLATE_PROFILES (estándar si no se indica)
+        days: Número de días
+        equipment: Clave de EQUIPMENT_TIERS
+        variant: Cambia la selección manteniendo el resto igual
+
+    Returns:
+        Texto de la rutina (incluye [INICIO_NUEVA_RUTINA])
+    """
+    profile = OFFLINE_TEMPLATE_PROFILES.get(template_key or DEFAULT_PROFILE, OFFLINE_TEMPLATE_PROFILES[DEFAULT_PROFILE])
+    sport = athlete_data.get('sport') or "General"
+    level = normalize_level(athlete_data.get('level'))
+    sport_type = classify_sport(sport)
+    equipment = equipment if equipment in EQUIPMENT_TIERS else "avanzado"
+    days = max(1, min(int(days or 1), MAX_DAYS))
+
+    prescriptions = dict(LEVEL_PRESCRIPTIONS[level])
+    prescriptions.update(profile["prescripciones"])
+
+    # Semilla estable (hash() cambia entre procesos)
+    seed_source = f"{athlete_data.get('id')}|{athlete_data.get('name')}|{sport}|{level}|{template_key}|{days}|{equipment}|{variant}"
+    rng = random.Random(zlib.crc32(seed_source.encode("utf-8")))
+
+    objective = athlete_data.get('goals') or PROGRESSION_GUIDELINES.get(level, PROGRESSION_GUIDELINES["intermedio"])["filosofia"]
+    lines = [
+        "[INICIO_NUEVA_RUTINA]",
+        f"**📝 RUTINA: {profile['titulo']} - {sport}**",
+        "",
+        f"⏱️ Duración Total: {profile['duracion']}",
+        f"🎯 Objetivo: {objective}",
+        f"📊 Nivel: {athlete_data.get('level') or 'Intermedio'}",
+        "",
+    ]
+
+    day_focus = DAY_FOCUS[sport_type]
+    used = set()
+    for day in range(1, days + 1):
+        lines.append(f"**### DÍA {day} - {day_focus[(day - 1) % len(day_focus)]}**")
+        lines.append("*Foam rolling + Mov. Articular (10 min)*")
+        lines.append("")
+
+        for block_number, (title, prescription_key, categories) in enumerate(TRADITIONAL_BLOCKS, 1):
+            lines.append(f"**Bloque {block_number} - {title}**")
+            prescription = _format_prescription(prescriptions[prescription_key], profile["series_extra"])
+            chosen_in_block = set()
+            for category in categories:
+                candidates = EXERCISE_INDEX.get((category, sport_type, level, equipment), ())
+                # Preferir ejercicios no usados en días anteriores ni en este bloque
+                fresh = [name for name in candidates if name not in used and name not in chosen_in_block]
+                pool = fresh or [name for name in candidates if name not in chosen_in_block]
+                if not pool:
+                    continue
+                exercise = rng.choice(pool)
+                chosen_in_block.add(exercise)
+                lines.append(f"• {exercise}: {prescription}")
+            used.update(chosen_in_block)
+            lines.append("")
+
+    level_guidelines = PROGRESSION_GUIDELINES.get(level, PROGRESSION_GUIDELINES["intermedio"])
+    sport_focus = SPORT_ADAPTATION_PRINCIPLES[sport_type]["enfoque"]
+    lines.extend([
+        f"⏱️ Tiempo Total: {days} {'día' if days == 1 else 'días'}",
+        "",
+        "**📋 NOTAS TÉCNICAS IMPORTANTES**",
+        f"• **Técnica:** {level_guidelines['filosofia']}",
+        "• **Descanso:** 2-3 min entre series de fuerza y potencia, 60-90 seg en el resto",
+        f"• **Progresión:** {level_guidelines['innovacion']} (prioridad: {sport_focus[0].lower()})",
+    ])
+
+    return "\n".join(lines)
+
+def generate_fallback_routine(athlete_data: Dict, user_message: str) -> Optional[str]:
+    """Rutina sin IA para cuando OpenAI no está disponible (None si no se pidió una rutina)"""
+    if not athlete_data or not looks_like_routine_request(user_message):
+        return None
+
+    try:
+        routine = generate_routine(athlete_data, days=requested_days(user_message))
+        logging.info(f"🧩 Rutina generada sin IA para {athlete_data.get('name')}")
+        return routine + "\n\n💡 *Rutina generada con la metodología ProFit mientras el asistente de IA está saturado.*"
+    except Exception as e:
+        logging.error(f"❌ Error generando rutina sin IA: {e}")
+        return None
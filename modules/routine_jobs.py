@@ -0,0 +1,101 @@
+"""
+Trabajos de generación de rutinas en segundo plano
+La generación (IA, Excel) se ejecuta en un pool de hilos y la interfaz consulta
+su estado por job_id, sin bloquear el hilo del script de Streamlit.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+# Estados de un trabajo
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+FINAL_JOB_STATUSES = (JOB_DONE, JOB_FAILED)
+
+class RoutineJobManager:
+    """Registro en memoria de trabajos de generación ejecutados por un pool de hilos"""
+
+    def __init__(self, max_workers=None, retention_seconds=3600):
+        self.max_workers = max_workers or Config.ROUTINE_JOB_WORKERS
+        self.retention_seconds = retention_seconds
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="routine-job")
+        return self._executor
+
+    def submit(self, athlete_id, label, func, *args, dedupe_key=None):
+        """Encola func(*args) y devuelve el job_id
+
+        Si ya hay un trabajo sin terminar con la misma dedupe_key (doble clic en
+        el mismo template) se devuelve ese job_id en lugar de lanzar otro.
+        """
+        with self._lock:
+            self._prune()
+
+            if dedupe_key is not None:
+                for job_id, job in self._jobs.items():
+                    if job['dedupe_key'] == dedupe_key and job['status'] not in FINAL_JOB_STATUSES:
+                        logging.info(f"♻️ Trabajo {job_id[:8]} ya en curso para {label}")
+                        return job_id
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'athlete_id': athlete_id,
+                'label': label,
+                'dedupe_key': dedupe_key,
+                'status': JOB_PENDING,
+                'result': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None,
+            }
+            self._get_executor().submit(self._run, job_id, func, args)
+
+        logging.info(f"🧵 Trabajo {job_id[:8]} encolado: {label} (atleta {athlete_id})")
+        return job_id
+
+    def _run(self, job_id, func, args):
+        self._update(job_id, status=JOB_RUNNING)
+        try:
+            result = func(*args)
+        except Exception as e:
+            logging.error(f"❌ Trabajo {job_id[:8]} fallido: {e}")
+            self._update(job_id, status=JOB_FAILED, error=str(e), finished_at=time.time())
+            return
+        self._update(job_id, status=JOB_DONE, result=result, finished_at=time.time())
+        logging.info(f"✅ Trabajo {job_id[:8]} completado")
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        """Olvida los trabajos terminados hace más de retention_seconds (con el lock tomado)"""
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] and job['finished_at'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id):
+        """Copia del estado del trabajo (o None si no existe o ya se olvidó)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+# Instancia global del gestor de trabajos
+routine_job_manager = RoutineJobManager()
@@ -0,0 +1,138 @@
+"""
+Pool de conexiones SMTP persistentes
+Reutiliza sesiones ya autenticadas (STARTTLS + login una sola vez), descarta
+las que superan el tiempo de inactividad y limita las sesiones concurrentes.
+"""
+
+import smtplib
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Errores tras los que la conexión sigue siendo válida (fallo del mensaje, no de la sesión)
+_RECOVERABLE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+# Errores que indican una conexión caída: se reconecta y se reintenta una vez
+_DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPConnectionPool:
+    """Pool de sesiones SMTP autenticadas
+
+    Uso:
+        pool = SMTPConnectionPool("smtp.gmail.com", 587, "user", "pass")
+        pool.send_message(msg)
+        pool.close_all()
+    """
+
+    def __init__(self, server, port, username=None, password=None, use_tls=True,
+                 max_connections=3, idle_timeout=60, timeout=30):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._idle = deque()  # (conexión, último uso)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.stats = {'connections_opened': 0, 'connections_reused': 0, 'reconnects': 0, 'sent': 0}
+
+    def _connect(self):
+        """Abre una sesión nueva: conexión, STARTTLS opcional y login"""
+        conn = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                conn.starttls()
+            if self.username:
+                conn.login(self.username, self.password)
+        except Exception:
+            self._close_quietly(conn)
+            raise
+        conn.pool_reused = False
+        self.stats['connections_opened'] += 1
+        logging.info(f"📡 Nueva sesión SMTP con {self.server}:{self.port}")
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        """Cierra una sesión ignorando errores (puede estar ya cerrada por el servidor)"""
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        """Toma una sesión inactiva válida o abre una nueva"""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used < self.idle_timeout:
+                    self.stats['connections_reused'] += 1
+                    conn.pool_reused = True
+                    return conn
+                # El servidor probablemente ya la cerró: descartarla
+                self._close_quietly(conn)
+        return self._connect()
+
+    def _checkin(self, conn):
+        """Devuelve una sesión sana al pool"""
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self, acquire_timeout=None):
+        """Context manager que presta una sesión autenticada del pool"""
+        if not self._slots.acquire(timeout=acquire_timeout):
+            raise TimeoutError("No hay sesiones SMTP libres en el pool")
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except _RECOVERABLE_ERRORS:
+            if conn is not None:
+                self._checkin(conn)
+                conn = None
+            raise
+        except Exception:
+            if conn is not None:
+                self._close_quietly(conn)
+                conn = None
+            raise
+        else:
+            self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    def send_message(self, msg, from_addr=None, to_addrs=None):
+        """Envía un mensaje reutilizando una sesión; si la sesión reutilizada estaba caída, reconecta una vez"""
+        while True:
+            reused = False
+            try:
+                with self.connection() as conn:
+                    reused = conn.pool_reused
+                    result = conn.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+                self.stats['sent'] += 1
+                return result
+            except _DISCONNECT_ERRORS as e:
+                # Una sesión nueva que falla no se reintenta (servidor caído, no sesión caducada)
+                if not reused:
+                    raise
+                self.stats['reconnects'] += 1
+                logging.warning(f"⚠️ Sesión SMTP caída, reconectando: {e}")
+
+    def close_all(self):
+        """Cierra todas las sesiones inactivas"""
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
@@ -0,0 +1,194 @@
+"""
+Precalentamiento del cache de templates rápidos
+Genera fuera de horario pico las respuestas de cada template × deporte × nivel
+habitual y las guarda en AICacheManager con un TTL largo, para que los
+templates rápidos respondan al instante sin esperar a OpenAI.
+
+Uso (cron en la franja valle, p. ej. 0 3 * * *):
+    python -m modules.template_warmup [--force] [--budget TOKENS]
+"""
+
+import argparse
+import logging
+from datetime import datetime
+
+from auth.database import get_db_connection
+from config import Config
+from modules.ai_cache_manager import cache_manager
+from modules.routine_generator import can_generate_offline, normalize_level
+from modules.training_variations import normalize_sport_name
+
+# Deportes y niveles a precalentar además de los de los atletas registrados
+COMMON_SPORTS = [
+    "Fútbol", "Básquet", "Rugby", "Hockey", "Vóley", "Handball", "Tenis", "Pádel",
+    "Natación", "Ciclismo", "Running", "Boxeo",
+]
+COMMON_LEVELS = ["Intermedio", "Avanzado", "Semi Profesional", "Élite", "Principiante"]  # Más habituales primero
+
+# Tokens reservados por llamada antes de lanzarla (max_tokens + prompt)
+ESTIMATED_TOKENS_PER_CALL = 4500
+MAX_CONSECUTIVE_ERRORS = 3
+
+def template_cache_context(athlete_data):
+    """Contexto de cache de un template: solo deporte y nivel normalizados"""
+    return {
+        'sport': normalize_sport_name(athlete_data.get('sport')),
+        'level': normalize_level(athlete_data.get('level')),
+    }
+
+def template_cache_query(template_id):
+    return f"quick_template:{template_id}"
+
+def get_prewarmed_response(athlete_data, template_id):
+    """Respuesta precalentada del template para el deporte y nivel del atleta (o None)"""
+    if not template_id:
+        return None
+    return cache_manager.get_cached_response(
+        template_cache_context(athlete_data), template_cache_query(template_id)
+    )
+
+def in_offpeak_window(now=None, window=None):
+    """Indica si la hora local está en la franja valle 'inicio-fin' (admite '22-6')"""
+    window = window or Config.TEMPLATE_WARMUP_HOURS
+    try:
+        start, end = (int(part) for part in str(window).split("-"))
+    except ValueError:
+        logging.warning(f"⚠️ TEMPLATE_WARMUP_HOURS inválido: {window!r}")
+        return False
+
+    hour = (now or datetime.now()).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+def get_warmup_templates():
+    """Templates que pasan por OpenAI (los de 6 bloques ya se generan sin IA)"""
+    from modules.quick_templates import QUICK_TEMPLATES
+
+    return [
+        template_id for template_id in QUICK_TEMPLATES
+        if not (Config.OFFLINE_QUICK_TEMPLATES and can_generate_offline(template_id))
+    ]
+
+def get_warmup_profiles():
+    """(deporte, nivel) a precalentar: primero los más frecuentes entre los atletas, luego los habituales"""
+    counts = {}
+    profiles = {}
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT sport, level, COUNT(*) FROM athletes
+                WHERE (is_active IS NULL OR is_active = 1) AND sport IS NOT NULL
+                GROUP BY sport, level
+            """)
+            for sport, level, total in cursor.fetchall():
+                key = tuple(template_cache_context({'sport': sport, 'level': level}).values())
+                counts[key] = counts.get(key, 0) + total
+                profiles.setdefault(key, (sport, level))
+    except Exception as e:
+        logging.error(f"❌ Error leyendo deportes de los atletas: {e}")
+
+    for level in COMMON_LEVELS:
+        for sport in COMMON_SPORTS:
+            key = tuple(template_cache_context({'sport': sport, 'level': level}).values())
+            counts.setdefault(key, 0)
+            profiles.setdefault(key, (sport, level))
+
+    # Más atletas primero; a igualdad, el orden de COMMON_LEVELS × COMMON_SPORTS
+    ordered = sorted(profiles, key=lambda key: -counts[key])
+    return [profiles[key] for key in ordered]
+
+def run_template_warmup(openai_client=None, token_budget=None, force=False):
+    """Precalienta el cache de templates dentro del presupuesto de tokens
+
+    Returns:
+        dict con generados, ya en cache, tokens usados y motivo de parada
+    """
+    from openai import RateLimitError
+    from modules.chat_interface import (
+        OPENAI_MODEL, OPENAI_TIMEOUT, build_system_message, initialize_openai_client
+    )
+    from modules.quick_templates import QUICK_TEMPLATES, build_template_prompt
+
+    summary = {'generated': 0, 'already_cached': 0, 'tokens_used': 0, 'stopped': 'completed'}
+
+    if not force and not in_offpeak_window():
+        logging.info(f"⏸️ Fuera de la franja valle ({Config.TEMPLATE_WARMUP_HOURS}), precalentamiento omitido")
+        summary['stopped'] = 'peak_hours'
+        return summary
+
+    openai_client = openai_client or initialize_openai_client()
+    if not openai_client:
+        summary['stopped'] = 'no_client'
+        return summary
+
+    token_budget = token_budget if token_budget is not None else Config.TEMPLATE_WARMUP_TOKEN_BUDGET
+    templates = get_warmup_templates()
+    consecutive_errors = 0
+
+    for sport, level in get_warmup_profiles():
+        athlete_data = {'sport': sport, 'level': level}
+        context = template_cache_context(athlete_data)
+
+        for template_id in templates:
+            query = template_cache_query(template_id)
+            if cache_manager.is_cached(context, query):
+                summary['already_cached'] += 1
+                continue
+
+            if token_budget - summary['tokens_used'] < ESTIMATED_TOKENS_PER_CALL:
+                summary['stopped'] = 'token_budget'
+                logging.info(f"💰 Presupuesto de tokens agotado: {summary}")
+                return summary
+
+            try:
+                response = openai_client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": build_system_message(athlete_data)},
+                        {"role": "user", "content": build_template_prompt(QUICK_TEMPLATES[template_id], athlete_data)},
+                    ],
+                    max_tokens=3000,
+                    temperature=0.7,
+                    timeout=OPENAI_TIMEOUT
+                )
+            except RateLimitError as e:
+                logging.warning(f"⚠️ Límite de OpenAI alcanzado, precalentamiento detenido: {e}")
+                summary['stopped'] = 'rate_limit'
+                return summary
+            except Exception as e:
+                consecutive_errors += 1
+                logging.error(f"❌ Error precalentando {template_id} ({sport}, {level}): {e}")
+                if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                    summary['stopped'] = 'errors'
+                    return summary
+                continue
+
+            consecutive_errors = 0
+            usage = getattr(response, "usage", None)
+            summary['tokens_used'] += getattr(usage, "total_tokens", None) or ESTIMATED_TOKENS_PER_CALL
+
+            content = response.choices[0].message.content
+            if content:
+                cache_manager.cache_response(context, query, content, ttl_hours=Config.TEMPLATE_CACHE_TTL_HOURS)
+                summary['generated'] += 1
+                logging.info(f"🔥 Template {template_id} precalentado para {sport} ({level})")
+
+    logging.info(f"✅ Precalentamiento completo: {summary}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalienta el cache de templates rápidos")
+    parser.add_argument("--force", action="store_true", help="Ejecutar aunque no sea la franja valle")
+    parser.add_argument("--budget", type=int, default=None, help="Presupuesto de tokens (por defecto TEMPLATE_WARMUP_TOKEN_BUDGET)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    summary = run_template_warmup(token_budget=args.budget, force=args.force)
+    print(f"Precalentamiento: {summary}")
+    print(f"Cache: {cache_manager.get_cache_stats()}")
+
+if __name__ == "__main__":
+    main()
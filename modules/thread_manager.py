@@ -13,6 +13,8 @@ from modules.chat_manager import get_or_create_thread_id
 from auth.database import get_db_cursor
 import os
 
+from utils.lazy import LazyInstance
+
 class ThreadManager:
     """Gestor inteligente de threads con rotación automática"""
     
@@ -408,5 +410,5 @@ class ThreadManager:
             logging.error(f"❌ Error getting threads summary: {e}")
             return {'status': 'error', 'error': str(e)}
 
-# Instancia global del thread manager
-thread_manager = ThreadManager()
+# Instancia global del thread manager (crea su tabla en el primer uso)
+thread_manager = LazyInstance(ThreadManager)
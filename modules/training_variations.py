@@ -4,6 +4,10 @@ Metodología que combina ejercicios tradicionales con innovaciones funcionales
 Principios de variabilidad y creatividad para rutinas únicas
 """
 
+import re
+import unicodedata
+from functools import lru_cache
+
 # ================================
 # 🎯 PRINCIPIOS DE ENTRENAMIENTO HÍBRIDO
 # ================================
@@ -50,6 +54,7 @@ TRAINING_PRINCIPLES = {
 ROUTINE_METHODOLOGY = {
     "bloque_1": {
         "nombre": "Activación Glútea",
+        "duracion": "10-12 min",
         "enfoque": "Activación específica del complejo glúteo y estabilizadores",
         "principios": [
             "Activación selectiva de glúteo medio y mayor",
@@ -62,6 +67,7 @@ ROUTINE_METHODOLOGY = {
     
     "bloque_2": {
         "nombre": "Dinámico/Potencia/Diagonales/Zona Media",
+        "duracion": "10-15 min",
         "enfoque": "Adaptable según objetivo del deportista - potencia, movimientos diagonales o zona media",
         "principios": [
             "Selección según necesidades específicas del atleta",
@@ -74,6 +80,7 @@ ROUTINE_METHODOLOGY = {
     
     "bloque_3": {
         "nombre": "Fuerza 1",
+        "duracion": "15-20 min",
         "enfoque": "Primer bloque de fuerza funcional - patrones fundamentales",
         "principios": [
             "Patrones básicos de empuje y tracción",
@@ -86,6 +93,7 @@ ROUTINE_METHODOLOGY = {
     
     "bloque_4": {
         "nombre": "Fuerza 2", 
+        "duracion": "15-20 min",
         "enfoque": "Segundo bloque de fuerza funcional - patrones complejos y combinados",
         "principios": [
             "Movimientos combinados multiarticulares",
@@ -98,6 +106,7 @@ ROUTINE_METHODOLOGY = {
     
     "bloque_5": {
         "nombre": "Contraste/Preventivos/RSA",
+        "duracion": "10-15 min",
         "enfoque": "Trabajo de contraste, prevención de lesiones y acondicionamiento específico",
         "principios": [
             "Contraste entre fuerza y velocidad",
@@ -110,6 +119,7 @@ ROUTINE_METHODOLOGY = {
     
     "alternativa_circuito": {
         "nombre": "Circuito Integral de 6 Ejercicios",
+        "duracion": "25-30 min",
         "enfoque": "Reemplaza Fuerza 1 y Fuerza 2 por un circuito que integra todas las capacidades",
         "formato": "6 ejercicios x 5 series",
         "principios": [
@@ -198,6 +208,32 @@ SPORT_ADAPTATION_PRINCIPLES = {
     }
 }
 
+# Nombres alternativos (ES/EN, deportistas, variantes) para clasificar el deporte
+SPORT_SYNONYMS = {
+    "deportes_intermitentes": [
+        "futbolista", "soccer", "futsal", "futbol sala", "futbol americano", "football",
+        "baloncesto", "basketball", "basket", "basquetbol", "basquetbolista",
+        "balonmano", "handball", "voleibol", "voley", "volleyball", "waterpolo",
+        "hockey hierba", "hockey patines", "hockey hielo", "rugbier", "padel", "squash",
+    ],
+    "deportes_ciclicos": [
+        "nadador", "swimming", "ciclista", "cycling", "mountain bike", "mtb", "remero",
+        "rowing", "atletismo fondo", "fondo", "medio fondo", "maraton", "maratonista",
+        "media maraton", "running", "runner", "corredor", "trail", "trail running",
+        "triatlon", "triathlon", "duatlon", "ultra", "esqui de fondo", "piraguismo", "kayak",
+    ],
+    "deportes_precision": [
+        "tenista", "tennis", "golfista", "tiro con arco", "arco", "archery",
+        "tiro deportivo", "dardos", "billar", "tenis de mesa", "ping pong",
+    ],
+    "deportes_combate": [
+        "boxeador", "boxing", "kickboxing", "muay thai", "mma", "artes marciales mixtas",
+        "judo", "karate", "taekwondo", "jiu jitsu", "bjj", "luchador", "wrestling",
+        "lucha libre", "grappling", "sambo", "esgrima", "krav maga",
+    ],
+}
+
+
 # ================================
 # 📊 GUÍAS DE PROGRESIÓN POR NIVEL
 # ================================
@@ -620,18 +656,81 @@ def generate_hybrid_routine(sport, level, equipment="basico", focus="integral"):
     
     return routine_framework
 
-def get_sport_adaptation_principles(sport):
-    """Obtiene principios de adaptación según el tipo de deporte"""
-    sport_lower = sport.lower()
-    
-    # Clasificar deporte por tipo
+def normalize_sport_name(text):
+    """'Fútbol-Sala ' -> 'futbol sala' (minúsculas, sin tildes ni signos)"""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+def _trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _build_sport_index():
+    """Índice término normalizado -> categoría y trigramas -> términos (una vez al importar)"""
+    index = {}
     for category, data in SPORT_ADAPTATION_PRINCIPLES.items():
-        for example_sport in data["ejemplos"]:
-            if example_sport in sport_lower:
-                return data
-    
+        for term in data["ejemplos"] + SPORT_SYNONYMS.get(category, []):
+            index.setdefault(normalize_sport_name(term), category)
+
+    trigram_index = {}
+    for term in index:
+        if " " in term:
+            continue  # solo palabras sueltas para la búsqueda aproximada
+        for trigram in _trigrams(term):
+            trigram_index.setdefault(trigram, []).append(term)
+    return index, trigram_index
+
+SPORT_INDEX, _SPORT_TRIGRAMS = _build_sport_index()
+SPORT_INDEX_MAX_WORDS = max(len(term.split()) for term in SPORT_INDEX)
+SPORT_FUZZY_THRESHOLD = 0.5
+
+def _fuzzy_sport_match(word):
+    """Término del índice más parecido por trigramas (coeficiente de Dice)"""
+    word_trigrams = _trigrams(word)
+    shared = {}
+    for trigram in word_trigrams:
+        for term in _SPORT_TRIGRAMS.get(trigram, ()):
+            shared[term] = shared.get(term, 0) + 1
+
+    best_term, best_score = None, SPORT_FUZZY_THRESHOLD
+    for term, count in shared.items():
+        score = 2 * count / (len(word_trigrams) + len(_trigrams(term)))
+        if score >= best_score:
+            best_term, best_score = term, score
+    return best_term
+
+@lru_cache(maxsize=1024)
+def classify_sport(sport):
+    """Devuelve el tipo de deporte (clave de SPORT_ADAPTATION_PRINCIPLES)"""
+    folded = normalize_sport_name(sport)
+    if not folded:
+        return "deportes_intermitentes"
+
+    # 1. Nombre completo, luego frases de palabras completas ("tiro con arco", "atletismo_fondo");
+    # una subcadena dentro de otra palabra no cuenta ("remo" en "deportes extremos")
+    if folded in SPORT_INDEX:
+        return SPORT_INDEX[folded]
+    words = folded.split()
+    for size in range(min(len(words), SPORT_INDEX_MAX_WORDS), 0, -1):
+        for start in range(len(words) - size + 1):
+            category = SPORT_INDEX.get(" ".join(words[start:start + size]))
+            if category:
+                return category
+
+    # 2. Errores de tipeo y derivados ("natasion", "boxoe", "futbolistas")
+    for word in words:
+        if len(word) >= 4:
+            term = _fuzzy_sport_match(word)
+            if term:
+                return SPORT_INDEX[term]
+
     # Default para deportes no clasificados
-    return SPORT_ADAPTATION_PRINCIPLES["deportes_intermitentes"]
+    return "deportes_intermitentes"
+
+def get_sport_adaptation_principles(sport):
+    """Obtiene principios de adaptación según el tipo de deporte"""
+    return SPORT_ADAPTATION_PRINCIPLES[classify_sport(sport)]
 
 def get_progression_guidelines(level):
     """Obtiene guías de progresión según el nivel"""
@@ -0,0 +1,150 @@
+"""
+Escritor XLSX en modo streaming para rutinas de entrenamiento
+Usa openpyxl en modo write-only: las filas se escriben en orden y se vuelcan
+a disco/buffer sin mantener el libro completo en memoria
+"""
+
+import logging
+from io import BytesIO
+from typing import Iterable, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+# Objetos de estilo compartidos (se crean una sola vez por proceso)
+_THIN_SIDE = Side(border_style="thin")
+_THIN_BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+_CENTER = Alignment(horizontal="center", vertical="center")
+
+# Definición de estilos con nombre: cada celda solo referencia el nombre
+STYLE_DEFINITIONS = {
+    "pc_header": {
+        "font": Font(bold=True, color="FFFFFF", size=12),
+        "fill": PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        "alignment": _CENTER,
+        "border": _THIN_BORDER,
+    },
+    "pc_day": {
+        "font": Font(bold=True, color="FFFFFF", size=11),
+        "fill": PatternFill(start_color="5B9BD5", end_color="5B9BD5", fill_type="solid"),
+        "alignment": _CENTER,
+        "border": _THIN_BORDER,
+    },
+    "pc_cell": {
+        "border": _THIN_BORDER,
+    },
+    "pc_label": {
+        "font": Font(bold=True),
+    },
+}
+
+DEFAULT_COLUMN_WIDTHS = (45, 20, 15, 30)  # Ejercicio, Series/Reps, Carga, Notas
+
+
+class RoutineWorkbookWriter:
+    """Construye un Excel de rutina fila a fila con estilos con nombre compartidos
+
+    Uso:
+        writer = RoutineWorkbookWriter()
+        writer.add_sheet("Plan de Entrenamiento")
+        writer.write_label_rows([("ATLETA:", "Ana")])
+        writer.write_table_header(["EJERCICIO", "SERIES/REPETICIONES", "CARGA", "NOTAS"])
+        writer.write_exercise("Sentadilla", "3x10")
+        data = writer.to_bytes()
+    """
+
+    def __init__(self, columns: int = 4):
+        self.columns = columns
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.current_row = 0
+        self.total_rows = 0
+        self._register_styles()
+
+    def _register_styles(self):
+        """Registra los estilos con nombre en el libro (una vez por libro)"""
+        for name, attributes in STYLE_DEFINITIONS.items():
+            style = NamedStyle(name=name)
+            for attribute, value in attributes.items():
+                setattr(style, attribute, value)
+            self.workbook.add_named_style(style)
+
+    def add_sheet(self, title: str, column_widths: Sequence[float] = DEFAULT_COLUMN_WIDTHS):
+        """Crea una nueva hoja; las siguientes filas se escriben en ella"""
+        # Excel limita los títulos de hoja a 31 caracteres y prohíbe algunos símbolos
+        safe_title = "".join(ch for ch in title if ch not in '[]:*?/\\')[:31] or "Hoja"
+        self.sheet = self.workbook.create_sheet(safe_title)
+        self.current_row = 0
+
+        # Los anchos deben fijarse antes de escribir filas en modo write-only
+        for index, width in enumerate(column_widths, 1):
+            self.sheet.column_dimensions[get_column_letter(index)].width = width
+
+        return self.sheet
+
+    def _cell(self, value, style: Optional[str] = None):
+        """Crea una celda write-only con un estilo con nombre"""
+        cell = WriteOnlyCell(self.sheet, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def write_row(self, values: Iterable, style: Optional[str] = None):
+        """Escribe una fila aplicando el mismo estilo a todas sus celdas"""
+        if self.sheet is None:
+            self.add_sheet("Plan de Entrenamiento")
+
+        if style:
+            row = [self._cell(value, style) for value in values]
+        else:
+            row = list(values)
+
+        self.sheet.append(row)
+        self.current_row += 1
+        self.total_rows += 1
+
+    def write_blank(self, count: int = 1):
+        """Escribe filas vacías (separadores)"""
+        for _ in range(count):
+            self.write_row([])
+
+    def write_label_rows(self, pairs: Iterable, label_style: str = "pc_label", value_style: Optional[str] = None):
+        """Escribe pares etiqueta/valor (encabezado con datos del atleta)"""
+        for label, value in pairs:
+            row = [self._cell(label, label_style), self._cell(value, value_style) if value_style else value]
+            self.write_row(row)
+
+    def write_table_header(self, headers: Sequence[str]):
+        """Escribe la fila de encabezados de la tabla de ejercicios"""
+        self.write_row(headers, style="pc_header")
+
+    def write_merged(self, text: str, style: Optional[str] = "pc_day"):
+        """Escribe un texto que ocupa todas las columnas (encabezado de día/bloque)"""
+        if self.sheet is None:
+            self.add_sheet("Plan de Entrenamiento")
+
+        row = [self._cell(text, style)]
+        # Las celdas cubiertas por la fusión también llevan el estilo para el borde
+        row.extend(self._cell(None, style) for _ in range(self.columns - 1))
+        self.sheet.append(row)
+        self.current_row += 1
+        self.total_rows += 1
+
+        last_column = get_column_letter(self.columns)
+        self.sheet.merged_cells.add(f"A{self.current_row}:{last_column}{self.current_row}")
+
+    def write_exercise(self, name: str, sets_reps: str = "", load: str = "", notes: str = ""):
+        """Escribe una fila de ejercicio con bordes"""
+        self.write_row([name, sets_reps, load, notes], style="pc_cell")
+
+    def to_bytes(self) -> bytes:
+        """Serializa el libro a bytes (el writer no puede reutilizarse después)"""
+        if not self.workbook.worksheets:
+            self.add_sheet("Plan de Entrenamiento")
+
+        buffer = BytesIO()
+        self.workbook.save(buffer)
+        logging.info(f"📊 XLSX generado: {len(self.workbook.worksheets)} hojas, {self.total_rows} filas")
+        return buffer.getvalue()
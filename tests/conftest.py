@@ -0,0 +1,23 @@
+"""
+Configuración común de los tests
+Igual que los benchmarks: la raíz del repo en sys.path y una DATABASE_URL de
+relleno, porque config la exige al importarse.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///test")
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Base SQLite vacía en un directorio temporal, con todas las tablas creadas"""
+    import auth.database as database
+
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "profit_coach.db"))
+    database.create_tables_if_not_exist()
+    return database.DB_PATH
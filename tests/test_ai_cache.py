@@ -0,0 +1,75 @@
+"""
+Caché de respuestas de IA: el hit rate se calcula con los aciertos y fallos
+guardados en ai_cache.db (sobrevive a reinicios y suma todos los procesos)
+"""
+
+import sqlite3
+
+import pytest
+
+from modules.ai_cache_manager import AICacheManager
+
+CONTEXT = {'sport': 'Fútbol', 'level': 'Avanzado'}
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "ai_cache.db")
+
+
+def test_hit_rate_is_persisted_across_instances(cache_path):
+    first = AICacheManager(cache_path)
+    first.cache_response(CONTEXT, "rutina de fuerza", "respuesta")
+    assert first.get_cached_response(CONTEXT, "rutina de fuerza") == "respuesta"
+    assert first.get_cached_response(CONTEXT, "rutina de fuerza") == "respuesta"
+    assert first.get_cached_response(CONTEXT, "otra consulta") is None
+
+    # Otro proceso (o la app tras reiniciar) ve los mismos números
+    stats = AICacheManager(cache_path).get_cache_stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['cache_hit_rate'] == "66.7%"
+
+
+def test_is_cached_does_not_count_as_lookup(cache_path):
+    cache = AICacheManager(cache_path)
+    cache.cache_response(CONTEXT, "rutina de fuerza", "respuesta")
+    assert cache.is_cached(CONTEXT, "rutina de fuerza")
+
+    stats = cache.get_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['cache_hit_rate']) == (0, 0, "0%")
+
+
+def test_eviction_keeps_prewarmed_entries(cache_path):
+    cache = AICacheManager(cache_path)
+    cache.MAX_CACHE_SIZE = 10
+    warm = [f"quick_template:{n}" for n in range(4)]
+    for query in warm:
+        cache.cache_response(CONTEXT, query, "rutina precalentada", ttl_hours=168)
+
+    # Consultas normales, usadas más de una vez, hasta desbordar la caché
+    for n in range(8):
+        cache.cache_response(CONTEXT, f"consulta {n}", "respuesta")
+        cache.get_cached_response(CONTEXT, f"consulta {n}")
+
+    assert cache.get_cache_stats()['total_entries'] <= cache.MAX_CACHE_SIZE
+    assert all(cache.is_cached(CONTEXT, query) for query in warm)
+
+
+def test_eviction_removes_expired_entries_first(cache_path):
+    cache = AICacheManager(cache_path)
+    cache.MAX_CACHE_SIZE = 5
+    cache.cache_response(CONTEXT, "caducada", "vieja", ttl_hours=168)
+    for _ in range(3):
+        cache.get_cached_response(CONTEXT, "caducada")
+    conn = sqlite3.connect(cache_path)
+    conn.execute("UPDATE ai_cache SET expires_at = datetime('now', '-1 hour')")
+    conn.commit()
+    conn.close()
+
+    for n in range(5):
+        cache.cache_response(CONTEXT, f"consulta {n}", "respuesta")
+
+    conn = sqlite3.connect(cache_path)
+    queries = {row[0] for row in conn.execute("SELECT query FROM ai_cache")}
+    conn.close()
+    assert "caducada" not in queries
@@ -0,0 +1,57 @@
+"""
+Importación masiva de atletas: los errores se informan con la fila del
+archivo (la que ve el entrenador), aunque haya líneas en blanco antes
+"""
+
+import io
+
+import pytest
+
+from auth.database import get_db_connection
+from config import Config
+from modules.athlete_import import import_athletes
+from modules.athlete_manager import get_athletes_by_user, invalidate_athlete_cache
+
+CSV_WITH_BLANK_LINES = "\n".join([
+    "Nombre;Deporte;Nivel;Objetivos;Correo",   # fila 1
+    "Ana Ruiz;Tenis;Avanzado;Saque;ana@club.com",
+    "",
+    "",
+    "Bea Gil;Tenis;Experto;;",                 # fila 5: nivel no reconocido
+    ";;;;",
+    "Carlos Mora;Remo;;;carlos@club",          # fila 7: email inválido
+    "Dani Sanz;Fútbol;Elite;;",
+]).encode("utf-8")
+
+
+@pytest.fixture
+def coach(temp_db):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        conn.commit()
+        user_id = cursor.lastrowid
+    invalidate_athlete_cache(user_id=user_id)
+    return user_id
+
+
+def test_errors_point_at_the_file_rows_after_blank_lines(coach):
+    summary = import_athletes(coach, io.BytesIO(CSV_WITH_BLANK_LINES), "atletas.csv")
+
+    assert [row for row, _ in summary['errors']] == [5, 7]
+    assert summary['errors'][0][1].startswith("Nivel no reconocido")
+    assert summary['errors'][1][1] == "Email con formato inválido"
+    assert summary['total_rows'] == 4
+    assert summary['imported'] == 2
+    assert sorted(athlete[1] for athlete in get_athletes_by_user(coach)) == ["Ana Ruiz", "Dani Sanz"]
+
+
+def test_rows_over_the_limit_keep_their_file_rows(coach, monkeypatch):
+    monkeypatch.setattr(Config, "MAX_ATHLETES_PER_USER", 1)
+    data = "nombre,deporte\n\nAna Ruiz,Tenis\n\nBea Gil,Tenis\nCarlos Mora,Remo\n".encode("utf-8")
+    summary = import_athletes(coach, io.BytesIO(data), "atletas.csv")
+
+    # Se leen las dos primeras filas con datos (el doble del cupo) aunque haya líneas en blanco
+    assert summary['total_rows'] == 2
+    assert summary['imported'] == 1
+    assert summary['errors'] == [(5, "Supera el límite de 1 atletas")]
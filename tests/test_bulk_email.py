@@ -0,0 +1,91 @@
+"""
+El envío masivo pone un email por atleta en la bandeja de salida y vuelve
+enseguida: el worker los envía después, con reintentos
+"""
+
+import time
+
+import pytest
+
+import modules.email_manager as email_manager
+from auth.database import get_db_connection
+from modules import email_outbox
+from modules.chat_manager import save_message
+from modules.email_outbox import STATUS_PENDING, STATUS_SENT, get_email_statuses
+
+ROUTINE = """[INICIO_NUEVA_RUTINA]
+**📝 RUTINA: Fuerza base**
+### DÍA 1 - FUERZA
+- **Sentadilla**: 4x6 al 80 % 1RM, descanso 120 seg
+- **Press banca**: 4x8 al 75 % 1RM, descanso 90 seg
+"""
+
+
+@pytest.fixture
+def worker(temp_db, monkeypatch):
+    """Worker sin hilo: los tests procesan la cola a mano"""
+    worker = email_outbox.EmailOutboxWorker()
+    worker.send_interval = 0
+    monkeypatch.setattr(email_outbox, "email_outbox_worker", worker)
+    monkeypatch.setattr(worker, "start", lambda: None)
+    return worker
+
+
+@pytest.fixture
+def athletes(temp_db):
+    """Entrenador con tres atletas: dos con rutina y email, uno sin email"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        ids = []
+        for name, email in (("Ana", "ana@club.com"), ("Bruno", "bruno@club.com"), ("Carla", "")):
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level, email) VALUES (?, ?, 'Fútbol', 'Avanzado', ?)",
+                (user_id, name, email)
+            )
+            ids.append(cursor.lastrowid)
+        conn.commit()
+    for athlete_id in ids:
+        save_message(athlete_id, ROUTINE, is_user=False)
+    return user_id, ids
+
+
+def test_bulk_send_queues_without_sending(worker, athletes, monkeypatch):
+    user_id, athlete_ids = athletes
+    monkeypatch.setattr(email_manager, "deliver_routine_email",
+                        lambda *args: pytest.fail("el envío masivo no debe enviar en el hilo del script"))
+
+    start = time.perf_counter()
+    results = email_manager.send_bulk_routine_emails(user_id, athlete_ids)
+    assert time.perf_counter() - start < 5
+
+    by_name = {result['name']: result for result in results}
+    assert by_name["Carla"]['outbox_id'] is None
+    queued = [by_name["Ana"]['outbox_id'], by_name["Bruno"]['outbox_id']]
+    assert all(queued)
+    assert {status['status'] for status in get_email_statuses(queued).values()} == {STATUS_PENDING}
+
+
+def test_bulk_send_is_delivered_by_the_worker(worker, athletes, monkeypatch):
+    user_id, athlete_ids = athletes
+    delivered = []
+    monkeypatch.setattr(email_manager, "deliver_routine_email", lambda *args: delivered.append(args[0]))
+
+    results = email_manager.send_bulk_routine_emails(user_id, athlete_ids)
+    while (email := worker._claim_next()):
+        worker._process(email)
+
+    outbox_ids = [result['outbox_id'] for result in results if result['outbox_id']]
+    assert {status['status'] for status in get_email_statuses(outbox_ids).values()} == {STATUS_SENT}
+    assert sorted(delivered) == ["ana@club.com", "bruno@club.com"]
+
+
+def test_repeated_bulk_send_while_queued_is_deduplicated(worker, athletes):
+    user_id, athlete_ids = athletes
+
+    first = email_manager.send_bulk_routine_emails(user_id, athlete_ids)
+    second = email_manager.send_bulk_routine_emails(user_id, athlete_ids)
+
+    assert [r['outbox_id'] for r in first] == [r['outbox_id'] for r in second]
+    assert {r['message'] for r in second if r['outbox_id']} == {"Ya estaba en cola"}
@@ -0,0 +1,62 @@
+"""
+Export masivo: un ZIP con la última rutina de cada atleta; con un solo núcleo
+se renderiza en el propio proceso, sin pool
+"""
+
+import zipfile
+
+import pytest
+
+from auth.database import get_db_connection
+from modules import bulk_export
+from modules.chat_manager import ROUTINE_MARKER, save_message
+
+ROUTINE = ROUTINE_MARKER + """
+**📝 RUTINA: Fuerza base**
+### DÍA 1 - FUERZA
+- **Sentadilla**: 4x6 al 80 % 1RM, descanso 120 seg
+"""
+
+
+@pytest.fixture
+def coach(temp_db):
+    """Entrenador con seis atletas con rutina (más que MIN_ATHLETES_FOR_POOL)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        athlete_ids = []
+        for n in range(6):
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, 'Tenis', 'Élite')",
+                (user_id, f"Atleta {n}")
+            )
+            athlete_ids.append(cursor.lastrowid)
+        conn.commit()
+    for athlete_id in athlete_ids:
+        save_message(athlete_id, ROUTINE, is_user=False)
+    return user_id, athlete_ids
+
+
+def test_single_core_renders_in_process(coach, tmp_path, monkeypatch):
+    user_id, athlete_ids = coach
+    monkeypatch.setattr(bulk_export, "_available_cpus", lambda: 1)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no debería arrancar un pool con un solo núcleo")
+    monkeypatch.setattr(bulk_export, "_render_in_pool", no_pool)
+
+    output = tmp_path / "rutinas.zip"
+    summary = bulk_export.export_latest_routines_zip(user_id, str(output), "csv", max_workers=4)
+
+    assert summary == {'total': 6, 'exported': 6, 'failed': 0}
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+    assert sorted(names) == sorted(f"Rutina_Atleta_{n}_{athlete_id}.csv" for n, athlete_id in enumerate(athlete_ids))
+
+
+def test_default_workers_never_exceed_available_cpus(monkeypatch):
+    monkeypatch.setattr(bulk_export, "_available_cpus", lambda: 1)
+    assert bulk_export._default_workers() == 1
+    monkeypatch.setattr(bulk_export, "_available_cpus", lambda: 16)
+    assert bulk_export._default_workers() == 4
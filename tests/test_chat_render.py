@@ -0,0 +1,60 @@
+"""
+Bloques de render del chat: el bloque memorizado debe ser el mismo HTML que
+formatear el mensaje de nuevo, y solo se formatea la primera vez
+"""
+
+import random
+
+import pytest
+
+from benchmarks.bench_chat_render import make_chat
+from modules import chat_render
+from modules.chat_render import build_message_render_block, get_message_render_block
+from modules.routine_generator import generate_routine
+
+CHAT = make_chat(24, random.Random(5))
+
+
+@pytest.fixture(autouse=True)
+def empty_render_cache():
+    chat_render._render_cache.clear()
+    yield
+    chat_render._render_cache.clear()
+
+
+@pytest.mark.parametrize("index", range(len(CHAT)))
+def test_cached_block_matches_fresh_render(index):
+    msg, is_user = CHAT[index]
+    expected = build_message_render_block(msg, is_user)
+    assert get_message_render_block(msg, is_user) == expected
+    # Segunda vez: desde la caché, sin cambios
+    assert get_message_render_block(msg, is_user) == expected
+
+
+def test_each_message_is_formatted_once(monkeypatch):
+    calls = []
+    original = chat_render.build_message_render_block
+
+    def counting(msg, is_user):
+        calls.append(msg)
+        return original(msg, is_user)
+
+    monkeypatch.setattr(chat_render, "build_message_render_block", counting)
+    for _ in range(3):
+        for msg, is_user in CHAT:
+            get_message_render_block(msg, is_user)
+
+    assert len(calls) == len({(msg, is_user) for msg, is_user in CHAT})
+
+
+def test_same_text_from_user_and_assistant_are_separate_blocks():
+    routine = generate_routine({'sport': 'Rugby', 'level': 'Elite'}, variant=1)
+    assert get_message_render_block(routine, True)['kind'] == 'user'
+    assert get_message_render_block(routine, False)['kind'] == 'routine'
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(chat_render, "RENDER_CACHE_SIZE", 5)
+    for n in range(12):
+        get_message_render_block(f"Mensaje {n}", True)
+    assert len(chat_render._render_cache) == 5
@@ -0,0 +1,90 @@
+"""
+Ventana del chat paginada por keyset: los límites de cada página son exactos
+(sin huecos ni solapes al retroceder), la ventana desde un id lo incluye y los
+mensajes de otra conversación intercalados no cuentan
+"""
+
+import pytest
+
+from auth.database import get_db_connection
+from modules.chat_manager import get_chat_window, get_earlier_cursor, save_message
+
+TOTAL = 11
+
+
+@pytest.fixture
+def chat(temp_db):
+    """Dos atletas con los mensajes intercalados: los ids de cada chat no son consecutivos"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        athlete_ids = []
+        for name in ("Ana", "Bruno"):
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, 'Fútbol', 'Avanzado')",
+                (user_id, name)
+            )
+            athlete_ids.append(cursor.lastrowid)
+        conn.commit()
+    ana, bruno = athlete_ids
+    for n in range(TOTAL):
+        save_message(ana, f"Ana {n}", is_user=n % 2 == 0)
+        save_message(bruno, f"Bruno {n}", is_user=True)
+    return ana, bruno
+
+
+def texts(messages):
+    return [content for _, content, _, _ in messages]
+
+
+def test_latest_window_and_earlier_flag(chat):
+    ana, _ = chat
+    messages, has_earlier = get_chat_window(ana, limit=4)
+    assert texts(messages) == [f"Ana {n}" for n in range(7, 11)]
+    assert has_earlier
+    assert [is_user for _, _, is_user, _ in messages] == [False, True, False, True]
+
+
+@pytest.mark.parametrize("limit", [TOTAL, TOTAL + 5])
+def test_window_with_every_message_has_nothing_earlier(chat, limit):
+    ana, _ = chat
+    messages, has_earlier = get_chat_window(ana, limit=limit)
+    assert texts(messages) == [f"Ana {n}" for n in range(TOTAL)]
+    assert not has_earlier
+
+
+def test_window_from_id_includes_it(chat):
+    ana, _ = chat
+    messages, _ = get_chat_window(ana, limit=TOTAL)
+    from_id = messages[3][0]
+
+    window, has_earlier = get_chat_window(ana, from_id=from_id)
+    assert window == messages[3:]
+    assert has_earlier
+
+
+def test_paging_back_covers_every_message_once(chat):
+    ana, _ = chat
+    window, has_earlier = get_chat_window(ana, limit=4)
+    pages = [texts(window)]
+    while has_earlier:
+        from_id = get_earlier_cursor(ana, window[0][0], limit=4)
+        window, has_earlier = get_chat_window(ana, from_id=from_id)
+        pages.append(texts(window))
+
+    # Cada página amplía la ventana con los 4 mensajes anteriores (3 al final)
+    assert [len(page) for page in pages] == [4, 8, 11]
+    assert pages[-1] == [f"Ana {n}" for n in range(TOTAL)]
+
+
+def test_earlier_cursor_at_the_start_is_none(chat):
+    ana, _ = chat
+    messages, _ = get_chat_window(ana, limit=TOTAL)
+    assert get_earlier_cursor(ana, messages[0][0]) is None
+    assert get_earlier_cursor(ana, messages[2][0], limit=30) == messages[0][0]
+
+
+def test_unknown_athlete_has_an_empty_chat(chat):
+    assert get_chat_window(9999) == ([], False)
+    assert get_earlier_cursor(9999, 10) is None
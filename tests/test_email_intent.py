@@ -0,0 +1,68 @@
+"""
+EmailIntentDetector debe decidir igual que probar cada patrón por separado
+(los bucles de re.search de AutoEmailHandler y chat_interface)
+"""
+
+import re
+
+import pytest
+
+from modules.email_intent import (
+    EMAIL_INTENT_PATTERNS, AUTO_EMAIL_INTENTS, CHAT_EMAIL_INTENTS,
+    auto_email_intent_detector, chat_email_intent_detector,
+)
+
+CORPUS = [
+    # Sin intención de email
+    "Hola, necesito una rutina de fuerza para un futbolista juvenil",
+    "¿Cuántas series recomiendas para hipertrofia en nivel intermedio?",
+    "Mi atleta tiene molestias en la rodilla, ¿qué ejercicios evito?",
+    "Cambia el peso muerto por hip thrust",
+    "Compartimos la sesión del martes con el otro grupo",
+    "Está bien así",
+    "",
+    # Pedidos de envío
+    "Envíala por email por favor",
+    "mandalo por correo",
+    "¿Me la podés mandar por mail?",
+    "Mándamela al correo",
+    "Quiero que lo envíes por email a su correo",
+    "Send it by email",
+    "compártelo por email",
+    "envíaselo a juan@club.com",
+    "Email me the plan",
+    "El correo del atleta está mal, hay que enviar de nuevo",
+    # Formas con tilde y mayúsculas que el prefiltro no puede descartar
+    "Compártelo",
+    "compártelo con el equipo",
+    "COMPÁRTELO POR CORREO",
+    "Mándaselo hoy",
+    "MÁNDASELO",
+    "Envíamela",
+    "ENVÍASELO YA",
+]
+
+
+def legacy_detect(intents, message):
+    """Los bucles anteriores: cada patrón por separado sobre el mensaje en minúsculas"""
+    patterns = [pattern for name, pattern in EMAIL_INTENT_PATTERNS if name in intents]
+    return any(re.search(pattern, message.lower()) for pattern in patterns)
+
+
+@pytest.mark.parametrize("message", CORPUS)
+@pytest.mark.parametrize("intents, detector", [
+    (AUTO_EMAIL_INTENTS, auto_email_intent_detector),
+    (CHAT_EMAIL_INTENTS, chat_email_intent_detector),
+], ids=["auto", "chat"])
+def test_same_decision_as_separate_patterns(intents, detector, message):
+    assert (detector.detect(message) is not None) == legacy_detect(intents, message)
+
+
+@pytest.mark.parametrize("message", ["Compártelo", "compártelo con el equipo", "COMPÁRTELO POR CORREO"])
+def test_accented_share_command_is_detected(message):
+    assert auto_email_intent_detector.detect(message) == "compartir"
+
+
+def test_prefilter_skips_messages_without_keywords():
+    assert auto_email_intent_detector.detect("Ajusta la carga del día 2") is None
+    assert chat_email_intent_detector.detect("Ajusta la carga del día 2") is None
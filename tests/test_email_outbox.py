@@ -0,0 +1,84 @@
+"""
+Deduplicación de la bandeja de salida: un doble clic no duplica el email,
+un reenvío después de enviado (o fallido) sí sale
+"""
+
+import pytest
+
+import modules.email_manager as email_manager
+from modules import email_outbox
+from modules.email_outbox import STATUS_FAILED, STATUS_PENDING, STATUS_SENT, enqueue_email, get_email_status
+
+ATTACHMENT = b"PK\x03\x04 rutina"
+
+
+@pytest.fixture
+def worker(temp_db, monkeypatch):
+    """Worker sin hilo: los tests procesan la cola a mano"""
+    worker = email_outbox.EmailOutboxWorker()
+    monkeypatch.setattr(email_outbox, "email_outbox_worker", worker)
+    monkeypatch.setattr(worker, "start", lambda: None)
+    return worker
+
+
+def enqueue():
+    return enqueue_email("ana@club.com", "Ana", ATTACHMENT, "rutina_ana.xlsx", athlete_id=1)
+
+
+def process_next(worker):
+    email = worker._claim_next()
+    assert email is not None
+    worker._process(email)
+    return email['id']
+
+
+def test_duplicate_while_pending_is_deduplicated(worker):
+    first_id, first_dedup = enqueue()
+    second_id, second_dedup = enqueue()
+
+    assert (first_dedup, second_dedup) == (False, True)
+    assert second_id == first_id
+    assert get_email_status(first_id)['status'] == STATUS_PENDING
+
+
+def test_resend_after_sent_is_queued_again(worker, monkeypatch):
+    delivered = []
+    monkeypatch.setattr(email_manager, "deliver_routine_email", lambda *args: delivered.append(args))
+
+    first_id, _ = enqueue()
+    assert process_next(worker) == first_id
+    assert get_email_status(first_id)['status'] == STATUS_SENT
+
+    resend_id, deduplicated = enqueue()
+    assert not deduplicated
+    assert resend_id != first_id
+    assert get_email_status(resend_id)['status'] == STATUS_PENDING
+    assert get_email_status(first_id)['status'] == STATUS_SENT
+
+    assert process_next(worker) == resend_id
+    assert len(delivered) == 2
+
+
+def test_resend_after_failure_is_queued_again(worker, monkeypatch):
+    def reject(*args):
+        raise email_manager.PermanentEmailError("Email del destinatario inválido")
+
+    monkeypatch.setattr(email_manager, "deliver_routine_email", reject)
+
+    first_id, _ = enqueue()
+    process_next(worker)
+    assert get_email_status(first_id)['status'] == STATUS_FAILED
+
+    resend_id, deduplicated = enqueue()
+    assert not deduplicated
+    assert resend_id != first_id
+    assert get_email_status(resend_id)['attempts'] == 0
+
+
+def test_send_routine_email_reports_deduplication(worker):
+    _, first_message, first_id = email_manager.send_routine_email("ana@club.com", "Ana", ATTACHMENT, "rutina.xlsx")
+    success, message, outbox_id = email_manager.send_routine_email("ana@club.com", "Ana", ATTACHMENT, "rutina.xlsx")
+
+    assert success and outbox_id == first_id
+    assert "no se duplica" in message
+    assert "no se duplica" not in first_message
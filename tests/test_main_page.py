@@ -0,0 +1,71 @@
+"""
+Página principal dividida en fragmentos: cada región es un st.fragment que
+carga sus propios atletas, y el id del usuario se resuelve una vez por sesión
+"""
+
+import sys
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import main
+from auth.database import get_db_connection
+
+REGIONS = ("show_athletes_section", "show_athlete_management", "show_quick_templates_section", "show_chat_panel")
+
+
+def page_script(db_path):
+    """Script de AppTest (se ejecuta aislado: solo puede usar sus argumentos e imports propios)"""
+    import streamlit as st
+    import auth.database as database
+    import main
+
+    database.DB_PATH = db_path
+    st.session_state["username"] = "coach"
+    main.main()
+
+
+@pytest.fixture
+def coach(temp_db):
+    from modules.athlete_manager import invalidate_athlete_cache
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        for name in ("Ana Ruiz", "Bruno Gil"):
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, 'Fútbol', 'Avanzado')",
+                (user_id, name)
+            )
+        conn.commit()
+    invalidate_athlete_cache(user_id=user_id)  # La caché de atletas no sabe que cambió la base
+    return temp_db
+
+
+@pytest.mark.parametrize("region", REGIONS)
+def test_regions_are_fragments(region):
+    # st.fragment envuelve la función con functools.wraps
+    assert getattr(main, region).__wrapped__.__name__ == region
+
+
+def test_page_renders_and_resolves_the_user_once(coach, monkeypatch):
+    calls = []
+    original = main.get_user_id
+
+    def counting(username):
+        calls.append(username)
+        return original(username)
+
+    monkeypatch.setattr(main, "get_user_id", counting)
+    # AppTest deja su script (ya borrado) como __main__: los pools con 'spawn' lo importarían
+    monkeypatch.setitem(sys.modules, "__main__", sys.modules["__main__"])
+
+    at = AppTest.from_function(page_script, args=(coach,), default_timeout=60)
+    for _ in range(3):
+        at.run()
+        assert not at.exception
+
+    assert calls == ["coach"]
+    page_text = " ".join(str(element.value) for element in at.markdown)
+    assert "Ana Ruiz" in page_text and "Bruno Gil" in page_text
@@ -0,0 +1,197 @@
+"""
+Mensajes largos comprimidos en message_bodies: la base se puede usar desde
+cualquier cliente de SQLite (sin funciones SQL propias), la búsqueda encuentra
+los mensajes comprimidos y la caché de IA no depende de la base principal
+"""
+
+import sqlite3
+
+import pytest
+
+import auth.database as database
+from auth.database import get_db_connection
+from config import Config
+from modules.ai_cache_manager import AICacheManager
+from modules.chat_manager import (
+    ROUTINE_MARKER, get_chat_stats, get_chat_window, get_latest_routines_by_user,
+    save_message, search_chat_messages,
+)
+
+LONG_ROUTINE = ROUTINE_MARKER + "\n**📝 RUTINA: Fuerza**\n" + "\n".join(
+    f"### DÍA {day} - FUERZA\n- **Sentadilla búlgara**: 4x8 al 70 % 1RM, descanso 90 seg" for day in range(1, 80)
+)
+LONG_ANSWER = "Trabaja la movilidad de cadera antes de cada sesión. " * 60
+
+
+@pytest.fixture
+def coach(temp_db, monkeypatch):
+    """Entrenador con dos atletas y un umbral de compresión bajo"""
+    monkeypatch.setattr(Config, "TEXT_COMPRESSION_MIN_CHARS", 1024)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        user_id = cursor.lastrowid
+        athlete_ids = []
+        for name in ("Ana", "Bruno"):
+            cursor.execute(
+                "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, ?, 'Fútbol', 'Avanzado')",
+                (user_id, name)
+            )
+            athlete_ids.append(cursor.lastrowid)
+        conn.commit()
+    return user_id, athlete_ids
+
+
+def plain_connection():
+    """Conexión como la del cliente sqlite3 o un backup: sin funciones registradas"""
+    return sqlite3.connect(database.DB_PATH)
+
+
+def test_long_messages_are_compressed_and_read_back(coach):
+    _, (ana, _) = coach
+    save_message(ana, "¿Qué hago hoy?", is_user=True)
+    save_message(ana, LONG_ROUTINE, is_user=False)
+
+    messages, _ = get_chat_window(ana, 10)
+    assert [content for _, content, _, _ in messages] == ["¿Qué hago hoy?", LONG_ROUTINE]
+
+    conn = plain_connection()
+    content, body_hash = conn.execute("SELECT content, body_hash FROM messages ORDER BY id DESC").fetchone()
+    conn.close()
+    assert content == "" and body_hash
+
+
+def test_database_works_without_python_functions(coach):
+    _, (ana, _) = coach
+    save_message(ana, LONG_ROUTINE, is_user=False)
+
+    conn = plain_connection()
+    conversation_id = conn.execute("SELECT id FROM conversations").fetchone()[0]
+    conn.execute(
+        "INSERT INTO messages (conversation_id, content, is_user) VALUES (?, 'escrito desde la consola', 0)",
+        (conversation_id,)
+    )
+    conn.execute("DELETE FROM messages WHERE body_hash IS NOT NULL")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM message_bodies").fetchone()[0] == 0
+    conn.close()
+
+    user_id, _ = coach
+    assert [hit['message_id'] for hit in search_chat_messages("consola", user_id)]
+
+
+def test_search_finds_compressed_messages(coach):
+    user_id, (ana, bruno) = coach
+    save_message(ana, LONG_ANSWER, is_user=False)
+    save_message(bruno, "Sin nada que ver", is_user=False)
+
+    hits = search_chat_messages("movilidad cadera", user_id)
+    assert [hit['athlete_id'] for hit in hits] == [ana]
+    assert "**movilidad**" in hits[0]['snippet']
+
+
+def test_chat_stats_count_compressed_routines(coach):
+    _, (ana, _) = coach
+    save_message(ana, "hola", is_user=True)
+    save_message(ana, LONG_ROUTINE, is_user=False)
+    save_message(ana, LONG_ANSWER, is_user=False)
+    save_message(ana, "Otra rutina corta", is_user=False)
+
+    assert get_chat_stats(ana) == (4, 2)
+
+
+def test_latest_routines_match_plain_and_compressed(coach):
+    user_id, (ana, bruno) = coach
+    older = LONG_ROUTINE.replace("Fuerza", "Base")
+    save_message(ana, older, is_user=False)
+    save_message(ana, LONG_ROUTINE, is_user=False)
+    save_message(ana, LONG_ANSWER, is_user=False)
+    save_message(bruno, ROUTINE_MARKER + " rutina corta", is_user=False)
+    save_message(bruno, "Buen trabajo", is_user=False)
+
+    routines = {routine['athlete']['id']: routine['content'] for routine in get_latest_routines_by_user(user_id)}
+    assert routines == {ana: LONG_ROUTINE, bruno: ROUTINE_MARKER + " rutina corta"}
+
+
+def test_backfill_compresses_existing_long_messages(coach):
+    user_id, (ana, _) = coach
+    save_message(ana, "corto", is_user=True)
+
+    # Filas largas en texto plano: guardadas antes de la compresión o por otro cliente
+    conn = plain_connection()
+    conversation_id = conn.execute("SELECT id FROM conversations").fetchone()[0]
+    conn.execute(
+        "INSERT INTO messages (conversation_id, content, is_user) VALUES (?, ?, 0)",
+        (conversation_id, LONG_ANSWER)
+    )
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    database.create_tables_if_not_exist()
+
+    conn = plain_connection()
+    rows = conn.execute("SELECT content, body_hash FROM messages ORDER BY id").fetchall()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    conn.close()
+    assert rows[0] == ("corto", None)
+    assert rows[1][0] == "" and rows[1][1]
+
+    messages, _ = get_chat_window(ana, 10)
+    assert messages[-1][1] == LONG_ANSWER
+    assert len(search_chat_messages("movilidad", user_id)) == 1
+
+
+def test_ai_cache_keeps_long_responses_in_its_own_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "TEXT_COMPRESSION_MIN_CHARS", 1024)
+    cache = AICacheManager(str(tmp_path / "ai_cache.db"))
+    context = {'sport': 'Fútbol', 'level': 'Avanzado'}
+
+    cache.cache_response(context, "quick_template:strength", LONG_ROUTINE)
+    cache.cache_response(context, "pregunta corta", "respuesta corta")
+
+    assert cache.get_cached_response(context, "quick_template:strength") == LONG_ROUTINE
+    assert cache.get_cached_response(context, "pregunta corta") == "respuesta corta"
+
+    conn = sqlite3.connect(cache.cache_db_path)
+    rows = conn.execute("SELECT response, response_body FROM ai_cache ORDER BY id").fetchall()
+    conn.close()
+    assert rows[0][0] is None and rows[0][1]
+    assert rows[1] == ("respuesta corta", None)
+
+
+def test_deleted_compressed_message_leaves_the_search_index(coach):
+    user_id, (ana, _) = coach
+    save_message(ana, LONG_ANSWER, is_user=False)
+    save_message(ana, "La movilidad de cadera va primero", is_user=False)
+
+    # Borrado desde otro cliente, sin pasar por la app
+    conn = plain_connection()
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("DELETE FROM messages WHERE body_hash IS NOT NULL")
+    conn.commit()
+    conn.close()
+
+    hits = search_chat_messages("movilidad", user_id, limit=1)
+    assert [hit['snippet'] for hit in hits] == ["La **movilidad** de cadera va primero"]
+
+    conn = plain_connection()
+    assert conn.execute("SELECT COUNT(*) FROM messages_fts_deleted").fetchone()[0] == 0
+    # Sin entrada en el índice: el término solo aparece en el mensaje corto
+    assert conn.execute(
+        "SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH 'sesion'"
+    ).fetchone()[0] == 0
+    conn.close()
+
+
+def test_index_entries_without_message_do_not_take_result_slots(coach):
+    user_id, (ana, _) = coach
+    save_message(ana, "Movilidad de cadera antes de entrenar", is_user=False)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        conversation_id = cursor.execute("SELECT id FROM conversations").fetchone()[0]
+        for ghost_id in range(1000, 1010):
+            database.index_message_text(cursor, ghost_id, conversation_id, "movilidad movilidad movilidad")
+        conn.commit()
+
+    assert len(search_chat_messages("movilidad", user_id, limit=1)) == 1
@@ -0,0 +1,61 @@
+"""
+Pool de hashing bajo carga: un timeout falla el login sin reiniciar el pool
+ni calcular bcrypt en el hilo de la petición
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import auth.auth_utils as auth_utils
+from auth import password_hashing
+from auth.password_hashing import PasswordHashTimeout, check_password, hash_password
+from config import Config
+
+
+@pytest.fixture
+def hash_pool(monkeypatch):
+    """Pool nuevo de un solo proceso, ya arrancado"""
+    monkeypatch.setattr(Config, "PASSWORD_HASH_WORKERS", 1)
+    password_hashing._reset_executor()
+    assert check_password("secreta", hash_password("secreta", rounds=4))
+    yield password_hashing._executor
+    password_hashing._reset_executor()
+
+
+def test_pool_uses_spawn(hash_pool):
+    assert hash_pool._mp_context.get_start_method() == "spawn"
+
+
+def test_timeout_under_load_keeps_pool_and_does_not_hash_inline(hash_pool, monkeypatch):
+    monkeypatch.setattr(password_hashing, "HASH_TIMEOUT_SECONDS", 0.3)
+
+    def slow_hash(_):
+        try:
+            return hash_password("secreta", rounds=14)
+        except PasswordHashTimeout as e:
+            return e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=6) as threads:
+        results = list(threads.map(slow_hash, range(6)))
+    elapsed = time.perf_counter() - start
+
+    assert all(isinstance(result, PasswordHashTimeout) for result in results)
+    # Sin el fallback en línea: seis hashes de coste 14 tardarían varios segundos
+    assert elapsed < 2
+    assert password_hashing._executor is hash_pool
+
+
+def test_login_during_timeout_is_a_failed_attempt(temp_db, monkeypatch):
+    def saturated(*args):
+        raise PasswordHashTimeout("Servidor ocupado verificando contraseñas, intenta de nuevo en unos segundos")
+
+    monkeypatch.setattr(Config, "BCRYPT_ROUNDS", 4)
+    assert auth_utils.register_user("coach", "Secreta123!")[0]
+    monkeypatch.setattr(auth_utils, "check_password", saturated)
+
+    success, message = auth_utils.verify_user("coach", "Secreta123!")
+    assert not success
+    assert "ocupado" in message
@@ -0,0 +1,119 @@
+"""
+Caché de usuarios y atletas: las lecturas repetidas no vuelven a la base, las
+escrituras de la app invalidan sus entradas al momento y el TTL acota lo que
+puede quedar desactualizado por escrituras de otro proceso
+"""
+
+import sqlite3
+
+import pytest
+
+import auth.database as database
+from auth import auth_utils
+from auth.auth_utils import get_user_id, invalidate_user_cache
+from modules import athlete_manager
+from modules.athlete_manager import (
+    add_athlete, delete_athlete, get_athlete_data, get_athletes_by_user,
+    update_athlete, update_athlete_email
+)
+from utils import ttl_cache
+from utils.ttl_cache import TTLCache
+
+CACHES = (athlete_manager._athletes_by_user_cache, athlete_manager._athlete_data_cache, auth_utils._user_id_cache)
+
+
+@pytest.fixture
+def coach(temp_db):
+    for cache in CACHES:
+        cache.clear()
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        conn.commit()
+        user_id = cursor.lastrowid
+    yield user_id
+    for cache in CACHES:
+        cache.clear()
+
+
+def external_write(sql, params=()):
+    """Escritura de otro proceso: no pasa por las funciones que invalidan la caché"""
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def test_athlete_list_is_cached_until_the_app_writes(coach):
+    ana = add_athlete(coach, "Ana", "Tenis", "Avanzado")
+    assert [athlete[1] for athlete in get_athletes_by_user(coach)] == ["Ana"]
+
+    external_write("INSERT INTO athletes (user_id, name, sport, level) VALUES (?, 'Bruno', 'Remo', 'Élite')", (coach,))
+    assert [athlete[1] for athlete in get_athletes_by_user(coach)] == ["Ana"]
+
+    update_athlete(ana, "Ana Ruiz", "Tenis", "Avanzado")
+    assert sorted(athlete[1] for athlete in get_athletes_by_user(coach)) == ["Ana Ruiz", "Bruno"]
+
+
+@pytest.mark.parametrize("write", [
+    lambda athlete_id: update_athlete(athlete_id, "Ana Ruiz", "Pádel", "Élite", email="ana@club.com"),
+    lambda athlete_id: update_athlete_email(athlete_id, "ana@club.com"),
+    lambda athlete_id: delete_athlete(athlete_id),
+])
+def test_writes_invalidate_the_athlete_and_the_owner_list(coach, write):
+    ana = add_athlete(coach, "Ana", "Tenis", "Avanzado")
+    before = get_athlete_data(ana)
+    athletes_before = get_athletes_by_user(coach)
+
+    write(ana)
+
+    assert get_athlete_data(ana) != before
+    assert get_athletes_by_user(coach) != athletes_before
+
+
+def test_cached_values_are_copies(coach):
+    ana = add_athlete(coach, "Ana", "Tenis", "Avanzado")
+    get_athlete_data(ana)['name'] = "cambiado"
+    get_athletes_by_user(coach).clear()
+
+    assert get_athlete_data(ana)['name'] == "Ana"
+    assert len(get_athletes_by_user(coach)) == 1
+
+
+def test_user_id_is_cached_and_invalidated(coach):
+    assert get_user_id(" coach ") == coach
+
+    external_write("UPDATE users SET is_active = FALSE WHERE id = ?", (coach,))
+    assert get_user_id("coach") == coach
+
+    invalidate_user_cache("coach ")
+    assert get_user_id("coach") is None
+
+
+def test_missing_users_are_not_cached(coach):
+    assert get_user_id("nuevo") is None
+    external_write("INSERT INTO users (username, password_hash) VALUES ('nuevo', 'x')")
+    assert get_user_id("nuevo") is not None
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: clock[0])
+    cache = TTLCache(ttl_seconds=30, max_entries=2)
+    cache.set("a", 1)
+
+    clock[0] += 29
+    assert cache.get("a") == (True, 1)
+    clock[0] += 2
+    assert cache.get("a") == (False, None)
+    assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = TTLCache(ttl_seconds=30, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
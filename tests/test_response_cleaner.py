@@ -0,0 +1,45 @@
+"""
+ResponseCleaner con los patrones precompilados y las pasadas combinadas debe
+dar exactamente el mismo texto que aplicar cada patrón por separado
+(LegacyResponseCleaner de benchmarks/bench_response_cleaner.py)
+"""
+
+import random
+
+import pytest
+
+from benchmarks.bench_response_cleaner import LegacyResponseCleaner, make_response
+from modules.response_cleaner import ResponseCleaner
+
+METHODS = ["clean_response", "format_routine_response", "enhance_response_formatting"]
+
+EDGE_CASES = [
+    "",
+    "corto",
+    "【4:0†source】 Claro, aquí tienes. Sentadilla 4x8 y 30seg de descanso.",
+    "[ASSISTANT] ¡Perfecto! 💪Fuerza: 3 x 10, 2min. luego repite?? ¡Vamos!!!",
+    "<div class='msg'>Voy a preparar <br/>la rutina&nbsp;de hoy [metadata: run_42]</div>",
+    "Error: el asistente no pudo completar la solicitud",
+    "🔥Día 1\n-   Press banca 4x6\n•Remo con mancuerna 3x12\n\n\n\n¿Alguna pregunta??",
+]
+
+
+def corpus():
+    rng = random.Random(7)
+    return EDGE_CASES + [make_response(size_kb, rng) for size_kb in (3, 10, 40) for _ in range(4)]
+
+
+CORPUS = corpus()
+
+
+@pytest.fixture(scope="module")
+def cleaners():
+    return LegacyResponseCleaner(), ResponseCleaner()
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("index", range(len(CORPUS)))
+def test_same_output_as_separate_patterns(cleaners, method, index):
+    legacy, combined = cleaners
+    text = CORPUS[index]
+    assert getattr(combined, method)(text) == getattr(legacy, method)(text)
@@ -0,0 +1,149 @@
+"""
+Pipeline de exportación: cada rutina se parsea una vez por contenido, la
+clave de la caché de artefactos cambia con el formato, el contenido, los datos
+del atleta que salen en el archivo y la fecha, y los renderers de CSV, JSON y
+PDF producen el artefacto esperado desde el modelo parseado
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from modules import routine_export
+from modules.routine_export import (
+    CSV_COLUMNS, EXPORT_RENDERERS, JSON_SCHEMA_VERSION, PDF_AVAILABLE,
+    _export_cache_key, build_export_filename, export_routine, get_parsed_routine
+)
+
+ATHLETE = {'id': 7, 'name': 'Lucía Pérez', 'sport': 'Tenis', 'level': 'Avanzado'}
+
+ROUTINE = """[INICIO_NUEVA_RUTINA]
+**📝 RUTINA: Fuerza base**
+SEMANA 1
+### DÍA 1 - FUERZA
+- Sentadilla frontal con barra: 4x6
+- Escalera de agilidad: entradas y salidas: 3x6
+### DÍA 2 - POTENCIA
+- Salto al cajón con contramovimiento: 5x3
+"""
+
+
+class FrozenDatetime(datetime):
+    day_offset = 0
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 3, 10 + cls.day_offset, 9, 30)
+
+
+@pytest.fixture(autouse=True)
+def empty_export_cache(monkeypatch):
+    monkeypatch.setattr(routine_export, "datetime", FrozenDatetime)
+    FrozenDatetime.day_offset = 0
+    routine_export._export_cache.clear()
+    yield
+    routine_export._export_cache.clear()
+
+
+def test_routine_is_parsed_once_per_content(monkeypatch):
+    calls = []
+    original = routine_export.parse_routine_simple
+
+    def counting(routine_text):
+        calls.append(routine_text)
+        return original(routine_text)
+
+    monkeypatch.setattr(routine_export, "parse_routine_simple", counting)
+    routine_export._parsed_routine_cache.clear()
+    parsed = get_parsed_routine(ROUTINE)
+    assert get_parsed_routine(str(ROUTINE)) is parsed
+    get_parsed_routine(ROUTINE + "- Remo con barra: 3x8\n")
+    assert len(calls) == 2
+
+
+def test_parsed_routine_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(routine_export, "PARSED_ROUTINE_CACHE_SIZE", 3)
+    routine_export._parsed_routine_cache.clear()
+    for n in range(8):
+        get_parsed_routine(f"### DÍA 1 - FUERZA\n- Sentadilla {n}: 4x6")
+    assert len(routine_export._parsed_routine_cache) == 3
+
+
+@pytest.mark.parametrize("field", ["id", "name", "sport", "level"])
+def test_cache_key_changes_with_athlete_fields(field):
+    changed = dict(ATHLETE, **{field: "otro"})
+    assert _export_cache_key(changed, ROUTINE, "xlsx") != _export_cache_key(ATHLETE, ROUTINE, "xlsx")
+
+
+def test_cache_key_changes_with_format_content_and_date():
+    key = _export_cache_key(ATHLETE, ROUTINE, "xlsx")
+    assert _export_cache_key(ATHLETE, ROUTINE, "xlsx") == key
+    assert _export_cache_key(ATHLETE, ROUTINE, "csv") != key
+    assert _export_cache_key(ATHLETE, ROUTINE + "- Remo con barra: 3x8\n", "xlsx") != key
+
+    FrozenDatetime.day_offset = 1
+    assert _export_cache_key(ATHLETE, ROUTINE, "xlsx") != key
+
+
+def test_each_artifact_is_rendered_once(monkeypatch):
+    calls = []
+    renderer = dict(EXPORT_RENDERERS["csv"])
+    original = renderer['render']
+
+    def counting(athlete_data, routine_data):
+        calls.append(athlete_data['name'])
+        return original(athlete_data, routine_data)
+
+    renderer['render'] = counting
+    monkeypatch.setitem(EXPORT_RENDERERS, "csv", renderer)
+
+    first = export_routine(ATHLETE, ROUTINE, "csv")
+    assert export_routine(dict(ATHLETE), ROUTINE, "csv") == first
+    assert len(calls) == 1
+
+    export_routine(dict(ATHLETE, level="Élite"), ROUTINE, "csv")
+    assert len(calls) == 2
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        export_routine(ATHLETE, ROUTINE, "docx")
+
+
+def test_csv_has_stable_columns_and_one_row_per_exercise():
+    rows = list(csv.reader(io.StringIO(export_routine(ATHLETE, ROUTINE, "csv").decode("utf-8"))))
+    assert rows[0] == CSV_COLUMNS
+    assert rows[1:] == [
+        ["Lucía Pérez", "Tenis", "Avanzado", "1", "1", "FUERZA", "Sentadilla frontal con barra", "4x6", "", ""],
+        ["Lucía Pérez", "Tenis", "Avanzado", "1", "1", "FUERZA", "Escalera de agilidad: entradas y salidas", "3x6", "", ""],
+        ["Lucía Pérez", "Tenis", "Avanzado", "1", "2", "POTENCIA", "Salto al cajón con contramovimiento", "5x3", "", ""],
+    ]
+
+
+def test_json_document_follows_the_schema():
+    document = json.loads(export_routine(ATHLETE, ROUTINE, "json"))
+    assert document['schema_version'] == JSON_SCHEMA_VERSION
+    assert document['generated_at'] == "2026-03-10"
+    assert document['athlete'] == {'name': 'Lucía Pérez', 'sport': 'Tenis', 'level': 'Avanzado'}
+    assert [(day['week'], day['day'], day['title']) for day in document['days']] == [(1, "1", "FUERZA"), (1, "2", "POTENCIA")]
+    assert document['days'][1]['exercises'] == [
+        {'name': "Salto al cajón con contramovimiento", 'sets_reps': "5x3", 'load': "", 'notes': ""}
+    ]
+
+
+@pytest.mark.skipif(not PDF_AVAILABLE, reason="fpdf2 no está instalado")
+def test_pdf_is_a_printable_document():
+    data = export_routine(ATHLETE, ROUTINE, "pdf")
+    assert data.startswith(b"%PDF-")
+    assert data.rstrip().endswith(b"%%EOF")
+
+
+@pytest.mark.parametrize("fmt, mime", [
+    ("xlsx", routine_export.XLSX_MIME), ("csv", "text/csv"), ("json", "application/json")
+])
+def test_registered_renderers_and_filenames(fmt, mime):
+    assert EXPORT_RENDERERS[fmt]['mime'] == mime
+    assert build_export_filename("Lucía Pérez", fmt) == f"Rutina_Lucía_Pérez_20260310_0930.{fmt}"
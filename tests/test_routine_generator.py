@@ -0,0 +1,73 @@
+"""
+Generador de rutinas sin IA: la misma semilla (atleta, template, días,
+variante) da siempre la misma rutina, y el texto vuelve a parsearse con
+get_parsed_routine en los días y ejercicios generados
+"""
+
+import pytest
+
+from modules.routine_export import get_parsed_routine, parse_routine_simple
+from modules.routine_generator import EXERCISE_LIBRARY, TRADITIONAL_BLOCKS, generate_routine
+
+ATHLETES = [
+    {'id': 1, 'name': 'Lucía', 'sport': 'Fútbol', 'level': 'Intermedio', 'goals': 'Aceleración'},
+    {'id': 2, 'name': 'Marcos', 'sport': 'Natación', 'level': 'Principiante'},
+    {'id': 3, 'name': 'Irene', 'sport': 'Tiro con arco', 'level': 'Avanzado'},
+    {'id': 4, 'name': 'Tomás', 'sport': 'Boxeo', 'level': 'Elite'},
+]
+
+LIBRARY_NAMES = {entry[0] for entry in EXERCISE_LIBRARY}
+EXERCISES_PER_DAY = sum(len(categories) for _, _, categories in TRADITIONAL_BLOCKS)
+WARM_UP = "Foam rolling + Mov. Articular (10 min)"
+
+
+def exercises(day):
+    return [exercise for exercise in day['exercises'] if not exercise['name'].startswith('**')]
+
+
+@pytest.mark.parametrize("variant", [0, 7])
+@pytest.mark.parametrize("athlete", ATHLETES, ids=lambda athlete: athlete['sport'])
+def test_same_seed_gives_the_same_routine(athlete, variant):
+    routine = generate_routine(athlete, "intensive_60", days=3, variant=variant)
+    assert generate_routine(dict(athlete), "intensive_60", days=3, variant=variant) == routine
+
+
+def test_variant_changes_the_selection():
+    routines = {generate_routine(ATHLETES[0], days=2, variant=variant) for variant in range(5)}
+    assert len(routines) > 1
+
+
+@pytest.mark.parametrize("days", [1, 3])
+@pytest.mark.parametrize("athlete", ATHLETES, ids=lambda athlete: athlete['sport'])
+def test_routine_parses_back_into_days_and_exercises(athlete, days):
+    routine = generate_routine(athlete, days=days, variant=1)
+    parsed = get_parsed_routine(routine)
+
+    assert [day['day'] for day in parsed] == [str(day) for day in range(1, days + 1)]
+    for day in parsed:
+        assert day['title'] and '*' not in day['title']
+        names = [exercise['name'] for exercise in exercises(day)]
+        assert names[0] == WARM_UP
+        assert len(names) == 1 + EXERCISES_PER_DAY
+        assert set(names[1:]) <= LIBRARY_NAMES
+        assert all(exercise['sets_reps'] for exercise in exercises(day)[1:])
+
+
+def test_colons_and_numbers_in_exercise_names_are_kept():
+    routine = "\n".join([
+        "**### DÍA 1 - AGILIDAD**",
+        "**Bloque 6 - Contraste/Preventivos**",
+        "• Escalera de agilidad: entradas y salidas: 3x6",
+        "• Cuerdas de batalla: ondas alternas: 4x5",
+        "• Shuttle run 6x20m: 3x6",
+        "• Plancha frontal con toque de hombro alterno: 3x30 seg",
+        "• Press banca: 4x8",
+    ])
+    parsed = exercises(parse_routine_simple(routine)[0])
+    assert [(exercise['name'], exercise['sets_reps']) for exercise in parsed] == [
+        ("Escalera de agilidad: entradas y salidas", "3x6"),
+        ("Cuerdas de batalla: ondas alternas", "4x5"),
+        ("Shuttle run 6x20m", "3x6"),
+        ("Plancha frontal con toque de hombro alterno", "3x30 seg"),
+        ("Press banca", "4x8"),
+    ]
@@ -0,0 +1,117 @@
+"""
+Rutinas rápidas en segundo plano: el pool ejecuta el trabajo y guarda su
+resultado o su error, un doble clic no lanza otro trabajo mientras el primero
+sigue en curso, y los templates de 6 bloques se generan sin IA
+"""
+
+import threading
+import time
+
+import pytest
+
+from auth.database import get_db_connection
+from config import Config
+from modules import routine_jobs
+from modules.athlete_manager import invalidate_athlete_cache
+from modules.chat_manager import get_chat_window
+from modules.quick_templates import generate_quick_routine
+from modules.routine_jobs import JOB_DONE, JOB_FAILED, JOB_RUNNING, RoutineJobManager
+
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get_job(job_id)
+        if job['status'] in routine_jobs.FINAL_JOB_STATUSES:
+            return job
+        time.sleep(0.01)
+    pytest.fail(f"El trabajo {job_id} no terminó")
+
+
+@pytest.fixture
+def manager():
+    manager = RoutineJobManager(max_workers=2)
+    yield manager
+    if manager._executor is not None:
+        manager._executor.shutdown(wait=True)
+
+
+def test_job_result_is_stored(manager):
+    job_id = manager.submit(1, "Estándar 45min", lambda a, b: a + b, 2, 3)
+    job = wait_for(manager, job_id)
+    assert job['status'] == JOB_DONE
+    assert job['result'] == 5
+    assert job['finished_at'] is not None
+
+
+def test_failed_job_keeps_the_error(manager):
+    def fail():
+        raise RuntimeError("La IA no devolvió ninguna rutina")
+
+    job = wait_for(manager, manager.submit(1, "Solo Fuerza", fail))
+    assert job['status'] == JOB_FAILED
+    assert job['error'] == "La IA no devolvió ninguna rutina"
+
+
+def test_double_click_reuses_the_running_job(manager):
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "rutina"
+
+    first = manager.submit(1, "Estándar 45min", slow, dedupe_key=(1, "standard_45"))
+    assert manager.submit(1, "Estándar 45min", slow, dedupe_key=(1, "standard_45")) == first
+    other = manager.submit(2, "Estándar 45min", slow, dedupe_key=(2, "standard_45"))
+    assert other != first
+
+    release.set()
+    wait_for(manager, first)
+    wait_for(manager, other)
+    assert len(calls) == 2
+
+    # Terminado el primero, un nuevo clic lanza otro trabajo
+    again = manager.submit(1, "Estándar 45min", slow, dedupe_key=(1, "standard_45"))
+    assert again != first
+    wait_for(manager, again)
+
+
+def test_finished_jobs_are_forgotten_after_retention(manager):
+    manager.retention_seconds = 0
+    job_id = manager.submit(1, "Estándar 45min", lambda: "rutina")
+    wait_for(manager, job_id)
+    time.sleep(0.01)
+
+    manager.submit(1, "Solo Fuerza", lambda: "rutina")  # Cada envío purga los terminados
+    assert manager.get_job(job_id) is None
+
+
+def test_get_job_returns_a_copy(manager):
+    job_id = manager.submit(1, "Estándar 45min", lambda: "rutina")
+    wait_for(manager, job_id)['status'] = JOB_RUNNING
+    assert manager.get_job(job_id)['status'] == JOB_DONE
+
+
+def test_offline_template_is_saved_to_the_chat_with_its_excel(temp_db, monkeypatch):
+    monkeypatch.setattr(Config, "OFFLINE_QUICK_TEMPLATES", True)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('coach', 'x')")
+        cursor.execute(
+            "INSERT INTO athletes (user_id, name, sport, level) VALUES (?, 'Ana', 'Fútbol', 'Avanzado')",
+            (cursor.lastrowid,)
+        )
+        conn.commit()
+        athlete_id = cursor.lastrowid
+    invalidate_athlete_cache(athlete_id)  # La caché de atletas no sabe que cambió la base
+
+    result = generate_quick_routine(athlete_id, "standard_45")
+
+    assert result['response'].startswith("[INICIO_NUEVA_RUTINA]")
+    assert result['excel_data'][:2] == b"PK"
+    assert result['filename'].endswith(".xlsx")
+    messages, _ = get_chat_window(athlete_id)
+    assert [is_user for _, _, is_user, _ in messages] == [True, False]
+    assert messages[1][1] == result['response']
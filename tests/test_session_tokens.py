@@ -0,0 +1,102 @@
+"""
+Tokens de sesión: la firma protege el contenido y depende de la clave, los
+tokens caducan, y la revocación (de un token o de todas las sesiones de un
+usuario) se ve desde la caché del proceso y desde otros procesos
+"""
+
+import json
+
+import pytest
+
+from auth import session_tokens
+from auth.session_tokens import (
+    _b64decode, _b64encode, issue_session_token, revoke_session_token,
+    revoke_user_sessions, verify_session_token
+)
+from config import Config
+
+
+@pytest.fixture
+def tokens(temp_db, monkeypatch):
+    monkeypatch.setattr(Config, "SESSION_SECRET_KEY", "clave-de-test")
+    monkeypatch.setattr(Config, "SESSION_REVOCATION", True)
+    monkeypatch.setattr(session_tokens, "_secret_key", None)
+    session_tokens._revocations_cache.clear()
+    yield
+    session_tokens._revocations_cache.clear()
+
+
+def test_valid_token_restores_the_session(tokens):
+    claims = verify_session_token(issue_session_token(7, "coach"))
+    assert (claims['uid'], claims['usr']) == (7, "coach")
+    assert claims['exp'] - claims['iat'] == pytest.approx(Config.SESSION_TIMEOUT_DAYS * 86400)
+
+
+def test_tampered_payload_is_rejected(tokens):
+    version, payload_b64, signature = issue_session_token(7, "coach").split(".")
+    payload = json.loads(_b64decode(payload_b64))
+    payload['uid'] = 1
+    forged = f"{version}.{_b64encode(json.dumps(payload).encode('utf-8'))}.{signature}"
+    assert verify_session_token(forged) is None
+
+
+def test_token_signed_with_another_key_is_rejected(tokens, monkeypatch):
+    token = issue_session_token(7, "coach")
+    monkeypatch.setattr(Config, "SESSION_SECRET_KEY", "otra-clave")
+    monkeypatch.setattr(session_tokens, "_secret_key", None)
+    assert verify_session_token(token) is None
+
+
+@pytest.mark.parametrize("token", [None, "", 42, "v1.abc", "v2.e30.AAAA", "v1.no base64.!!"])
+def test_malformed_tokens_are_rejected(tokens, token):
+    assert verify_session_token(token) is None
+
+
+def test_expired_token_is_rejected(tokens):
+    assert verify_session_token(issue_session_token(7, "coach", ttl_days=-1)) is None
+
+
+def test_revoked_token_is_rejected_and_others_survive(tokens):
+    revoked = issue_session_token(7, "coach")
+    other = issue_session_token(7, "coach")
+
+    assert revoke_session_token(revoked)
+    assert verify_session_token(revoked) is None
+    assert verify_session_token(other) is not None
+    assert not revoke_session_token(revoked)
+
+
+def test_user_revocation_rejects_earlier_tokens_only(tokens):
+    earlier = issue_session_token(7, "coach")
+    other_user = issue_session_token(8, "ayudante")
+
+    assert revoke_user_sessions(7)
+    later = issue_session_token(7, "coach")
+
+    assert verify_session_token(earlier) is None
+    assert verify_session_token(later) is not None
+    assert verify_session_token(other_user) is not None
+
+
+def test_revocation_from_another_process_is_seen_after_refresh(tokens):
+    token = issue_session_token(7, "coach")
+    assert verify_session_token(token) is not None  # La lista de revocaciones queda en caché
+
+    claims = verify_session_token(token)
+    with session_tokens.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO session_revocations (token_id, user_id, revoked_at, expires_at) VALUES (?, ?, ?, ?)",
+            (claims['jti'], 7, claims['iat'], claims['exp'])
+        )
+        conn.commit()
+    assert verify_session_token(token) is not None
+
+    session_tokens._revocations_cache.clear()  # Pasado REVOCATION_REFRESH_SECONDS
+    assert verify_session_token(token) is None
+
+
+def test_without_revocation_table_tokens_only_expire(tokens, monkeypatch):
+    token = issue_session_token(7, "coach")
+    monkeypatch.setattr(Config, "SESSION_REVOCATION", False)
+    assert not revoke_session_token(token)
+    assert verify_session_token(token) is not None
@@ -0,0 +1,129 @@
+"""
+SMTPConnectionPool: las sesiones autenticadas se reutilizan, las que pasan el
+tiempo de inactividad o las que el servidor cerró se descartan, y un fallo del
+mensaje no invalida la sesión
+"""
+
+import smtplib
+from email.mime.text import MIMEText
+
+import pytest
+
+from modules import smtp_pool
+from modules.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Sesión SMTP en memoria que registra logins, envíos y cierres"""
+
+    instances = []
+
+    def __init__(self, server, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.closed = False
+        self.fail_next = None
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def send_message(self, msg, from_addr=None, to_addrs=None):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        if self.fail_next:
+            error, self.fail_next = self.fail_next, None
+            raise error
+        self.sent.append(msg['Subject'])
+        return {}
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(smtp_pool.smtplib, "SMTP", FakeSMTP)
+    return SMTPConnectionPool("smtp.test", 587, "coach", "secret", max_connections=2, idle_timeout=60)
+
+
+def message(n):
+    msg = MIMEText("Rutina")
+    msg['Subject'] = f"Rutina {n}"
+    return msg
+
+
+def test_session_is_reused_across_messages(pool):
+    for n in range(5):
+        pool.send_message(message(n))
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].logins == 1
+    assert FakeSMTP.instances[0].sent == [f"Rutina {n}" for n in range(5)]
+    assert pool.stats == {'connections_opened': 1, 'connections_reused': 4, 'reconnects': 0, 'sent': 5}
+
+
+def test_idle_sessions_are_discarded(pool, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(smtp_pool.time, "monotonic", lambda: clock[0])
+    pool.send_message(message(1))
+
+    clock[0] += pool.idle_timeout + 1
+    pool.send_message(message(2))
+
+    first, second = FakeSMTP.instances
+    assert first.closed and not second.closed
+    assert pool.stats['connections_opened'] == 2
+    assert pool.stats['connections_reused'] == 0
+
+
+def test_session_closed_by_the_server_is_evicted_and_retried(pool):
+    pool.send_message(message(1))
+    FakeSMTP.instances[0].closed = True  # El servidor cortó la sesión inactiva
+
+    pool.send_message(message(2))
+
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[1].sent == ["Rutina 2"]
+    assert pool.stats['reconnects'] == 1
+    assert [conn for conn, _ in pool._idle] == [FakeSMTP.instances[1]]
+
+
+def test_new_session_that_fails_is_not_retried(pool, monkeypatch):
+    def refuse(self, username, password):
+        raise smtplib.SMTPServerDisconnected("servidor caído")
+
+    monkeypatch.setattr(FakeSMTP, "login", refuse)
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.send_message(message(1))
+    assert pool.stats['reconnects'] == 0
+    assert not pool._idle
+
+
+def test_refused_recipient_keeps_the_session(pool):
+    pool.send_message(message(1))
+    FakeSMTP.instances[0].fail_next = smtplib.SMTPRecipientsRefused({'x@club.com': (550, b"no existe")})
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_message(message(2))
+    pool.send_message(message(3))
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].sent == ["Rutina 1", "Rutina 3"]
+
+
+def test_concurrent_sessions_are_limited(pool):
+    with pool.connection(), pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection(acquire_timeout=0.01):
+                pass
+
+    pool.close_all()
+    assert all(conn.closed for conn in FakeSMTP.instances)
@@ -0,0 +1,65 @@
+"""
+classify_sport (índice normalizado) frente a la clasificación anterior: los
+deportes que la búsqueda por subcadena ya reconocía siguen igual, y las
+tildes, sinónimos y errores de tipeo caen ahora en su categoría
+"""
+
+import pytest
+
+from benchmarks.bench_sport_index import SPORTS, legacy_classify
+from modules.training_variations import classify_sport
+
+# Casos que la búsqueda anterior mandaba al valor por defecto
+IMPROVED = {
+    "Natación": "deportes_ciclicos",
+    "Natasion": "deportes_ciclicos",
+    "Ciclsmo": "deportes_ciclicos",
+    "Atletismo fondo": "deportes_ciclicos",
+    "Maratón": "deportes_ciclicos",
+    "Triatlón": "deportes_ciclicos",
+    "Trail running": "deportes_ciclicos",
+    "Running": "deportes_ciclicos",
+    "Arquería": "deportes_precision",
+    "boxoe": "deportes_combate",
+    "Artes marciales": "deportes_combate",
+    "MMA": "deportes_combate",
+    "Judo": "deportes_combate",
+    "Karate": "deportes_combate",
+    "Jiu-Jitsu": "deportes_combate",
+}
+
+# Nombres que contienen un deporte solo como subcadena de otra palabra
+NOT_WHOLE_WORDS = {
+    "Deportes extremos": "deportes_intermitentes",
+    "Extremo": "deportes_intermitentes",
+}
+
+
+@pytest.mark.parametrize("sport", [sport for sport in SPORTS if sport not in IMPROVED])
+def test_same_category_as_substring_search(sport):
+    assert classify_sport(sport) == legacy_classify(sport)
+
+
+@pytest.mark.parametrize("sport, category", IMPROVED.items())
+def test_accents_synonyms_and_typos_are_classified(sport, category):
+    assert legacy_classify(sport) == "deportes_intermitentes"
+    assert classify_sport(sport) == category
+
+
+@pytest.mark.parametrize("sport, category", NOT_WHOLE_WORDS.items())
+def test_substring_inside_a_word_is_not_a_match(sport, category):
+    assert classify_sport(sport) == category
+
+
+def test_whole_words_and_derived_names_are_matched():
+    assert classify_sport("Remo olímpico") == "deportes_ciclicos"
+    assert classify_sport("Ciclistas de ruta") == "deportes_ciclicos"
+    assert classify_sport("Boxeadores") == "deportes_combate"
+    assert classify_sport("Atletismo_fondo") == "deportes_ciclicos"
+
+
+def test_lookup_is_cached():
+    classify_sport.cache_clear()
+    classify_sport("Fútbol")
+    classify_sport("Fútbol")
+    assert classify_sport.cache_info().hits == 1
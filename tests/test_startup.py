@@ -0,0 +1,79 @@
+"""
+Arranque de main.py: las librerías pesadas (pandas, openpyxl, openai, fpdf) y
+los gestores globales que abren SQLite se cargan en el primer uso, no al
+importar
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+from benchmarks.bench_startup import LAZY_MODULES, ROOT
+from utils.lazy import LazyInstance
+
+STARTUP_PROBE = """
+import sys
+import main
+from modules.ai_cache_manager import cache_manager
+from modules.performance_monitor import performance_monitor
+
+print(",".join(sorted(name for name in {lazy_modules!r} if name in sys.modules)))
+print(",".join(name for name, instance in (
+    ("cache_manager", cache_manager), ("performance_monitor", performance_monitor)
+) if instance.is_initialized))
+"""
+
+
+def test_import_main_defers_heavy_modules_and_singletons():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///test")
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE.format(lazy_modules=LAZY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    imported, initialized = result.stdout.splitlines()[-2:]
+    assert imported == ""
+    assert initialized == ""
+
+
+class Counter:
+    created = 0
+
+    def __init__(self):
+        Counter.created += 1
+        self.value = 42
+
+    def double(self):
+        return self.value * 2
+
+
+def test_lazy_instance_builds_once_on_first_use():
+    Counter.created = 0
+    proxy = LazyInstance(Counter)
+    assert not proxy.is_initialized
+    assert "sin inicializar" in repr(proxy)
+
+    assert proxy.double() == 84
+    assert proxy.value == 42
+    assert proxy.is_initialized and Counter.created == 1
+    assert proxy.get_instance() is proxy.get_instance()
+
+
+def test_lazy_instance_is_built_once_across_threads():
+    Counter.created = 0
+    proxy = LazyInstance(Counter)
+    start = threading.Barrier(8)
+
+    def use():
+        start.wait()
+        proxy.double()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Counter.created == 1
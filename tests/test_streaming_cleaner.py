@@ -0,0 +1,40 @@
+"""
+StreamingResponseCleaner: limpiar fragmento a fragmento debe dar lo mismo que
+clean_response() sobre el texto completo, se corte donde se corte
+"""
+
+import random
+
+import pytest
+
+from benchmarks.bench_response_cleaner import make_response
+from benchmarks.bench_streaming_cleaner import EDGE_CASES, split_chunks
+from modules.response_cleaner import StreamingResponseCleaner, response_cleaner
+
+
+def corpus():
+    rng = random.Random(11)
+    return EDGE_CASES + [make_response(rng.choice((3, 10)), rng) for _ in range(8)]
+
+
+CORPUS = corpus()
+
+
+def stream_clean(chunks):
+    cleaner = StreamingResponseCleaner()
+    for chunk in chunks:
+        cleaner.feed(chunk)
+    return cleaner.finish()
+
+
+@pytest.mark.parametrize("mode", ["char", "token", "random"])
+@pytest.mark.parametrize("index", range(len(CORPUS)))
+def test_stream_matches_batch_cleaning(mode, index):
+    text = CORPUS[index]
+    chunks = split_chunks(text, random.Random(index), mode)
+    assert stream_clean(chunks) == response_cleaner.clean_response(text)
+
+
+def test_single_chunk_matches_batch_cleaning():
+    text = make_response(10, random.Random(3))
+    assert stream_clean([text]) == response_cleaner.clean_response(text)
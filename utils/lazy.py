@@ -0,0 +1,35 @@
+"""
+Instancias globales perezosas
+Los gestores que abren SQLite y crean tablas en su constructor se crean la
+primera vez que se usan, no al importar su módulo, para no alargar el
+arranque de la aplicación.
+"""
+
+import threading
+
+class LazyInstance:
+    """Proxy de una instancia global: la construye con factory() en el primer acceso"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get_instance(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def is_initialized(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        # Solo se llama para atributos que no son del proxy: se delegan en la instancia
+        return getattr(self.get_instance(), name)
+
+    def __repr__(self):
+        state = "inicializada" if self._instance is not None else "sin inicializar"
+        return f"<LazyInstance {getattr(self._factory, '__name__', self._factory)} ({state})>"
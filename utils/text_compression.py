@@ -0,0 +1,25 @@
+"""
+Compresión de textos largos (mensajes del chat y respuestas de la caché de IA)
+Las rutinas ocupan decenas de KB de markdown muy repetitivo: con zlib quedan
+en ~1/5. El hash del texto original sirve de clave para guardar una sola copia
+de cada cuerpo aunque aparezca en varios mensajes.
+"""
+
+import hashlib
+import zlib
+
+COMPRESSION_LEVEL = 6  # Nivel por defecto de zlib: casi la misma ratio que 9, bastante más rápido
+
+def content_hash(text):
+    """SHA-256 (hex) del texto, clave de deduplicación"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def compress_text(text):
+    """Texto -> bytes comprimidos con zlib"""
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+def decompress_text(data):
+    """Inversa de compress_text (None se devuelve tal cual)"""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode('utf-8')
@@ -0,0 +1,55 @@
+"""
+Caché en memoria con caducidad por entrada
+Compartida por todas las sesiones de Streamlit y los hilos de fondo del proceso
+(trabajos de rutinas, bandeja de emails). Las escrituras invalidan sus claves
+de forma explícita; el TTL solo acota lo que puede quedar desactualizado si
+otro proceso modifica la base de datos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Mapa clave -> valor con TTL y límite de entradas (descarta las menos usadas)"""
+
+    def __init__(self, ttl_seconds, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(True, valor) si la clave está en caché y vigente; (False, None) si no"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}